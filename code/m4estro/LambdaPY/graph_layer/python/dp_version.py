@@ -0,0 +1,69 @@
+from typing import Any, Dict, List, Set
+from dataclasses import dataclass
+import hashlib
+import json
+import igraph as ig
+
+from graph_config import V_ID_ATTR, N_ORDERS_BY_CARRIER_ATTR, PATH_DP_VERSION_ATTR, PATH_PROB_DP_VERSIONS_ATTR
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+VERSION_LENGTH: int = 16
+
+@dataclass(frozen=True)
+class DPVersions:
+    """
+    Versions of the DP caches of a graph: hashes of the graph data each cache depends on. Paths depend on the
+    topology and vertex order only; the probabilities of a carrier also on the order counts of that carrier.
+    Shards written for another version are never read, so a stale writer cannot corrupt the caches of a new graph.
+    """
+    path_dp: str
+    path_prob_dp_by_carrier: Dict[str, str]
+
+    def path_prob_dp(self, carrier: str) -> str:
+        # A carrier without orders in the graph has probabilities depending on the topology only
+        return self.path_prob_dp_by_carrier.get(carrier, self.path_dp)
+
+    def carriers(self) -> Set[str]:
+        return set(self.path_prob_dp_by_carrier)
+
+def _hash(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, separators=(',', ':')).encode('utf-8')).hexdigest()[:VERSION_LENGTH]
+
+def _get_counts(seq: Any) -> List[Dict[str, int]]:
+    if N_ORDERS_BY_CARRIER_ATTR not in seq.attributes():
+        return [{} for _ in range(len(seq))]
+    return [counts or {} for counts in seq[N_ORDERS_BY_CARRIER_ATTR]]
+
+def compute_dp_versions(graph: ig.Graph) -> DPVersions:
+    v_ids: List[Any] = graph.vs[V_ID_ATTR] if V_ID_ATTR in graph.vs.attributes() else list(range(graph.vcount()))
+    path_dp_version: str = _hash([v_ids, graph.get_edgelist()])
+
+    v_counts: List[Dict[str, int]] = _get_counts(graph.vs)
+    e_counts: List[Dict[str, int]] = _get_counts(graph.es)
+    carriers: Set[str] = {carrier for counts in v_counts + e_counts for carrier in counts}
+
+    return DPVersions(
+        path_dp=path_dp_version,
+        path_prob_dp_by_carrier={
+            carrier: _hash([path_dp_version, [c.get(carrier, 0) for c in v_counts], [c.get(carrier, 0) for c in e_counts]])
+            for carrier in sorted(carriers)
+        }
+    )
+
+def set_dp_versions(graph: ig.Graph) -> DPVersions:
+    """Computes the DP versions of the graph and stores them as graph attributes, serialized with it."""
+    versions: DPVersions = compute_dp_versions(graph)
+    graph[PATH_DP_VERSION_ATTR] = versions.path_dp
+    graph[PATH_PROB_DP_VERSIONS_ATTR] = dict(versions.path_prob_dp_by_carrier)
+    logger.debug(f"DP versions set: path DP {versions.path_dp}, path probability DP of {len(versions.path_prob_dp_by_carrier)} carriers")
+    return versions
+
+def get_dp_versions(graph: ig.Graph) -> DPVersions:
+    """DP versions stored in the graph, computed and stored for graphs built without them."""
+    if PATH_DP_VERSION_ATTR not in graph.attributes() or PATH_PROB_DP_VERSIONS_ATTR not in graph.attributes():
+        logger.debug("Graph has no DP versions: computing them")
+        return set_dp_versions(graph)
+
+    return DPVersions(path_dp=graph[PATH_DP_VERSION_ATTR], path_prob_dp_by_carrier=dict(graph[PATH_PROB_DP_VERSIONS_ATTR]))
@@ -1,3 +1,5 @@
+from urllib.parse import quote
+
 SC_GRAPH_PATH = "/lcdi/sc-graph"
 
 V_ID_ATTR: str = "v_id"
@@ -7,11 +9,49 @@ N_ORDERS_ATTR: str = "n_orders"
 LATITUDE_ATTR: str = "latitude"
 LONGITUDE_ATTR: str = "longitude"
 AVG_ORI_ATTR: str = "avg_ori"
+ORDERS_ATTR: str = "orders"
 
 DISTANCE_ATTR: str = "distance"
 AVG_OTI_ATTR: str = "avg_oti"
 AVG_WMI_ATTR: str = "avg_wmi"
 AVG_TMI_ATTR: str = "avg_tmi"
+TRANSPORTATION_MODE_ATTR: str = "transportation_mode"
+
+# Graph attribute: the TMI speed and distance params the edge transportation modes were classified with
+TRANSPORTATION_MODE_PARAMS_ATTR: str = "transportation_mode_params"
+
+# Running sums and counts behind the averages, kept to update them incrementally
+ORI_SUM_ATTR: str = "ori_sum"
+ORI_COUNT_ATTR: str = "ori_count"
+OTI_SUM_ATTR: str = "oti_sum"
+OTI_COUNT_ATTR: str = "oti_count"
+TMI_SUM_ATTR: str = "tmi_sum"
+TMI_COUNT_ATTR: str = "tmi_count"
+WMI_SUM_ATTR: str = "wmi_sum"
+WMI_COUNT_ATTR: str = "wmi_count"
+
+PATH_DP_MANAGER_KEY = 'path_dp_manager.json'                 # Legacy single object DP caches
+PATH_PROB_DP_MANAGER_KEY = 'path_prob_dp_manager.json'
+
+# Sharded DP caches: one object per target vertex for paths, per (carrier, source vertex) for probabilities.
+# Shard keys carry the version of the graph data they were computed from (see dp_version)
+PATH_DP_SHARD_PREFIX = 'path_dp/'
+PATH_PROB_DP_SHARD_PREFIX = 'path_prob_dp/'
+GRAPH_WATERMARK_KEY = 'sc_graph_watermark.json'
+ORDERS_OVERLAY_KEY = 'sc_graph_orders.json'
+
+# Graph attributes: versions of the DP caches, the path one and the probability one by carrier name
+PATH_DP_VERSION_ATTR: str = "path_dp_version"
+PATH_PROB_DP_VERSIONS_ATTR: str = "path_prob_dp_versions"
+
+def get_path_dp_shard_prefix(version: str, prefix: str = PATH_DP_SHARD_PREFIX) -> str:
+    return f"{prefix}{version}/"
+
+def get_path_dp_shard_key(target_index: int, version: str, prefix: str = PATH_DP_SHARD_PREFIX) -> str:
+    return f"{get_path_dp_shard_prefix(version, prefix)}{target_index}.json"
+
+def get_path_prob_dp_shard_prefix(carrier: str, version: str, prefix: str = PATH_PROB_DP_SHARD_PREFIX) -> str:
+    return f"{prefix}{quote(carrier, safe='')}/{version}/"
 
-PATH_DP_MANAGER_KEY = 'path_dp_manager.json'
-PATH_PROB_DP_MANAGER_KEY = 'path_prob_dp_manager.json'
\ No newline at end of file
+def get_path_prob_dp_shard_key(carrier: str, version: str, source_index: int, prefix: str = PATH_PROB_DP_SHARD_PREFIX) -> str:
+    return f"{get_path_prob_dp_shard_prefix(carrier, version, prefix)}{source_index}.json"
@@ -0,0 +1,146 @@
+from typing import Dict, List, Tuple, Any
+import io
+import json
+import numpy as np
+import igraph as ig
+
+# Column kinds
+BOOL_KIND: str = "bool"
+INT_KIND: str = "int"
+FLOAT_KIND: str = "float"
+STR_KIND: str = "str"
+SPARSE_KIND: str = "sparse"         # Dict[str, number] attributes, e.g. n_orders_by_carrier
+JSON_KIND: str = "json"             # Anything else, stored as a JSON document
+
+META_KEY: str = "meta"
+EDGES_KEY: str = "edges"
+
+VERTEX_PREFIX: str = "v"
+EDGE_PREFIX: str = "e"
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _column_kind(values: List[Any]) -> str:
+    present: List[Any] = [value for value in values if value is not None]
+    if not present:
+        return JSON_KIND
+    if all(isinstance(value, bool) for value in present):
+        return BOOL_KIND
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return INT_KIND
+    if all(_is_number(value) for value in present):
+        return FLOAT_KIND
+    if all(isinstance(value, str) for value in present):
+        return STR_KIND
+    if all(isinstance(value, dict) and all(isinstance(k, str) and _is_number(v) for k, v in value.items()) for value in present):
+        return SPARSE_KIND
+    return JSON_KIND
+
+def _encode_json(data: Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(data).encode('utf-8'), dtype=np.uint8)
+
+def _decode_json(array: np.ndarray) -> Any:
+    return json.loads(array.tobytes().decode('utf-8'))
+
+def _encode_column(name: str, values: List[Any], kind: str, arrays: Dict[str, np.ndarray]) -> None:
+    mask: np.ndarray = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    if kind != JSON_KIND and mask.any():
+        arrays[f"{name}.mask"] = mask
+
+    if kind == BOOL_KIND:
+        arrays[name] = np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+    elif kind == INT_KIND:
+        arrays[name] = np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(values))
+    elif kind == FLOAT_KIND:
+        arrays[name] = np.fromiter((value or 0.0 for value in values), dtype=np.float64, count=len(values))
+    elif kind == STR_KIND:
+        arrays[name] = np.array([value or "" for value in values], dtype=np.str_)
+    elif kind == SPARSE_KIND:
+        keys: List[str] = sorted({key for value in values if value for key in value})
+        col_by_key: Dict[str, int] = {key: i for i, key in enumerate(keys)}
+
+        rows: List[int] = []
+        cols: List[int] = []
+        data: List[Any] = []
+        for row, value in enumerate(values):
+            for key, v in (value or {}).items():
+                rows.append(row)
+                cols.append(col_by_key[key])
+                data.append(v)
+
+        arrays[f"{name}.keys"] = np.array(keys, dtype=np.str_)
+        arrays[f"{name}.rows"] = np.array(rows, dtype=np.int32)
+        arrays[f"{name}.cols"] = np.array(cols, dtype=np.int32)
+        is_int: bool = all(isinstance(v, int) for v in data)
+        arrays[f"{name}.data"] = np.array(data, dtype=np.int64 if is_int else np.float64)
+    else:
+        arrays[name] = _encode_json(values)
+
+def _decode_column(name: str, kind: str, n: int, arrays: Any) -> List[Any]:
+    values: List[Any]
+    if kind == SPARSE_KIND:
+        keys: List[str] = arrays[f"{name}.keys"].tolist()
+        values = [{} for _ in range(n)]
+        for row, col, v in zip(arrays[f"{name}.rows"].tolist(), arrays[f"{name}.cols"].tolist(), arrays[f"{name}.data"].tolist()):
+            values[row][keys[col]] = v
+    elif kind == JSON_KIND:
+        return _decode_json(arrays[name])
+    else:
+        values = arrays[name].tolist()
+
+    mask_key: str = f"{name}.mask"
+    if mask_key in arrays.files:
+        for i in np.flatnonzero(arrays[mask_key]).tolist():
+            values[i] = None
+
+    return values
+
+def _encode_sequence(prefix: str, seq: Any, arrays: Dict[str, np.ndarray]) -> Dict[str, str]:
+    kinds: Dict[str, str] = {}
+    for i, attr in enumerate(seq.attributes()):
+        values: List[Any] = seq[attr]
+        kind: str = _column_kind(values)
+        _encode_column(f"{prefix}{i}", values, kind, arrays)
+        kinds[attr] = kind
+    return kinds
+
+def _decode_sequence(prefix: str, seq: Any, kinds: Dict[str, str], n: int, arrays: Any) -> None:
+    for i, (attr, kind) in enumerate(kinds.items()):
+        seq[attr] = _decode_column(f"{prefix}{i}", kind, n, arrays)
+
+def encode_columnar(graph: ig.Graph) -> bytes:
+    """
+    Encodes a graph as an npz archive: the edge list as an int32 (m, 2) array and one typed column per attribute.
+    Dict attributes with numeric values are stored as sparse (row, key) matrices.
+    Graph attributes are stored in the JSON metadata.
+    """
+    arrays: Dict[str, np.ndarray] = {
+        EDGES_KEY: np.array(graph.get_edgelist(), dtype=np.int32).reshape(-1, 2)
+    }
+
+    meta: Dict[str, Any] = {
+        "n": graph.vcount(),
+        "directed": graph.is_directed(),
+        "vertex": _encode_sequence(VERTEX_PREFIX, graph.vs, arrays),
+        "edge": _encode_sequence(EDGE_PREFIX, graph.es, arrays),
+        "graph": {attr: graph[attr] for attr in graph.attributes()},
+    }
+    arrays[META_KEY] = _encode_json(meta)
+
+    buffer: io.BytesIO = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+def decode_columnar(data: bytes) -> ig.Graph:
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        meta: Dict[str, Any] = _decode_json(arrays[META_KEY])
+        edges: List[Tuple[int, int]] = [tuple(edge) for edge in arrays[EDGES_KEY].tolist()]
+
+        graph: ig.Graph = ig.Graph(n=meta["n"], edges=edges, directed=meta["directed"])
+        _decode_sequence(VERTEX_PREFIX, graph.vs, meta["vertex"], graph.vcount(), arrays)
+        _decode_sequence(EDGE_PREFIX, graph.es, meta["edge"], graph.ecount(), arrays)
+        for attr, value in meta.get("graph", {}).items():
+            graph[attr] = value
+
+    return graph
@@ -2,14 +2,15 @@ from typing import override, Optional, Tuple, List, Any
 import json
 import igraph as ig
 
-from serializer.graph_serializer import GraphSerializer
+from serializer.graph_serializer import GraphSerializer, GraphFormat
 
 GRAPH_PATH = '.\\'
 GRAPH_FILENAME = 'sc_graph.json'
 
 class FileGraphSerializer(GraphSerializer):
-    def __init__(self):
+    def __init__(self, graph_format: GraphFormat = GraphFormat.JSON):
         super().__init__()
+        self.graph_format: GraphFormat = graph_format
 
     def _get_file_path(self, maybe_path: Optional[str], maybe_filename: Optional[str]) -> str:
         filename: str = maybe_filename or GRAPH_FILENAME
@@ -23,6 +24,11 @@ class FileGraphSerializer(GraphSerializer):
     def serialize(self, graph: ig.Graph, path: Optional[str] = None, filename: Optional[str] = None) -> None:
         filepath: str = self._get_file_path(path, filename)
         try:
+            if self.graph_format == GraphFormat.COLUMNAR:
+                with open(filepath, 'wb') as f:
+                    f.write(self.to_columnar(graph))
+                return
+
             g_data: Tuple[List[Any], List[Any]] = self.to_json(graph)
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(g_data, f, indent=2)
@@ -33,6 +39,10 @@ class FileGraphSerializer(GraphSerializer):
     def deserialize(self, path: Optional[str] = None, filename: Optional[str] = None) -> ig.Graph:
         file_path: str = self._get_file_path(path, filename)
         try:
+            if self.graph_format == GraphFormat.COLUMNAR:
+                with open(file_path, 'rb') as f:
+                    return self.from_columnar(f.read())
+
             with open(file_path, 'r', encoding='utf-8') as f:
                 data: Any = json.load(f)
             return self.from_json(data)
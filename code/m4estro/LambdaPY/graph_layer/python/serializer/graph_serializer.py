@@ -1,9 +1,16 @@
 from typing import List, Tuple, Any, Optional
 from abc import ABC, abstractmethod
+from enum import Enum
 import igraph as ig
 
+from serializer.columnar_graph_codec import encode_columnar, decode_columnar
+
 VERTEX_NAME_ATTR = 'name'
 
+class GraphFormat(Enum):
+    JSON = "json"
+    COLUMNAR = "npz"
+
 class GraphSerializer(ABC):
     def __init__(self, vertex_name_attr: str = VERTEX_NAME_ATTR):
         assert isinstance(vertex_name_attr, str)
@@ -22,6 +29,12 @@ class GraphSerializer(ABC):
         
         return ig.Graph.DictList(g_data[0], g_data[1], directed=True, vertex_name_attr=self.vertex_name_attr)
 
+    def to_columnar(self, graph: ig.Graph) -> bytes:
+        return encode_columnar(graph)
+
+    def from_columnar(self, data: bytes) -> ig.Graph:
+        return decode_columnar(data)
+
     @abstractmethod
     def serialize(self, graph: ig.Graph, path: Optional[str] = None, filename: Optional[str] = None) -> None:
         pass
@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple, Any
+from dataclasses import dataclass, field
+import igraph as ig
+
+from graph_config import V_ID_ATTR, ORDERS_ATTR
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+EdgeKey = Tuple[int, int]           # (source v_id, destination v_id)
+
+@dataclass
+class OrdersOverlay:
+    """
+    Per order payloads of the graph vertices and edges, stored apart from the estimation graph,
+    which only keeps topology and numeric attributes. Orders are stored once and referenced by ID.
+    """
+    orders: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    vertex_order_ids: Dict[int, List[int]] = field(default_factory=dict)
+    edge_order_ids: Dict[EdgeKey, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def extract(cls, graph: ig.Graph) -> 'OrdersOverlay':
+        """Moves the orders attribute of the graph vertices and edges into a new overlay."""
+        overlay: OrdersOverlay = cls()
+        if graph.vcount() == 0 or ORDERS_ATTR not in graph.vs.attributes():
+            return overlay
+
+        v_ids: List[int] = graph.vs[V_ID_ATTR]
+        for v_id, orders in zip(v_ids, graph.vs[ORDERS_ATTR]):
+            overlay.vertex_order_ids[v_id] = overlay._add_orders(orders)
+        del graph.vs[ORDERS_ATTR]
+
+        if ORDERS_ATTR in graph.es.attributes():
+            for (source, target), orders in zip(graph.get_edgelist(), graph.es[ORDERS_ATTR]):
+                overlay.edge_order_ids[(v_ids[source], v_ids[target])] = overlay._add_orders(orders)
+            del graph.es[ORDERS_ATTR]
+
+        logger.debug(f"Extracted {len(overlay.orders)} orders from the graph")
+        return overlay
+
+    def _add_orders(self, orders: List[Dict[str, Any]]) -> List[int]:
+        order_ids: List[int] = []
+        for order in orders:
+            self.orders.setdefault(order["order_id"], order)
+            order_ids.append(order["order_id"])
+        return order_ids
+
+    def apply(self, graph: ig.Graph) -> None:
+        """Sets the orders attribute of the graph vertices and edges, empty for those not in the overlay."""
+        if graph.vcount() == 0:
+            return
+
+        v_ids: List[int] = graph.vs[V_ID_ATTR]
+        graph.vs[ORDERS_ATTR] = [
+            [self.orders[order_id] for order_id in self.vertex_order_ids.get(v_id, [])]
+            for v_id in v_ids
+        ]
+        graph.es[ORDERS_ATTR] = [
+            [self.orders[order_id] for order_id in self.edge_order_ids.get((v_ids[source], v_ids[target]), [])]
+            for source, target in graph.get_edgelist()
+        ]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "orders": list(self.orders.values()),
+            "vertices": [[v_id, order_ids] for v_id, order_ids in self.vertex_order_ids.items()],
+            "edges": [[source_id, dest_id, order_ids] for (source_id, dest_id), order_ids in self.edge_order_ids.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'OrdersOverlay':
+        return cls(
+            orders={order["order_id"]: order for order in data.get("orders", [])},
+            vertex_order_ids={v_id: order_ids for v_id, order_ids in data.get("vertices", [])},
+            edge_order_ids={(source_id, dest_id): order_ids for source_id, dest_id, order_ids in data.get("edges", [])}
+        )
@@ -3,23 +3,26 @@ import json
 import boto3
 import igraph as ig
 
-from serializer.graph_serializer import GraphSerializer
+from serializer.graph_serializer import GraphSerializer, GraphFormat
+from serializer import s3_transfer
 
 s3 = boto3.client('s3')
 
 from utils.config import SC_GRAPH_BUCKET_NAME_KEY, get_env
 GRAPH_KEY = 'sc_graph.json'
+COLUMNAR_GRAPH_KEY = 'sc_graph.npz'
 
 from logger import get_logger
 logger = get_logger(__name__)
 
 class S3GraphSerializer(GraphSerializer):
-    def __init__(self):
+    def __init__(self, graph_format: GraphFormat = GraphFormat.COLUMNAR):
         super().__init__()
         self.bucket_name: str = get_env(SC_GRAPH_BUCKET_NAME_KEY)
+        self.graph_format: GraphFormat = graph_format
         
     def _get_bucket_paths(self, maybe_bucket_name: Optional[str], maybe_key: Optional[str]) -> Tuple[str, str]:
-        key: str = maybe_key or GRAPH_KEY
+        key: str = maybe_key or (COLUMNAR_GRAPH_KEY if self.graph_format == GraphFormat.COLUMNAR else GRAPH_KEY)
         bucket_name: str = maybe_bucket_name or self.bucket_name
         return bucket_name, key
 
@@ -27,20 +30,22 @@ class S3GraphSerializer(GraphSerializer):
     def serialize(self, graph: ig.Graph, path: Optional[str] = None, filename: Optional[str] = None) -> None:
         bucket_name, key = self._get_bucket_paths(path, filename)
         try:
-            g_data: Tuple[List[Any], List[Any]] = self.to_json(graph)
+            body: bytes
+            content_type: str
+            compress: bool
+            if self.graph_format == GraphFormat.COLUMNAR:
+                body, content_type, compress = self.to_columnar(graph), 'application/octet-stream', False      # npz is already compressed
+            else:
+                g_data: Tuple[List[Any], List[Any]] = self.to_json(graph)
+                body, content_type, compress = json.dumps(g_data).encode('utf-8'), 'application/json', True
         except Exception:
             logger.exception(f"Error converting graph to serializable format")
             raise
         
-        logger.debug(f"Graph converted to serializable format successfully")
+        logger.debug(f"Graph converted to {self.graph_format.value} format successfully")
         
         try:
-            s3.put_object(
-                Bucket=bucket_name,
-                Key=key,
-                Body=json.dumps(g_data).encode('utf-8'),
-                ContentType='application/json'
-            )
+            s3_transfer.put_object(s3, bucket_name, key, body, content_type, compress=compress)
         except Exception:
             logger.exception(f"Error serializing graph data to {bucket_name}/{key}")
             raise
@@ -49,22 +54,53 @@ class S3GraphSerializer(GraphSerializer):
 
     @override
     def deserialize(self, path: Optional[str] = None, filename: Optional[str] = None) -> ig.Graph:
+        return self.deserialize_with_version(path, filename)[0]
+
+    def deserialize_with_version(self, path: Optional[str] = None, filename: Optional[str] = None) -> Tuple[ig.Graph, Optional[str]]:
+        """Graph and the ETag of the object it was read from, which identifies the graph version."""
+        maybe_graph: Optional[Tuple[ig.Graph, Optional[str]]] = self.deserialize_if_changed(None, path, filename)
+        assert maybe_graph is not None
+        return maybe_graph
+
+    def deserialize_if_changed(self, 
+                               maybe_known_version: Optional[str], 
+                               path: Optional[str] = None, 
+                               filename: Optional[str] = None
+                               ) -> Optional[Tuple[ig.Graph, Optional[str]]]:
+        """As deserialize_with_version, but None without parsing the graph if its version is still maybe_known_version."""
         bucket_name, key = self._get_bucket_paths(path, filename) 
+        graph_format: GraphFormat = self.graph_format
         try:
-            response = s3.get_object(Bucket=bucket_name, Key=key)
-            content: str = response['Body'].read().decode('utf-8')
-            g_data: Any = json.loads(content)
+            maybe_version: Optional[Tuple[bytes, Optional[str]]] = s3_transfer.get_object_version(s3, bucket_name, key)
+            if maybe_version is None and graph_format == GraphFormat.COLUMNAR and filename is None:
+                # Graph built before the columnar format was introduced
+                logger.warning(f"No columnar graph found at {bucket_name}/{key}, falling back to {GRAPH_KEY}")
+                key, graph_format = GRAPH_KEY, GraphFormat.JSON
+                maybe_version = s3_transfer.get_object_version(s3, bucket_name, key)
         except Exception:
             logger.exception(f"Error retrieving graph data from {bucket_name}/{key}")
             raise
+
+        if maybe_version is None:
+            logger.error(f"No graph found at {bucket_name}/{key}")
+            raise FileNotFoundError(f"No graph found at {bucket_name}/{key}")
+        content, maybe_etag = maybe_version
         
         logger.debug(f"Graph data retrieved successfully from {bucket_name}/{key}")
+
+        if maybe_known_version is not None and maybe_etag == maybe_known_version:
+            logger.debug(f"Graph at {bucket_name}/{key} unchanged: version {maybe_etag}")
+            return None
         
         try:
-            graph: ig.Graph = self.from_json(g_data)
+            graph: ig.Graph
+            if graph_format == GraphFormat.COLUMNAR:
+                graph = self.from_columnar(content)
+            else:
+                graph = self.from_json(json.loads(content.decode('utf-8')))
         except Exception:
             logger.exception(f"Error initializing graph from data")
             raise
         
         logger.debug("Graph initialized successfully")
-        return graph
\ No newline at end of file
+        return graph, maybe_etag
@@ -0,0 +1,57 @@
+from typing import Tuple, Optional, Any
+import json
+import boto3
+
+from serializer.orders_overlay import OrdersOverlay
+from serializer import s3_transfer
+
+s3 = boto3.client('s3')
+
+from utils.config import SC_GRAPH_BUCKET_NAME_KEY, get_env
+from graph_config import ORDERS_OVERLAY_KEY
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+class S3OrdersOverlaySerializer:
+    def __init__(self):
+        self.bucket_name: str = get_env(SC_GRAPH_BUCKET_NAME_KEY)
+
+    def _get_bucket_paths(self, maybe_bucket_name: Optional[str], maybe_key: Optional[str]) -> Tuple[str, str]:
+        key: str = maybe_key or ORDERS_OVERLAY_KEY
+        bucket_name: str = maybe_bucket_name or self.bucket_name
+        return bucket_name, key
+
+    def serialize(self, overlay: OrdersOverlay, path: Optional[str] = None, filename: Optional[str] = None) -> None:
+        bucket_name, key = self._get_bucket_paths(path, filename)
+        try:
+            s3_transfer.put_object(s3, bucket_name, key, json.dumps(overlay.to_json()).encode('utf-8'), 'application/json')
+        except Exception:
+            logger.exception(f"Error serializing orders overlay to {bucket_name}/{key}")
+            raise
+
+        logger.debug(f"Orders overlay serialized successfully to {bucket_name}/{key}")
+
+    def maybe_deserialize(self, path: Optional[str] = None, filename: Optional[str] = None) -> Optional[OrdersOverlay]:
+        bucket_name, key = self._get_bucket_paths(path, filename)
+        try:
+            maybe_content: Optional[bytes] = s3_transfer.get_object(s3, bucket_name, key)
+        except Exception:
+            logger.exception(f"Error retrieving orders overlay from {bucket_name}/{key}")
+            raise
+
+        if maybe_content is None:
+            logger.debug(f"No orders overlay found at {bucket_name}/{key}")
+            return None
+
+        data: Any = json.loads(maybe_content.decode('utf-8'))
+
+        logger.debug(f"Orders overlay retrieved successfully from {bucket_name}/{key}")
+        return OrdersOverlay.from_json(data)
+
+    def deserialize(self, path: Optional[str] = None, filename: Optional[str] = None) -> OrdersOverlay:
+        maybe_overlay: Optional[OrdersOverlay] = self.maybe_deserialize(path, filename)
+        if maybe_overlay is None:
+            logger.warning("No orders overlay found: graph exported without orders")
+            return OrdersOverlay()
+        return maybe_overlay
@@ -0,0 +1,143 @@
+from typing import Dict, Optional, Tuple, Any
+import os
+import gzip
+import hashlib
+import tempfile
+
+from botocore.exceptions import ClientError
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+GZIP_ENCODING: str = 'gzip'
+
+# Objects read once are kept here with their ETag, so warm execution environments only issue conditional GETs
+LOCAL_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), 's3_object_cache')
+
+NOT_FOUND_CODES: Tuple[str, ...] = ('NoSuchKey', '404')
+NOT_MODIFIED_CODES: Tuple[str, ...] = ('NotModified', '304')
+PRECONDITION_FAILED_CODES: Tuple[str, ...] = ('PreconditionFailed', '412', 'ConditionalRequestConflict', '409')
+
+def _error_code(e: ClientError) -> str:
+    return str(e.response.get('Error', {}).get('Code', ''))
+
+def is_not_found(e: Exception) -> bool:
+    return isinstance(e, ClientError) and _error_code(e) in NOT_FOUND_CODES
+
+def is_precondition_failed(e: Exception) -> bool:
+    return isinstance(e, ClientError) and _error_code(e) in PRECONDITION_FAILED_CODES
+
+def _get_local_paths(bucket_name: str, key: str) -> Tuple[str, str]:
+    name: str = hashlib.sha256(f"{bucket_name}/{key}".encode('utf-8')).hexdigest()
+    body_path: str = os.path.join(LOCAL_CACHE_DIR, name)
+    return body_path, f"{body_path}.etag"
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path: str = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _read_local_copy(bucket_name: str, key: str) -> Optional[Tuple[bytes, str]]:
+    body_path, etag_path = _get_local_paths(bucket_name, key)
+    try:
+        with open(etag_path, 'r', encoding='utf-8') as f:
+            etag: str = f.read()
+        with open(body_path, 'rb') as f:
+            return f.read(), etag
+    except OSError:
+        return None
+
+def _save_local_copy(bucket_name: str, key: str, body: bytes, maybe_etag: Any) -> None:
+    if not isinstance(maybe_etag, str):
+        return
+
+    body_path, etag_path = _get_local_paths(bucket_name, key)
+    try:
+        os.makedirs(LOCAL_CACHE_DIR, exist_ok=True)
+        _write_atomic(body_path, body)
+        _write_atomic(etag_path, maybe_etag.encode('utf-8'))
+    except OSError:
+        logger.warning(f"Could not cache {bucket_name}/{key} locally", exc_info=True)
+
+def _drop_local_copy(bucket_name: str, key: str) -> None:
+    for path in _get_local_paths(bucket_name, key):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def put_object(s3: Any,
+               bucket_name: str,
+               key: str,
+               body: bytes,
+               content_type: str,
+               compress: bool = True,
+               maybe_if_match: Optional[str] = None,
+               if_none_match: bool = False,
+               keep_local_copy: bool = True
+               ) -> Optional[str]:
+    """
+    Uploads an object, gzip encoded unless compress is False (e.g. already compressed formats), and returns its ETag.
+    With maybe_if_match the write only succeeds if the object still has that ETag, with if_none_match only if
+    it does not exist yet: otherwise a ClientError satisfying is_precondition_failed is raised.
+    Without keep_local_copy the body is not kept in LOCAL_CACHE_DIR, e.g. for objects already cached in memory.
+    """
+    payload: bytes = gzip.compress(body, mtime=0) if compress else body         # Fixed mtime: same content, same bytes
+    extra_args: Dict[str, str] = {'ContentEncoding': GZIP_ENCODING} if compress else {}
+    if maybe_if_match is not None:
+        extra_args['IfMatch'] = maybe_if_match
+    elif if_none_match:
+        extra_args['IfNoneMatch'] = '*'
+
+    response: Any = s3.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=payload,
+        ContentType=content_type,
+        **extra_args
+    )
+    logger.debug(f"Uploaded {len(payload)} bytes ({len(body)} decoded) to {bucket_name}/{key}")
+
+    maybe_etag: Any = response.get('ETag') if isinstance(response, dict) else None
+    if keep_local_copy:
+        _save_local_copy(bucket_name, key, body, maybe_etag)
+    return maybe_etag if isinstance(maybe_etag, str) else None
+
+def get_object(s3: Any, bucket_name: str, key: str, keep_local_copy: bool = True) -> Optional[bytes]:
+    """
+    Returns the decoded object body, or None if the key does not exist.
+    A locally cached copy is revalidated with If-None-Match, so an unchanged object is not transferred again.
+    Without keep_local_copy the object is always transferred and not kept in LOCAL_CACHE_DIR.
+    """
+    maybe_version: Optional[Tuple[bytes, Optional[str]]] = get_object_version(s3, bucket_name, key, keep_local_copy)
+    return maybe_version[0] if maybe_version is not None else None
+
+def get_object_version(s3: Any, bucket_name: str, key: str, keep_local_copy: bool = True) -> Optional[Tuple[bytes, Optional[str]]]:
+    """Like get_object, but also returns the ETag of the returned body, for conditional writes."""
+    maybe_local_copy: Optional[Tuple[bytes, str]] = _read_local_copy(bucket_name, key) if keep_local_copy else None
+
+    try:
+        if maybe_local_copy is not None:
+            response = s3.get_object(Bucket=bucket_name, Key=key, IfNoneMatch=maybe_local_copy[1])
+        else:
+            response = s3.get_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if maybe_local_copy is not None and _error_code(e) in NOT_MODIFIED_CODES:
+            logger.debug(f"Object at {bucket_name}/{key} not modified: using local copy")
+            return maybe_local_copy
+        if is_not_found(e):
+            logger.debug(f"No object found at {bucket_name}/{key}")
+            _drop_local_copy(bucket_name, key)
+            return None
+        raise
+
+    body: bytes = response['Body'].read()
+    if response.get('ContentEncoding') == GZIP_ENCODING:
+        body = gzip.decompress(body)
+    logger.debug(f"Downloaded {len(body)} decoded bytes from {bucket_name}/{key}")
+
+    maybe_etag: Any = response.get('ETag')
+    if keep_local_copy:
+        _save_local_copy(bucket_name, key, body, maybe_etag)
+    return body, maybe_etag if isinstance(maybe_etag, str) else None
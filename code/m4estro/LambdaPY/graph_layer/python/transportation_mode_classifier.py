@@ -0,0 +1,45 @@
+from typing import Dict, List, Set
+
+from model.tmi import TransportationMode
+from model.param import ParamName
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+# Checked in this order: the first mode whose speed and distance ranges both contain the route is taken
+CLASSIFIED_MODES: List[TransportationMode] = [
+    TransportationMode.AIR,
+    TransportationMode.SEA,
+    TransportationMode.RAIL,
+    TransportationMode.ROAD
+]
+
+# Modes with a meaningful road traffic index
+TRAFFIC_MODES: Set[TransportationMode] = {TransportationMode.ROAD, TransportationMode.RAIL}
+
+TRANSPORTATION_MODE_PARAM_NAMES: List[ParamName] = [
+    param_name for param_name in ParamName
+    if param_name.value.startswith('TMI_') and param_name.value.endswith(('_SPEED_KM_H', '_DISTANCE_KM'))
+]
+
+def get_mode_param_key(param_name: ParamName) -> str:
+    """Key of a speed or distance param in the mode params dict, e.g. TMI_AIR_MIN_SPEED_KM_H -> air_min_speed_km_h."""
+    return param_name.value.removeprefix('TMI_').lower()
+
+def get_transportation_mode(distance_km: float, time_hours: float, mode_params: Dict[str, float]) -> TransportationMode:
+    """
+    Transportation mode of a route from its geodesic distance and average time.
+    mode_params holds the min/max speed and distance of each mode, keyed as get_mode_param_key.
+    """
+    if time_hours <= 0:
+        return TransportationMode.UNKNOWN
+
+    speed_km_h: float = distance_km / time_hours
+    for mode in CLASSIFIED_MODES:
+        prefix: str = mode.value.lower()
+        if mode_params[f"{prefix}_min_speed_km_h"] <= speed_km_h <= mode_params[f"{prefix}_max_speed_km_h"] \
+                and mode_params[f"{prefix}_min_distance_km"] <= distance_km <= mode_params[f"{prefix}_max_distance_km"]:
+            logger.debug(f"Calculated speed {speed_km_h} km/h and distance {distance_km} km indicate transportation mode: {mode.value}")
+            return mode
+
+    return TransportationMode.UNKNOWN
@@ -0,0 +1,25 @@
+from typing import List, Set
+
+from graph_config import get_path_dp_shard_prefix, get_path_prob_dp_shard_prefix
+from dp_version import DPVersions
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+def get_stale_dp_shard_prefixes(previous_versions: DPVersions, versions: DPVersions) -> List[str]:
+    """
+    Prefixes of the DP cache shards written for DP versions the graph no longer has. Those shards are never read
+    again, so deleting them only reclaims space: a stale writer recreating one cannot affect the new graph.
+    """
+    prefixes: List[str] = []
+    if previous_versions.path_dp != versions.path_dp:
+        prefixes.append(get_path_dp_shard_prefix(previous_versions.path_dp))
+
+    carriers: Set[str] = previous_versions.carriers() | versions.carriers()
+    for carrier in sorted(carriers):
+        previous_version: str = previous_versions.path_prob_dp(carrier)
+        if previous_version != versions.path_prob_dp(carrier):
+            prefixes.append(get_path_prob_dp_shard_prefix(carrier, previous_version))
+
+    logger.debug(f"{len(prefixes)} stale DP cache shard prefixes")
+    return prefixes
@@ -1,4 +1,6 @@
-from typing import List, Optional, Tuple, Dict, Optional, Any
+from typing import List, Optional, Tuple, Dict, Optional, Any, Set
+from collections import defaultdict
+from dataclasses import dataclass
 import igraph as ig
 
 from service.read_only_db_connector import ReadOnlyDBConnector
@@ -14,8 +16,21 @@ from graph_config import (
     AVG_ORI_ATTR,
     AVG_OTI_ATTR,
     AVG_WMI_ATTR,
-    AVG_TMI_ATTR
+    AVG_TMI_ATTR,
+    ORDERS_ATTR,
+    ORI_SUM_ATTR,
+    ORI_COUNT_ATTR,
+    OTI_SUM_ATTR,
+    OTI_COUNT_ATTR,
+    TMI_SUM_ATTR,
+    TMI_COUNT_ATTR,
+    WMI_SUM_ATTR,
+    WMI_COUNT_ATTR,
+    TRANSPORTATION_MODE_ATTR,
+    TRANSPORTATION_MODE_PARAMS_ATTR
 )
+from transportation_mode_classifier import get_transportation_mode
+from dp_version import DPVersions, get_dp_versions, set_dp_versions
 
 from model.site import Site
 from model.supplier import Supplier
@@ -31,19 +46,53 @@ from builder_service.query_handler import (
     QueryHandler,
     AvgVertexMetricResult,
     AvgRouteMetricResult,
+    VertexMetricTotalResult,
+    RouteMetricTotalResult,
     CarrierOrderCountResult,
-    OrderRoutesResult
+    OrderRoutesResult,
+    IdRange
 ) 
+from builder_service.graph_watermark import GraphWatermark
 
 from logger import get_logger
 logger = get_logger(__name__)
 
+ROUTE_METRIC_ATTRS: List[Tuple[str, str, str]] = [
+    (OTI_SUM_ATTR, OTI_COUNT_ATTR, AVG_OTI_ATTR),
+    (TMI_SUM_ATTR, TMI_COUNT_ATTR, AVG_TMI_ATTR),
+    (WMI_SUM_ATTR, WMI_COUNT_ATTR, AVG_WMI_ATTR),
+]
+
+@dataclass
+class GraphUpdateResult:
+    graph: ig.Graph
+    watermark: GraphWatermark
+    changed_vertices_by_carrier: Dict[str, Set[int]]        # Vertex indices whose order counts changed, by carrier name
+    previous_dp_versions: DPVersions                         # Of the graph before the update: its DP cache shards are stale if changed
+    dp_versions: DPVersions
+
+def _get_index_by_v_id(g: ig.Graph) -> Dict[int, int]:
+    return {v_id: i for i, v_id in enumerate(g.vs[V_ID_ATTR])}
+
+def _get_eid_by_index_pair(g: ig.Graph) -> Dict[Tuple[int, int], int]:
+    eid_by_index_pair: Dict[Tuple[int, int], int] = {}
+    for eid, index_pair in enumerate(g.get_edgelist()):
+        eid_by_index_pair.setdefault(index_pair, eid)        # Same edge get_eid would return on multi-edges
+    return eid_by_index_pair
+
+def _to_avg_vertex_metrics(totals: List[VertexMetricTotalResult]) -> List[AvgVertexMetricResult]:
+    return [AvgVertexMetricResult(vertex_id=t.vertex_id, value=t.total / t.count) for t in totals if t.count > 0]
+
+def _to_avg_route_metrics(totals: List[RouteMetricTotalResult]) -> List[AvgRouteMetricResult]:
+    return [AvgRouteMetricResult(source_id=t.source_id, destination_id=t.destination_id, value=t.total / t.count) for t in totals if t.count > 0]
+
 class GraphBuilder:
     def __init__(self, db_connection_url: str, geo: Optional[GeoCalculator] = None) -> None:
         self.db_connection_url: str = db_connection_url
         
         self.geo: GeoCalculator = geo if geo else GeoCalculator()
         self.graph: ig.Graph = ig.Graph(directed=True)
+        self.maybe_watermark: Optional[GraphWatermark] = None
     
     def build(self) -> ig.Graph:
         self.graph: ig.Graph = ig.Graph(directed=True)
@@ -59,6 +108,9 @@ class GraphBuilder:
                     logger.warning("No manufacturer found in the database, aborting graph build")
                     return g
 
+                watermark: GraphWatermark = query_handler.get_watermark()
+                logger.debug(f"Building graph up to watermark: {watermark}")
+
                 vertices: List[Vertex] = query_handler.get_all_vertices()
                 routes: List[Route] = query_handler.get_all_routes()
 
@@ -74,22 +126,26 @@ class GraphBuilder:
                 self._set_companies_attributes(sites, manufacturer, locations)
                 logger.debug("Companies attributes set successfully")                
 
-                avg_ori_per_vertex: List[AvgVertexMetricResult] = query_handler.get_avg_ori_per_vertex()
-                avg_oti_per_route: List[AvgRouteMetricResult] = query_handler.get_avg_oti_per_route()
-                avg_tmi_per_route: List[AvgRouteMetricResult] = query_handler.get_avg_tmi_per_route()
-                avg_wmi_per_route: List[AvgRouteMetricResult] = query_handler.get_avg_wmi_per_route()
+                ori_totals: List[VertexMetricTotalResult] = query_handler.get_ori_totals_per_vertex((0, watermark.ori_id))
+                oti_totals: List[RouteMetricTotalResult] = query_handler.get_oti_totals_per_route((0, watermark.oti_id))
+                tmi_totals: List[RouteMetricTotalResult] = query_handler.get_tmi_totals_per_route((0, watermark.tmi_id))
+                wmi_totals: List[RouteMetricTotalResult] = query_handler.get_wmi_totals_per_route((0, watermark.wmi_id))
 
                 self._set_indicators_attributes(
-                    avg_ori_per_vertex=avg_ori_per_vertex,
-                    avg_oti_per_route=avg_oti_per_route,
-                    avg_tmi_per_route=avg_tmi_per_route,
-                    avg_wmi_per_route=avg_wmi_per_route
+                    avg_ori_per_vertex=_to_avg_vertex_metrics(ori_totals),
+                    avg_oti_per_route=_to_avg_route_metrics(oti_totals),
+                    avg_tmi_per_route=_to_avg_route_metrics(tmi_totals),
+                    avg_wmi_per_route=_to_avg_route_metrics(wmi_totals)
                 )
+                self._set_indicators_totals(ori_totals, oti_totals, tmi_totals, wmi_totals)
                 logger.debug("Indicators attributes set successfully")
 
+                self._set_transportation_modes(query_handler.get_transportation_mode_params())
+
                 carriers: List[Carrier] = query_handler.get_all_carriers()
-                n_orders_per_carrier_route: List[CarrierOrderCountResult] = query_handler.get_n_orders_per_carrier_route()
-                order_routes: List[OrderRoutesResult] = query_handler.get_order_routes()
+                route_order_range: IdRange = (0, watermark.route_order_id)
+                n_orders_per_carrier_route: List[CarrierOrderCountResult] = query_handler.get_n_orders_per_carrier_route(route_order_range)
+                order_routes: List[OrderRoutesResult] = query_handler.get_order_routes(route_order_range)
 
                 self._set_orders_attributes(
                     carriers=carriers,
@@ -101,7 +157,80 @@ class GraphBuilder:
             logger.exception("Error during graph building")
             raise
         
+        set_dp_versions(g)
+        self.maybe_watermark = watermark
         return g
+
+    def _supports_update(self, graph: ig.Graph) -> bool:
+        return graph.vcount() > 0 and ORI_SUM_ATTR in graph.vs.attributes() and OTI_SUM_ATTR in graph.es.attributes()
+
+    def update(self, graph: ig.Graph, watermark: GraphWatermark) -> Optional[GraphUpdateResult]:
+        """
+        Apply to a previously built graph the ORI, OTI, TMI, WMI and route order rows added after its watermark,
+        and refresh its companies attributes. Returns None when the topology changed, the rows already applied
+        changed (see TableFingerprint) or the graph carries no running totals: a full build is needed.
+        """
+        if not self._supports_update(graph):
+            logger.info("Graph has no running totals: incremental update not supported")
+            return None
+
+        self.graph = graph
+        previous_dp_versions: DPVersions = get_dp_versions(graph)
+        connector: ReadOnlyDBConnector = ReadOnlyDBConnector(self.db_connection_url)
+
+        try:
+            with connector.session_scope() as session:
+                query_handler: QueryHandler = QueryHandler(session)
+
+                current_watermark: GraphWatermark = query_handler.get_watermark()
+                if not watermark.same_topology(current_watermark) or graph.vcount() != current_watermark.n_vertices:
+                    logger.info(f"Graph topology changed from {watermark} to {current_watermark}: incremental update not supported")
+                    return None
+
+                if not watermark.same_applied_rows(query_handler.get_fingerprints(watermark)):
+                    logger.info(f"Rows up to watermark {watermark} were updated, deleted or committed late: incremental update not supported")
+                    return None
+
+                logger.debug(f"Updating graph from watermark {watermark} to {current_watermark}")
+
+                # As in build, vertex orders are counted from the route orders: the site counters include the new orders
+                applied_n_orders: List[int] = graph.vs['n_orders']
+                manufacturer: Manufacturer = query_handler.get_manufacturer()
+                self._set_companies_attributes(query_handler.get_all_sites(), manufacturer, query_handler.get_all_locations())
+                graph.vs['n_orders'] = applied_n_orders
+                logger.debug("Companies attributes refreshed successfully")
+
+                self._add_indicators_totals(
+                    ori_totals=query_handler.get_ori_totals_per_vertex((watermark.ori_id, current_watermark.ori_id)),
+                    oti_totals=query_handler.get_oti_totals_per_route((watermark.oti_id, current_watermark.oti_id)),
+                    tmi_totals=query_handler.get_tmi_totals_per_route((watermark.tmi_id, current_watermark.tmi_id)),
+                    wmi_totals=query_handler.get_wmi_totals_per_route((watermark.wmi_id, current_watermark.wmi_id))
+                )
+                logger.debug("Indicators deltas applied successfully")
+
+                self._set_transportation_modes(query_handler.get_transportation_mode_params())
+
+                route_order_range: IdRange = (watermark.route_order_id, current_watermark.route_order_id)
+                changed_vertices_by_carrier: Dict[str, Set[int]] = self._add_orders_attributes(
+                    carriers=query_handler.get_all_carriers(),
+                    n_orders_per_carrier_route=query_handler.get_n_orders_per_carrier_route(route_order_range),
+                    order_routes=query_handler.get_order_routes(route_order_range)
+                )
+                logger.debug(f"Orders deltas applied successfully: changed vertices by carrier {changed_vertices_by_carrier}")
+
+        except Exception:
+            logger.exception("Error during graph update")
+            raise
+
+        dp_versions: DPVersions = set_dp_versions(graph)
+        self.maybe_watermark = current_watermark
+        return GraphUpdateResult(
+            graph=graph,
+            watermark=current_watermark,
+            changed_vertices_by_carrier=changed_vertices_by_carrier,
+            previous_dp_versions=previous_dp_versions,
+            dp_versions=dp_versions
+        )
         
     def _build_graph_topology(self, vertices: list[Vertex], routes: list[Route], manufacturer_name: str) -> None:
         g: ig.Graph = self.graph  
@@ -242,6 +371,84 @@ class GraphBuilder:
             e[AVG_TMI_ATTR] = avg_tmi or 0.0
             e[AVG_WMI_ATTR] = avg_wmi or 0.0
 
+    def _set_indicators_totals(self,
+                               ori_totals: List[VertexMetricTotalResult],
+                               oti_totals: List[RouteMetricTotalResult],
+                               tmi_totals: List[RouteMetricTotalResult],
+                               wmi_totals: List[RouteMetricTotalResult]
+                               ) -> None:
+        g = self.graph
+
+        g.vs[ORI_SUM_ATTR] = [0.0] * g.vcount()
+        g.vs[ORI_COUNT_ATTR] = [0] * g.vcount()
+        for sum_attr, count_attr, _ in ROUTE_METRIC_ATTRS:
+            g.es[sum_attr] = [0.0] * g.ecount()
+            g.es[count_attr] = [0] * g.ecount()
+
+        self._add_indicators_totals(ori_totals, oti_totals, tmi_totals, wmi_totals)
+
+    def _add_indicators_totals(self,
+                               ori_totals: List[VertexMetricTotalResult],
+                               oti_totals: List[RouteMetricTotalResult],
+                               tmi_totals: List[RouteMetricTotalResult],
+                               wmi_totals: List[RouteMetricTotalResult]
+                               ) -> None:
+        g = self.graph
+
+        index_by_v_id: Dict[int, int] = _get_index_by_v_id(g)
+        eid_by_index_pair: Dict[Tuple[int, int], int] = _get_eid_by_index_pair(g)
+
+        for t in ori_totals:
+            v_index: Optional[int] = index_by_v_id.get(t.vertex_id)
+            if v_index is None:
+                logger.error(f"Vertex not found for ORI totals of v_id={t.vertex_id}")
+                continue
+
+            v: ig.Vertex = g.vs[v_index]
+            v[ORI_SUM_ATTR] += t.total
+            v[ORI_COUNT_ATTR] += t.count
+            if v[TYPE_ATTR] == VertexType.INTERMEDIATE.value:
+                v[AVG_ORI_ATTR] = v[ORI_SUM_ATTR] / v[ORI_COUNT_ATTR] if v[ORI_COUNT_ATTR] > 0 else 0.0
+
+        for (sum_attr, count_attr, avg_attr), totals in zip(ROUTE_METRIC_ATTRS, (oti_totals, tmi_totals, wmi_totals)):
+            for t in totals:
+                source_index: Optional[int] = index_by_v_id.get(t.source_id)
+                dest_index: Optional[int] = index_by_v_id.get(t.destination_id)
+                edge_id: int = eid_by_index_pair.get((source_index, dest_index), -1)
+                if edge_id == -1:
+                    logger.error(f"Edge not found for {avg_attr} totals of route from v_id={t.source_id} to v_id={t.destination_id}")
+                    continue
+
+                e: ig.Edge = g.es[edge_id]
+                e[sum_attr] += t.total
+                e[count_attr] += t.count
+                e[avg_attr] = e[sum_attr] / e[count_attr] if e[count_attr] > 0 else 0.0
+
+    def _set_transportation_modes(self, maybe_mode_params: Optional[Dict[str, float]]) -> None:
+        """
+        Classifies every edge from its distance and average OTI, so traffic requests for air and sea routes can be skipped.
+        Run on every build and update: both the average OTIs and the TMI params may have changed.
+        """
+        g = self.graph
+
+        if maybe_mode_params is None:
+            logger.warning("TMI speed and distance params not found: edge transportation modes not set")
+        elif TRANSPORTATION_MODE_PARAMS_ATTR in g.attributes() and g[TRANSPORTATION_MODE_PARAMS_ATTR] != maybe_mode_params:
+            logger.info("TMI speed and distance params changed: reclassifying edge transportation modes")
+
+        g[TRANSPORTATION_MODE_PARAMS_ATTR] = maybe_mode_params
+        if g.ecount() == 0:
+            return
+
+        if maybe_mode_params is None:
+            g.es[TRANSPORTATION_MODE_ATTR] = [None] * g.ecount()
+            return
+
+        g.es[TRANSPORTATION_MODE_ATTR] = [
+            get_transportation_mode(distance, avg_oti, maybe_mode_params).value
+            for distance, avg_oti in zip(g.es[DISTANCE_ATTR], g.es[AVG_OTI_ATTR])
+        ]
+
     def _set_orders_attributes(self,
         carriers: List[Carrier],
         n_orders_per_carrier_route: List[CarrierOrderCountResult],
@@ -250,99 +457,126 @@ class GraphBuilder:
         
         g = self.graph
 
-        n_orders_by_route = {
-            (cocr.source_id, cocr.destination_id, cocr.carrier_id): cocr.route_carrier_orders_count
-            for cocr in n_orders_per_carrier_route
-        }
+        g.vs[N_ORDERS_BY_CARRIER_ATTR] = [{} for _ in range(g.vcount())]
+        g.vs[ORDERS_ATTR] = [[] for _ in range(g.vcount())]
+        g.vs['n_orders'] = [0] * g.vcount()
 
-        carriers_by_id: Dict[int, Carrier] = {c.id: c for c in carriers}
+        g.es[N_ORDERS_BY_CARRIER_ATTR] = [{} for _ in range(g.ecount())]
+        g.es[ORDERS_ATTR] = [[] for _ in range(g.ecount())]
+        g.es['n_orders'] = [0] * g.ecount()
 
-        for v in g.vs:
-            v[N_ORDERS_BY_CARRIER_ATTR] = {} 
-            v['orders'] = []
-            v['n_orders'] = 0
+        self._add_orders_attributes(carriers, n_orders_per_carrier_route, order_routes)
 
-        for e in g.es:
-            e[N_ORDERS_BY_CARRIER_ATTR] = {}
-            e['orders'] = []
-            e['n_orders'] = 0
+    def _find_route_edge(self,
+        index_by_v_id: Dict[int, int],
+        eid_by_index_pair: Dict[Tuple[int, int], int],
+        source_id: int,
+        dest_id: int
+        ) -> Optional[Tuple[int, int, int]]:
 
-        for (source_id, dest_id, carrier_id), count in n_orders_by_route.items():
-            try:
-                source_vertex: ig.Vertex = g.vs.find(v_id=source_id)
-            except ValueError as e:
-                logger.error(f"Source vertex not found for route from v_id={source_id} to v_id={dest_id}: {e}")
-                continue
+        maybe_source_index: Optional[int] = index_by_v_id.get(source_id)
+        if maybe_source_index is None:
+            logger.error(f"Source vertex not found for route from v_id={source_id} to v_id={dest_id}")
+            return None
 
-            try:
-                dest_vertex: ig.Vertex = g.vs.find(v_id=dest_id)
-            except ValueError as e:
-                logger.error(f"Destination vertex not found for route from v_id={source_id} to v_id={dest_id}: {e}")
-                continue
+        maybe_dest_index: Optional[int] = index_by_v_id.get(dest_id)
+        if maybe_dest_index is None:
+            logger.error(f"Destination vertex not found for route from v_id={source_id} to v_id={dest_id}")
+            return None
 
-            edge_id: int = g.get_eid(source_vertex.index, dest_vertex.index, error=False)
-            if edge_id == -1:
-                logger.error(f"Edge not found for route from v_id={source_id} ({source_vertex['name']}) to v_id={dest_id} ({dest_vertex['name']})")
-                continue
+        maybe_edge_id: Optional[int] = eid_by_index_pair.get((maybe_source_index, maybe_dest_index))
+        if maybe_edge_id is None:
+            logger.error(f"Edge not found for route from v_id={source_id} to v_id={dest_id}")
+            return None
+
+        return maybe_source_index, maybe_dest_index, maybe_edge_id
+
+    def _add_orders_attributes(self,
+        carriers: List[Carrier],
+        n_orders_per_carrier_route: List[CarrierOrderCountResult],
+        order_routes: List[OrderRoutesResult]
+        ) -> Dict[str, Set[int]]:
+        
+        g = self.graph
+        changed_vertices_by_carrier: Dict[str, Set[int]] = defaultdict(set)
 
-            edge: ig.Edge = g.es[edge_id]
+        if g.vcount() == 0:
+            return {}
+
+        index_by_v_id: Dict[int, int] = _get_index_by_v_id(g)
+        eid_by_index_pair: Dict[Tuple[int, int], int] = _get_eid_by_index_pair(g)
+        carriers_by_id: Dict[int, Carrier] = {c.id: c for c in carriers}
+
+        # Attribute lists are read once, updated in place and assigned back in bulk
+        is_manufacturer: List[bool] = [v_type == VertexType.MANUFACTURER.value for v_type in g.vs[TYPE_ATTR]]
+        v_n_orders: List[int] = g.vs['n_orders']
+        v_n_orders_by_carrier: List[Dict[str, int]] = g.vs[N_ORDERS_BY_CARRIER_ATTR]
+        v_orders: List[List[Dict[str, Any]]] = g.vs[ORDERS_ATTR]
+        e_n_orders: List[int] = g.es['n_orders']
+        e_n_orders_by_carrier: List[Dict[str, int]] = g.es[N_ORDERS_BY_CARRIER_ATTR]
+        e_orders: List[List[Dict[str, Any]]] = g.es[ORDERS_ATTR]
+
+        n_orders_by_route = {
+            (cocr.source_id, cocr.destination_id, cocr.carrier_id): cocr.route_carrier_orders_count
+            for cocr in n_orders_per_carrier_route
+        }
+
+        for (source_id, dest_id, carrier_id), count in n_orders_by_route.items():
+            maybe_route_edge: Optional[Tuple[int, int, int]] = self._find_route_edge(index_by_v_id, eid_by_index_pair, source_id, dest_id)
+            if maybe_route_edge is None:
+                continue
+            source_index, dest_index, edge_id = maybe_route_edge
 
             carrier: Optional[Carrier] = carriers_by_id.get(carrier_id)
             if carrier is None:
-                logger.error(f"Carrier with id {carrier_id} not found for route {source_id} ({source_vertex['name']}) -> {dest_id} ({dest_vertex['name']})")
+                logger.error(f"Carrier with id {carrier_id} not found for route {source_id} -> {dest_id}")
                 continue
             carrier_name: str = carrier.name
 
             # Update vertex-level counts
-            source_n_orders_by_carrier: Dict[str, int] = source_vertex[N_ORDERS_BY_CARRIER_ATTR]
+            source_n_orders_by_carrier: Dict[str, int] = v_n_orders_by_carrier[source_index]
             source_n_orders_by_carrier[carrier_name] = source_n_orders_by_carrier.get(carrier_name, 0) + count
-            source_vertex['n_orders'] += count
+            v_n_orders[source_index] += count
             
-            if dest_vertex[TYPE_ATTR] == VertexType.MANUFACTURER.value:                # Update only if destination is the sink vertex
-                dest_n_orders_by_carrier: Dict[str, int] = dest_vertex[N_ORDERS_BY_CARRIER_ATTR]
+            if is_manufacturer[dest_index]:                # Update only if destination is the sink vertex
+                dest_n_orders_by_carrier: Dict[str, int] = v_n_orders_by_carrier[dest_index]
                 dest_n_orders_by_carrier[carrier_name] = dest_n_orders_by_carrier.get(carrier_name, 0) + count
-                dest_vertex['n_orders'] += count  
+                v_n_orders[dest_index] += count  
 
             # Update edge-level counts
-            edge_n_orders_by_carrier: Dict[str, int] = edge[N_ORDERS_BY_CARRIER_ATTR]
+            edge_n_orders_by_carrier: Dict[str, int] = e_n_orders_by_carrier[edge_id]
             edge_n_orders_by_carrier[carrier_name] = edge_n_orders_by_carrier.get(carrier_name, 0) + count
-            edge['n_orders'] += count
+            e_n_orders[edge_id] += count
 
-        for orr in order_routes:
-            source_id, dest_id = orr.source_id, orr.destination_id
-            
-            try:
-                source_vertex: ig.Vertex = g.vs.find(v_id=source_id)
-            except ValueError as e:
-                logger.error(f"Source vertex not found for route from v_id={source_id} to v_id={dest_id}: {e}")
-                continue
-
-            try:
-                dest_vertex: ig.Vertex = g.vs.find(v_id=dest_id)
-            except ValueError as e:
-                logger.error(f"Destination vertex not found for route from v_id={source_id} to v_id={dest_id}: {e}")
-                continue
+            changed_vertices_by_carrier[carrier_name].add(source_index)
 
-            edge_id: int = g.get_eid(source_vertex.index, dest_vertex.index, error=False)
-            if edge_id == -1:
-                logger.error(f"Edge not found for route from v_id={source_id} ({source_vertex['name']}) to v_id={dest_id} ({dest_vertex['name']})")
+        for orr in order_routes:
+            maybe_route_edge = self._find_route_edge(index_by_v_id, eid_by_index_pair, orr.source_id, orr.destination_id)
+            if maybe_route_edge is None:
                 continue
+            source_index, dest_index, edge_id = maybe_route_edge
 
-            edge: ig.Edge = g.es[edge_id]
-
-            carrier: Optional[Carrier] = carriers_by_id.get(orr.carrier_id)
+            carrier = carriers_by_id.get(orr.carrier_id)
             if carrier is None:
-                logger.error(f"Carrier with id {orr.carrier_id} not found for route {source_id} ({source_vertex['name']}) -> {dest_id} ({dest_vertex['name']})")
+                logger.error(f"Carrier with id {orr.carrier_id} not found for route {orr.source_id} -> {orr.destination_id}")
                 continue
-            carrier_name: str = carrier.name
 
             order_data: Dict[str, Any] = {
                 "order_id": orr.order_id,
                 "manufacturer_order_id": orr.manufacturer_order_id,
                 "tracking_number": orr.tracking_number,
-                "carrier_name": carrier_name
+                "carrier_name": carrier.name
             }
 
-            source_vertex['orders'].append(order_data)
-            dest_vertex['orders'].append(order_data)
-            edge['orders'].append(order_data)
\ No newline at end of file
+            v_orders[source_index].append(order_data)
+            v_orders[dest_index].append(order_data)
+            e_orders[edge_id].append(order_data)
+
+        g.vs['n_orders'] = v_n_orders
+        g.vs[N_ORDERS_BY_CARRIER_ATTR] = v_n_orders_by_carrier
+        g.vs[ORDERS_ATTR] = v_orders
+        g.es['n_orders'] = e_n_orders
+        g.es[N_ORDERS_BY_CARRIER_ATTR] = e_n_orders_by_carrier
+        g.es[ORDERS_ATTR] = e_orders
+
+        return dict(changed_vertices_by_carrier)
\ No newline at end of file
@@ -1,13 +1,26 @@
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
+import json
 import igraph as ig
 import boto3
 
 from service.db_utils import get_db_credentials, build_connection_url
 from serializer.s3_graph_serializer import S3GraphSerializer
+from serializer.s3_orders_overlay_serializer import S3OrdersOverlaySerializer
+from serializer.orders_overlay import OrdersOverlay
+from serializer import s3_transfer
 from utils.config import DATABASE_SECRET_ARN_KEY, AWS_REGION_KEY, SC_GRAPH_BUCKET_NAME_KEY, get_env
-from graph_config import PATH_DP_MANAGER_KEY, PATH_PROB_DP_MANAGER_KEY
+from graph_config import (
+    PATH_DP_MANAGER_KEY,
+    PATH_PROB_DP_MANAGER_KEY,
+    PATH_DP_SHARD_PREFIX,
+    PATH_PROB_DP_SHARD_PREFIX,
+    GRAPH_WATERMARK_KEY,
+    ORDERS_ATTR
+)
 
-from builder_service.graph_builder import GraphBuilder
+from builder_service.graph_builder import GraphBuilder, GraphUpdateResult
+from builder_service.graph_watermark import GraphWatermark
+from builder_service.dp_cache_invalidator import get_stale_dp_shard_prefixes
 from builder_service.exception.s3_bucket_object_deletion_exception import S3BucketObjectDeletionException
 
 if TYPE_CHECKING:
@@ -19,29 +32,79 @@ from logger import get_logger
 logger = get_logger(__name__)
 
 def _delete_s3_bucket_object(bucket_name: str, key: str) -> None:
-    try:
-        s3.head_object(Bucket=bucket_name, Key=key)
-    except Exception as e:
-        logger.debug(f"No object found at {bucket_name}/{key}, skipping deletion")
-        return
-    
+    # Deleting a missing key succeeds, so no existence check is needed
     s3.delete_object(Bucket=bucket_name, Key=key)
     logger.debug(f"Object at {bucket_name}/{key} deleted successfully")
 
-def build_graph() -> None:    
+DELETE_OBJECTS_BATCH_SIZE: int = 1000           # S3 DeleteObjects limit
+
+def _delete_s3_bucket_objects(bucket_name: str, keys: List[str]) -> None:
+    for i in range(0, len(keys), DELETE_OBJECTS_BATCH_SIZE):
+        batch: List[str] = keys[i:i + DELETE_OBJECTS_BATCH_SIZE]
+        s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+        )
+    logger.debug(f"{len(keys)} objects deleted successfully from {bucket_name}")
+
+def _delete_s3_bucket_prefix(bucket_name: str, prefix: str) -> None:
+    keys: List[str] = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []))
+
+    _delete_s3_bucket_objects(bucket_name, keys)
+
+def _get_s3_json(bucket_name: str, key: str) -> Optional[Any]:
+    maybe_content: Optional[bytes] = s3_transfer.get_object(s3, bucket_name, key)
+    if maybe_content is None:
+        return None
+
+    return json.loads(maybe_content.decode('utf-8'))
+
+def _put_s3_json(bucket_name: str, key: str, data: Any) -> None:
+    s3_transfer.put_object(s3, bucket_name, key, json.dumps(data).encode('utf-8'), 'application/json')
+    logger.debug(f"Object at {bucket_name}/{key} saved successfully")
+
+def _save_watermark(bucket_name: str, maybe_watermark: Optional[GraphWatermark]) -> None:
+    if maybe_watermark is None:
+        _delete_s3_bucket_object(bucket_name, GRAPH_WATERMARK_KEY)
+        return
+
+    _put_s3_json(bucket_name, GRAPH_WATERMARK_KEY, maybe_watermark.to_dict())
+
+def _delete_stale_dp_shards(bucket_name: str, result: GraphUpdateResult) -> None:
+    prefixes: List[str] = get_stale_dp_shard_prefixes(result.previous_dp_versions, result.dp_versions)
+    if not prefixes:
+        logger.debug("DP versions unchanged: DP caches left untouched")
+        return
+
+    for prefix in prefixes:
+        _delete_s3_bucket_prefix(bucket_name, prefix)
+
+def _serialize_graph(graph: ig.Graph) -> None:
+    # Realtime estimators load the lean graph only: order payloads go to a separate overlay
+    overlay: OrdersOverlay = OrdersOverlay.extract(graph)
     try:
-        config: Dict = get_db_credentials(secret_arn=get_env(DATABASE_SECRET_ARN_KEY), region=get_env(AWS_REGION_KEY))
-        db_connection_url: str = build_connection_url(config)
+        S3GraphSerializer().serialize(graph)
+        S3OrdersOverlaySerializer().serialize(overlay)
     except Exception:
-        logger.exception("Error during database connection setup")
+        logger.exception("Error during graph serialization")
         raise
-    
-    logger.debug(f"Retrieved database connection URL: {db_connection_url}")
-    
-    bucket_name: str = get_env(SC_GRAPH_BUCKET_NAME_KEY)
-    logger.debug(f"Retrieved bucket name: {bucket_name}")
-    
-    builder: GraphBuilder = GraphBuilder(db_connection_url)
+
+def _maybe_deserialize_graph_with_orders() -> Optional[ig.Graph]:
+    """The stored graph with its order payloads, None if its orders overlay is missing: updating it would drop them."""
+    g: ig.Graph = S3GraphSerializer().deserialize()
+    if ORDERS_ATTR in g.vs.attributes():
+        return g
+
+    maybe_overlay: Optional[OrdersOverlay] = S3OrdersOverlaySerializer().maybe_deserialize()
+    if maybe_overlay is None:
+        return None
+
+    maybe_overlay.apply(g)
+    return g
+
+def _build_full_graph(builder: GraphBuilder, bucket_name: str) -> None:
     try:
         g: ig.Graph = builder.build()
     except Exception:
@@ -50,16 +113,75 @@ def build_graph() -> None:
     
     logger.debug("Graph built successfully")
     
-    try:
-        serializer: S3GraphSerializer = S3GraphSerializer()
-        serializer.serialize(g)
-    except Exception:
-        logger.exception("Error during graph serialization")
-        raise
+    _serialize_graph(g)
 
     for key in (PATH_DP_MANAGER_KEY, PATH_PROB_DP_MANAGER_KEY):
         try:
             _delete_s3_bucket_object(bucket_name, key)
         except Exception:
             logger.exception(f"Could not delete object at {bucket_name}/{key}")
-            raise S3BucketObjectDeletionException(bucket_name, key)
\ No newline at end of file
+            raise S3BucketObjectDeletionException(bucket_name, key)
+
+    for prefix in (PATH_DP_SHARD_PREFIX, PATH_PROB_DP_SHARD_PREFIX):
+        try:
+            _delete_s3_bucket_prefix(bucket_name, prefix)
+        except Exception:
+            logger.exception(f"Could not delete objects at {bucket_name}/{prefix}")
+            raise S3BucketObjectDeletionException(bucket_name, prefix)
+
+    _save_watermark(bucket_name, builder.maybe_watermark)
+
+def _update_graph(builder: GraphBuilder, bucket_name: str) -> bool:
+    maybe_watermark_data: Optional[Dict[str, Any]] = _get_s3_json(bucket_name, GRAPH_WATERMARK_KEY)
+    if maybe_watermark_data is None:
+        logger.info("No graph watermark found: incremental update not possible")
+        return False
+
+    try:
+        maybe_graph: Optional[ig.Graph] = _maybe_deserialize_graph_with_orders()
+        if maybe_graph is None:
+            logger.info("No orders overlay found: incremental update not possible")
+            return False
+
+        maybe_result: Optional[GraphUpdateResult] = builder.update(maybe_graph, GraphWatermark.from_dict(maybe_watermark_data))
+    except Exception:
+        logger.exception("Error during graph update")
+        raise
+
+    if maybe_result is None:
+        return False
+
+    _serialize_graph(maybe_result.graph)
+
+    # Topology is unchanged, so the path DP version is too: only the probabilities of carriers whose counts changed are stale
+    try:
+        _delete_stale_dp_shards(bucket_name, maybe_result)
+    except Exception:
+        logger.exception(f"Could not delete stale objects at {bucket_name}/{PATH_PROB_DP_SHARD_PREFIX}")
+        raise S3BucketObjectDeletionException(bucket_name, PATH_PROB_DP_SHARD_PREFIX)
+
+    _save_watermark(bucket_name, maybe_result.watermark)
+    logger.debug("Graph updated successfully")
+    return True
+
+def build_graph(incremental: bool = False) -> None:    
+    try:
+        config: Dict = get_db_credentials(secret_arn=get_env(DATABASE_SECRET_ARN_KEY), region=get_env(AWS_REGION_KEY))
+        db_connection_url: str = build_connection_url(config)
+    except Exception:
+        logger.exception("Error during database connection setup")
+        raise
+    
+    logger.debug(f"Retrieved database connection URL: {db_connection_url}")
+    
+    bucket_name: str = get_env(SC_GRAPH_BUCKET_NAME_KEY)
+    logger.debug(f"Retrieved bucket name: {bucket_name}")
+    
+    builder: GraphBuilder = GraphBuilder(db_connection_url)
+    if incremental and _update_graph(builder, bucket_name):
+        return
+
+    if incremental:
+        logger.info("Falling back to full graph build")
+
+    _build_full_graph(builder, bucket_name)
@@ -0,0 +1,64 @@
+from typing import Dict, Any
+import math
+from dataclasses import dataclass, field, asdict
+
+# Tables the graph aggregates: their highest applied ID is the watermark field f"{table}_id"
+WATERMARK_TABLES = ('ori', 'oti', 'tmi', 'wmi', 'route_order', 'order')
+
+@dataclass(frozen=True)
+class TableFingerprint:
+    """
+    Count and checksum of the rows of a table up to its watermark ID. They change if rows up to that ID are
+    updated, deleted or committed after the watermark with a lower ID, which an ID watermark alone misses.
+    """
+    count: int
+    checksum: float
+
+    def matches(self, other: 'TableFingerprint') -> bool:
+        return self.count == other.count and math.isclose(self.checksum, other.checksum, rel_tol=1e-9, abs_tol=1e-6)
+
+@dataclass(frozen=True)
+class GraphWatermark:
+    """
+    Database state a graph was built from: topology size plus the highest ID of every table the graph aggregates.
+    Rows with a greater ID have not been applied to the graph yet.
+    """
+    n_vertices: int
+    max_vertex_id: int
+    n_routes: int
+    max_route_id: int
+
+    ori_id: int
+    oti_id: int
+    tmi_id: int
+    wmi_id: int
+    route_order_id: int
+    order_id: int                   # Only bounds the order fingerprint: orders are applied through their route orders
+
+    fingerprints: Dict[str, TableFingerprint] = field(default_factory=dict)       # By WATERMARK_TABLES name
+
+    def same_topology(self, other: 'GraphWatermark') -> bool:
+        return (self.n_vertices, self.max_vertex_id, self.n_routes, self.max_route_id) == \
+               (other.n_vertices, other.max_vertex_id, other.n_routes, other.max_route_id)
+
+    def same_applied_rows(self, fingerprints: Dict[str, TableFingerprint]) -> bool:
+        """Whether the rows up to this watermark still have its fingerprints. Without fingerprints, nothing can be verified."""
+        return all(
+            table in self.fingerprints and table in fingerprints and self.fingerprints[table].matches(fingerprints[table])
+            for table in WATERMARK_TABLES
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GraphWatermark':
+        fingerprints: Dict[str, TableFingerprint] = {
+            table: TableFingerprint(count=int(fingerprint['count']), checksum=float(fingerprint['checksum']))
+            for table, fingerprint in data.get('fingerprints', {}).items()
+        }
+        # Fields missing from watermarks saved by older versions have no fingerprint either, so they never match
+        return cls(
+            **{name: int(data.get(name, 0)) for name in cls.__dataclass_fields__ if name != 'fingerprints'},
+            fingerprints=fingerprints
+        )
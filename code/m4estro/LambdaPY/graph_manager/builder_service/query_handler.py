@@ -1,7 +1,7 @@
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Any, Dict, Set
 from dataclasses import dataclass
-from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Float, Row
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import func, cast, select, Float, Row
 
 from model.manufacturer import Manufacturer
 from model.vertex import Vertex
@@ -15,6 +15,28 @@ from model.ori import ORI
 from model.oti import OTI
 from model.tmi import TMI
 from model.wmi import WMI
+from model.param import Param
+
+from transportation_mode_classifier import TRANSPORTATION_MODE_PARAM_NAMES, get_mode_param_key
+
+from builder_service.graph_watermark import GraphWatermark, TableFingerprint, WATERMARK_TABLES
+
+IdRange = Tuple[int, int]                       # (after_id, up_to_id]: rows with after_id < id <= up_to_id
+
+# Per watermark table: model, the expression summed by its fingerprint and the text columns added to it, covering the
+# keys and values the graph aggregates or copies into the order payloads
+FINGERPRINT_COLUMNS: Dict[str, Tuple[Any, Any, Tuple[Any, ...]]] = {
+    'ori': (ORI, ORI.vertex_id + ORI.hours, ()),
+    'oti': (OTI, OTI.source_id + OTI.destination_id + OTI.hours, ()),
+    'tmi': (TMI, TMI.source_id + TMI.destination_id + TMI.value, ()),
+    'wmi': (WMI, WMI.source_id + WMI.destination_id + WMI.value, ()),
+    'route_order': (RouteOrder, RouteOrder.source_id + RouteOrder.destination_id + RouteOrder.order_id, ()),
+    'order': (Order, Order.carrier_id + func.coalesce(Order.manufacturer_order_id, 0), (Order.tracking_number,)),
+}
+
+# Dialects with a text hash function: elsewhere (e.g. SQLite) text columns are fingerprinted by their length
+TEXT_HASH_DIALECTS: Set[str] = {'postgresql'}
+TEXT_HASH_MODULUS: int = 1000003            # Keeps the checksums small enough for their float comparison
 
 @dataclass
 class AvgVertexMetricResult:
@@ -27,6 +49,19 @@ class AvgRouteMetricResult:
     destination_id: int
     value: float
 
+@dataclass
+class VertexMetricTotalResult:
+    vertex_id: int
+    total: float
+    count: int
+
+@dataclass
+class RouteMetricTotalResult:
+    source_id: int
+    destination_id: int
+    total: float
+    count: int
+
 @dataclass
 class CarrierOrderCountResult:
     source_id: int
@@ -43,10 +78,80 @@ class OrderRoutesResult:
     tracking_number: str
     carrier_id: int
 
+def _filter_id_range(query: Query, id_column: Any, maybe_id_range: Optional[IdRange]) -> Query:
+    if maybe_id_range is None:
+        return query
+
+    after_id, up_to_id = maybe_id_range
+    return query.filter(id_column > after_id, id_column <= up_to_id)
+
 class QueryHandler:
     def __init__(self, session: Session):
         self.session = session
 
+    def _text_checksum(self, column: Any) -> Any:
+        if self.session.get_bind().dialect.name in TEXT_HASH_DIALECTS:
+            return func.abs(func.hashtext(column)) % TEXT_HASH_MODULUS
+        return func.length(column)
+
+    def _fingerprint_columns(self, table: str, maybe_up_to_id: Optional[int] = None) -> Tuple[Any, Any]:
+        model, checksum_column, text_columns = FINGERPRINT_COLUMNS[table]
+        for text_column in text_columns:
+            checksum_column = checksum_column + self._text_checksum(text_column)
+        count_query = select(func.count(model.id))
+        checksum_query = select(func.coalesce(cast(func.sum(checksum_column), Float), 0.0))
+        if maybe_up_to_id is not None:
+            count_query = count_query.where(model.id <= maybe_up_to_id)
+            checksum_query = checksum_query.where(model.id <= maybe_up_to_id)
+
+        return count_query.scalar_subquery(), checksum_query.scalar_subquery()
+
+    def _to_fingerprints(self, values: Tuple[Any, ...]) -> Dict[str, TableFingerprint]:
+        return {
+            table: TableFingerprint(count=int(values[2 * i]), checksum=float(values[2 * i + 1]))
+            for i, table in enumerate(WATERMARK_TABLES)
+        }
+
+    def get_watermark(self) -> GraphWatermark:
+        def max_id(id_column: Any) -> Any:
+            return select(func.coalesce(func.max(id_column), 0)).scalar_subquery()
+
+        # One statement: IDs and fingerprints come from the same snapshot, so the fingerprints cover the rows up to the IDs
+        row: Row = self.session.query(
+            select(func.count(Vertex.id)).scalar_subquery(),
+            max_id(Vertex.id),
+            select(func.count(Route.id)).scalar_subquery(),
+            max_id(Route.id),
+            max_id(ORI.id),
+            max_id(OTI.id),
+            max_id(TMI.id),
+            max_id(WMI.id),
+            max_id(RouteOrder.id),
+            max_id(Order.id),
+            *(column for table in WATERMARK_TABLES for column in self._fingerprint_columns(table))
+        ).one()
+
+        return GraphWatermark(
+            n_vertices=row[0],
+            max_vertex_id=row[1],
+            n_routes=row[2],
+            max_route_id=row[3],
+            ori_id=row[4],
+            oti_id=row[5],
+            tmi_id=row[6],
+            wmi_id=row[7],
+            route_order_id=row[8],
+            order_id=row[9],
+            fingerprints=self._to_fingerprints(tuple(row[10:]))
+        )
+
+    def get_fingerprints(self, watermark: GraphWatermark) -> Dict[str, TableFingerprint]:
+        """Current fingerprints of the rows up to the IDs of a previous watermark."""
+        row: Row = self.session.query(
+            *(column for table in WATERMARK_TABLES for column in self._fingerprint_columns(table, getattr(watermark, f"{table}_id")))
+        ).one()
+        return self._to_fingerprints(tuple(row))
+
     def get_manufacturer(self) -> Manufacturer:
         return self.session.query(Manufacturer).first()
 
@@ -112,8 +217,44 @@ class QueryHandler:
         )
         return [AvgRouteMetricResult(source_id=row[0], destination_id=row[1], value=row[2]) for row in result]
 
-    def get_n_orders_per_carrier_route(self) -> List[CarrierOrderCountResult]:
-        result: List[Row[Tuple[int, int, int, int]]] = (
+    def get_ori_totals_per_vertex(self, id_range: IdRange) -> List[VertexMetricTotalResult]:
+        query: Query = self.session.query(
+            ORI.vertex_id,
+            cast(func.sum(ORI.hours), Float).label("total_ori"),
+            func.count(ORI.id).label("n_ori")
+        )
+        result: List[Row[Tuple[int, float, int]]] = (
+            _filter_id_range(query, ORI.id, id_range)
+            .group_by(ORI.vertex_id)
+            .all()
+        )
+        return [VertexMetricTotalResult(vertex_id=row[0], total=row[1], count=row[2]) for row in result]
+
+    def _get_route_metric_totals(self, model: Any, value_column: Any, id_range: IdRange) -> List[RouteMetricTotalResult]:
+        query: Query = self.session.query(
+            model.source_id,
+            model.destination_id,
+            cast(func.sum(value_column), Float).label("total"),
+            func.count(model.id).label("count")
+        )
+        result: List[Row[Tuple[int, int, float, int]]] = (
+            _filter_id_range(query, model.id, id_range)
+            .group_by(model.source_id, model.destination_id)
+            .all()
+        )
+        return [RouteMetricTotalResult(source_id=row[0], destination_id=row[1], total=row[2], count=row[3]) for row in result]
+
+    def get_oti_totals_per_route(self, id_range: IdRange) -> List[RouteMetricTotalResult]:
+        return self._get_route_metric_totals(OTI, OTI.hours, id_range)
+
+    def get_tmi_totals_per_route(self, id_range: IdRange) -> List[RouteMetricTotalResult]:
+        return self._get_route_metric_totals(TMI, TMI.value, id_range)
+
+    def get_wmi_totals_per_route(self, id_range: IdRange) -> List[RouteMetricTotalResult]:
+        return self._get_route_metric_totals(WMI, WMI.value, id_range)
+
+    def get_n_orders_per_carrier_route(self, maybe_id_range: Optional[IdRange] = None) -> List[CarrierOrderCountResult]:
+        query: Query = (
             self.session.query(
                 RouteOrder.source_id,
                 RouteOrder.destination_id,
@@ -121,13 +262,16 @@ class QueryHandler:
                 func.count(RouteOrder.id).label("route_carrier_orders_count")
             )
             .join(Order, RouteOrder.order_id == Order.id)
+        )
+        result: List[Row[Tuple[int, int, int, int]]] = (
+            _filter_id_range(query, RouteOrder.id, maybe_id_range)
             .group_by(RouteOrder.source_id, RouteOrder.destination_id, Order.carrier_id)
             .all()
         )
         return [CarrierOrderCountResult(source_id=row[0], destination_id=row[1], carrier_id=row[2], route_carrier_orders_count=row[3]) for row in result]
     
-    def get_order_routes(self) -> List[OrderRoutesResult]:
-        result: List[Row[Tuple[int, int, int, Optional[int], str, int]]] = (
+    def get_order_routes(self, maybe_id_range: Optional[IdRange] = None) -> List[OrderRoutesResult]:
+        query: Query = (
             self.session.query(
                 RouteOrder.source_id,
                 RouteOrder.destination_id,
@@ -137,6 +281,17 @@ class QueryHandler:
                 Order.carrier_id.label("carrier_id")
             )
             .join(Order, RouteOrder.order_id == Order.id)
-            .all()
         )
-        return [OrderRoutesResult(source_id=row[0], destination_id=row[1], order_id=row[2], manufacturer_order_id=row[3], tracking_number=row[4], carrier_id=row[5]) for row in result]
\ No newline at end of file
+        result: List[Row[Tuple[int, int, int, Optional[int], str, int]]] = _filter_id_range(query, RouteOrder.id, maybe_id_range).all()
+        return [OrderRoutesResult(source_id=row[0], destination_id=row[1], order_id=row[2], manufacturer_order_id=row[3], tracking_number=row[4], carrier_id=row[5]) for row in result]
+
+    def get_transportation_mode_params(self) -> Optional[Dict[str, float]]:
+        """TMI speed and distance params keyed as get_mode_param_key, or None if any of them is missing."""
+        names: List[str] = [param_name.value for param_name in TRANSPORTATION_MODE_PARAM_NAMES]
+        values: Dict[str, float] = {
+            name: float(value) for name, value in self.session.query(Param.name, Param.value).filter(Param.name.in_(names)).all()
+        }
+        if len(values) != len(names):
+            return None
+
+        return {get_mode_param_key(param_name): values[param_name.value] for param_name in TRANSPORTATION_MODE_PARAM_NAMES}
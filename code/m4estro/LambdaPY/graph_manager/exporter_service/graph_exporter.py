@@ -15,6 +15,7 @@ from graph_config import (
     AVG_OTI_ATTR,
     AVG_WMI_ATTR,
     AVG_TMI_ATTR,
+    ORDERS_ATTR,
 )
 
 class GraphExporter:
@@ -38,7 +39,7 @@ class GraphExporter:
                 "company_name": vertex['company_name'],
                 "manufacturer_supplier_id": vertex['manufacturer_supplier_id'],
 
-                "packages": vertex['orders'],
+                "packages": vertex[ORDERS_ATTR],
                 "n_orders_by_carrier": vertex[N_ORDERS_BY_CARRIER_ATTR],
                 "n_orders": vertex['n_orders'],
                 "n_rejections": vertex['n_rejections'],
@@ -54,7 +55,7 @@ class GraphExporter:
                 "source": s_v['v_id'],
                 "target":  t_v['v_id'],
                 
-                "packages": edge['orders'],
+                "packages": edge[ORDERS_ATTR],
                 "n_orders_by_carrier": edge[N_ORDERS_BY_CARRIER_ATTR],
                 "n_orders": edge['n_orders'],
 
@@ -92,7 +93,7 @@ class GraphExporter:
                 "company_name": vertex['company_name'],
                 "manufacturer_supplier_id": vertex['manufacturer_supplier_id'],
 
-                "packages": vertex['orders'],
+                "packages": vertex[ORDERS_ATTR],
                 "n_orders_by_carrier": vertex[N_ORDERS_BY_CARRIER_ATTR],
                 "n_orders": vertex['n_orders'],
                 "n_rejections": vertex['n_rejections'],
@@ -103,7 +104,7 @@ class GraphExporter:
                     "source": vertex['v_id'],
                     "target": manufacturer_v['v_id'],
 
-                    "packages": vertex['orders'],
+                    "packages": vertex[ORDERS_ATTR],
                     "n_orders_by_carrier": vertex[N_ORDERS_BY_CARRIER_ATTR],
                     "n_orders": vertex['n_orders'],
 
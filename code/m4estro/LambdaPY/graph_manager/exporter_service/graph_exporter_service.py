@@ -3,13 +3,15 @@ import igraph as ig
 import os
 
 from serializer.s3_graph_serializer import S3GraphSerializer
+from serializer.s3_orders_overlay_serializer import S3OrdersOverlaySerializer
+from graph_config import ORDERS_ATTR
 
 from exporter_service.graph_exporter import GraphExporter
 
 from logger import get_logger
 logger = get_logger(__name__)
 
-def get_graph_data() -> Dict[str, Any]:
+def _load_graph() -> ig.Graph:
     try:
         serializer: S3GraphSerializer = S3GraphSerializer()
         g: ig.Graph = serializer.deserialize()
@@ -19,6 +21,21 @@ def get_graph_data() -> Dict[str, Any]:
     
     logger.debug("Graph deserialized successfully")
 
+    if ORDERS_ATTR in g.vs.attributes():                # Graph serialized before the orders overlay split
+        return g
+
+    try:
+        S3OrdersOverlaySerializer().deserialize().apply(g)
+    except Exception:
+        logger.exception("Error during orders overlay deserialization")
+        raise
+
+    logger.debug("Orders overlay applied successfully")
+    return g
+
+def get_graph_data() -> Dict[str, Any]:
+    g: ig.Graph = _load_graph()
+
     exporter: GraphExporter = GraphExporter()
     try:
         graph_data: Dict[str, Any] = exporter.export_as_graph(g)
@@ -30,14 +47,7 @@ def get_graph_data() -> Dict[str, Any]:
     return graph_data
 
 def get_map_data() -> Dict[str, Any]:
-    try:
-        serializer: S3GraphSerializer = S3GraphSerializer()
-        g: ig.Graph = serializer.deserialize()
-    except Exception:
-        logger.exception("Error during graph serialization")
-        raise
-    
-    logger.debug("Graph deserialized successfully")
+    g: ig.Graph = _load_graph()
 
     exporter: GraphExporter = GraphExporter()
     try:
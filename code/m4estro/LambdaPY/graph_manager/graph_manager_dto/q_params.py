@@ -1,4 +1,5 @@
 from enum import Enum
 
 class GraphManagerQParamsKeys(Enum):
-    INTERMEDIATE = "intermediate" 
\ No newline at end of file
+    INTERMEDIATE = "intermediate"
+    INCREMENTAL = "incremental" 
\ No newline at end of file
@@ -35,8 +35,14 @@ def handle_graph_retrieval() -> Response:
 
 @app.post(SC_GRAPH_PATH)
 def handle_graph_build() -> Response:
+    incremental_q_param_key = GraphManagerQParamsKeys.INCREMENTAL.value
+    q_params: Dict[str, str] = get_query_params(app.current_event.query_string_parameters or {}, allowed_keys={incremental_q_param_key})
+    
+    incremental: bool = q_params.get(incremental_q_param_key, "").lower() == "true"
+    logger.debug(f"Incremental graph build: {incremental}")
+
     try:
-        build_graph()
+        build_graph(incremental=incremental)
     except S3BucketObjectDeletionException as e:
         logger.error(f"Error deleting S3 bucket object: {e}")
         return internal_error_response(f"Error deleting S3 bucket object: {str(e)}")
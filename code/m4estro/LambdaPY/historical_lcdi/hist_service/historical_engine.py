@@ -0,0 +1,303 @@
+from typing import Any, Set, List, Dict, Tuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, Query, joinedload
+
+from service.read_only_db_connector import ReadOnlyDBConnector
+from service.db_utils import get_read_only_db_connector
+
+from model.site import Site
+from model.carrier import Carrier
+from model.dispatch_time import DispatchTime
+from model.dispatch_time_gamma import DispatchTimeGamma
+from model.dispatch_time_sample import DispatchTimeSample
+from model.shipment_time import ShipmentTime
+from model.shipment_time_gamma import ShipmentTimeGamma
+from model.shipment_time_sample import ShipmentTimeSample
+from model.param import Param, ParamName
+
+from utils.parsing import parse_id_list, parse_str_list
+
+from hist_service.historical_lcdi_aggregator import HistoricalLCDIAggregator
+from hist_service.quantile_sketch_writer import QuantileSketchWriter
+
+from hist_service.dri.dri_calculator import DRICalculator
+from hist_service.cli.cli_calculator import CLICalculator
+
+from hist_service.dispatch_time.calculator.adt_calculator import ADTCalculator
+from hist_service.dispatch_time.calculator.ddi_calculator import DDICalculator
+from hist_service.dispatch_time.dto.ddi_dto import DDI_DTO
+from hist_service.dispatch_time.dto.dispatch_time_dist_dto import DispatchTimeDistDTO
+from hist_service.dispatch_time.dto.dispatch_time_gamma_dto import DispatchTimeGammaDTO
+from hist_service.dispatch_time.dto.dispatch_time_sample_dto import DispatchTimeSampleDTO
+
+from hist_service.shipment_time.calculator.ast_calculator import ASTCalculator
+from hist_service.shipment_time.calculator.ctdi_calculator import CTDICalculator
+from hist_service.shipment_time.dto.ctdi_dto import CTDI_DTO
+from hist_service.shipment_time.dto.shipment_time_dist_dto import ShipmentTimeDistDTO
+from hist_service.shipment_time.dto.shipment_time_gamma_dto import ShipmentTimeGammaDTO
+from hist_service.shipment_time.dto.shipment_time_sample_dto import ShipmentTimeSampleDTO
+
+from historical_api.q_params import HistoricalQParamsKeys
+
+from quantile_sketch import QuantileSketch
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+Key = Tuple[int, ...]
+
+class HistoricalEngine:
+    """
+    Computes the historical LCDI indicators with set-based queries: one query per indicator family,
+    joined server-side with the site, supplier and carrier features, plus one grouped quantile sketch query
+    for the samples without a stored sketch. Indicators are computed by the per-indicator calculators,
+    and rows are shaped as the HistoricalLCDIAggregator expects them.
+    """
+    def __init__(self, session: Session) -> None:
+        self.session: Session = session
+
+    def get_site_ids(self, query_params: Dict[str, str]) -> Set[int]:
+        suppliers_str: str = query_params.get(HistoricalQParamsKeys.SUPPLIER.value, '')
+        sites_str: str = query_params.get(HistoricalQParamsKeys.SITE.value, '')
+        supplier_ids: Set[int] = parse_id_list(suppliers_str)
+        logger.debug(f"Supplier query parameter: {suppliers_str} -> IDs: {supplier_ids}, site query parameter: {sites_str}")
+
+        site_ids: Set[int] = set()
+        if supplier_ids:
+            site_ids.update(id_ for (id_,) in self.session.query(Site.id).filter(Site.supplier_id.in_(supplier_ids)).all())
+        site_ids.update(parse_id_list(sites_str))
+
+        if not site_ids and not suppliers_str and not sites_str:                    # If no suppliers or sites specified, fetch all sites
+            site_ids.update(id_ for (id_,) in self.session.query(Site.id).filter(Site.n_orders > 0).all())
+            logger.debug(f"No specific sites or suppliers provided, retrieved all sites with at least one order")
+
+        logger.debug(f"Resolved site IDs: {site_ids}")
+        return site_ids
+
+    def _filter_carriers(self, query: Query, query_params: Dict[str, str]) -> Query:
+        carriers_str: str = query_params.get(HistoricalQParamsKeys.CARRIER_NAME.value, '')
+        if not carriers_str:
+            logger.debug("No specific carriers provided, using all carriers with at least one order")
+            return query.filter(Carrier.n_orders > 0)
+
+        carrier_tokens: Set[str] = parse_str_list(carriers_str, case='lower')
+        logger.debug(f"Parsed carrier tokens: {carrier_tokens}")
+        return query.filter(func.lower(Carrier.name).in_(carrier_tokens))
+
+    def get_carrier_ids(self, query_params: Dict[str, str]) -> Set[int]:
+        query: Query = self._filter_carriers(self.session.query(Carrier.id), query_params)
+        carrier_ids: Set[int] = {c_id for (c_id,) in query.all()}
+        logger.debug(f"Resolved carrier IDs: {carrier_ids}")
+        return carrier_ids
+
+    def _get_confidence_level(self, param_name: ParamName) -> float:
+        confidence_level: float = self.session.query(Param.value).filter(Param.name == param_name.value).scalar()
+        logger.debug(f"{param_name.value} confidence level: {confidence_level}")
+        return confidence_level
+
+    def _get_raw_sketches(self, key_columns: List[Any], hours_column: Any, keys: Set[Key], table_name: str) -> Dict[Key, List[float]]:
+        """Quantile sketches of the raw hours of samples without a current stored sketch, computed by the database when it can."""
+        if not keys:
+            return {}
+
+        sketches: Dict[Key, QuantileSketch] = QuantileSketchWriter(self.session).get_sketches(key_columns, hours_column, keys)
+        if len(sketches) != len(keys):
+            logger.error(f"Missing {table_name} records for {len(keys) - len(sketches)} samples. Check data integrity.")
+        return {key: sketch.to_list() for key, sketch in sketches.items()}
+
+    def _site_features(self, dto: DispatchTimeDistDTO | ShipmentTimeDistDTO) -> Dict[str, Any]:
+        return {
+            "site": {
+                "id": dto.site_id,
+                "location": dto.site_location,
+            },
+            "supplier": {
+                "id": dto.supplier_id,
+                "manufacturer_id": dto.manufacturer_supplier_id,
+                "name": dto.supplier_name,
+            },
+        }
+
+    def dri(self, site_ids: Set[int]) -> List[Dict[str, Any]]:
+        if not site_ids:
+            return []
+
+        sites: List[Site] = (
+            self.session.query(Site)
+            .options(joinedload(Site.supplier))
+            .filter(Site.id.in_(site_ids))
+            .order_by(Site.id)
+            .all()
+        )
+
+        calculator: DRICalculator = DRICalculator()
+        dri_indicators: List[Dict[str, Any]] = [
+            {
+                "site": {
+                    "id": site.id,
+                    "location": site.location_name,
+                },
+                "supplier": {
+                    "id": site.supplier_id,
+                    "manufacturer_id": site.supplier.manufacturer_supplier_id,
+                    "name": site.supplier.name,
+                },
+                "indicators": {
+                    "DRI": calculator.calculate_dri(n_rejections=site.n_rejections, n_orders=site.n_orders).value
+                }
+            }
+            for site in sites
+        ]
+        logger.debug(f"Calculated DRI indicators for {len(dri_indicators)} sites")
+        return dri_indicators
+
+    def cli(self, query_params: Dict[str, str]) -> List[Dict[str, Any]]:
+        carriers: List[Carrier] = self._filter_carriers(self.session.query(Carrier), query_params).order_by(Carrier.id).all()
+
+        calculator: CLICalculator = CLICalculator()
+        cli_indicators: List[Dict[str, Any]] = [
+            {
+                "carrier": {
+                    "id": carrier.id,
+                    "name": carrier.name
+                },
+                "indicators": {
+                    "CLI": calculator.calculate_cli(n_losses=carrier.n_losses, n_orders=carrier.n_orders).value
+                }
+            }
+            for carrier in carriers
+        ]
+        logger.debug(f"Calculated CLI indicators for {len(cli_indicators)} carriers")
+        return cli_indicators
+
+    def dispatch_time(self, site_ids: Set[int]) -> List[Dict[str, Any]]:
+        if not site_ids:
+            return []
+
+        confidence_level: float = self._get_confidence_level(ParamName.DISPATCH_HIST_CONFIDENCE)
+
+        gammas: List[DispatchTimeGamma] = (
+            self.session.query(DispatchTimeGamma)
+            .options(joinedload(DispatchTimeGamma.site).joinedload(Site.supplier))
+            .filter(DispatchTimeGamma.site_id.in_(site_ids))
+            .order_by(DispatchTimeGamma.site_id)
+            .all()
+        )
+        logger.debug(f"Retrieved {len(gammas)} DispatchTimeGamma rows")
+        dtos: List[DispatchTimeDistDTO] = [DispatchTimeGammaDTO.from_orm_model(gamma) for gamma in gammas]
+
+        sample_site_ids: Set[int] = site_ids - {gamma.site_id for gamma in gammas}         # Gamma fits take precedence over samples
+        if sample_site_ids:
+            samples: List[DispatchTimeSample] = (
+                self.session.query(DispatchTimeSample)
+                .options(joinedload(DispatchTimeSample.site).joinedload(Site.supplier))
+                .filter(DispatchTimeSample.site_id.in_(sample_site_ids))
+                .order_by(DispatchTimeSample.site_id)
+                .all()
+            )
+            logger.debug(f"Retrieved {len(samples)} DispatchTimeSample rows")
+
+            raw_sketches: Dict[Key, List[float]] = self._get_raw_sketches(
+                [DispatchTime.site_id], DispatchTime.hours,
+                {(sample.site_id,) for sample in samples if sample.get_current_quantiles() is None}, DispatchTime.__tablename__
+            )
+            for sample in samples:
+                maybe_quantiles: Optional[List[float]] = sample.get_current_quantiles()
+                maybe_x: Optional[List[float]] = maybe_quantiles if maybe_quantiles is not None else raw_sketches.get((sample.site_id,))
+                if maybe_x is not None:
+                    dtos.append(DispatchTimeSampleDTO.from_orm_model(x=list(maybe_x), orm=sample))
+
+        adt_calculator: ADTCalculator = ADTCalculator()
+        ddi_calculator: DDICalculator = DDICalculator(confidence_level=confidence_level)
+
+        dt_indicators: List[Dict[str, Any]] = []
+        for dto in dtos:
+            ddi: DDI_DTO = ddi_calculator.ddi(dto)
+            dt_indicators.append({
+                **self._site_features(dto),
+                "indicators": {
+                    "ADT": adt_calculator.adt(dto).value,
+                    "DDI": {"lower": ddi.lower, "upper": ddi.upper, "confidence": confidence_level}
+                }
+            })
+
+        return dt_indicators
+
+    def shipment_time(self, site_ids: Set[int], carrier_ids: Set[int]) -> List[Dict[str, Any]]:
+        if not site_ids or not carrier_ids:
+            return []
+
+        confidence_level: float = self._get_confidence_level(ParamName.SHIPMENT_HIST_CONFIDENCE)
+
+        gammas: List[ShipmentTimeGamma] = (
+            self.session.query(ShipmentTimeGamma)
+            .options(joinedload(ShipmentTimeGamma.site).joinedload(Site.supplier), joinedload(ShipmentTimeGamma.carrier))
+            .filter(ShipmentTimeGamma.site_id.in_(site_ids))
+            .filter(ShipmentTimeGamma.carrier_id.in_(carrier_ids))
+            .order_by(ShipmentTimeGamma.site_id, ShipmentTimeGamma.carrier_id)
+            .all()
+        )
+        logger.debug(f"Retrieved {len(gammas)} ShipmentTimeGamma rows")
+        dtos: List[ShipmentTimeDistDTO] = [ShipmentTimeGammaDTO.from_orm_model(gamma) for gamma in gammas]
+
+        samples: List[ShipmentTimeSample] = (
+            self.session.query(ShipmentTimeSample)
+            .options(joinedload(ShipmentTimeSample.site).joinedload(Site.supplier), joinedload(ShipmentTimeSample.carrier))
+            .filter(ShipmentTimeSample.site_id.in_(site_ids))
+            .filter(ShipmentTimeSample.carrier_id.in_(carrier_ids))
+            .order_by(ShipmentTimeSample.site_id, ShipmentTimeSample.carrier_id)
+            .all()
+        )
+        logger.debug(f"Retrieved {len(samples)} ShipmentTimeSample rows")
+
+        raw_sketches: Dict[Key, List[float]] = self._get_raw_sketches(
+            [ShipmentTime.site_id, ShipmentTime.carrier_id], ShipmentTime.hours,
+            {(sample.site_id, sample.carrier_id) for sample in samples if sample.get_current_quantiles() is None}, ShipmentTime.__tablename__
+        )
+        for sample in samples:
+            maybe_quantiles: Optional[List[float]] = sample.get_current_quantiles()
+            maybe_x: Optional[List[float]] = maybe_quantiles if maybe_quantiles is not None else raw_sketches.get((sample.site_id, sample.carrier_id))
+            if maybe_x is not None:
+                dtos.append(ShipmentTimeSampleDTO.from_orm_model(x=list(maybe_x), orm=sample))
+
+        ast_calculator: ASTCalculator = ASTCalculator()
+        ctdi_calculator: CTDICalculator = CTDICalculator(confidence_level=confidence_level)
+
+        st_indicators: List[Dict[str, Any]] = []
+        for dto in dtos:
+            ctdi: CTDI_DTO = ctdi_calculator.ctdi(dto)
+            st_indicators.append({
+                **self._site_features(dto),
+                "carrier": {
+                    "id": dto.carrier_id,
+                    "name": dto.carrier_name,
+                },
+                "indicators": {
+                    "AST": ast_calculator.ast(dto).value,
+                    "CTDI": {"lower": ctdi.lower, "upper": ctdi.upper, "confidence": confidence_level}
+                }
+            })
+
+        return st_indicators
+
+def calculate_historical_lcdi(query_params: Dict[str, str]) -> List[Dict[str, Any]]:
+    """All the historical indicators of the requested sites and carriers, computed in a single session and aggregated."""
+    connector: ReadOnlyDBConnector = get_read_only_db_connector()
+    try:
+        with connector.session_scope() as session:
+            engine: HistoricalEngine = HistoricalEngine(session)
+            site_ids: Set[int] = engine.get_site_ids(query_params)
+            carrier_ids: Set[int] = engine.get_carrier_ids(query_params)
+
+            aggregator: HistoricalLCDIAggregator = HistoricalLCDIAggregator(
+                dispatch_time_indicators=engine.dispatch_time(site_ids),
+                shipment_time_indicators=engine.shipment_time(site_ids, carrier_ids),
+                dri_indicators=engine.dri(site_ids),
+                cli_indicators=engine.cli(query_params)
+            )
+    except Exception:
+        logger.exception("Exception during database query")
+        raise
+
+    return aggregator.aggregate()
@@ -0,0 +1,107 @@
+from typing import Any, Set, List, Dict, Tuple, Type
+from collections import defaultdict
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+
+from service.db_connector import DBConnector
+from service.db_utils import get_db_connector
+
+from model.dispatch_time import DispatchTime
+from model.dispatch_time_sample import DispatchTimeSample
+from model.shipment_time import ShipmentTime
+from model.shipment_time_sample import ShipmentTimeSample
+
+from quantile_sketch import QuantileSketch, QUANTILE_GRID
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+# Dialects with ordered-set aggregates: sketches are computed by the database
+PERCENTILE_CONT_DIALECTS: Set[str] = {'postgresql'}
+
+Key = Tuple[int, ...]
+
+class QuantileSketchWriter:
+    """
+    Writes the quantile sketches of the sample distributions from their raw hours: one grouped query per table.
+
+    Only rows without a current sketch are written, unless refresh is set: a sketch is stale when the number
+    of observations it summarizes differs from the sample n, and readers fall back to the raw hours until it is rewritten.
+    """
+    def __init__(self, session: Session) -> None:
+        self.session: Session = session
+
+    def _supports_percentile_cont(self) -> bool:
+        return self.session.get_bind().dialect.name in PERCENTILE_CONT_DIALECTS
+
+    def get_sketches(self, key_columns: List[Any], hours_column: Any, keys: Set[Key]) -> Dict[Key, QuantileSketch]:
+        filters: List[Any] = [key_columns[0].in_({key[0] for key in keys})]          # Prefilter, exact keys are matched below
+
+        if self._supports_percentile_cont():
+            grid: Any = postgresql.array([float(q) for q in QUANTILE_GRID])
+            rows = (
+                self.session.query(*key_columns, func.count(hours_column), func.percentile_cont(grid).within_group(hours_column))
+                .filter(*filters)
+                .group_by(*key_columns)
+                .all()
+            )
+            return {tuple(row[:-2]): QuantileSketch.from_list(row[-2], row[-1]) for row in rows if tuple(row[:-2]) in keys}
+
+        # No ordered-set aggregates (e.g. SQLite): same linear interpolation computed on the fetched hours
+        hours_by_key: Dict[Key, List[float]] = defaultdict(list)
+        for row in self.session.query(*key_columns, hours_column).filter(*filters).all():
+            hours_by_key[tuple(row[:-1])].append(row[-1])
+        return {key: QuantileSketch.from_sample(hours) for key, hours in hours_by_key.items() if key in keys}
+
+    def _write(self, sample_model: Type[Any], key_attrs: Tuple[str, ...], hours_model: Type[Any], refresh: bool) -> int:
+        query = self.session.query(sample_model)
+        if not refresh:
+            query = query.filter(or_(
+                sample_model.quantiles.is_(None),
+                sample_model.quantiles_n.is_(None),
+                sample_model.quantiles_n != sample_model.n,
+            ))
+
+        samples_by_key: Dict[Key, Any] = {tuple(getattr(sample, attr) for attr in key_attrs): sample for sample in query.all()}
+        if not samples_by_key:
+            logger.debug(f"No {sample_model.__tablename__} rows to write quantile sketches for")
+            return 0
+
+        key_columns: List[Any] = [getattr(hours_model, attr) for attr in key_attrs]
+        sketches: Dict[Key, QuantileSketch] = self.get_sketches(key_columns, hours_model.hours, set(samples_by_key))
+
+        missing_keys: Set[Key] = set(samples_by_key) - set(sketches)
+        if missing_keys:
+            logger.error(f"Missing {hours_model.__tablename__} records for {len(missing_keys)} {sample_model.__tablename__} rows. Check data integrity.")
+
+        for key, sketch in sketches.items():
+            sample: Any = samples_by_key[key]
+            if sketch.n != sample.n:
+                logger.warning(f"{sample_model.__tablename__} row {sample.id} has n={sample.n} but {sketch.n} raw hours: the sketch stays stale until n is updated")
+            sample.quantiles = sketch.to_list()
+            sample.quantiles_n = sketch.n
+
+        logger.debug(f"Wrote {len(sketches)} quantile sketches to {sample_model.__tablename__}")
+        return len(sketches)
+
+    def dispatch_time(self, refresh: bool = False) -> int:
+        return self._write(DispatchTimeSample, ("site_id",), DispatchTime, refresh)
+
+    def shipment_time(self, refresh: bool = False) -> int:
+        return self._write(ShipmentTimeSample, ("site_id", "carrier_id"), ShipmentTime, refresh)
+
+def write_quantile_sketches(refresh: bool = False) -> Dict[str, int]:
+    """Backfills the quantile sketches of the dispatch and shipment time samples, in a single transaction."""
+    connector: DBConnector = get_db_connector()
+    try:
+        with connector.session_scope() as session:
+            writer: QuantileSketchWriter = QuantileSketchWriter(session)
+            return {
+                DispatchTimeSample.__tablename__: writer.dispatch_time(refresh),
+                ShipmentTimeSample.__tablename__: writer.shipment_time(refresh),
+            }
+    except Exception:
+        logger.exception("Exception during quantile sketches write")
+        raise
@@ -3,4 +3,7 @@ from enum import Enum
 class HistoricalQParamsKeys(Enum):
     SITE = "site"
     SUPPLIER = "supplier"
-    CARRIER_NAME = "carrier_name"
\ No newline at end of file
+    CARRIER_NAME = "carrier_name"
+
+class QuantileSketchQParamsKeys(Enum):
+    REFRESH = "refresh"
\ No newline at end of file
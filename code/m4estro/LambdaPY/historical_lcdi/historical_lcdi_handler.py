@@ -3,27 +3,21 @@ from aws_lambda_powertools.event_handler import APIGatewayRestResolver
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.event_handler.api_gateway import Response
 
-from concurrent.futures import ThreadPoolExecutor, Future
-
-from hist_service.historical_lcdi_aggregator import HistoricalLCDIAggregator
+from hist_service.historical_engine import calculate_historical_lcdi
 from hist_service.dispatch_time.dispatch_time_service import calculate_dispatch_time
 from hist_service.shipment_time.shipment_time_service import calculate_shipment_time
 from hist_service.dri.dri_service import calculate_dri
 from hist_service.cli.cli_service import calculate_cli
+from hist_service.quantile_sketch_writer import write_quantile_sketches
 
 from utils.parsing import get_query_params
 from utils.response import internal_error_response, success_response
 
-from historical_api.q_params import HistoricalQParamsKeys
+from historical_api.q_params import HistoricalQParamsKeys, QuantileSketchQParamsKeys
 
 from logger import get_logger
 logger = get_logger(__name__)
 
-SHIPMENT_FUTURE_KEY = "shipment"
-DISPATCH_FUTURE_KEY = "dispatch"
-DRI_FUTURE_KEY = "dri"
-CLI_FUTURE_KEY = "cli"
-
 HISTORICAL_BASE_PATH = "/lcdi/historical"
 
 app = APIGatewayRestResolver()
@@ -36,38 +30,12 @@ def get_historical_lcdi() -> Response:
     )
     logger.debug(f"Filtered query parameters for {HISTORICAL_BASE_PATH}: {q_params}")
 
-    with ThreadPoolExecutor() as executor:
-        futures: Dict[str, Future[List[Dict[str, Any]]]] = {
-            SHIPMENT_FUTURE_KEY: executor.submit(calculate_shipment_time, q_params),
-            DISPATCH_FUTURE_KEY: executor.submit(calculate_dispatch_time, q_params),
-            DRI_FUTURE_KEY: executor.submit(calculate_dri, q_params),
-            CLI_FUTURE_KEY: executor.submit(calculate_cli, q_params)
-        }
-
-        try:
-            dispatch_time_indicators: List[Dict[str, Any]] = futures[DISPATCH_FUTURE_KEY].result()
-            logger.debug(f"Dispatch time indicators: {dispatch_time_indicators}")
-
-            shipment_time_indicators: List[Dict[str, Any]] = futures[SHIPMENT_FUTURE_KEY].result()
-            logger.debug(f"Shipment time indicators: {shipment_time_indicators}")
-            
-            dri_indicators: List[Dict[str, Any]] = futures[DRI_FUTURE_KEY].result()
-            logger.debug(f"DRI indicators: {dri_indicators}")
-
-            cli_indicators: List[Dict[str, Any]] = futures[CLI_FUTURE_KEY].result()
-            logger.debug(f"CLI indicators: {cli_indicators}")
-        except Exception as e:
-            logger.exception("Error during historical LCDI calculations")
-            return internal_error_response(f"Error during calculations: {str(e)}")
-        
-    aggregator = HistoricalLCDIAggregator(
-        dispatch_time_indicators=dispatch_time_indicators,
-        shipment_time_indicators=shipment_time_indicators,
-        dri_indicators=dri_indicators,
-        cli_indicators=cli_indicators
-    )
+    try:
+        aggregated_indicators: List[Dict[str, Any]] = calculate_historical_lcdi(q_params)
+    except Exception as e:
+        logger.exception("Error during historical LCDI calculations")
+        return internal_error_response(f"Error during calculations: {str(e)}")
 
-    aggregated_indicators = aggregator.aggregate()
     logger.debug(f"Aggregated indicators: {aggregated_indicators}")
 
     return success_response(aggregated_indicators)
@@ -122,6 +90,19 @@ def get_dri() -> Response:
     dri_indicators: List[Dict[str, Any]] = calculate_dri(q_params)
     logger.debug(f"DRI indicators: {dri_indicators}")
     return success_response(dri_indicators)
+
+
+@app.post(f"{HISTORICAL_BASE_PATH}/quantiles")
+def post_quantile_sketches() -> Response:
+    refresh_q_param_key = QuantileSketchQParamsKeys.REFRESH.value
+    q_params: Dict[str, str] = get_query_params(app.current_event.query_string_parameters or {}, allowed_keys={refresh_q_param_key})
+
+    refresh: bool = q_params.get(refresh_q_param_key, "").lower() == "true"
+    logger.debug(f"Writing quantile sketches of the sample distributions, refresh: {refresh}")
+
+    n_written_by_table: Dict[str, int] = write_quantile_sketches(refresh=refresh)
+    logger.debug(f"Quantile sketches written: {n_written_by_table}")
+    return success_response(n_written_by_table)
     
 
 @app.exception_handler(Exception)
@@ -1,6 +1,6 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, List
 
-from sqlalchemy import Integer, Float, ForeignKey
+from sqlalchemy import Integer, Float, ForeignKey, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from model.base import Base
@@ -22,6 +22,14 @@ class DispatchTimeSample(Base):
     mean: Mapped[float] = mapped_column(Float, nullable=False)
     std_dev: Mapped[float] = mapped_column(Float, nullable=False)
     n: Mapped[int] = mapped_column(Integer, nullable=False)
+    quantiles: Mapped[Optional[List[float]]] = mapped_column(JSON, nullable=True)        # Quantile sketch on the stats layer QUANTILE_GRID
+    quantiles_n: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)            # Number of observations summarized by the sketch
+
+    def get_current_quantiles(self) -> Optional[List[float]]:
+        """Stored quantile sketch, only if it summarizes the current n observations: stale sketches are ignored."""
+        if self.quantiles is None or self.quantiles_n != self.n:
+            return None
+        return list(self.quantiles)
 
     def __str__(self) -> str:
         return (f"DispatchTimeSample(id={self.id}, site_id={self.site_id}, "
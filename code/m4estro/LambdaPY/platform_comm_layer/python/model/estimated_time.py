@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, List
-from sqlalchemy import Integer, Float, ForeignKey
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from sqlalchemy import Integer, Float, ForeignKey, JSON
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from model.base import Base
@@ -49,6 +49,8 @@ class EstimatedTime(Base):
     CFDI_lower: Mapped[float] = mapped_column(Float, nullable=False)
     CFDI_upper: Mapped[float] = mapped_column(Float, nullable=False)
     EDD: Mapped[datetime] = mapped_column(nullable=False)
+    payload: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)      # Formatted estimate, computed once at save time
+    payload_version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)      # Version of the format of payload
 
     time_deviation_id: Mapped[int] = mapped_column(ForeignKey(f"{time_deviation.TIME_DEVIATION_TABLE_NAME}.id"), nullable=False)
     time_deviation: Mapped["TimeDeviation"] = relationship("TimeDeviation")
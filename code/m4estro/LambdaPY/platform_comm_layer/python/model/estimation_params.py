@@ -35,6 +35,8 @@ class EstimationParams(Base):
     pt_max_paths: Mapped[int] = mapped_column(nullable=False)
     pt_ext_data_min_prob: Mapped[float] = mapped_column(nullable=False)
     pt_confidence: Mapped[float] = mapped_column(nullable=False)
+    pt_mode: Mapped[str] = mapped_column(nullable=False, default='ENUMERATION')
+    pt_dp_prefix_hops: Mapped[int] = mapped_column(nullable=False, default=0)
 
     # TT parameters
     tt_confidence: Mapped[float] = mapped_column(nullable=False)
@@ -59,5 +61,7 @@ class EstimationParams(Base):
                 f"pt_max_paths={self.pt_max_paths}, "
                 f"pt_ext_data_min_prob={self.pt_ext_data_min_prob}, "
                 f"pt_confidence={self.pt_confidence}, "
+                f"pt_mode={self.pt_mode}, "
+                f"pt_dp_prefix_hops={self.pt_dp_prefix_hops}, "
                 f"tt_confidence={self.tt_confidence}, "
                 f"tfst_tollerance={self.tfst_tollerance})")
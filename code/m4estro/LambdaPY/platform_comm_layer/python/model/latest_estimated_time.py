@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+from sqlalchemy import Float, ForeignKey
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+
+from model.base import Base
+from model import vertex, order, estimated_time
+
+if TYPE_CHECKING:
+    from model.order import Order
+    from model.estimated_time import EstimatedTime
+
+LATEST_ESTIMATED_TIME_TABLE_NAME = 'latest_estimated_times'
+
+class LatestEstimatedTime(Base):
+    """Projection of the newest estimated time of each order, upserted on every saved estimate."""
+    __tablename__ = LATEST_ESTIMATED_TIME_TABLE_NAME
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    order_id: Mapped[int] = mapped_column(ForeignKey(f"{order.ORDER_TABLE_NAME}.id"), nullable=False, unique=True)
+    order: Mapped["Order"] = relationship("Order")
+
+    estimated_time_id: Mapped[int] = mapped_column(ForeignKey(f"{estimated_time.ESTIMATED_TIME_TABLE_NAME}.id"), nullable=False)
+    estimated_time: Mapped["EstimatedTime"] = relationship("EstimatedTime")
+
+    vertex_id: Mapped[int] = mapped_column(ForeignKey(f"{vertex.VERTEX_TABLE_NAME}.id"), nullable=False)
+
+    estimation_time: Mapped[datetime] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False)
+    EODT: Mapped[float] = mapped_column(Float, nullable=False)
+    EDD: Mapped[datetime] = mapped_column(nullable=False)
+
+    def __str__(self) -> str:
+        return (f"LatestEstimatedTime(id={self.id}, order_id={self.order_id}, "
+                f"estimated_time_id={self.estimated_time_id}, vertex_id={self.vertex_id}, "
+                f"estimation_time={self.estimation_time}, status={self.status}, "
+                f"EODT={self.EODT}, EDD={self.EDD})")
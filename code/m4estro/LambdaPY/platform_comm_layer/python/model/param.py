@@ -78,6 +78,9 @@ class ParamName(Enum):
     PT_MAX_PATHS = 'PT_MAX_PATHS'
     PT_EXT_DATA_MIN_PROBABILITY = 'PT_EXT_DATA_MIN_PROBABILITY'
     PT_CONFIDENCE = 'PT_CONFIDENCE'
+    PT_MODE = 'PT_MODE'
+    PT_DP_PREFIX_HOPS = 'PT_DP_PREFIX_HOPS'
+    PT_CACHE_TIME_BUCKET_SECONDS = 'PT_CACHE_TIME_BUCKET_SECONDS'
 
     # TT parameters
     TT_CONFIDENCE = 'TT_CONFIDENCE'
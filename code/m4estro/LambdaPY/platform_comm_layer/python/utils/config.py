@@ -8,6 +8,10 @@ EXTERNAL_API_LAMBDA_ARN_KEY = 'EXTERNAL_API_LAMBDA_ARN'
 SC_GRAPH_BUCKET_NAME_KEY = 'SC_GRAPH_BUCKET'
 RECONFIGURATION_QUEUE_URL_KEY = 'RECONFIGURATION_QUEUE_URL'
 RT_ESTIMATOR_LAMBDA_ARN_KEY = 'RT_ESTIMATOR_LAMBDA_ARN'
+PT_CACHE_BUCKET_NAME_KEY = 'PT_CACHE_BUCKET'                # Optional: PT results shared across Lambdas when set
+PT_CACHE_MAX_SIZE_KEY = 'PT_CACHE_MAX_SIZE'                 # Optional: PT results kept in memory by each Lambda
+ORDER_BATCH_MAX_WORKERS_KEY = 'ORDER_BATCH_MAX_WORKERS'     # Optional: threads estimating a batch of orders
+STAGE_METRICS_NAMESPACE_KEY = 'STAGE_METRICS_NAMESPACE'     # Optional: CloudWatch namespace of the estimate stage metrics, emitted when set
 
 COMMON_API_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -1,22 +1,44 @@
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Optional, Iterable, Any
+import orjson
 from aws_lambda_powertools.event_handler.api_gateway import Response
 
 from utils.config import COMMON_API_HEADERS
 
 INDENT = 2
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"      # Cursor of the next page of a paginated NDJSON body, absent on the last page
+
+# Equivalent to json.dumps(data, indent=INDENT) (UTF-8 is not escaped), encoded natively
+ORJSON_OPTIONS: int = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _dumps(data: Any) -> str:
+    return orjson.dumps(data, option=ORJSON_OPTIONS).decode('utf-8')
 
 def success_response(data: Dict | List) -> Response:
     return Response(
         status_code=200,
-        body=json.dumps(data, indent=INDENT),
+        body=_dumps(data),
         headers=COMMON_API_HEADERS
     )
 
+def ndjson_response(lines: Iterable[str], maybe_next_cursor: Optional[int] = None) -> Response:
+    headers: Dict[str, str] = {
+        **COMMON_API_HEADERS,
+        "Content-Type": NDJSON_CONTENT_TYPE
+    }
+    if maybe_next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = str(maybe_next_cursor)
+        headers["Access-Control-Expose-Headers"] = NEXT_CURSOR_HEADER
+    return Response(
+        status_code=200,
+        body="".join(f"{line}\n" for line in lines),
+        headers=headers
+    )
+
 def created_response(location_url: str, data: Optional[Dict | List] = None) -> Response:
     return Response(
         status_code=201,
-        body=json.dumps(data, indent=INDENT) if data else "",
+        body=_dumps(data) if data else "",
         headers={
             **COMMON_API_HEADERS,
             "Location": location_url
@@ -29,21 +51,21 @@ def multi_status_response(location_url: str, data: List, add_location_header: bo
         headers["Location"] = location_url
     return Response(
         status_code=207,
-        body=json.dumps(data, indent=INDENT),
+        body=_dumps(data),
         headers=headers
     )
 
 def bad_request_response(error_message: str) -> Response:
     return Response(
         status_code=400,
-        body=json.dumps({"message": error_message}, indent=INDENT),
+        body=_dumps({"message": error_message}),
         headers=COMMON_API_HEADERS
     )
 
 def not_found_response(error_message: str) -> Response:
     return Response(
         status_code=404,
-        body=json.dumps({"message": error_message}, indent=INDENT),
+        body=_dumps({"message": error_message}),
         headers=COMMON_API_HEADERS
     )
 
@@ -54,7 +76,7 @@ def internal_error_response(error_message: str, data: Optional[Dict | List] = No
 
     return Response(
         status_code=500,
-        body=json.dumps(body, indent=INDENT),
+        body=_dumps(body),
         headers=COMMON_API_HEADERS
     )
 
@@ -64,6 +86,6 @@ def unprocessable_entity_response(message: str, data: Optional[Dict | List] = No
         body["data"] = data
     return Response(
         status_code=422,
-        body=json.dumps(body, indent=INDENT),
+        body=_dumps(body),
         headers=COMMON_API_HEADERS
     )
\ No newline at end of file
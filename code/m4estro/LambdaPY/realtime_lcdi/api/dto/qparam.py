@@ -5,10 +5,19 @@ class RealtimeQParamKeys(Enum):
     ORDER = "order"
     VERTEX = "vertex"
     CARRIER_NAME = "carrier_name"
+    LIMIT = "limit"
+    AFTER = "after"
+    LATEST = "latest"
+    FORMAT = "format"
+    DEBUG = "debug"
 
     @classmethod
     def get_all_values(cls) -> Set[str]:
         return {key.value for key in cls}
+
+class RetrievalFormat(Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
     
 class PathQParamKeys(Enum):
     SOURCE = "source"
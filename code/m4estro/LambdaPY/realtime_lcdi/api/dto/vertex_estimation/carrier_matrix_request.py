@@ -0,0 +1,36 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from pydantic.config import ConfigDict
+
+from resolver.vertex_dto import VertexDTO
+from api.dto.carrier_dto import CarrierDTO
+from api.dto.site_dto import SiteDTO
+
+class CarrierMatrixRequestDTO(BaseModel):
+    vertex: VertexDTO = Field(..., description="Vertex object descriptor")
+    carriers: List[CarrierDTO] = Field(..., min_length=1, description="Candidate carrier object descriptors")
+    site: SiteDTO = Field(..., description="Site object descriptor")
+    
+    order_time: datetime = Field(
+        ...,
+        alias="orderTime",
+        description="Timestamp of the order event (e.g. of the time the order was confirmed)."
+    )
+    event_time: datetime = Field(
+        ...,
+        alias="eventTime",
+        description="Timestamp of the last event (both dispatch or shipment event)."
+    )
+    estimation_time: datetime = Field(
+        ...,
+        alias="estimationTime",
+        description="Timestamp to start the estimation process with."
+    )
+    maybe_shipment_time: Optional[datetime] = Field(
+        default=None,
+        alias="shipmentTime",
+        description="Timestamp of the first carrier event (e.g. of the time the shipment started) or None."
+    )
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
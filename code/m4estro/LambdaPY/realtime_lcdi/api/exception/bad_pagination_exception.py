@@ -0,0 +1,12 @@
+class BadPaginationException(Exception):
+    """
+    Exception raised when a pagination query parameter is invalid.
+    """
+
+    def __init__(self, param: str, value: str) -> None:
+        super().__init__(f"Invalid pagination parameter {param}: {value}")
+        self.param: str = param
+        self.value: str = value
+
+    def __str__(self):
+        return f"'{self.value}' is not a valid value for '{self.param}'."
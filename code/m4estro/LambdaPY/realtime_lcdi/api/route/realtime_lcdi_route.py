@@ -1,9 +1,9 @@
-from typing import Dict, List, Any, TYPE_CHECKING
+from typing import Dict, List, Set, Any, Optional, TYPE_CHECKING
 from collections import defaultdict
 from pydantic import ValidationError
 
 from utils.response import (
-    success_response, created_response, multi_status_response, 
+    success_response, ndjson_response, created_response, multi_status_response, 
     internal_error_response, bad_request_response,
     unprocessable_entity_response
 )
@@ -17,20 +17,24 @@ from core.calculator.tfst.pt.route_time.rt_estimator_lambda_client import RTEsti
 from core.serializer.bucket_data_loader import BucketDataLoader
 from core.exception.invalid_time_sequence_exception import InvalidTimeSequenceException
 from core.exception.prob_path_exception import ProbPathException
-from core.service.calculator_service import compute_order_realtime_lcdi
+from core.service.calculator_service import compute_orders_realtime_lcdi, OrderEstimationInput
 from core.sc_graph.sc_graph import SCGraph
 from core.sc_graph.sc_graph_resolver import SCGraphResolver, SCGraphVertexResult
 
-from api.dto.qparam import RealtimeQParamKeys
+from api.dto.qparam import RealtimeQParamKeys, RetrievalFormat
+from api.exception.bad_pagination_exception import BadPaginationException
 from api.dto.order_estimation.order_estimation_request import OrderEstimationRequest, OrderEstimationRequestDTO
 from api.dto.order_estimation.order_estimation_response import (
     OrderEstimationCreatedDTO, OrderEstimationFailedDTO, OrderEstimationErrorDTO, 
     OrderEstimationResponseDTO, OrderEstimationStatus
 )
 from api.dto.vertex_estimation.vertex_estimation_request import VertexEstimationRequestDTO, VertexEstimationRequest
+from api.dto.vertex_estimation.carrier_matrix_request import CarrierMatrixRequestDTO
 
-from api.service.retrieval_service import get_realtime_lcdi_by_order
-from api.service.volatile_calculator_service import compute_volatile_realtime_lcdi
+from api.service.retrieval_service import (
+    get_realtime_lcdi_by_order, get_realtime_lcdi_page, get_latest_lcdi, get_realtime_lcdi_ndjson_page, RetrievalPage, NDJSONPage
+)
+from api.service.volatile_calculator_service import compute_volatile_realtime_lcdi, compute_volatile_carrier_matrix
 
 from resolver.vertex_dto import VertexDTO
 from resolver.vertex_not_found_exception import VertexNotFoundException
@@ -43,6 +47,21 @@ if TYPE_CHECKING:
 
 logger = get_logger(__name__)
 REALTIME_LCDI_PATH: str = "/lcdi/realtime"
+RETRIEVAL_Q_PARAM_KEYS: Set[str] = {
+    RealtimeQParamKeys.ORDER.value,
+    RealtimeQParamKeys.LIMIT.value,
+    RealtimeQParamKeys.AFTER.value,
+    RealtimeQParamKeys.LATEST.value,
+    RealtimeQParamKeys.FORMAT.value
+}
+LATEST_Q_PARAM_KEYS: Set[str] = {
+    RealtimeQParamKeys.ORDER.value,
+    RealtimeQParamKeys.LIMIT.value,
+    RealtimeQParamKeys.AFTER.value
+}
+COMPUTE_Q_PARAM_KEYS: Set[str] = {
+    RealtimeQParamKeys.DEBUG.value
+}
 
 def _retrieve_vertex_dto(order_estimation_dto: OrderEstimationRequestDTO) -> VertexDTO:
     if order_estimation_dto.vertex is None:
@@ -50,22 +69,68 @@ def _retrieve_vertex_dto(order_estimation_dto: OrderEstimationRequestDTO) -> Ver
 
     return order_estimation_dto.vertex
 
+def _to_order_estimation_response(req: OrderEstimationRequestDTO, outcome: Dict[str, Any] | Exception) -> OrderEstimationResponseDTO:
+    if isinstance(outcome, VertexNotFoundException):
+        logger.warning(f"Vertex not found for request {req}: {outcome}")
+        return OrderEstimationFailedDTO(message=f"Vertex not found for request {req}: {outcome}")
+    if isinstance(outcome, InvalidTimeSequenceException):
+        logger.warning(f"Invalid time sequence for request {req}: {outcome}")
+        return OrderEstimationFailedDTO(message=f"Invalid time sequence for request {req}: {outcome}")
+    if isinstance(outcome, ProbPathException):
+        logger.warning(f"Paths extraction failed for request {req}: {outcome}")
+        return OrderEstimationFailedDTO(message=f"Paths extraction failed for request {req}: {outcome}")
+    if isinstance(outcome, Exception):
+        logger.error(f"Error processing request: {req}", exc_info=outcome)
+        return OrderEstimationErrorDTO(message=f"Error during computation of realtime LCDI for request {req}: {outcome}")
+
+    return OrderEstimationCreatedDTO(
+        id=outcome['id'],
+        location=f"{REALTIME_LCDI_PATH}/{outcome['id']}",
+        data=outcome
+    )
+
 def register_routes(app: 'APIGatewayRestResolver') -> None:
     @app.get(REALTIME_LCDI_PATH)
     def handle_retrieve_realtime_lcdi() -> 'Response':
         q_params: Dict[str, str] = get_query_params(
             app.current_event.query_string_parameters,
-            allowed_keys={RealtimeQParamKeys.ORDER.value}
+            allowed_keys=RETRIEVAL_Q_PARAM_KEYS
         )
         logger.debug(f"Filtered query parameters for GET {REALTIME_LCDI_PATH}: {q_params}")
 
         try:
+            if q_params.get(RealtimeQParamKeys.FORMAT.value, '').lower() == RetrievalFormat.NDJSON.value:
+                ndjson_page: NDJSONPage = get_realtime_lcdi_ndjson_page(q_params)
+                return ndjson_response(ndjson_page.lines, ndjson_page.maybe_next_cursor)
+
+            if RealtimeQParamKeys.LIMIT.value in q_params or RealtimeQParamKeys.AFTER.value in q_params:
+                page: RetrievalPage = get_realtime_lcdi_page(q_params)
+                return success_response(page.to_dict())
+
             data: List[Dict[str, Any]] | Dict[str, Any] = get_realtime_lcdi_by_order(q_params)
             return success_response(data)
+        except BadPaginationException as e:
+            return bad_request_response(str(e))
         except Exception as e:
             logger.exception("Unexpected error during realtime LCDI retrieval")
             return internal_error_response(f"Unexpected error during realtime LCDI retrieval: {str(e)}")
 
+    @app.get(f"{REALTIME_LCDI_PATH}/latest")
+    def handle_retrieve_latest_realtime_lcdi() -> 'Response':
+        q_params: Dict[str, str] = get_query_params(
+            app.current_event.query_string_parameters or {},
+            allowed_keys=LATEST_Q_PARAM_KEYS
+        )
+        logger.debug(f"Filtered query parameters for GET {REALTIME_LCDI_PATH}/latest: {q_params}")
+
+        try:
+            return success_response(get_latest_lcdi(q_params))
+        except BadPaginationException as e:
+            return bad_request_response(str(e))
+        except Exception as e:
+            logger.exception("Unexpected error during latest realtime LCDI retrieval")
+            return internal_error_response(f"Unexpected error during latest realtime LCDI retrieval: {str(e)}")
+
     @app.post(REALTIME_LCDI_PATH)
     def handle_compute_realtime_lcdi_from_order() -> 'Response':
         payload: Dict[str, Any] = app.current_event.json_body
@@ -85,6 +150,12 @@ def register_routes(app: 'APIGatewayRestResolver') -> None:
         )
         is_single: bool = isinstance(payload_parsed, OrderEstimationRequestDTO)
 
+        q_params: Dict[str, str] = get_query_params(
+            app.current_event.query_string_parameters or {},
+            allowed_keys=COMPUTE_Q_PARAM_KEYS
+        )
+        include_metrics: bool = q_params.get(RealtimeQParamKeys.DEBUG.value, '').lower() == 'true'
+
         bd_loader: BucketDataLoader = BucketDataLoader()
         
         sc_graph: SCGraph = bd_loader.load_sc_graph()
@@ -96,38 +167,45 @@ def register_routes(app: 'APIGatewayRestResolver') -> None:
         vertex_resolver: SCGraphResolver = SCGraphResolver(lambda_client=geo_service_lambda_client, maybe_sc_graph=sc_graph)
         logger.debug("Vertex resolver initialized")
 
-        results: List[OrderEstimationResponseDTO] = []
+        # Vertices are resolved first, then the resolved orders are estimated and saved as one batch
+        outcomes: List[Optional[Dict[str, Any] | Exception]] = [None] * len(requests)
+        batch_indices: List[int] = []
+        batch_inputs: List[OrderEstimationInput] = []
 
-        for req in requests:
-            logger.debug(f"Processing request: {req}")
+        for i, req in enumerate(requests):
+            logger.debug(f"Resolving vertex for request: {req}")
             try:
                 v_dto: VertexDTO = _retrieve_vertex_dto(req)
                 v_result: SCGraphVertexResult = vertex_resolver.resolve(v_dto)
-                resource = compute_order_realtime_lcdi(
-                    vertex=v_result.vertex,
-                    order_id=req.order_id,
-                    event_time=req.event_time,
-                    maybe_estimation_time=req.estimation_time,
+            except Exception as ex:
+                outcomes[i] = ex
+                continue
+
+            batch_indices.append(i)
+            batch_inputs.append(OrderEstimationInput(
+                vertex=v_result.vertex,
+                order_id=req.order_id,
+                event_time=req.event_time,
+                maybe_estimation_time=req.estimation_time
+            ))
+
+        if batch_inputs:
+            try:
+                batch_outcomes: List[Dict[str, Any] | Exception] = compute_orders_realtime_lcdi(
+                    batch_inputs,
                     maybe_sc_graph=sc_graph,
-                    use_order_status=False
+                    use_order_status=False,
+                    include_metrics=include_metrics
                 )
-                results.append(OrderEstimationCreatedDTO(
-                    id=resource['id'],
-                    location=f"{REALTIME_LCDI_PATH}/{resource['id']}",
-                    data=resource
-                ))
-            except VertexNotFoundException as ex:
-                logger.warning(f"Vertex not found for request {req}: {ex}")
-                results.append(OrderEstimationFailedDTO(message=f"Vertex not found for request {req}: {ex}"))
-            except InvalidTimeSequenceException as ex:
-                logger.warning(f"Invalid time sequence for request {req}: {ex}")
-                results.append(OrderEstimationFailedDTO(message=f"Invalid time sequence for request {req}: {ex}"))
-            except ProbPathException as ex:
-                logger.warning(f"Paths extraction failed for request {req}: {ex}")
-                results.append(OrderEstimationFailedDTO(message=f"Paths extraction failed for request {req}: {ex}"))
             except Exception as ex:
-                logger.exception(f"Error processing request: {req}")
-                results.append(OrderEstimationErrorDTO(message=f"Error during computation of realtime LCDI for request {req}: {ex}"))
+                batch_outcomes = [ex] * len(batch_inputs)
+
+            for i, outcome in zip(batch_indices, batch_outcomes):
+                outcomes[i] = outcome
+
+        results: List[OrderEstimationResponseDTO] = [
+            _to_order_estimation_response(req, outcome) for req, outcome in zip(requests, outcomes)  # type: ignore
+        ]
 
         logger.debug("Finished processing realtime LCDI requests")
 
@@ -242,3 +320,49 @@ def register_routes(app: 'APIGatewayRestResolver') -> None:
             return internal_error_response(error_message=result["message"])
 
         return success_response(data=results)
+
+    @app.post(f"{REALTIME_LCDI_PATH}/volatile/carriers")
+    def handle_compute_volatile_carrier_matrix() -> 'Response':
+        payload: Dict[str, Any] = app.current_event.json_body
+        logger.debug(f"Received payload for POST {REALTIME_LCDI_PATH}/volatile/carriers: {payload}")
+
+        try:
+            request: CarrierMatrixRequestDTO = parse_as(CarrierMatrixRequestDTO, payload)
+        except ValidationError as e:
+            logger.info(f"Invalid request body for POST {REALTIME_LCDI_PATH}/volatile/carriers: {e}")
+            return bad_request_response(f"Invalid request body: {str(e)}")
+
+        logger.debug(f"Parsed payload: {request}")
+
+        bd_loader: BucketDataLoader = BucketDataLoader()
+        sc_graph: SCGraph = bd_loader.load_sc_graph()
+        logger.debug(f"SCGraph retrieved successfully")
+
+        geo_service_lambda_client: GeoServiceLambdaClient = GeoServiceLambdaClient(
+            lambda_arn=get_env(EXTERNAL_API_LAMBDA_ARN_KEY)
+        )
+        vertex_resolver: SCGraphResolver = SCGraphResolver(lambda_client=geo_service_lambda_client, maybe_sc_graph=sc_graph)
+        logger.debug("Vertex resolver initialized")
+
+        try:
+            v_result: SCGraphVertexResult = vertex_resolver.resolve(request.vertex)
+            matrix: Dict[str, Any] = compute_volatile_carrier_matrix(
+                carrier_matrix_request=request,
+                vertex=v_result.vertex,
+                sc_graph=sc_graph
+            )
+        except VertexNotFoundException as ex:
+            logger.warning(f"Vertex not found for request {request}: {ex}")
+            return unprocessable_entity_response(message=f"Vertex not found: {ex}")
+        except InvalidTimeSequenceException as ex:
+            logger.warning(f"Invalid time sequence for request {request}: {ex}")
+            return unprocessable_entity_response(message=f"Invalid time sequence: {ex}")
+        except ProbPathException as ex:
+            logger.warning(f"Paths extraction failed for request {request}: {ex}")
+            return unprocessable_entity_response(message=f"Paths extraction failed: {ex}")
+        except Exception as ex:
+            logger.exception(f"Error processing request: {request}")
+            return internal_error_response(error_message=f"Error during computation of the carrier matrix: {ex}")
+
+        logger.debug("Finished processing carrier matrix request")
+        return success_response(data=matrix)
@@ -1,18 +1,20 @@
-from typing import Set, Dict, Any, List, TYPE_CHECKING
-from sqlalchemy.orm import joinedload
-from collections import defaultdict
+from typing import Set, Dict, Any, List, Optional, Iterator, TYPE_CHECKING
+from sqlalchemy.orm import joinedload, Session, Query
+from dataclasses import dataclass
+import orjson
 
-from utils.config import get_env, DATABASE_SECRET_ARN_KEY, AWS_REGION_KEY
 from utils.parsing import parse_id_list
 
 from service.read_only_db_connector import ReadOnlyDBConnector
 from service.db_utils import get_read_only_db_connector
 
 from api.dto.qparam import RealtimeQParamKeys
+from api.exception.bad_pagination_exception import BadPaginationException
 
 from core.formatter.formatter import Formatter, EstimatedTimeSharedDTO
 
 from model.estimated_time import EstimatedTime
+from model.latest_estimated_time import LatestEstimatedTime
 from model.order import Order
 from model.site import Site
 from model.manufacturer import Manufacturer
@@ -24,76 +26,236 @@ if TYPE_CHECKING:
 from logger import get_logger
 logger = get_logger(__name__)
 
-def get_realtime_lcdi_by_order(query_params: Dict[str, str]) -> List[Dict[str, Any]] | Dict[str, Any]:
+MAX_PAGE_SIZE: int = 1000
+EXPORT_PAGE_SIZE: int = 200         # Orders loaded per query while exporting as NDJSON
+
+@dataclass(frozen=True)
+class RetrievalParams:
+    order_ids: Set[int]
+    maybe_limit: Optional[int]
+    maybe_after: Optional[int]
+    latest_only: bool
+
+@dataclass(frozen=True)
+class RetrievalPage:
+    data: List[Dict[str, Any]]
+    maybe_next_cursor: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"data": self.data, "next_cursor": self.maybe_next_cursor}
+
+@dataclass(frozen=True)
+class NDJSONPage:
+    lines: List[str]
+    maybe_next_cursor: Optional[int]
+
+def _parse_int_param(query_params: Dict[str, str], key: RealtimeQParamKeys, min_value: int) -> Optional[int]:
+    raw: Optional[str] = query_params.get(key.value)
+    if raw is None:
+        return None
+
+    try:
+        value: int = int(raw)
+    except ValueError:
+        raise BadPaginationException(param=key.value, value=raw)
+
+    if value < min_value:
+        raise BadPaginationException(param=key.value, value=raw)
+    return value
+
+def parse_retrieval_params(query_params: Dict[str, str]) -> RetrievalParams:
     order_param: str = query_params.get(RealtimeQParamKeys.ORDER.value, '')
     order_ids: Set[int] = parse_id_list(order_param)
     logger.debug(f"Order query parameter: {order_param} -> IDs: {order_ids or 'ALL'}")
 
+    maybe_limit: Optional[int] = _parse_int_param(query_params, RealtimeQParamKeys.LIMIT, min_value=1)
+    if maybe_limit is not None and maybe_limit > MAX_PAGE_SIZE:
+        raise BadPaginationException(param=RealtimeQParamKeys.LIMIT.value, value=str(maybe_limit))
+
+    return RetrievalParams(
+        order_ids=order_ids,
+        maybe_limit=maybe_limit,
+        maybe_after=_parse_int_param(query_params, RealtimeQParamKeys.AFTER, min_value=0),
+        latest_only=query_params.get(RealtimeQParamKeys.LATEST.value, '').lower() == 'true'
+    )
+
+def _query_order_ids_page(session: Session, params: RetrievalParams, maybe_after: Optional[int], limit: int) -> List[int]:
+    """Keyset page over the ids of the orders with at least one estimate, in ascending order."""
+    query: Query = session.query(EstimatedTime.order_id).distinct()
+    if params.order_ids:
+        query = query.filter(EstimatedTime.order_id.in_(params.order_ids))
+    if maybe_after is not None:
+        query = query.filter(EstimatedTime.order_id > maybe_after)
+
+    return [order_id for (order_id,) in query.order_by(EstimatedTime.order_id).limit(limit).all()]
+
+def _build_estimated_times_query(session: Session, order_ids: Set[int], latest_only: bool) -> Query:
+    # Eagerly load the relationships of the order level fields to avoid N+1 queries:
+    # estimate level fields come formatted from the stored payload
+    query: Query = session.query(EstimatedTime).options(
+        joinedload(EstimatedTime.order).joinedload(Order.carrier),
+        joinedload(EstimatedTime.order).joinedload(Order.site).joinedload(Site.supplier),
+        joinedload(EstimatedTime.order).joinedload(Order.manufacturer),
+        joinedload(EstimatedTime.time_deviation)
+    )
+
+    if order_ids:
+        query = query.filter(EstimatedTime.order_id.in_(order_ids))
+
+    if latest_only:
+        # The projection holds one estimate per order: no scan of the estimates history
+        query = query.join(LatestEstimatedTime, LatestEstimatedTime.estimated_time_id == EstimatedTime.id)
+
+    return query.order_by(EstimatedTime.order_id, EstimatedTime.estimation_time, EstimatedTime.id)
+
+def _query_estimated_times(session: Session, order_ids: Set[int], latest_only: bool) -> List[EstimatedTime]:
+    estimated_times: List[EstimatedTime] = _build_estimated_times_query(session, order_ids, latest_only).all()
+    logger.debug(f"Retrieved {len(estimated_times)} estimated time records")
+    return estimated_times
+
+def _format_order(formatter: Formatter, order_id: int, ets: List[EstimatedTime]) -> Dict[str, Any]:
+    ets_last: EstimatedTime = ets[-1]
+    order: Order = ets_last.order
+    site: Site = order.site
+    supplier: 'Supplier' = site.supplier
+    manufacturer: Manufacturer = order.manufacturer
+    time_deviation: 'TimeDeviation' = ets_last.time_deviation
+
+    shared: EstimatedTimeSharedDTO = EstimatedTimeSharedDTO(
+        order_id=order_id,
+        manufacturer_order_id=order.manufacturer_order_id,      #TODO: Adjust model to set this field not nullable
+        tracking_number=order.tracking_number,
+        carrier_id=order.carrier.id,
+        carrier_name=order.carrier.name,
+        site_id=site.id,
+        site_location=site.location.name,
+        supplier_id=supplier.id,
+        manufacturer_supplier_id=supplier.manufacturer_supplier_id,
+        supplier_name=supplier.name,
+        manufacturer_id=manufacturer.id,
+        manufacturer_name=manufacturer.name,
+        manufacturer_location=manufacturer.location_name,
+        SLS=order.SLS,
+        SRS=order.SRS,
+        EODT=ets_last.EODT,
+        EDD=ets_last.EDD,
+        dispatch_td_lower=time_deviation.dt_hours_lower,
+        dispatch_td_upper=time_deviation.dt_hours_upper,
+        shipment_td_lower=time_deviation.st_hours_lower,
+        shipment_td_upper=time_deviation.st_hours_upper,
+        status=order.status
+    )
+
+    return formatter.format_et_by_order(shared, ets)
+
+def _iter_formatted_orders(formatter: Formatter, estimated_times: List[EstimatedTime]) -> Iterator[Dict[str, Any]]:
+    """Formats estimates sorted by order id and estimation time, one order at a time."""
+    current: List[EstimatedTime] = []
+    for et in estimated_times:
+        if current and current[-1].order_id != et.order_id:
+            yield _format_order(formatter, current[-1].order_id, current)
+            current = []
+        current.append(et)
+
+    if current:
+        yield _format_order(formatter, current[-1].order_id, current)
+
+def get_realtime_lcdi_by_order(query_params: Dict[str, str]) -> List[Dict[str, Any]] | Dict[str, Any]:
+    params: RetrievalParams = parse_retrieval_params(query_params)
+    formatter: Formatter = Formatter()
+
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+    with ro_db_connector.session_scope() as session:
+        estimated_times: List[EstimatedTime] = _query_estimated_times(session, params.order_ids, params.latest_only)
+        data: List[Dict[str, Any]] = list(_iter_formatted_orders(formatter, estimated_times))
+
+    logger.debug(f"Formatted estimated times records of {len(data)} orders")
+    return data[0] if len(data) == 1 else data
+
+def get_latest_lcdi(query_params: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Newest estimate of the requested orders, read from the latest_estimated_times projection
+    with a single lookup on its unique order_id index. 'limit' and 'after' page it as the other retrievals.
+    """
+    params: RetrievalParams = parse_retrieval_params(query_params)
+    formatter: Formatter = Formatter()
+
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+    with ro_db_connector.session_scope() as session:
+        query: Query = session.query(LatestEstimatedTime)
+        if params.order_ids:
+            query = query.filter(LatestEstimatedTime.order_id.in_(params.order_ids))
+        if params.maybe_after is not None:
+            query = query.filter(LatestEstimatedTime.order_id > params.maybe_after)
+
+        query = query.order_by(LatestEstimatedTime.order_id).limit(params.maybe_limit or MAX_PAGE_SIZE)
+        data: List[Dict[str, Any]] = [formatter.format_latest_et(latest) for latest in query.all()]
+
+    logger.debug(f"Retrieved latest estimates of {len(data)} orders")
+    return data
+
+def get_realtime_lcdi_page(query_params: Dict[str, str]) -> RetrievalPage:
+    """
+    Keyset page of orders: the orders with id greater than the 'after' cursor, at most 'limit' of them.
+    next_cursor is the last order id of the page, or None on the last page.
+    """
+    params: RetrievalParams = parse_retrieval_params(query_params)
+    limit: int = params.maybe_limit or MAX_PAGE_SIZE
     formatter: Formatter = Formatter()
 
     ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
     with ro_db_connector.session_scope() as session:
-        # Eagerly load all relevant relationships to avoid N+1 queries
-        query = session.query(EstimatedTime).options(
-            joinedload(EstimatedTime.order).joinedload(Order.carrier),
-            joinedload(EstimatedTime.order).joinedload(Order.site).joinedload(Site.supplier),
-            joinedload(EstimatedTime.order).joinedload(Order.manufacturer),
-            joinedload(EstimatedTime.vertex),
-            joinedload(EstimatedTime.time_deviation),
-            joinedload(EstimatedTime.alpha)
-        )
-
-        if order_ids:
-            query = query.filter(EstimatedTime.order_id.in_(order_ids))
-
-        estimated_times: List[EstimatedTime] = query.all()
-        logger.debug(f"Retrieved {len(estimated_times)} estimated time records")
-
-        et_grouped_by_order: Dict[int, List[EstimatedTime]] = defaultdict(list)
-        for et in estimated_times:
-            et_grouped_by_order[et.order_id].append(et)
-        logger.debug(f"Grouped estimated times records by: {len(et_grouped_by_order)} orders")
-
-        for et in et_grouped_by_order.values():
-            et.sort(key=lambda x: x.estimation_time, reverse=False)
+        # One extra id tells whether a next page exists without a count query
+        page_order_ids: List[int] = _query_order_ids_page(session, params, params.maybe_after, limit + 1)
+        has_next: bool = len(page_order_ids) > limit
+        page_order_ids = page_order_ids[:limit]
 
         data: List[Dict[str, Any]] = []
-        for order_id, ets in et_grouped_by_order.items():
-            ets_last: EstimatedTime = ets[-1]
-            order: Order = ets_last.order
-            site: Site = order.site
-            supplier: Supplier = site.supplier
-            manufacturer: Manufacturer = order.manufacturer
-            time_deviation: 'TimeDeviation' = ets_last.time_deviation
-
-            shared: EstimatedTimeSharedDTO = EstimatedTimeSharedDTO(
-                order_id=order_id,
-                manufacturer_order_id=order.manufacturer_order_id,      #TODO: Adjust model to set this field not nullable
-                tracking_number=order.tracking_number,
-                carrier_id=order.carrier.id,
-                carrier_name=order.carrier.name,
-                site_id=site.id,
-                site_location=site.location.name,
-                supplier_id=supplier.id,
-                manufacturer_supplier_id=supplier.manufacturer_supplier_id,
-                supplier_name=supplier.name,
-                manufacturer_id=manufacturer.id,
-                manufacturer_name=manufacturer.name,
-                manufacturer_location=manufacturer.location_name,
-                SLS=order.SLS,
-                SRS=order.SRS,
-                EODT=ets_last.EODT,
-                EDD=ets_last.EDD,
-                dispatch_td_lower=time_deviation.dt_hours_lower,
-                dispatch_td_upper=time_deviation.dt_hours_upper,
-                shipment_td_lower=time_deviation.st_hours_lower,
-                shipment_td_upper=time_deviation.st_hours_upper,
-                status=order.status
-            )
-
-            data.append(formatter.format_et_by_order(shared, ets))
+        if page_order_ids:
+            estimated_times: List[EstimatedTime] = _query_estimated_times(session, set(page_order_ids), params.latest_only)
+            data = list(_iter_formatted_orders(formatter, estimated_times))
 
-    return data[0] if len(data) == 1 else data
+    maybe_next_cursor: Optional[int] = page_order_ids[-1] if has_next else None
+    logger.debug(f"Retrieved page of {len(data)} orders after {params.maybe_after}: next cursor {maybe_next_cursor}")
+    return RetrievalPage(data=data, maybe_next_cursor=maybe_next_cursor)
+
+def get_realtime_lcdi_ndjson_page(query_params: Dict[str, str]) -> NDJSONPage:
+    """
+    Keyset page of orders as JSON lines, bounded like get_realtime_lcdi_page: at most 'limit' orders, MAX_PAGE_SIZE by default.
+    Orders are loaded in pages of EXPORT_PAGE_SIZE, so only one of them has its estimates in memory at a time.
+    next_cursor is the last order id of the page, or None on the last page.
+    """
+    params: RetrievalParams = parse_retrieval_params(query_params)
+    limit: int = params.maybe_limit or MAX_PAGE_SIZE
+    formatter: Formatter = Formatter()
+    maybe_after: Optional[int] = params.maybe_after
+    lines: List[str] = []
+    has_next: bool = False
+
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+    with ro_db_connector.session_scope() as session:
+        remaining: int = limit
+        while remaining > 0:
+            page_size: int = min(EXPORT_PAGE_SIZE, remaining)
+            # On the last chunk, one extra id tells whether a next page exists without a count query
+            query_size: int = page_size + 1 if page_size == remaining else page_size
+            page_order_ids: List[int] = _query_order_ids_page(session, params, maybe_after, query_size)
+            has_next = len(page_order_ids) > page_size
+            page_order_ids = page_order_ids[:page_size]
+            if not page_order_ids:
+                break
+
+            estimated_times: List[EstimatedTime] = _query_estimated_times(session, set(page_order_ids), params.latest_only)
+            lines.extend(orjson.dumps(order_data).decode('utf-8') for order_data in _iter_formatted_orders(formatter, estimated_times))
 
+            # Loaded estimates are not needed anymore: keep the session identity map bounded
+            session.expunge_all()
 
+            maybe_after = page_order_ids[-1]
+            remaining -= len(page_order_ids)
+            if len(page_order_ids) < page_size:
+                break
 
+    maybe_next_cursor: Optional[int] = maybe_after if has_next else None
+    logger.debug(f"Exported {len(lines)} orders after {params.maybe_after} as NDJSON: next cursor {maybe_next_cursor}")
+    return NDJSONPage(lines=lines, maybe_next_cursor=maybe_next_cursor)
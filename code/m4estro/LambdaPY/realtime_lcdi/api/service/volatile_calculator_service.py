@@ -1,4 +1,4 @@
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Dict, Any, List, TYPE_CHECKING
 
 import igraph as ig
 
@@ -10,12 +10,14 @@ from service.read_only_db_connector import ReadOnlyDBConnector
 from core.serializer.bucket_data_loader import BucketDataLoader
 from core.executor.executor import ExecutorResult
 from core.calculator.tfst.pt.route_time.route_time_estimator import RouteTimeEstimator
-from core.service.calculator_service import compute_realtime_lcdi, get_status
+from core.service.calculator_service import compute_realtime_lcdi, compute_realtime_lcdi_by_carrier, get_status
+from core.pipeline.estimation_request import EstimationResult
 from core.query_handler.query_handler import QueryHandler
 from core.sc_graph.sc_graph import SCGraph
 from core.formatter.formatter import Formatter
 
 from api.dto.vertex_estimation.vertex_estimation_request import VertexEstimationRequestDTO
+from api.dto.vertex_estimation.carrier_matrix_request import CarrierMatrixRequestDTO
 from api.dto.carrier_dto import CarrierDTO, CarrierIdDTO, CarrierNameDTO
 
 if TYPE_CHECKING:
@@ -85,4 +87,54 @@ def compute_volatile_realtime_lcdi(
         manufacturer=manufacturer,
         executor_result=executor_result,
         status=get_status(vertex, vertex_estimation_request.maybe_shipment_time)
-    )
\ No newline at end of file
+    )
+
+def compute_volatile_carrier_matrix(
+        carrier_matrix_request: CarrierMatrixRequestDTO,
+        vertex: ig.Vertex,
+        sc_graph: SCGraph,
+        ) -> Dict[str, Any]:
+
+    vertex_id: int = vertex[V_ID_ATTR]
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+
+    with ro_db_connector.session_scope() as session:
+        query_handler: QueryHandler = QueryHandler(session=session)
+
+        site: 'Site' = query_handler.get_site(site_id=carrier_matrix_request.site.site_id)
+        supplier: 'Supplier' = site.supplier
+        logger.debug(f"Site and supplier data retrieved successfully: {site}")
+
+        carriers: List['Carrier'] = list({
+            carrier.id: carrier 
+            for carrier in (_get_carrier_from_request(query_handler, carrier_dto) for carrier_dto in carrier_matrix_request.carriers)
+        }.values())
+        logger.debug(f"Carriers data retrieved successfully: {carriers}")
+
+        manufacturer: 'Manufacturer' = query_handler.get_manufacturer()
+        logger.debug(f"Manufacturer data retrieved successfully: {manufacturer}")
+
+    results: List[EstimationResult] = compute_realtime_lcdi_by_carrier(
+        sc_graph,
+        site,
+        carriers,
+        vertex_id,
+        carrier_matrix_request.order_time,
+        event_time=carrier_matrix_request.event_time,
+        estimation_time=carrier_matrix_request.estimation_time,
+        maybe_shipment_time=carrier_matrix_request.maybe_shipment_time
+    )
+
+    bucket_loader: BucketDataLoader = BucketDataLoader()
+    bucket_loader.save_dp_managers(sc_graph, force=False)
+
+    formatter: Formatter = Formatter()
+    return formatter.format_carrier_matrix_result(
+        vertex=vertex,
+        site=site,
+        supplier=supplier,
+        carriers=carriers,
+        manufacturer=manufacturer,
+        results=results,
+        status=get_status(vertex, carrier_matrix_request.maybe_shipment_time)
+    )
@@ -40,18 +40,22 @@ class DTCalculator:
         
         if isinstance(dt_distribution, DTGammaDTO):
             dt_gamma: DTGammaDTO = dt_distribution
-            adt: float = compute_gamma_mean(
-                shape=dt_gamma.shape, 
-                scale=dt_gamma.scale,
-                loc=dt_gamma.loc
-            )
+            if dt_gamma.maybe_summary is not None:
+                adt: float = dt_gamma.maybe_summary.mean
+                dispatch_ci: Tuple[float, float] = dt_gamma.maybe_summary.ci(self.confidence)
+            else:
+                adt: float = compute_gamma_mean(
+                    shape=dt_gamma.shape, 
+                    scale=dt_gamma.scale,
+                    loc=dt_gamma.loc
+                )
+                dispatch_ci: Tuple[float, float] = compute_gamma_ci(
+                    shape=dt_gamma.shape, 
+                    scale=dt_gamma.scale,
+                    loc=dt_gamma.loc,
+                    confidence_level=self.confidence
+                )
             logger.debug(f"Computed ADT from gamma distribution: {adt}")
-            dispatch_ci: Tuple[float, float] = compute_gamma_ci(
-                shape=dt_gamma.shape, 
-                scale=dt_gamma.scale,
-                loc=dt_gamma.loc,
-                confidence_level=self.confidence
-            )
             logger.debug(f"Computed dispatch confidence interval from gamma distribution: {dispatch_ci}")
         elif isinstance(dt_distribution, DTSampleDTO):
             dt_sample: DTSampleDTO = dt_distribution
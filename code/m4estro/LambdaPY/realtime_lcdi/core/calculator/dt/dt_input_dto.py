@@ -1,7 +1,9 @@
-from typing import Union, List
+from typing import Union, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from gamma_summary import GammaSummary
+
 @dataclass(frozen=True)
 class DTBaseInputDTO:
     site_id: int = field(metadata={"description": "ID of the site for which the DT is calculated."})
@@ -11,6 +13,10 @@ class DTGammaDTO:
     shape: float
     scale: float
     loc: float
+    maybe_summary: Optional[GammaSummary] = field(
+        default=None,
+        metadata={"description": "Precomputed mean and confidence intervals of the distribution, if available"},
+    )
 
 @dataclass(frozen=True)
 class DTSampleDTO:
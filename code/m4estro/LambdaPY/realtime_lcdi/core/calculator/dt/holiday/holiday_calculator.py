@@ -1,6 +1,9 @@
 from typing import Optional, List, Dict, TYPE_CHECKING
 import math
-from datetime import timedelta, date
+import time
+from threading import Lock
+from dataclasses import dataclass
+from datetime import timedelta, date, datetime
 
 from utils.config import WEEK_DAY_MAP, get_week_day
 from service.db_utils import get_read_only_db_connector
@@ -11,6 +14,7 @@ from model.site import Site
 
 from core.calculator.dt.holiday.holiday_input_dto import HolidayInputDTO, HolidayPeriodInputDTO, HolidayADTInputDTO
 from core.calculator.dt.holiday.holiday_dto import HolidayDTO, HolidayResultDTO
+from core.calculator.dt.holiday.working_calendar import WorkingCalendar
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -20,6 +24,28 @@ from logger import get_logger
 logger = get_logger(__name__)
 
 DAYS_WINDOW: int = 30
+SITE_CALENDAR_TTL_SECONDS: float = 15 * 60            # Holidays and site settings changed in the database are seen after it
+
+@dataclass
+class SiteCalendar:
+    site_id: int
+    location_name: str
+    country_code: str
+
+    consider_closure_holidays: bool
+    consider_working_holidays: bool
+    consider_weekends_holidays: bool
+
+    holidays_by_date: Dict[date, Holiday]
+    calendar: WorkingCalendar
+
+    loaded_at: float
+
+    def considers_holidays(self) -> bool:
+        return self.consider_closure_holidays or self.consider_working_holidays or self.consider_weekends_holidays
+
+    def is_expired(self, ttl_seconds: float) -> bool:
+        return time.monotonic() - self.loaded_at > ttl_seconds
 
 class HolidayCalculator:
 
@@ -28,7 +54,8 @@ class HolidayCalculator:
                  consider_working_holidays: bool,
                  consider_weekends_holidays: bool,
                  maybe_days_window: Optional[int] = None,
-                 maybe_ro_db_connector: Optional[ReadOnlyDBConnector] = None
+                 maybe_ro_db_connector: Optional[ReadOnlyDBConnector] = None,
+                 maybe_calendar_ttl_seconds: Optional[float] = None
                  ) -> None:
         
         self.consider_closure_holidays: bool = consider_closure_holidays
@@ -38,223 +65,195 @@ class HolidayCalculator:
         self.days_window: int = maybe_days_window or DAYS_WINDOW
         self.ro_db_connector: ReadOnlyDBConnector = maybe_ro_db_connector or get_read_only_db_connector()
 
+        self.calendar_ttl_seconds: float = maybe_calendar_ttl_seconds if maybe_calendar_ttl_seconds is not None else SITE_CALENDAR_TTL_SECONDS
+
+        # Shared by the concurrent estimates of a pipeline: reloaded once expired
+        self._site_calendars: Dict[int, SiteCalendar] = {}
+        self._site_calendars_lock: Lock = Lock()
+
     def _load_holidays(self, country: 'Country', from_: date, to: date, session: 'Session') -> List[Holiday]:
         holidays = session.query(Holiday).filter(
             Holiday.country == country,
             Holiday.date >= from_,
-            Holiday.date <= to
+            Holiday.date < to + timedelta(days=1)
         ).all()
 
         logger.debug(f"Loaded {len(holidays)} holidays for country {country.code} from {from_} to {to}.")
 
         return holidays
-    
-    def _is_weekend(self, holiday_by_year_day: Dict[int, Holiday], country: 'Country', date_: date) -> Optional[HolidayDTO]:            
-        weekend_start: int = country.weekend_start
-        weekend_end: int = country.weekend_end
-        week_day: int = get_week_day(date_)
-        
-        if not weekend_start <= week_day <= weekend_end:
-            return None 
 
-        week_day_name: str = WEEK_DAY_MAP[week_day]
-        return HolidayDTO(
-            id=0,
-            name=f"Weekend - {week_day_name}",
-            country=country.code,
-            date=date_,
-            category=HolidayCategory.CLOSURE.value,
-            type='Public',
-            description=f"Weekend closure on {week_day_name}"
-        )
-    
-    def _is_holiday(self, holiday_by_year_day: Dict[int, Holiday], date_: date, holiday_category: HolidayCategory) -> Optional[HolidayDTO]:
-        year_day: int = date_.timetuple().tm_yday
-
-        if year_day in holiday_by_year_day:
-            holiday: Holiday = holiday_by_year_day[year_day] 
-            if holiday.category == holiday_category:
-                return HolidayDTO(
-                    id=holiday.id,
-                    name=holiday.name,
-                    country=holiday.country_code,
-                    date=date_,
-                    category=holiday.category.value,
-                    type=holiday.type or 'Unknown',
-                    description=holiday.description or 'No description available'
-                )
-        
-        return None
-    
-    def _is_working_holiday(self, holiday_by_year_day: Dict[int, Holiday], date_: date) -> Optional[HolidayDTO]:
-        return self._is_holiday(holiday_by_year_day, date_, HolidayCategory.WORKING)
-    
-    def _is_closure_holiday(self, holiday_by_year_day: Dict[int, Holiday], date_: date) -> Optional[HolidayDTO]:
-        return self._is_holiday(holiday_by_year_day, date_, HolidayCategory.CLOSURE)
-
-    def _index_holidays(self, holidays: List[Holiday]) -> Dict[int, Holiday]:
-        holidays_by_year_day: Dict[int, Holiday] = {}
+    def _index_holidays(self, holidays: List[Holiday]) -> Dict[date, Holiday]:
+        holidays_by_date: Dict[date, Holiday] = {}
         for holiday in holidays:
-            year_day: int = holiday.date.timetuple().tm_yday
-            holidays_by_year_day[year_day] = holiday
+            holiday_date: date = holiday.date.date() if isinstance(holiday.date, datetime) else holiday.date
+            holidays_by_date[holiday_date] = holiday
+
+        logger.debug(f"Indexed {len(holidays_by_date)} holidays by date.")
+
+        return holidays_by_date
+
+    def _load_site_calendar(self, site_id: int, start_date: date, end_date: date) -> SiteCalendar:
+        with self._site_calendars_lock:
+            maybe_site_calendar: Optional[SiteCalendar] = self._site_calendars.get(site_id)
+        if maybe_site_calendar is not None and maybe_site_calendar.is_expired(self.calendar_ttl_seconds):
+            logger.debug(f"Working calendar for site {site_id} expired: reloading holidays.")
+            maybe_site_calendar = None
+
+        if maybe_site_calendar is not None:
+            if maybe_site_calendar.calendar.covers(start_date, end_date):
+                logger.debug(f"Working calendar for site {site_id} already covers {start_date} - {end_date}: skipping holidays retrieval.")
+                return maybe_site_calendar
+
+            start_date = min(start_date, maybe_site_calendar.calendar.valid_from)
+
+        to: date = end_date + timedelta(days=self.days_window)
 
-        logger.debug(f"Indexed {len(holidays_by_year_day)} holidays by year day.")
-        
-        return holidays_by_year_day
-    
-    def _retrieve_holidays_from_period(self, start_date: date, end_date: date, site_id: int) -> HolidayResultDTO:
         with self.ro_db_connector.session_scope() as session:
             site: Site = session.query(Site).filter(Site.id == site_id).one()
             country: 'Country' = site.location.country
             logger.debug(f"Data for site {site_id} with country {country.code} loaded successfully.")
 
-            possible_holidays: List[Holiday] = self._load_holidays(country, start_date, end_date + timedelta(days=self.days_window), session)
+            holidays: List[Holiday] = self._load_holidays(country, start_date, to, session)
 
-        consider_closure_holidays: bool = site.consider_closure_holidays and self.consider_closure_holidays
-        consider_working_holidays: bool = site.consider_working_holidays and self.consider_working_holidays
-        consider_weekends_holidays: bool = site.consider_weekends_holidays and self.consider_weekends_holidays
-        
-        if not consider_closure_holidays and not consider_working_holidays and not consider_weekends_holidays:
-            logger.debug("No holidays considered after applying site configuration, skipping holiday retrieval.")
-            return HolidayResultDTO(
-                consider_closure_holidays=False,
-                consider_working_holidays=False,
-                consider_weekends_holidays=False,
-                closure_holidays=[],
-                working_holidays=[],
-                weekend_holidays=[]
-            )
-
-        holiday_index: Dict[int, Holiday] = self._index_holidays(possible_holidays)
+            country_code: str = country.code
+            weekend_start, weekend_end = country.weekend_start, country.weekend_end
+            location_name: str = site.location_name
 
-        actual_date: date = start_date
+            consider_closure_holidays: bool = bool(site.consider_closure_holidays) and self.consider_closure_holidays
+            consider_working_holidays: bool = bool(site.consider_working_holidays) and self.consider_working_holidays
+            consider_weekends_holidays: bool = bool(site.consider_weekends_holidays) and self.consider_weekends_holidays
 
-        closure_holidays: List[HolidayDTO] = []
-        working_holidays: List[HolidayDTO] = []
-        weekend_holidays: List[HolidayDTO] = []
+        holidays_by_date: Dict[date, Holiday] = self._index_holidays(holidays)
 
-        logger.debug(
-            f"Starting holiday retrieval from {start_date} to {end_date} for site {site_id} ({site.location_name}) with: "
-            f"consider_closure_holidays={consider_closure_holidays}, "
-            f"consider_weekends_holidays={consider_weekends_holidays}, "
-            f"consider_working_holidays={consider_working_holidays})"
+        calendar: WorkingCalendar = WorkingCalendar(
+            valid_from=start_date,
+            valid_to=to,
+            weekend_days=range(weekend_start, weekend_end + 1) if consider_weekends_holidays else [],
+            closure_dates=[d for d, h in holidays_by_date.items() if h.category == HolidayCategory.CLOSURE] if consider_closure_holidays else [],
+            working_dates=[d for d, h in holidays_by_date.items() if h.category == HolidayCategory.WORKING] if consider_working_holidays else []
         )
+        logger.debug(f"Working calendar for site {site_id} built from {start_date} to {to}.")
 
-        for _ in range((end_date - start_date).days + 1):
-            found_holiday: bool = False
-
-            if consider_closure_holidays:
-                maybe_closure_holiday: Optional[HolidayDTO] = self._is_closure_holiday(holiday_index, actual_date)
-                if maybe_closure_holiday is not None:
-                    found_holiday = True
-                    closure_holidays.append(maybe_closure_holiday)
-                    logger.debug(f"Found closure holiday on {actual_date}: {maybe_closure_holiday.name}.")
-            if consider_working_holidays and not found_holiday:
-                maybe_working_holiday: Optional[HolidayDTO] = self._is_working_holiday(holiday_index, actual_date)
-                if maybe_working_holiday is not None:
-                    found_holiday = True
-                    working_holidays.append(maybe_working_holiday)
-                    logger.debug(f"Found working holiday on {actual_date}: {maybe_working_holiday.name}.")
-            if consider_weekends_holidays and not found_holiday:
-                maybe_weekend: Optional[HolidayDTO] = self._is_weekend(holiday_index, country, actual_date)
-                if maybe_weekend is not None:
-                    found_holiday = True
-                    weekend_holidays.append(maybe_weekend)
-                    logger.debug(f"Found weekend day on {actual_date}: {maybe_weekend.name}.")
-                                    
-            if not found_holiday:
-                logger.debug(f"No holiday found on {actual_date}.")
-
-            actual_date += timedelta(days=1)
-    
-        return HolidayResultDTO(
+        site_calendar: SiteCalendar = SiteCalendar(
+            site_id=site_id,
+            location_name=location_name,
+            country_code=country_code,
             consider_closure_holidays=consider_closure_holidays,
             consider_working_holidays=consider_working_holidays,
             consider_weekends_holidays=consider_weekends_holidays,
+            holidays_by_date=holidays_by_date,
+            calendar=calendar,
+            loaded_at=time.monotonic()
+        )
+        with self._site_calendars_lock:
+            self._site_calendars[site_id] = site_calendar
+
+        return site_calendar
+
+    def _holiday_dto(self, holiday: Holiday, date_: date) -> HolidayDTO:
+        return HolidayDTO(
+            id=holiday.id,
+            name=holiday.name,
+            country=holiday.country_code,
+            date=date_,
+            category=holiday.category.value,
+            type=holiday.type or 'Unknown',
+            description=holiday.description or 'No description available'
+        )
+
+    def _weekend_dto(self, country_code: str, date_: date) -> HolidayDTO:
+        week_day_name: str = WEEK_DAY_MAP[get_week_day(date_)]
+        return HolidayDTO(
+            id=0,
+            name=f"Weekend - {week_day_name}",
+            country=country_code,
+            date=date_,
+            category=HolidayCategory.CLOSURE.value,
+            type='Public',
+            description=f"Weekend closure on {week_day_name}"
+        )
+
+    def _empty_result(self) -> HolidayResultDTO:
+        return HolidayResultDTO(
+            consider_closure_holidays=False,
+            consider_working_holidays=False,
+            consider_weekends_holidays=False,
+            closure_holidays=[],
+            working_holidays=[],
+            weekend_holidays=[]
+        )
+
+    def _build_result(self, site_calendar: SiteCalendar, start_date: date, end_date: date) -> HolidayResultDTO:
+        calendar: WorkingCalendar = site_calendar.calendar
+        holidays_by_date: Dict[date, Holiday] = site_calendar.holidays_by_date
+
+        closure_holidays: List[HolidayDTO] = [
+            self._holiday_dto(holidays_by_date[d], d) for d in calendar.closure_holidays_between(start_date, end_date)
+        ]
+        working_holidays: List[HolidayDTO] = [
+            self._holiday_dto(holidays_by_date[d], d) for d in calendar.working_holidays_between(start_date, end_date)
+        ]
+        weekend_holidays: List[HolidayDTO] = [
+            self._weekend_dto(site_calendar.country_code, d) for d in calendar.weekend_days_between(start_date, end_date)
+        ]
+        logger.debug(
+            f"Found {len(closure_holidays)} closure holidays, {len(working_holidays)} working holidays and "
+            f"{len(weekend_holidays)} weekend days from {start_date} to {end_date} for site {site_calendar.site_id}."
+        )
+
+        return HolidayResultDTO(
+            consider_closure_holidays=site_calendar.consider_closure_holidays,
+            consider_working_holidays=site_calendar.consider_working_holidays,
+            consider_weekends_holidays=site_calendar.consider_weekends_holidays,
             closure_holidays=closure_holidays,
             working_holidays=working_holidays,
             weekend_holidays=weekend_holidays
         )
 
+    def _retrieve_holidays_from_period(self, start_date: date, end_date: date, site_id: int) -> HolidayResultDTO:
+        site_calendar: SiteCalendar = self._load_site_calendar(site_id, start_date, end_date)
+        
+        if not site_calendar.considers_holidays():
+            logger.debug("No holidays considered after applying site configuration, skipping holiday retrieval.")
+            return self._empty_result()
+
+        logger.debug(
+            f"Starting holiday retrieval from {start_date} to {end_date} for site {site_id} ({site_calendar.location_name}) with: "
+            f"consider_closure_holidays={site_calendar.consider_closure_holidays}, "
+            f"consider_weekends_holidays={site_calendar.consider_weekends_holidays}, "
+            f"consider_working_holidays={site_calendar.consider_working_holidays})"
+        )
+
+        return self._build_result(site_calendar, start_date, end_date)
 
     def _calculate_holidays_from_adt(self, start_date: date, adt: float, site_id: int) -> HolidayResultDTO:
         dispatch_days: int = math.ceil(adt / 24.0)
         end_date: date = start_date + timedelta(days=dispatch_days)
 
-        with self.ro_db_connector.session_scope() as session:
-            site: Site = session.query(Site).filter(Site.id == site_id).one()
-            country: 'Country' = site.location.country
-            logger.debug(f"Data for site {site_id} with country {country.code} loaded successfully.")
-
-            possible_holidays: List[Holiday] = self._load_holidays(country, start_date, end_date + timedelta(days=self.days_window), session)
-
-        consider_closure_holidays: bool = site.consider_closure_holidays and self.consider_closure_holidays
-        consider_working_holidays: bool = site.consider_working_holidays and self.consider_working_holidays
-        consider_weekends_holidays: bool = site.consider_weekends_holidays and self.consider_weekends_holidays
+        site_calendar: SiteCalendar = self._load_site_calendar(site_id, start_date, end_date)
         
-        if not consider_closure_holidays and not consider_working_holidays and not consider_weekends_holidays:
+        if not site_calendar.considers_holidays():
             logger.debug("No holidays considered after applying site configuration, skipping holiday calculation.")
-            return HolidayResultDTO(
-                consider_closure_holidays=False,
-                consider_working_holidays=False,
-                consider_weekends_holidays=False,
-                closure_holidays=[],
-                working_holidays=[],
-                weekend_holidays=[]
-            )
-
-        holiday_index: Dict[int, Holiday] = self._index_holidays(possible_holidays)
+            return self._empty_result()
 
-        actual_date: date = start_date
+        if dispatch_days <= 0:
+            logger.debug(f"No dispatch days remaining from {start_date} for site {site_id}: no holidays to project.")
+            return self._build_result(site_calendar, start_date, start_date - timedelta(days=1))
 
-        closure_holidays: List[HolidayDTO] = []
-        working_holidays: List[HolidayDTO] = []
-        weekend_holidays: List[HolidayDTO] = []
+        end_date = site_calendar.calendar.working_day_offset(start_date, dispatch_days)
+        while not site_calendar.calendar.covers(start_date, end_date):
+            logger.debug(f"Projected dispatch end {end_date} exceeds the loaded holidays window: extending working calendar for site {site_id}.")
+            site_calendar = self._load_site_calendar(site_id, start_date, end_date)
+            end_date = site_calendar.calendar.working_day_offset(start_date, dispatch_days)
 
         logger.debug(
-            f"Starting holiday calculation from {start_date} to {end_date} ({dispatch_days} dispatch days) for site {site_id} ({site.location_name}) with: "
-            f"consider_closure_holidays={consider_closure_holidays}, "
-            f"consider_weekends_holidays={consider_weekends_holidays}, "
-            f"consider_working_holidays={consider_working_holidays})"
+            f"Projected {dispatch_days} dispatch days from {start_date} to {end_date} for site {site_id} ({site_calendar.location_name}) with: "
+            f"consider_closure_holidays={site_calendar.consider_closure_holidays}, "
+            f"consider_weekends_holidays={site_calendar.consider_weekends_holidays}, "
+            f"consider_working_holidays={site_calendar.consider_working_holidays})"
         )
 
-        while dispatch_days > 0:
-            found_holiday: bool = False
-
-            if consider_closure_holidays:
-                maybe_closure_holiday: Optional[HolidayDTO] = self._is_closure_holiday(holiday_index, actual_date)
-                if maybe_closure_holiday is not None:
-                    found_holiday = True
-                    closure_holidays.append(maybe_closure_holiday)
-                    logger.debug(f"Found closure holiday on {actual_date}: {maybe_closure_holiday.name}. Remaining dispatch days: {dispatch_days}")
-            if consider_working_holidays and not found_holiday:
-                maybe_working_holiday: Optional[HolidayDTO] = self._is_working_holiday(holiday_index, actual_date)
-                if maybe_working_holiday is not None:
-                    found_holiday = True
-                    working_holidays.append(maybe_working_holiday)
-                    dispatch_days -= 1
-                    logger.debug(f"Found working holiday on {actual_date}: {maybe_working_holiday.name}. Remaining dispatch days: {dispatch_days}")
-            if consider_weekends_holidays and not found_holiday:
-                maybe_weekend: Optional[HolidayDTO] = self._is_weekend(holiday_index, country, actual_date)
-                if maybe_weekend is not None:
-                    found_holiday = True
-                    weekend_holidays.append(maybe_weekend)
-                    logger.debug(f"Found weekend day on {actual_date}: {maybe_weekend.name}. Remaining dispatch days: {dispatch_days}")
-                                    
-            if not found_holiday:
-                dispatch_days -= 1
-                logger.debug(f"No holiday found on {actual_date}. Remaining dispatch days: {dispatch_days}")
-
-            actual_date += timedelta(days=1)
-
-        return HolidayResultDTO(
-            consider_closure_holidays=consider_closure_holidays,
-            consider_working_holidays=consider_working_holidays,
-            consider_weekends_holidays=consider_weekends_holidays,
-            closure_holidays=closure_holidays,
-            working_holidays=working_holidays,
-            weekend_holidays=weekend_holidays
-        )
+        return self._build_result(site_calendar, start_date, end_date)
     
     def retrieve_holidays(self, holiday_input: HolidayPeriodInputDTO) -> HolidayResultDTO:
         return self._retrieve_holidays_from_period(
@@ -0,0 +1,94 @@
+from typing import List, Iterable
+from datetime import date
+import numpy as np
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+DAY: np.timedelta64 = np.timedelta64(1, 'D')
+
+def _to_days(dates: Iterable[date]) -> np.ndarray:
+    return np.unique(np.array(list(dates), dtype='datetime64[D]'))
+
+class WorkingCalendar:
+    """
+    Working calendar of a site over the closed interval [valid_from, valid_to].
+
+    Weekend days and closure holidays are non-working days, while working holidays override the weekend.
+    Working-day offsets rely on a NumPy business-day calendar plus binary searches over the sorted holiday dates,
+    so they do not depend on the length of the interval.
+    """
+    def __init__(self,
+                 valid_from: date,
+                 valid_to: date,
+                 weekend_days: Iterable[int],
+                 closure_dates: Iterable[date],
+                 working_dates: Iterable[date]
+                 ) -> None:
+
+        self.valid_from: date = valid_from
+        self.valid_to: date = valid_to
+
+        weekend: set[int] = set(weekend_days)
+        self.weekmask: List[int] = [0 if week_day in weekend else 1 for week_day in range(1, 8)]           # ISO week days, 1 = Monday
+        if not any(self.weekmask):
+            logger.error(f"Invalid weekend days {sorted(weekend)}: no working day left in the week")
+            raise ValueError(f"Invalid weekend days {sorted(weekend)}: no working day left in the week")
+
+        self.closure_dates: np.ndarray = _to_days(closure_dates)
+        self.working_dates: np.ndarray = np.setdiff1d(_to_days(working_dates), self.closure_dates)        # Closure holidays take precedence
+
+        self._busdaycal: np.busdaycalendar = np.busdaycalendar(weekmask=self.weekmask, holidays=self.closure_dates)
+        self._weekend_working_dates: np.ndarray = self.working_dates[~np.is_busday(self.working_dates, weekmask=self.weekmask)]
+
+    def covers(self, start: date, end: date) -> bool:
+        return self.valid_from <= start and end <= self.valid_to
+
+    def _count_between(self, dates: np.ndarray, a: np.datetime64, b: np.datetime64) -> int:
+        return int(np.searchsorted(dates, b, side='left') - np.searchsorted(dates, a, side='left'))
+
+    def _count_working_days(self, a: np.datetime64, b: np.datetime64) -> int:
+        n_busdays: int = int(np.busday_count(a, b, busdaycal=self._busdaycal))
+        return n_busdays + self._count_between(self._weekend_working_dates, a, b)
+
+    def working_day_offset(self, start: date, n_working_days: int) -> date:
+        """
+        Date of the n-th working day counted from start (included).
+        """
+        if n_working_days <= 0:
+            raise ValueError(f"Number of working days must be positive, got {n_working_days}")
+
+        a: np.datetime64 = np.datetime64(start, 'D')
+
+        # Ignoring weekend working holidays can only delay the target: the plain business day offset is an upper bound
+        upper: np.datetime64 = np.busday_offset(a, n_working_days - 1, roll='forward', busdaycal=self._busdaycal)
+        lo, hi = 0, int((upper - a) // DAY)
+        while lo < hi:
+            mid: int = (lo + hi) // 2
+            if self._count_working_days(a, a + (mid + 1) * DAY) >= n_working_days:
+                hi = mid
+            else:
+                lo = mid + 1
+
+        return (a + lo * DAY).item()
+
+    def closure_holidays_between(self, start: date, end: date) -> List[date]:
+        a: np.datetime64 = np.datetime64(start, 'D')
+        b: np.datetime64 = np.datetime64(end, 'D') + DAY
+
+        return [d.item() for d in self.closure_dates[np.searchsorted(self.closure_dates, a):np.searchsorted(self.closure_dates, b)]]
+
+    def working_holidays_between(self, start: date, end: date) -> List[date]:
+        a: np.datetime64 = np.datetime64(start, 'D')
+        b: np.datetime64 = np.datetime64(end, 'D') + DAY
+
+        return [d.item() for d in self.working_dates[np.searchsorted(self.working_dates, a):np.searchsorted(self.working_dates, b)]]
+
+    def weekend_days_between(self, start: date, end: date) -> List[date]:
+        days: np.ndarray = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + DAY, dtype='datetime64[D]')
+
+        weekend_mask: np.ndarray = ~np.is_busday(days, weekmask=self.weekmask)
+        weekend_mask &= ~np.isin(days, self.closure_dates)
+        weekend_mask &= ~np.isin(days, self._weekend_working_dates)
+
+        return [d.item() for d in days[weekend_mask]]
@@ -29,11 +29,14 @@ class AlphaExpCalculator(AlphaCalculator):
         
         if isinstance(alpha_distribution, AlphaGammaDTO):
             alpha_gamma: AlphaGammaDTO = alpha_distribution
-            mean: float = compute_gamma_mean(
-                shape=alpha_gamma.shape, 
-                scale=alpha_gamma.scale,
-                loc=alpha_gamma.loc
-            )
+            if alpha_gamma.maybe_summary is not None:
+                mean: float = alpha_gamma.maybe_summary.mean
+            else:
+                mean: float = compute_gamma_mean(
+                    shape=alpha_gamma.shape, 
+                    scale=alpha_gamma.scale,
+                    loc=alpha_gamma.loc
+                )
             logger.debug(f"Computed AST from gamma distribution for alpha calculation: {mean}")
         elif isinstance(alpha_distribution, AlphaSampleDTO):
             alpha_sample: AlphaSampleDTO = alpha_distribution
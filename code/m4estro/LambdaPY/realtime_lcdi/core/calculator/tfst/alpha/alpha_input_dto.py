@@ -3,11 +3,17 @@ from dataclasses import dataclass, field
 
 import igraph as ig
 
+from gamma_summary import GammaSummary
+
 @dataclass(frozen=True)
 class AlphaGammaDTO:
     shape: float
     scale: float
     loc: float
+    maybe_summary: Optional[GammaSummary] = field(
+        default=None,
+        metadata={"description": "Precomputed mean and confidence intervals of the distribution, if available"},
+    )
 
 @dataclass(frozen=True)
 class AlphaSampleDTO:
@@ -0,0 +1,203 @@
+from typing import Optional, List, Dict, Set, Any, Type, TypeVar, get_type_hints
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from dataclasses import dataclass, fields
+from datetime import datetime
+from enum import Enum
+from threading import Lock
+from urllib.parse import quote
+import hashlib
+import json
+
+from core.query_handler.params.params_result import PTParams
+
+from core.calculator.tfst.pt.pt_dto import PT_DTO
+from core.calculator.tfst.pt.tmi.tmi_dto import TMI_DTO
+from core.calculator.tfst.pt.wmi.wmi_dto import WMI_DTO
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+DEFAULT_PT_CACHE_MAX_SIZE: int = 1024
+PT_CACHE_FLUSH_TIMEOUT_SECONDS: float = 5.0
+
+T = TypeVar('T')
+
+def _encode_dataclass(dto: Any) -> Dict[str, Any]:
+    encoded: Dict[str, Any] = {}
+    for f in fields(dto):
+        value: Any = getattr(dto, f.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Enum):
+            value = value.value
+        encoded[f.name] = value
+    return encoded
+
+def _decode_dataclass(cls: Type[T], data: Dict[str, Any]) -> T:
+    hints: Dict[str, Any] = get_type_hints(cls)
+    values: Dict[str, Any] = {}
+    for f in fields(cls):
+        hint: Any = hints[f.name]
+        value: Any = data[f.name]
+        if hint is datetime:
+            value = datetime.fromisoformat(value)
+        elif isinstance(hint, type) and issubclass(hint, Enum):
+            value = hint(value)
+        values[f.name] = value
+    return cls(**values)
+
+@dataclass(frozen=True)
+class PTCacheEntry:
+    """PT result without its params, which are part of the key, with the TMIs and WMIs it was computed with."""
+    lower: float
+    upper: float
+    n_paths: int
+    avg_tmi: float
+    avg_wmi: float
+    tmi_data: List[TMI_DTO]
+    wmi_data: List[WMI_DTO]
+
+    @classmethod
+    def from_pt_dto(cls, pt: PT_DTO) -> 'PTCacheEntry':
+        return cls(
+            lower=pt.lower, upper=pt.upper,
+            n_paths=pt.n_paths, avg_tmi=pt.avg_tmi, avg_wmi=pt.avg_wmi,
+            tmi_data=list(pt.tmi_data), wmi_data=list(pt.wmi_data)
+        )
+
+    def to_pt_dto(self, params: PTParams) -> PT_DTO:
+        return PT_DTO(
+            lower=self.lower, upper=self.upper,
+            n_paths=self.n_paths, avg_tmi=self.avg_tmi, avg_wmi=self.avg_wmi,
+            params=params,
+            tmi_data=list(self.tmi_data),
+            wmi_data=list(self.wmi_data)
+        )
+
+    def to_json(self) -> bytes:
+        return json.dumps({
+            "lower": self.lower,
+            "upper": self.upper,
+            "n_paths": self.n_paths,
+            "avg_tmi": self.avg_tmi,
+            "avg_wmi": self.avg_wmi,
+            "tmi_data": [_encode_dataclass(tmi) for tmi in self.tmi_data],
+            "wmi_data": [_encode_dataclass(wmi) for wmi in self.wmi_data],
+        }).encode('utf-8')
+
+    @classmethod
+    def from_json(cls, content: bytes) -> 'PTCacheEntry':
+        data: Dict[str, Any] = json.loads(content.decode('utf-8'))
+        return cls(
+            lower=data["lower"], upper=data["upper"],
+            n_paths=data["n_paths"], avg_tmi=data["avg_tmi"], avg_wmi=data["avg_wmi"],
+            tmi_data=[_decode_dataclass(TMI_DTO, tmi) for tmi in data["tmi_data"]],
+            wmi_data=[_decode_dataclass(WMI_DTO, wmi) for wmi in data["wmi_data"]]
+        )
+
+def get_params_version(params: PTParams) -> str:
+    return hashlib.sha256(json.dumps(params.to_dict(), sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def get_time_bucket(time: datetime, bucket_seconds: float) -> int:
+    return int(time.timestamp() // bucket_seconds)
+
+def get_pt_cache_key(vertex_id: int,
+                     carrier_names: List[str],
+                     event_time: datetime,
+                     estimation_time: datetime,
+                     bucket_seconds: float,
+                     params_version: str,
+                     graph_version: str) -> str:
+    carriers: str = ','.join(quote(carrier, safe='') for carrier in sorted(set(carrier_names)))
+    return (f"{quote(graph_version, safe='')}/{params_version}/{vertex_id}/{carriers}/"
+            f"{get_time_bucket(event_time, bucket_seconds)}-{get_time_bucket(estimation_time, bucket_seconds)}")
+
+class PTCacheBackend(ABC):
+    """Store shared across execution environments, so concurrent Lambdas reuse each other's PT results."""
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, content: bytes) -> None:
+        pass
+
+class PTCache:
+    """
+    LRU cache of PT results, local to the execution environment and backed by an optional shared backend.
+    Backend errors are logged and treated as misses: the cache never fails a PT calculation.
+    Backend writes run in the background, off the PT calculation: flush waits for the pending ones.
+    """
+    def __init__(self, max_size: int = DEFAULT_PT_CACHE_MAX_SIZE, maybe_backend: Optional[PTCacheBackend] = None) -> None:
+        self.max_size: int = max_size
+        self.maybe_backend: Optional[PTCacheBackend] = maybe_backend
+
+        self.entries: 'OrderedDict[str, PTCacheEntry]' = OrderedDict()
+        self.lock: Lock = Lock()
+
+        self.maybe_writer: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pt-cache-writer") if maybe_backend is not None else None
+        self.pending_writes: Set[Future] = set()
+
+    def _put_local(self, key: str, entry: PTCacheEntry) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[PTCacheEntry]:
+        with self.lock:
+            maybe_entry: Optional[PTCacheEntry] = self.entries.get(key)
+            if maybe_entry is not None:
+                self.entries.move_to_end(key)
+                logger.debug(f"PT cache hit for key {key}")
+                return maybe_entry
+
+        if self.maybe_backend is None:
+            return None
+
+        try:
+            maybe_content: Optional[bytes] = self.maybe_backend.get(key)
+            if maybe_content is None:
+                return None
+            entry: PTCacheEntry = PTCacheEntry.from_json(maybe_content)
+        except Exception:
+            logger.warning(f"Could not read PT cache entry {key} from the shared backend", exc_info=True)
+            return None
+
+        logger.debug(f"PT cache hit for key {key} in the shared backend")
+        self._put_local(key, entry)
+        return entry
+
+    def _put_backend(self, backend: PTCacheBackend, key: str, entry: PTCacheEntry) -> None:
+        try:
+            backend.put(key, entry.to_json())
+        except Exception:
+            logger.warning(f"Could not write PT cache entry {key} to the shared backend", exc_info=True)
+
+    def put(self, key: str, entry: PTCacheEntry) -> None:
+        self._put_local(key, entry)
+        if self.maybe_backend is None or self.maybe_writer is None:
+            return
+
+        future: Future = self.maybe_writer.submit(self._put_backend, self.maybe_backend, key, entry)
+        with self.lock:
+            self.pending_writes.add(future)
+        future.add_done_callback(self._discard_pending_write)
+
+    def _discard_pending_write(self, future: Future) -> None:
+        with self.lock:
+            self.pending_writes.discard(future)
+
+    def flush(self, timeout_seconds: float = PT_CACHE_FLUSH_TIMEOUT_SECONDS) -> None:
+        """Waits for the pending backend writes, so they are not lost when the execution environment is frozen."""
+        with self.lock:
+            pending: Set[Future] = set(self.pending_writes)
+        if not pending:
+            return
+
+        _, not_done = wait(pending, timeout=timeout_seconds)
+        if not_done:
+            logger.warning(f"{len(not_done)} PT cache entries still being written to the shared backend after {timeout_seconds}s")
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+
+PathTime = Tuple[float, float, float, float]
+
+@dataclass
+class PathTrieNode:
+    """
+    Prefix of one or more paths, ending at vertex v_id. The time fields hold the accumulated state on arrival at the
+    vertex and, once the node is departed, the state after its vertex time: that is the result of a path ending here.
+    """
+    v_id: int
+    depth: int
+    children: Dict[int, 'PathTrieNode'] = field(default_factory=dict)
+
+    lower: float = 0.0
+    upper: float = 0.0
+    current_time: Optional[datetime] = None
+    starting_tmi: float = 0.0
+    starting_wmi: float = 0.0
+
+    maybe_error: Optional[Exception] = None
+
+    def get_state(self) -> PathTime:
+        return self.lower, self.upper, self.starting_tmi, self.starting_wmi
+
+class PathTrie:
+    """Prefix trie of the paths of a PT calculation: each distinct (prefix, hop) is a single trie edge."""
+    def __init__(self, paths: List[List[int]]) -> None:
+        self.roots: Dict[int, PathTrieNode] = {}
+        self.n_edges: int = 0
+
+        for path in paths:
+            if not path:
+                continue
+
+            node: PathTrieNode = self.roots.setdefault(path[0], PathTrieNode(v_id=path[0], depth=0))
+            for v_id in path[1:]:
+                if v_id not in node.children:
+                    node.children[v_id] = PathTrieNode(v_id=v_id, depth=node.depth + 1)
+                    self.n_edges += 1
+                node = node.children[v_id]
+
+    def get_result(self, path: List[int]) -> PathTime | Exception:
+        """State of the terminal node of the path, or the error of the first failed node along it."""
+        if not path:
+            return ValueError("Cannot calculate the time of an empty path")
+
+        node: PathTrieNode = self.roots[path[0]]
+        for v_id in path[1:]:
+            if node.maybe_error is not None:
+                return node.maybe_error
+            node = node.children[v_id]
+
+        if node.maybe_error is not None:
+            return node.maybe_error
+        return node.get_state()
@@ -1,11 +1,10 @@
-from typing import List, Tuple, TYPE_CHECKING
+from typing import Dict, List, Set, Tuple, Optional, TYPE_CHECKING
 import numpy as np
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import igraph as ig
 
-from model.vertex import VertexType
 
 from graph_config import (
     V_ID_ATTR,
@@ -15,23 +14,31 @@ from graph_config import (
     AVG_ORI_ATTR,
     DISTANCE_ATTR,
     AVG_OTI_ATTR,
+    TRANSPORTATION_MODE_ATTR,
     AVG_WMI_ATTR,
     AVG_TMI_ATTR,
 )
 
 from core.calculator.tfst.pt.vertex_time.vertex_time_input_dto import VertexTimeInputDTO
 from core.calculator.tfst.pt.route_time.route_time_input_dto import RouteTimeInputDTO
+from core.calculator.tfst.pt.pt_input_dto import PTInputDTO, PTDisruptionDTO
 
 from core.dto.path.paths_dto import PathsIdDTO
 from core.dto.path.prob_path_dto import ProbPathIdDTO
 from core.dto.path.prob_path_time_dto import ProbPathIdTimeDTO
 
-from core.calculator.tfst.pt.tmi.tmi_dto import TMIInputDTO
-from core.calculator.tfst.pt.wmi.wmi_dto import WMIInputDTO
+from core.calculator.tfst.pt.tmi.tmi_dto import TMIInputDTO, TMIValueDTO
+from core.calculator.tfst.pt.wmi.wmi_dto import WMIInputDTO, WMIValueDTO
 
 from core.calculator.tfst.pt.pt_dto import PT_DTO
+from core.calculator.tfst.pt.pt_context import PTRequestContext
+from core.calculator.tfst.pt.path_trie import PathTrie, PathTrieNode, PathTime
+from core.calculator.tfst.pt.cache.pt_cache import PTCache, PTCacheEntry, get_pt_cache_key, get_params_version
+from core.metrics.stage_metrics import StageMetrics, Stage, Counter, measure, count
 
-from core.sc_graph.utils import VertexIdentifier
+from core.sc_graph.utils import VertexIdentifier, PathId, resolve_path
+from core.sc_graph.remaining_time.remaining_time_dp_manager import RemainingTimeDPManager, RemainingTimePrefix, UNTIMED_VERTEX_TYPES
+from core.query_handler.params.params_result import PTMode
 
 if TYPE_CHECKING:
     from core.dto.time_sequence.time_sequence_dto import TimeSequenceDTO
@@ -46,17 +53,19 @@ if TYPE_CHECKING:
     from core.calculator.tfst.pt.route_time.route_time_calculator import RouteTimeCalculator
 
     from core.calculator.tfst.pt.tmi.tmi_manager import TMIManager
-    from core.calculator.tfst.pt.tmi.tmi_dto import TMIValueDTO
     
     from core.calculator.tfst.pt.wmi.wmi_manager import WMIManager
-    from core.calculator.tfst.pt.wmi.wmi_dto import WMIValueDTO
 
     from core.dto.path.paths_dto import PathsNameDTO
-    from core.calculator.tfst.pt.pt_input_dto import PTInputDTO
     
 from logger import get_logger
 logger = get_logger(__name__)
 
+PT_HOP_MAX_WORKERS: int = 16        # Hops are bound by the TMI and WMI service calls, not by the CPU
+
+# Shared by all the PT calculators: a batch estimating orders concurrently does not start a pool per order
+_hop_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=PT_HOP_MAX_WORKERS, thread_name_prefix="pt-hop")
+
 class PTCalculator:
     def __init__(self, 
                  sc_graph: 'SCGraph',
@@ -64,7 +73,8 @@ class PTCalculator:
                  rt_calculator: 'RouteTimeCalculator', 
                  tmi_manager: 'TMIManager',
                  wmi_manager: 'WMIManager',
-                 params: 'PTParams'
+                 params: 'PTParams',
+                 maybe_cache: Optional[PTCache] = None
                  ) -> None:
         
         self.sc_graph: 'SCGraph' = sc_graph
@@ -76,17 +86,25 @@ class PTCalculator:
         self.wmi_manager: 'WMIManager' = wmi_manager
         
         self.params: 'PTParams' = params
+
+        # Only used when the params set a time bucket: within a bucket the PT is assumed not to change
+        self.maybe_cache: Optional[PTCache] = maybe_cache if params.cache_time_bucket_seconds > 0 else None
+
+        # Built on the first lookup: every trie node and hop resolves its vertices by ID
+        self._maybe_vertex_indices: Optional[Dict[int, int]] = None
         
     def _compute_tmi(self, 
-                     prob: float,
+                     use_ext_data: bool,
                      s: 'ig.Vertex', 
                      d: 'ig.Vertex', 
                      route_distance: float,
                      route_average_time: float, 
                      estimation_time: datetime, 
-                     current_time: datetime) -> 'TMIValueDTO':
-        if prob < self.params.ext_data_min_probability:
-            logger.debug(f"Probability = {prob} < {self.params.ext_data_min_probability}, skipping TMI calculation")
+                     current_time: datetime,
+                     maybe_context: Optional[PTRequestContext] = None,
+                     maybe_transportation_mode: Optional[str] = None) -> 'TMIValueDTO':
+        if not use_ext_data:
+            logger.debug(f"Path probability < {self.params.ext_data_min_probability}, skipping TMI calculation")
             return TMIValueDTO(value=0.0, computed=False)
 
         tmi_input: TMIInputDTO = TMIInputDTO(
@@ -95,20 +113,21 @@ class PTCalculator:
             route_geodesic_distance=route_distance,
             route_average_time=route_average_time,
             shipment_estimation_time=estimation_time,
-            departure_time=current_time
+            departure_time=current_time,
+            maybe_transportation_mode=maybe_transportation_mode
         )
-        return self.tmi_manager.calculate_tmi(tmi_input)
+        return self.tmi_manager.calculate_tmi(tmi_input, maybe_context=maybe_context)
     
     def _compute_wmi(self, 
-                     prob: float,
+                     use_ext_data: bool,
                      s: 'ig.Vertex', 
                      d: 'ig.Vertex', 
                      route_average_time: float, 
                      estimation_time: datetime, 
-                     current_time: datetime) -> 'WMIValueDTO':
-        ext_data_min_prob: float = self.params.ext_data_min_probability
-        if prob < ext_data_min_prob:
-            logger.debug(f"Probability = {prob} < {ext_data_min_prob}, skipping WMI calculation")
+                     current_time: datetime,
+                     maybe_context: Optional[PTRequestContext] = None) -> 'WMIValueDTO':
+        if not use_ext_data:
+            logger.debug(f"Path probability < {self.params.ext_data_min_probability}, skipping WMI calculation")
             return WMIValueDTO(value=0.0, computed=False)
 
         wmi_input: WMIInputDTO = WMIInputDTO(
@@ -118,11 +137,11 @@ class PTCalculator:
             shipment_estimation_time=estimation_time,
             departure_time=current_time
         )
-        return self.wmi_manager.calculate_wmi(wmi_input)
+        return self.wmi_manager.calculate_wmi(wmi_input, maybe_context=maybe_context)
 
 
     def _calculate_vertex_time(self, v: ig.Vertex, event_time: datetime, current_time: datetime, first_vertex: bool = False) -> Tuple[float, float]:
-        if v[TYPE_ATTR] in {VertexType.MANUFACTURER.value, VertexType.SUPPLIER_SITE.value}:
+        if v[TYPE_ATTR] in UNTIMED_VERTEX_TYPES:
             logger.debug("Skipping vertex time calculation for type '%s'", v[TYPE_ATTR])
             return 0.0, 0.0
         
@@ -157,49 +176,113 @@ class PTCalculator:
         
         return r_time.lower, r_time.upper
 
-    def _calculate_path_time(self, path: List[int], prob: float, event_time: datetime, estimation_time: datetime) -> Tuple[float, float, float, float]:
+    def _get_vertex(self, v_id: int) -> ig.Vertex:
         g: ig.Graph = self.sc_graph.graph
-        l_time, u_time = 0.0, 0.0
-        starting_tmi, starting_wmi = 0.0, 0.0
-        current_time: datetime = estimation_time
-
-        for i in range(len(path) - 1):
-            s_id: int = path[i]
-            d_id: int = path[i + 1]
-            
-            s: ig.Vertex = g.vs.find(**{V_ID_ATTR: s_id})
-            d: ig.Vertex = g.vs.find(**{V_ID_ATTR: d_id})
-            e: ig.Edge = g.es[g.get_eid(s, d)]
-
-            l, u = self._calculate_vertex_time(s, event_time, current_time, first_vertex=(i == 0))
-            
-            l_time += l
-            u_time += u
-            current_time += timedelta(hours=(l + u) / 2.0)
-
-            tmi: 'TMIValueDTO' = self._compute_tmi(prob, s, d, e[DISTANCE_ATTR], e[AVG_OTI_ATTR], estimation_time, current_time)
-            if i == 0:
-                starting_tmi: float = tmi.value
-                logger.debug(f"Starting TMI for first route ({s_id} -> {d_id}) at time {current_time}: {starting_tmi}")
-
-            wmi: 'WMIValueDTO' = self._compute_wmi(prob, s, d, e[AVG_OTI_ATTR], estimation_time, current_time)
-            if i == 0:
-                starting_wmi: float = wmi.value
-                logger.debug(f"Starting WMI for first route ({s_id} -> {d_id}) at time {current_time}: {starting_wmi}")
-
-            l, u = self._calculate_route_time(s, d, e, tmi, wmi, current_time)
-            
-            l_time += l
-            u_time += u
-            current_time += timedelta(hours=(l + u) / 2.0)
-
-        last_vertex: ig.Vertex = g.vs.find(**{V_ID_ATTR: path[-1]})
-        l, u = self._calculate_vertex_time(last_vertex, event_time, current_time, first_vertex=(len(path) == 1))
-
-        l_time += l
-        u_time += u
-
-        return l_time, u_time, starting_tmi, starting_wmi
+        if self._maybe_vertex_indices is None:
+            self._maybe_vertex_indices = {vertex_id: index for index, vertex_id in enumerate(g.vs[V_ID_ATTR])}
+
+        maybe_index: Optional[int] = self._maybe_vertex_indices.get(v_id)
+        if maybe_index is None:
+            raise ValueError(f"Vertex with ID {v_id} not found in the graph")
+        return g.vs[maybe_index]
+
+    def _depart_node(self, node: PathTrieNode, event_time: datetime) -> None:
+        v: ig.Vertex = self._get_vertex(node.v_id)
+        l, u = self._calculate_vertex_time(v, event_time, node.current_time, first_vertex=(node.depth == 0))
+
+        node.lower += l
+        node.upper += u
+        node.current_time += timedelta(hours=(l + u) / 2.0)
+
+    def _get_hop_route(self, parent: PathTrieNode, child: PathTrieNode) -> Tuple[ig.Vertex, ig.Vertex, ig.Edge]:
+        g: ig.Graph = self.sc_graph.graph
+        s: ig.Vertex = self._get_vertex(parent.v_id)
+        d: ig.Vertex = self._get_vertex(child.v_id)
+        return s, d, g.es[g.get_eid(s, d)]
+
+    def _evaluate_hop(self, 
+                      parent: PathTrieNode, 
+                      child: PathTrieNode, 
+                      route: Tuple[ig.Vertex, ig.Vertex, ig.Edge], 
+                      use_ext_data: bool, 
+                      estimation_time: datetime, 
+                      maybe_context: Optional[PTRequestContext] = None) -> None:
+        s, d, e = route
+        current_time: datetime = parent.current_time
+
+        tmi: 'TMIValueDTO' = self._compute_tmi(
+            use_ext_data, s, d, e[DISTANCE_ATTR], e[AVG_OTI_ATTR], estimation_time, current_time, maybe_context,
+            maybe_transportation_mode=e.attributes().get(TRANSPORTATION_MODE_ATTR)
+        )
+        wmi: 'WMIValueDTO' = self._compute_wmi(use_ext_data, s, d, e[AVG_OTI_ATTR], estimation_time, current_time, maybe_context)
+        l, u = self._calculate_route_time(s, d, e, tmi, wmi, current_time)
+
+        child.lower = parent.lower + l
+        child.upper = parent.upper + u
+        child.current_time = current_time + timedelta(hours=(l + u) / 2.0)
+        if parent.depth == 0:
+            child.starting_tmi, child.starting_wmi = tmi.value, wmi.value
+            logger.debug(f"Starting TMI and WMI for first route ({parent.v_id} -> {child.v_id}) at time {current_time}: {tmi.value}, {wmi.value}")
+        else:
+            child.starting_tmi, child.starting_wmi = parent.starting_tmi, parent.starting_wmi
+
+    def _calculate_paths_time(self, paths: List[List[int]], use_ext_data: bool, event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> List[PathTime | Exception]:
+        """
+        Times of the paths, evaluated over their prefix trie: each distinct (prefix, hop) is computed once and shared by
+        all the paths below it. Levels are evaluated in order, the hops of a level concurrently.
+        Returns, for each path, (lower, upper, starting_tmi, starting_wmi) or the error that made it fail.
+        """
+        maybe_metrics: Optional[StageMetrics] = maybe_context.maybe_metrics if maybe_context is not None else None
+        with measure(maybe_metrics, Stage.PT_TIMES):
+            trie: PathTrie = PathTrie(paths)
+            count(maybe_metrics, Stage.PT_TIMES, Counter.ROUTES, trie.n_edges)
+            return self._evaluate_trie(trie, paths, use_ext_data, event_time, estimation_time, maybe_context)
+
+    def _evaluate_trie(self, trie: PathTrie, paths: List[List[int]], use_ext_data: bool, event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> List[PathTime | Exception]:
+        logger.debug(f"Evaluating {len(paths)} paths over a trie of {len(trie.roots)} roots and {trie.n_edges} hops")
+
+        level: List[PathTrieNode] = list(trie.roots.values())
+        for root in level:
+            root.current_time = estimation_time
+
+        while level:
+            # Graph lookups stay in this thread: igraph errors are not safe to raise from the workers
+            futures = {}
+            for node in level:
+                try:
+                    self._depart_node(node, event_time)
+                except Exception as e:
+                    logger.exception(f"Failed to calculate vertex time for vertex {node.v_id} at depth {node.depth}")
+                    node.maybe_error = e
+                    continue
+
+                for child in node.children.values():
+                    try:
+                        route: Tuple[ig.Vertex, ig.Vertex, ig.Edge] = self._get_hop_route(node, child)
+                    except Exception as e:
+                        logger.exception(f"Route ({node.v_id} -> {child.v_id}) not found in the graph")
+                        child.maybe_error = e
+                        continue
+                    futures[_hop_executor.submit(self._evaluate_hop, node, child, route, use_ext_data, estimation_time, maybe_context)] = (node, child)
+
+            level = []
+            for f in as_completed(futures):
+                parent, child = futures[f]
+                try:
+                    f.result()
+                    level.append(child)
+                except Exception as e:
+                    logger.exception(f"Failed to calculate route time for hop ({parent.v_id} -> {child.v_id}) at depth {parent.depth}")
+                    child.maybe_error = e
+
+        return [trie.get_result(path) for path in paths]
+
+    def _calculate_path_time(self, path: List[int], prob: float, event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> PathTime:
+        use_ext_data: bool = prob >= self.params.ext_data_min_probability
+        result: PathTime | Exception = self._calculate_paths_time([path], use_ext_data, event_time, estimation_time, maybe_context)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
     
     def _handle_path_time_failure(self, successful_paths: List[ProbPathIdTimeDTO], failed_paths: List[ProbPathIdDTO]) -> None:
         if not successful_paths:
@@ -224,31 +307,94 @@ class PTCalculator:
             wmi_data=[]
         )
 
-    def calculate_remaining_time(self, pt_input: 'PTInputDTO', event_time: datetime, estimation_time: datetime) -> PT_DTO:
-        path_min_prob: float = self.params.path_min_probability
-        max_paths: int = self.params.max_paths
-        
-        sc_graph: 'SCGraph' = self.sc_graph    
-        v_id: int = pt_input.vertex_id
+    def _calculate_dp_remaining_time(self, vertex: ig.Vertex, pt_input: 'PTInputDTO', event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> PT_DTO:
+        """
+        Probability weighted PT over all the paths, without the path probability and count filters: the first
+        dp_prefix_hops routes are evaluated over the path trie, with external data where the probability below a prefix
+        reaches ext_data_min_probability, and the rest of each path is taken from the DP sums.
+        """
+        dp_manager: RemainingTimeDPManager = self.sc_graph.remaining_time_dp_manager
+        prefixes: List[RemainingTimePrefix] = dp_manager.get_prefixes(vertex.index, pt_input.carrier_names, self.params.dp_prefix_hops)
+        if not prefixes:
+            logger.warning(f"No paths with non-zero probability from vertex {pt_input.vertex_id}, returning default PT_DTO")
+            return self.empty_path_dto()
+
+        g: ig.Graph = self.sc_graph.graph
+        ext_data_min_prob: float = self.params.ext_data_min_probability
+        groups: Dict[bool, List[RemainingTimePrefix]] = {True: [], False: []}
+        for prefix in prefixes:
+            groups[prefix.prob >= ext_data_min_prob].append(prefix)
+
+        lower, upper, avg_tmi, avg_wmi = 0.0, 0.0, 0.0, 0.0
+        n_paths: int = 0
+        failed_prob: float = 0.0
+        for use_ext_data, group in groups.items():
+            if not group:
+                continue
+
+            id_paths: List[PathId] = [resolve_path(g, prefix.path, VertexIdentifier.ID) for prefix in group]
+            results: List[PathTime | Exception] = self._calculate_paths_time(id_paths, use_ext_data, event_time, estimation_time, maybe_context)
+            for prefix, id_path, result in zip(group, id_paths, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to calculate PT for prefix {id_path} with probability {prefix.prob}: {result}")
+                    failed_prob += prefix.prob
+                    continue
+
+                l_time, u_time, starting_tmi, starting_wmi = result
+                tail_vertex_time: 'VertexTimeDTO' = self.vt_calculator.calculate(VertexTimeInputDTO(avg_ori=prefix.tail_ori), self.params.confidence)
+                tail_route_time: 'RouteTimeDTO' = self.rt_calculator.calculate_static(prefix.tail_oti, self.params.confidence)
+
+                lower += prefix.prob * l_time + tail_vertex_time.lower + tail_route_time.lower
+                upper += prefix.prob * u_time + tail_vertex_time.upper + tail_route_time.upper
+                avg_tmi += prefix.prob * starting_tmi
+                avg_wmi += prefix.prob * starting_wmi
+                n_paths += prefix.n_paths
+
+        if n_paths == 0:
+            logger.warning("No successful prefixes remaining after failure handling")
+            return self.empty_path_dto()
+
+        if failed_prob > 0.0:
+            logger.debug(f"Adjusting PT for a total failed probability of {failed_prob:.4f}")
+            scale: float = 1.0 / (1.0 - failed_prob)
+            lower, upper, avg_tmi, avg_wmi = lower * scale, upper * scale, avg_tmi * scale, avg_wmi * scale
+
+        logger.debug(f"PT calculated over {len(prefixes)} prefixes of at most {self.params.dp_prefix_hops} hops covering {n_paths} paths")
+        return PT_DTO(
+            lower=lower, upper=upper,
+            n_paths=n_paths, avg_tmi=avg_tmi, avg_wmi=avg_wmi,
+            params=self.params
+        )
+
+    def _find_vertex(self, v_id: int) -> ig.Vertex:
         try:
-            vertex: ig.Vertex = sc_graph.graph.vs.find(**{V_ID_ATTR: v_id})
+            return self._get_vertex(v_id)
         except Exception:
             logger.exception(f"Vertex with ID {v_id} not found in the graph")
             raise ValueError(f"Vertex with ID {v_id} not found in the graph")
-        
-        logger.debug(f"Extracting paths for vertex {v_id} ({vertex["name"]}) and carriers {pt_input.carrier_names})")
-        all_paths_dto: 'PathsIdDTO | PathsNameDTO' = self.sc_graph.extract_paths(vertex, pt_input.carrier_names, zero_prob_paths=False, by=VertexIdentifier.ID)
+
+    def _extract_paths(self, vertex: ig.Vertex, carrier_names: List[str], maybe_context: Optional[PTRequestContext] = None) -> PathsIdDTO:
+        logger.debug(f"Extracting paths for vertex {vertex[V_ID_ATTR]} ({vertex["name"]}) and carriers {carrier_names})")
+        maybe_metrics: Optional[StageMetrics] = maybe_context.maybe_metrics if maybe_context is not None else None
+        with measure(maybe_metrics, Stage.PT_PATHS):
+            all_paths_dto: 'PathsIdDTO | PathsNameDTO' = self.sc_graph.extract_paths(vertex, carrier_names, zero_prob_paths=False, by=VertexIdentifier.ID)
         if not isinstance(all_paths_dto, PathsIdDTO):
             logger.error(f"Expected PathsIdDTO, but got {type(all_paths_dto)}: this should never happen.")
             raise TypeError(f"Expected PathsIdDTO, but got {type(all_paths_dto)}: this should never happen.")
-        all_paths: List[ProbPathIdDTO] = all_paths_dto.paths
 
-        logger.debug(f"Extracted {len(all_paths)} paths from the graph with non-zero probability: {all_paths}")
+        logger.debug(f"Extracted {len(all_paths_dto.paths)} paths from the graph with non-zero probability: {all_paths_dto.paths}")
+        count(maybe_metrics, Stage.PT_PATHS, Counter.PATHS, len(all_paths_dto.paths))
+        return all_paths_dto
+
+    def _select_paths(self, all_paths: List[ProbPathIdDTO]) -> List[ProbPathIdDTO]:
+        """Paths above path_min_probability, at most max_paths of them, with their probabilities normalized."""
+        path_min_prob: float = self.params.path_min_probability
+        max_paths: int = self.params.max_paths
 
         filtered_paths: List[ProbPathIdDTO] = [path for path in all_paths if path.prob >= path_min_prob]
         if not filtered_paths:
-            logger.warning(f"No paths found with probability >= {path_min_prob}, returning default PT_DTO")
-            return self.empty_path_dto()
+            logger.warning(f"No paths found with probability >= {path_min_prob}")
+            return []
 
         logger.debug(f"Filtered {len(filtered_paths)} paths with probability >= {path_min_prob}")
 
@@ -263,46 +409,64 @@ class PTCalculator:
 
             logger.debug("Normalized path filtered paths probabilities")
 
-        paths: PathsIdDTO = PathsIdDTO(
-            source=all_paths_dto.source,
-            destination=all_paths_dto.destination,
-            requestedCarriers=pt_input.carrier_names,
-            validCarriers=all_paths_dto.valid_carriers,
-            paths=filtered_paths,
-        )
-        logger.debug(f"Filtered {len(paths.paths)} paths with non-zero probability: {paths}")
+        return filtered_paths
+
+    def _evaluate_paths(self, 
+                        selections: List[List[ProbPathIdDTO]], 
+                        event_time: datetime, 
+                        estimation_time: datetime, 
+                        maybe_context: Optional[PTRequestContext] = None
+                        ) -> Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception]:
+        """
+        Times of the distinct paths of one or more path selections. External data is only fetched for likely paths: 
+        each group shares its trie, so a hop shared by several paths, or selections, is evaluated once.
+        """
+        ext_data_min_prob: float = self.params.ext_data_min_probability
+        groups: Dict[bool, Dict[Tuple[int, ...], List[int]]] = {True: {}, False: {}}
+        for paths in selections:
+            for path_prob in paths:
+                groups[path_prob.prob >= ext_data_min_prob].setdefault(tuple(path_prob.path), path_prob.path)
+
+        results: Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception] = {}
+        for use_ext_data, group in groups.items():
+            if not group:
+                continue
+
+            group_results: List[PathTime | Exception] = self._calculate_paths_time(
+                list(group.values()), use_ext_data, event_time, estimation_time, maybe_context
+            )
+            for key, result in zip(group.keys(), group_results):
+                results[(use_ext_data, key)] = result
 
-        logger.debug(f"Calculating PT for {len(paths.paths)} paths with event_time={event_time} and estimation_time={estimation_time}")
+        return results
+
+    def _aggregate_paths_time(self, paths: List[ProbPathIdDTO], results: Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception]) -> PT_DTO:
+        ext_data_min_prob: float = self.params.ext_data_min_probability
 
         successful_paths: List[ProbPathIdTimeDTO] = []
         failed_paths: List[ProbPathIdDTO] = []
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(self._calculate_path_time, path_prob.path, path_prob.prob, event_time, estimation_time): path_prob
-                for path_prob in paths.paths
-            }
-
-            for f in as_completed(futures):
-                path_prob: ProbPathIdDTO = futures[f]
-                try:
-                    l_time, u_time, starting_tmi, starting_wmi = f.result()
-                    path_prob_time: ProbPathIdTimeDTO = ProbPathIdTimeDTO(
-                        path=path_prob.path,
-                        prob=path_prob.prob,
-                        lower_time=l_time,
-                        upper_time=u_time,
-                        avg_tmi=starting_tmi,
-                        avg_wmi=starting_wmi,
-                        carrier=path_prob.carrier,
-                    )
-
-                    successful_paths.append(path_prob_time)
-                    logger.debug(f"PT calculated for path {path_prob.path}: "
-                                 f"prob={path_prob.prob}, lower_time={l_time}, upper_time={u_time}, "
-                                 f"avg_tmi={starting_tmi}, avg_wmi={starting_wmi}")
-                except Exception:
-                    logger.exception(f"Failed to calculate PT for path {path_prob.path} with probability {path_prob.prob}")
-                    failed_paths.append(path_prob)
+        for path_prob in paths:
+            result: PathTime | Exception = results[(path_prob.prob >= ext_data_min_prob, tuple(path_prob.path))]
+            if isinstance(result, Exception):
+                logger.error(f"Failed to calculate PT for path {path_prob.path} with probability {path_prob.prob}: {result}")
+                failed_paths.append(path_prob)
+                continue
+
+            l_time, u_time, starting_tmi, starting_wmi = result
+            path_prob_time: ProbPathIdTimeDTO = ProbPathIdTimeDTO(
+                path=path_prob.path,
+                prob=path_prob.prob,
+                lower_time=l_time,
+                upper_time=u_time,
+                avg_tmi=starting_tmi,
+                avg_wmi=starting_wmi,
+                carrier=path_prob.carrier,
+            )
+
+            successful_paths.append(path_prob_time)
+            logger.debug(f"PT calculated for path {path_prob.path}: "
+                         f"prob={path_prob.prob}, lower_time={l_time}, upper_time={u_time}, "
+                         f"avg_tmi={starting_tmi}, avg_wmi={starting_wmi}")
 
         logger.debug(f"PT successfully calculated for {len(successful_paths)} paths, failed for {len(failed_paths)} paths")
         
@@ -327,17 +491,155 @@ class PTCalculator:
         return PT_DTO(
             lower=lower, upper=upper,
             n_paths=len(successful_paths), avg_tmi=avg_tmi, avg_wmi=avg_wmi,
-            params=self.params
+            params=self.params,
+            path_times=successful_paths
         )
 
-    def calculate(self, pt_input: 'PTInputDTO', time_sequence: 'TimeSequenceDTO') -> PT_DTO:
-        tmi_manager: 'TMIManager' = self.tmi_manager
-        tmi_manager.initialize()
+    def calculate_remaining_time(self, pt_input: 'PTInputDTO', event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> PT_DTO:
+        vertex: ig.Vertex = self._find_vertex(pt_input.vertex_id)
 
+        if self.params.mode == PTMode.DP:
+            if self.sc_graph.remaining_time_dp_manager.is_available():
+                return self._calculate_dp_remaining_time(vertex, pt_input, event_time, estimation_time, maybe_context)
+            logger.warning("Remaining time DP not available, falling back to path enumeration")
+        
+        all_paths_dto: PathsIdDTO = self._extract_paths(vertex, pt_input.carrier_names, maybe_context)
+        paths: List[ProbPathIdDTO] = self._select_paths(all_paths_dto.paths)
+        if not paths:
+            logger.warning("No paths selected, returning default PT_DTO")
+            return self.empty_path_dto()
+
+        logger.debug(f"Calculating PT for {len(paths)} paths with event_time={event_time} and estimation_time={estimation_time}")
+        results: Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception] = self._evaluate_paths([paths], event_time, estimation_time, maybe_context)
+        return self._aggregate_paths_time(paths, results)
+
+    def calculate_disrupted_remaining_time(self, pt_input: 'PTInputDTO', disruption: PTDisruptionDTO, event_time: datetime, estimation_time: datetime, maybe_context: Optional[PTRequestContext] = None) -> PT_DTO:
+        """
+        Remaining time after a disruption: only the selected paths traversing the disrupted vertices, or without a time
+        in the previous PT, are evaluated again, the others keep their previous times. A previous PT without path times, 
+        e.g. computed on the DP or read from the cache, has every path evaluated.
+        """
+        previous_pt: PT_DTO = disruption.previous_pt
+        if self.params.mode == PTMode.DP or not previous_pt.path_times:
+            logger.debug("No path times in the previous PT: evaluating every path")
+            return self.calculate_remaining_time(pt_input, event_time, estimation_time, maybe_context)
+
+        vertex: ig.Vertex = self._find_vertex(pt_input.vertex_id)
+        paths: List[ProbPathIdDTO] = self._select_paths(self._extract_paths(vertex, pt_input.carrier_names, maybe_context).paths)
+        if not paths:
+            logger.warning("No paths selected, returning default PT_DTO")
+            return self.empty_path_dto()
+
+        disrupted_v_indices: List[int] = [self._get_vertex(v_id).index for v_id in disruption.vertex_ids]
+        disrupted_paths: Set[Tuple[int, ...]] = self.sc_graph.get_paths_through_vertices(vertex, disrupted_v_indices)
+        previous_times: Dict[Tuple[int, ...], ProbPathIdTimeDTO] = {tuple(p.path): p for p in previous_pt.path_times}
+
+        ext_data_min_prob: float = self.params.ext_data_min_probability
+        results: Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception] = {}
+        to_evaluate: List[ProbPathIdDTO] = []
+        for path_prob in paths:
+            key: Tuple[int, ...] = tuple(path_prob.path)
+            maybe_previous: Optional[ProbPathIdTimeDTO] = previous_times.get(key)
+            if key in disrupted_paths or maybe_previous is None:
+                to_evaluate.append(path_prob)
+                continue
+            results[(path_prob.prob >= ext_data_min_prob, key)] = (maybe_previous.lower_time, maybe_previous.upper_time, maybe_previous.avg_tmi, maybe_previous.avg_wmi)
+
+        logger.debug(f"Evaluating {len(to_evaluate)} of {len(paths)} paths after the disruption of {len(disrupted_v_indices)} vertices")
+        if to_evaluate:
+            results.update(self._evaluate_paths([to_evaluate], event_time, estimation_time, maybe_context))
+        return self._aggregate_paths_time(paths, results)
+
+    def calculate_remaining_time_by_carrier(self, vertex_id: int, carrier_names: List[str], event_time: datetime, estimation_time: datetime, maybe_metrics: Optional[StageMetrics] = None) -> Dict[str, Tuple[PT_DTO, PTRequestContext]]:
+        """
+        Remaining time of each carrier on its own, as calculate_remaining_time with a single carrier would compute it, 
+        from one extraction of the union of their paths and one evaluation of each distinct hop. Each carrier gets its
+        own request context, with the TMIs and WMIs of the hops of its paths only.
+        """
+        vertex: ig.Vertex = self._find_vertex(vertex_id)
+        contexts: Dict[str, PTRequestContext] = {carrier: PTRequestContext(maybe_metrics=maybe_metrics) for carrier in carrier_names}
+
+        if self.params.mode == PTMode.DP and self.sc_graph.remaining_time_dp_manager.is_available():
+            return {
+                carrier: (self._calculate_dp_remaining_time(vertex, PTInputDTO(vertex_id=vertex_id, carrier_names=[carrier]), event_time, estimation_time, contexts[carrier]), contexts[carrier])
+                for carrier in carrier_names
+            }
+
+        shared_context: PTRequestContext = PTRequestContext(maybe_metrics=maybe_metrics)
+
+        # The union probabilities are scaled by the order share of each carrier: normalizing by carrier undoes it
+        paths_by_carrier: Dict[str, List[ProbPathIdDTO]] = {carrier: [] for carrier in carrier_names}
+        for path_prob in self._extract_paths(vertex, carrier_names, shared_context).paths:
+            paths_by_carrier[path_prob.carrier].append(path_prob)
+
+        selections: Dict[str, List[ProbPathIdDTO]] = {}
+        for carrier, carrier_paths in paths_by_carrier.items():
+            carrier_prob: float = sum(p.prob for p in carrier_paths)
+            if carrier_prob <= 0.0:
+                logger.warning(f"No paths with non-zero probability for carrier {carrier}")
+                continue
+
+            selections[carrier] = self._select_paths([
+                ProbPathIdDTO(path=p.path, prob=min(p.prob / carrier_prob, 1.0), carrier=carrier) for p in carrier_paths
+            ])
+
+        logger.debug(f"Calculating PT for carriers {carrier_names} over {sum(len(paths) for paths in selections.values())} selected paths")
+        results: Dict[Tuple[bool, Tuple[int, ...]], PathTime | Exception] = self._evaluate_paths(
+            list(selections.values()), event_time, estimation_time, shared_context
+        )
+
+        # Hops are evaluated once for all the carriers: each context keeps the external data of the hops of its paths
+        for carrier, paths in selections.items():
+            hops: Set[Tuple[int, int]] = {hop for p in paths for hop in zip(p.path, p.path[1:])}
+            contexts[carrier].tmi_data.extend(tmi for tmi in shared_context.tmi_data if (tmi.source_id, tmi.destination_id) in hops)
+            contexts[carrier].wmi_data.extend(wmi for wmi in shared_context.wmi_data if (wmi.source_id, wmi.destination_id) in hops)
+
+        return {
+            carrier: (self._aggregate_paths_time(selections[carrier], results) if selections.get(carrier) else self.empty_path_dto(), contexts[carrier])
+            for carrier in carrier_names
+        }
+
+    def calculate(self, pt_input: 'PTInputDTO', time_sequence: 'TimeSequenceDTO', maybe_metrics: Optional[StageMetrics] = None) -> PT_DTO:
+        if self.maybe_cache is None:
+            return self._calculate(pt_input, time_sequence, maybe_metrics)
+
+        key: str = get_pt_cache_key(
+            vertex_id=pt_input.vertex_id,
+            carrier_names=pt_input.carrier_names,
+            event_time=time_sequence.shipment_event_time,
+            estimation_time=time_sequence.shipment_estimation_time,
+            bucket_seconds=self.params.cache_time_bucket_seconds,
+            params_version=get_params_version(self.params),
+            graph_version=self.sc_graph.version
+        )
+        # A bypassed entry is still refreshed, so later estimates see the recomputed PT
+        maybe_entry: Optional[PTCacheEntry] = None if pt_input.bypass_cache else self.maybe_cache.get(key)
+        if maybe_entry is not None:
+            logger.debug(f"PT for vertex {pt_input.vertex_id} and carriers {pt_input.carrier_names} retrieved from cache")
+            count(maybe_metrics, Stage.PT, Counter.CACHE_HITS)
+            return maybe_entry.to_pt_dto(self.params)
+
+        count(maybe_metrics, Stage.PT, Counter.CACHE_MISSES)
+        pt: PT_DTO = self._calculate(pt_input, time_sequence, maybe_metrics)
+        self.maybe_cache.put(key, PTCacheEntry.from_pt_dto(pt))
+        return pt
+
+    def _calculate(self, pt_input: 'PTInputDTO', time_sequence: 'TimeSequenceDTO', maybe_metrics: Optional[StageMetrics] = None) -> PT_DTO:
         event_time: datetime = time_sequence.shipment_event_time
         estimation_time: datetime = time_sequence.shipment_estimation_time
 
-        pt_remaining_time: PT_DTO = self.calculate_remaining_time(pt_input, event_time, estimation_time)
+        context: PTRequestContext
+        pt_remaining_time: PT_DTO
+        if pt_input.maybe_carrier_matrix is not None:
+            if len(pt_input.carrier_names) != 1:
+                raise ValueError(f"Carrier matrix PT requires a single carrier, got {pt_input.carrier_names}")
+            pt_remaining_time, context = pt_input.maybe_carrier_matrix.get(self, pt_input.carrier_names[0], event_time, estimation_time, maybe_metrics)
+        elif pt_input.maybe_disruption is not None:
+            context = PTRequestContext(maybe_metrics=maybe_metrics)
+            pt_remaining_time = self.calculate_disrupted_remaining_time(pt_input, pt_input.maybe_disruption, event_time, estimation_time, context)
+        else:
+            context = PTRequestContext(maybe_metrics=maybe_metrics)        # Request scoped: the managers are shared across requests
+            pt_remaining_time = self.calculate_remaining_time(pt_input, event_time, estimation_time, context)
         remaining_l: float = pt_remaining_time.lower
         remaining_u: float = pt_remaining_time.upper
 
@@ -357,6 +659,7 @@ class PTCalculator:
             avg_wmi=pt_remaining_time.avg_wmi,
             avg_tmi=pt_remaining_time.avg_tmi,
             params=self.params,
-            tmi_data=tmi_manager.tmi_data,
-            wmi_data=self.wmi_manager.wmi_data
+            tmi_data=context.tmi_data,
+            wmi_data=context.wmi_data,
+            path_times=pt_remaining_time.path_times
         )
\ No newline at end of file
@@ -0,0 +1,41 @@
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
+from datetime import datetime
+from threading import Lock
+
+from core.calculator.tfst.pt.pt_dto import PT_DTO
+from core.calculator.tfst.pt.pt_context import PTRequestContext
+from core.metrics.stage_metrics import StageMetrics
+
+if TYPE_CHECKING:
+    from core.calculator.tfst.pt.pt_calculator import PTCalculator
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+class PTCarrierMatrix:
+    """
+    Remaining times of a vertex for several candidate carriers, shared by their estimates: the union of their paths is
+    extracted once and each distinct hop, with its TMI and WMI, is evaluated once. Computed on first use for each pair of
+    shipment event and estimation times, which only differ across the carriers if their DTs do. The stage metrics of
+    the shared work go to the estimate that computes it.
+    """
+    def __init__(self, vertex_id: int, carrier_names: List[str]) -> None:
+        self.vertex_id: int = vertex_id
+        self.carrier_names: List[str] = list(dict.fromkeys(carrier_names))
+
+        self.results: Dict[Tuple[datetime, datetime], Dict[str, Tuple[PT_DTO, PTRequestContext]]] = {}
+        self.lock: Lock = Lock()
+
+    def get(self, pt_calculator: 'PTCalculator', carrier_name: str, event_time: datetime, estimation_time: datetime, maybe_metrics: Optional[StageMetrics] = None) -> Tuple[PT_DTO, PTRequestContext]:
+        if carrier_name not in self.carrier_names:
+            raise ValueError(f"Carrier {carrier_name} is not part of the carrier matrix {self.carrier_names}")
+
+        with self.lock:         # Estimates of the carriers can run concurrently: the first one computes for all
+            key: Tuple[datetime, datetime] = (event_time, estimation_time)
+            if key not in self.results:
+                self.results[key] = pt_calculator.calculate_remaining_time_by_carrier(
+                    self.vertex_id, self.carrier_names, event_time, estimation_time, maybe_metrics
+                )
+                logger.debug(f"PT remaining times computed for vertex {self.vertex_id} and carriers {self.carrier_names}")
+
+            return self.results[key][carrier_name]
@@ -0,0 +1,15 @@
+from typing import List, Optional
+from dataclasses import dataclass, field
+
+from core.calculator.tfst.pt.tmi.tmi_dto import TMI_DTO
+from core.calculator.tfst.pt.wmi.wmi_dto import WMI_DTO
+from core.metrics.stage_metrics import StageMetrics
+
+@dataclass
+class PTRequestContext:
+    """
+    Mutable state of a single PT calculation, so that managers and calculators can be shared across requests.
+    """
+    tmi_data: List[TMI_DTO] = field(default_factory=list, metadata={"description": "TMIs computed for the paths of the request"})
+    wmi_data: List[WMI_DTO] = field(default_factory=list, metadata={"description": "WMIs computed for the paths of the request"})
+    maybe_metrics: Optional[StageMetrics] = field(default=None, metadata={"description": "Stage metrics of the estimate the request belongs to"})
@@ -6,6 +6,8 @@ from core.query_handler.params.params_result import PTParams
 from core.calculator.tfst.pt.tmi.tmi_dto import TMI_DTO
 from core.calculator.tfst.pt.wmi.wmi_dto import WMI_DTO
 
+from core.dto.path.prob_path_time_dto import ProbPathIdTimeDTO
+
 @dataclass(frozen=True)
 class PT_DTO:
     lower: float = field(metadata={"description": "Lower bound of the PT (Path Time) estimate in hours"})
@@ -20,4 +22,6 @@ class PT_DTO:
     tmi_data: List[TMI_DTO] = field(default_factory=list, metadata={"description": "List of TMI computed for the paths"})
     wmi_data: List[WMI_DTO] = field(default_factory=list, metadata={"description": "List of WMI computed for the paths"})
 
+    path_times: List[ProbPathIdTimeDTO] = field(default_factory=list, metadata={"description": "Times of the evaluated paths, reused by disruption re-estimates"})
+
     
\ No newline at end of file
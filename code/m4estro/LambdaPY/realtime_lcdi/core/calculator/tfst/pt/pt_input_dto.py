@@ -1,7 +1,21 @@
-from typing import List
+from typing import List, FrozenSet, Optional, TYPE_CHECKING
 from datetime import datetime
 from dataclasses import dataclass, field
 
+if TYPE_CHECKING:
+    from core.calculator.tfst.pt.pt_carrier_matrix import PTCarrierMatrix
+    from core.calculator.tfst.pt.pt_dto import PT_DTO
+
+@dataclass(frozen=True)
+class PTDisruptionDTO:
+    vertex_ids: FrozenSet[int] = field(
+        metadata={"description": "IDs of the vertices whose external conditions changed."}
+    )
+
+    previous_pt: 'PT_DTO' = field(
+        metadata={"description": "PT of the previous estimate: its paths not traversing the vertices keep their times."}
+    )
+
 @dataclass(frozen=True)
 class PTBaseInputDTO:
     vertex_id: int = field(
@@ -12,6 +26,21 @@ class PTBaseInputDTO:
         metadata={"description": "List of carrier names to be considered for the path time estimate."},
     )
 
+    maybe_carrier_matrix: Optional['PTCarrierMatrix'] = field(
+        default=None,
+        metadata={"description": "Remaining times shared with the estimates of other carriers, for a single carrier name."}
+    )
+
+    bypass_cache: bool = field(
+        default=False,
+        metadata={"description": "Whether to recompute the path time ignoring cached results, e.g. after a disruption changed the external conditions."}
+    )
+
+    maybe_disruption: Optional[PTDisruptionDTO] = field(
+        default=None,
+        metadata={"description": "Disruption since the previous estimate: only the paths traversing its vertices are evaluated again."}
+    )
+
 @dataclass(frozen=True)
 class PTInputDTO(PTBaseInputDTO):
     pass
\ No newline at end of file
@@ -14,10 +14,18 @@ class RouteTimeCalculator:
         self.mape: float = mape
 
     def calculate(self, route_time_dto: RouteTimeInputDTO, confidence: float) -> RouteTimeDTO:
-        mape: float = self.mape
         estimated_route_time_vec: np.ndarray = self.estimator.predict(route_time_dto)
-        estimated_route_time: float = float(estimated_route_time_vec[0])
-        
+        return self._get_route_time(float(estimated_route_time_vec[0]), confidence)
+
+    def calculate_static(self, avg_oti: float, confidence: float) -> RouteTimeDTO:
+        """
+        Route time without TMI and WMI, where the estimator falls back to the average OTI. Being linear in avg_oti,
+        it also applies to probability weighted sums of OTIs.
+        """
+        return self._get_route_time(avg_oti, confidence)
+
+    def _get_route_time(self, estimated_route_time: float, confidence: float) -> RouteTimeDTO:
+        mape: float = self.mape
         route_time: RouteTimeDTO = RouteTimeDTO(
             lower=estimated_route_time * (1 - confidence * mape),
             upper=estimated_route_time * (1 + confidence * mape)
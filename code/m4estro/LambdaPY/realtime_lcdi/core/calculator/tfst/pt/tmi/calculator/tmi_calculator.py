@@ -1,6 +1,8 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 from model.tmi import TransportationMode
 
+from transportation_mode_classifier import get_transportation_mode
+
 from core.calculator.tfst.pt.tmi.calculator.tmi_calculation_dto import TMICalculationDTO
 
 if TYPE_CHECKING:
@@ -15,29 +17,11 @@ class TMICalculator:
         self.tmi_speed_params: 'TMISpeedParameters' = tmi_speed_params
         self.tmi_distance_params: 'TMIDistanceParameters' = tmi_distance_params
 
-    def get_transportation_mode(self, distance_km: float, time_hours: float) -> TransportationMode:
-        speed_params: 'TMISpeedParameters' = self.tmi_speed_params
-        distance_params: 'TMIDistanceParameters' = self.tmi_distance_params
-        
-        speed_km_h: float = distance_km / time_hours
-        
-        if speed_params.air_min_speed_km_h <= speed_km_h <= speed_params.air_max_speed_km_h and distance_params.air_min_distance_km <= distance_km <= distance_params.air_max_distance_km:
-            logger.debug(f"Calculated speed {speed_km_h} km/h and distance {distance_km} km indicate transportation mode: AIR")
-            return TransportationMode.AIR
+        # Same keys as the params the graph edge transportation modes are classified with
+        self.transportation_mode_params: Dict[str, float] = {**tmi_speed_params.to_dict(), **tmi_distance_params.to_dict()}
 
-        if speed_params.sea_min_speed_km_h <= speed_km_h <= speed_params.sea_max_speed_km_h and distance_params.sea_min_distance_km <= distance_km <= distance_params.sea_max_distance_km:
-            logger.debug(f"Calculated speed {speed_km_h} km/h and distance {distance_km} km indicate transportation mode: SEA")
-            return TransportationMode.SEA
-        
-        if speed_params.rail_min_speed_km_h <= speed_km_h <= speed_params.rail_max_speed_km_h and distance_params.rail_min_distance_km <= distance_km <= distance_params.rail_max_distance_km:
-            logger.debug(f"Calculated speed {speed_km_h} km/h and distance {distance_km} km indicate transportation mode: RAIL")
-            return TransportationMode.RAIL
-        
-        if speed_params.road_min_speed_km_h <= speed_km_h <= speed_params.road_max_speed_km_h and distance_params.road_min_distance_km <= distance_km <= distance_params.road_max_distance_km:
-            logger.debug(f"Calculated speed {speed_km_h} km/h and distance {distance_km} km indicate transportation mode: ROAD")
-            return TransportationMode.ROAD
-        
-        return TransportationMode.UNKNOWN
+    def get_transportation_mode(self, distance_km: float, time_hours: float) -> TransportationMode:
+        return get_transportation_mode(distance_km, time_hours, self.transportation_mode_params)
     
     def _empty_tmi_dto(self, tmi_input: 'TMICalculationInputDTO', transportation_mode: TransportationMode) -> TMICalculationDTO:
         return TMICalculationDTO(
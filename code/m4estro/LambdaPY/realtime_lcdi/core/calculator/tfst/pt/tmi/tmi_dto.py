@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -14,6 +14,7 @@ class TMIInputDTO:
     route_average_time: float
     shipment_estimation_time: datetime 
     departure_time: datetime
+    maybe_transportation_mode: Optional[str] = None          # Classified at graph build time, see TRANSPORTATION_MODE_ATTR
 
 @dataclass(frozen=True)
 class TMIValueDTO:
@@ -1,9 +1,10 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 from datetime import datetime, timedelta
 
 import igraph as ig
 
-from graph_config import V_ID_ATTR, LATITUDE_ATTR, LONGITUDE_ATTR
+from graph_config import V_ID_ATTR, LATITUDE_ATTR, LONGITUDE_ATTR, TRANSPORTATION_MODE_PARAMS_ATTR
+from transportation_mode_classifier import TRAFFIC_MODES
 
 from service.lambda_client.traffic_service_lambda_client import TrafficRequest
 
@@ -11,6 +12,8 @@ from model.tmi import TransportationMode
 
 from core.calculator.tfst.pt.tmi.calculator.tmi_calculation_input_dto import TMICalculationInputDTO
 from core.calculator.tfst.pt.tmi.tmi_dto import TMI_DTO, TMIValueDTO, TMIInputDTO
+from core.calculator.tfst.pt.pt_context import PTRequestContext
+from core.metrics.stage_metrics import Stage, Counter, count
 
 if TYPE_CHECKING:
     from service.lambda_client.traffic_service_lambda_client import TrafficServiceLambdaClient, TrafficResult
@@ -42,7 +45,20 @@ class TMIManager:
     def _meets_save_conditions(self, tmi: TMI_DTO) -> bool:
         return tmi.transportation_mode == TransportationMode.ROAD or tmi.transportation_mode == TransportationMode.RAIL
 
-    def calculate_tmi(self, tmi_input: TMIInputDTO) -> TMIValueDTO:
+    def _get_graph_transportation_mode(self, tmi_input: TMIInputDTO) -> Optional[TransportationMode]:
+        """Transportation mode of the edge classified at graph build time, if classified with the current TMI params."""
+        maybe_mode: Optional[str] = tmi_input.maybe_transportation_mode
+        if maybe_mode is None:
+            return None
+
+        graph: ig.Graph = tmi_input.source.graph
+        if TRANSPORTATION_MODE_PARAMS_ATTR not in graph.attributes() or graph[TRANSPORTATION_MODE_PARAMS_ATTR] != self.calculator.transportation_mode_params:
+            logger.debug("Graph transportation modes classified with different TMI params: ignoring them")
+            return None
+
+        return TransportationMode(maybe_mode)
+
+    def calculate_tmi(self, tmi_input: TMIInputDTO, maybe_context: Optional[PTRequestContext] = None) -> TMIValueDTO:
         if not self.use_traffic_service:
             logger.debug("Traffic service not enabled: skipping TMI calculation.")
             return TMIValueDTO(value=0.0, computed=False)
@@ -57,6 +73,11 @@ class TMIManager:
         if departure_time - shipment_estimation_time > timedelta(hours=self.max_timedelta):
             logger.debug(f"Departure time {departure_time} exceeds max timedelta from estimation time {shipment_estimation_time}. Skipping TMI calculation.")
             return TMIValueDTO(value=0.0, computed=False)
+
+        maybe_mode: Optional[TransportationMode] = self._get_graph_transportation_mode(tmi_input)
+        if maybe_mode is not None and maybe_mode not in TRAFFIC_MODES:           # Same empty TMI the calculator returns, without the traffic request
+            logger.debug(f"Route from {source[V_ID_ATTR]} to {destination[V_ID_ATTR]} classified as {maybe_mode.value}: skipping traffic request")
+            return TMIValueDTO(value=0.0, computed=True)
         
         logger.debug(f"Calculating TMI for source {source[V_ID_ATTR]} ({source['name']}) and destination {destination[V_ID_ATTR]} ({destination['name']}) at {departure_time.isoformat()}")
         request: TrafficRequest = TrafficRequest(
@@ -69,6 +90,8 @@ class TMIManager:
         )
 
         result: 'TrafficResult' = self.lambda_client.get_traffic_data(request)
+        if maybe_context is not None:
+            count(maybe_context.maybe_metrics, Stage.PT_TIMES, Counter.LAMBDA_INVOKES)
         logger.debug(f"Received traffic data: {result}")
 
         if result.error:
@@ -98,7 +121,8 @@ class TMIManager:
         )
 
         if self._meets_save_conditions(tmi_dto):
-            self.tmi_data.append(tmi_dto)
+            tmi_data: List['TMI_DTO'] = maybe_context.tmi_data if maybe_context is not None else self.tmi_data
+            tmi_data.append(tmi_dto)
             logger.debug(f"Stored TMI DTO: {tmi_dto}")
         else:
             logger.debug(f"Avoided storing TMI DTO")
@@ -13,6 +13,8 @@ from core.query_handler.params.params_result import WMIParams
 
 from core.calculator.tfst.pt.wmi.calculator.wmi_calculation_input_dto import WMICalculationInputDTO
 from core.calculator.tfst.pt.wmi.wmi_dto import WMI_DTO, WMIValueDTO, WMIInputDTO
+from core.calculator.tfst.pt.pt_context import PTRequestContext
+from core.metrics.stage_metrics import Stage, Counter, count
 
 if TYPE_CHECKING:
     from service.lambda_client.weather_service_lambda_client import WeatherServiceLambdaClient, WeatherResult
@@ -75,7 +77,7 @@ class WMIManager:
         
         return waypoints, step_km, total_distance
 
-    def calculate_wmi(self, wmi_input: WMIInputDTO) -> WMIValueDTO:
+    def calculate_wmi(self, wmi_input: WMIInputDTO, maybe_context: Optional[PTRequestContext] = None) -> WMIValueDTO:
         if not self.use_traffic_service:
             logger.debug("Weather service not enabled: skipping WMI calculation.")
             return WMIValueDTO(value=0.0, computed=False)
@@ -129,6 +131,9 @@ class WMIManager:
 
         logger.debug("Invoking weather service to retrieve weather data for waypoints.")
         weather_results: List['WeatherResult'] = self.lambda_client.get_weather_data(weather_requests_data)
+        if maybe_context is not None:
+            count(maybe_context.maybe_metrics, Stage.PT_TIMES, Counter.LAMBDA_INVOKES)
+            count(maybe_context.maybe_metrics, Stage.PT_TIMES, Counter.PAYLOAD_ITEMS, len(weather_requests_data))
         logger.debug(f"Received {len(weather_results)} weather results from the service.")
 
         weather_validated_results: List['WeatherResult'] = [doc for doc in weather_results if doc is not None and doc.error is False]
@@ -167,7 +172,8 @@ class WMIManager:
             step_distance_km=step_distance_km
         )
         if self._meets_save_conditions(wmi_dto):
-            self.wmi_data.append(wmi_dto)
+            wmi_data: List['WMI_DTO'] = maybe_context.wmi_data if maybe_context is not None else self.wmi_data
+            wmi_data.append(wmi_dto)
             logger.debug(f"Stored WMI DTO: {wmi_dto}")
         else:
             logger.debug(f"Avoided storing WMI DTO: {wmi_dto}")
@@ -24,12 +24,15 @@ class TTCalculator:
         return tt_lower, tt_upper
 
     def _calculate_gamma_tt(self, tt_gamma_input: TTGammaDTO, starting_time: datetime, estimation_time: datetime) -> Tuple[float, float]:
-        l, u = compute_gamma_ci(
-            shape=tt_gamma_input.shape,
-            scale=tt_gamma_input.scale,
-            loc=tt_gamma_input.loc,
-            confidence_level=self.confidence
-        )
+        if tt_gamma_input.maybe_summary is not None:
+            l, u = tt_gamma_input.maybe_summary.ci(self.confidence)
+        else:
+            l, u = compute_gamma_ci(
+                shape=tt_gamma_input.shape,
+                scale=tt_gamma_input.scale,
+                loc=tt_gamma_input.loc,
+                confidence_level=self.confidence
+            )
         logger.debug(f"Gamma TT CI computed: lower={l}, upper={u}")
 
         return self._calculate_tt(l, u, starting_time, estimation_time)
@@ -2,11 +2,17 @@ from typing import Union, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from gamma_summary import GammaSummary
+
 @dataclass(frozen=True)
 class TTGammaDTO:
     shape: float
     scale: float
     loc: float
+    maybe_summary: Optional[GammaSummary] = field(
+        default=None,
+        metadata={"description": "Precomputed mean and confidence intervals of the distribution, if available"},
+    )
 
 @dataclass(frozen=True)
 class TTSampleDTO:
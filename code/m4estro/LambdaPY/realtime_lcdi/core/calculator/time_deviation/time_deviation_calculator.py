@@ -32,12 +32,15 @@ class TimeDeviationCalculator:
         
         if isinstance(dt_distribution, DTGammaDTO):
             dt_gamma: DTGammaDTO = dt_distribution
-            dt_ci: Tuple[float, float] = compute_gamma_ci(
-                shape=dt_gamma.shape, 
-                scale=dt_gamma.scale,
-                loc=dt_gamma.loc,
-                confidence_level=self.dispatch_confidence
-            )
+            if dt_gamma.maybe_summary is not None:
+                dt_ci: Tuple[float, float] = dt_gamma.maybe_summary.ci(self.dispatch_confidence)
+            else:
+                dt_ci: Tuple[float, float] = compute_gamma_ci(
+                    shape=dt_gamma.shape, 
+                    scale=dt_gamma.scale,
+                    loc=dt_gamma.loc,
+                    confidence_level=self.dispatch_confidence
+                )
             logger.debug(f"Computed DT confidence interval from gamma distribution for time deviation calculation: {dt_ci}")
         elif isinstance(dt_distribution, DTSampleDTO):
             dt_sample: DTSampleDTO = dt_distribution
@@ -60,12 +63,15 @@ class TimeDeviationCalculator:
         
         if isinstance(st_distribution, STGammaDTO):
             st_gamma: STGammaDTO = st_distribution
-            st_ci: Tuple[float, float] = compute_gamma_ci(
-                shape=st_gamma.shape, 
-                scale=st_gamma.scale,
-                loc=st_gamma.loc,
-                confidence_level=self.shipment_confidence
-            )
+            if st_gamma.maybe_summary is not None:
+                st_ci: Tuple[float, float] = st_gamma.maybe_summary.ci(self.shipment_confidence)
+            else:
+                st_ci: Tuple[float, float] = compute_gamma_ci(
+                    shape=st_gamma.shape, 
+                    scale=st_gamma.scale,
+                    loc=st_gamma.loc,
+                    confidence_level=self.shipment_confidence
+                )
             logger.debug(f"Computed ST confidence interval from gamma distribution for time deviation calculation: {st_ci}")
         elif isinstance(st_distribution, STSampleDTO):
             st_sample: STSampleDTO = st_distribution
@@ -1,5 +1,7 @@
-from typing import Union, List
-from dataclasses import dataclass
+from typing import Union, List, Optional
+from dataclasses import dataclass, field
+
+from gamma_summary import GammaSummary
 
 from core.calculator.dt.dt_input_dto import DTDistributionDTO
 from core.calculator.dt.dt_dto import DT_DTO
@@ -11,6 +13,10 @@ class STGammaDTO:
     shape: float
     scale: float
     loc: float
+    maybe_summary: Optional[GammaSummary] = field(
+        default=None,
+        metadata={"description": "Precomputed mean and confidence intervals of the distribution, if available"},
+    )
 
 @dataclass(frozen=True)
 class STSampleDTO:
@@ -1,8 +1,11 @@
-from typing import List, Optional
+from typing import List, Optional, Iterable, Tuple, Union, TYPE_CHECKING
 from datetime import datetime
 
+from gamma_summary import GammaSummary, GammaSummaryTable
+
 from model.dispatch_time_gamma import DispatchTimeGamma
 from model.dispatch_time_sample import DispatchTimeSample
+from model.shipment_time_gamma import ShipmentTimeGamma
 
 from core.query_handler.query_result import DispatchTimeResult, DispatchTimeGammaResult, DispatchTimeSampleResult
 from core.query_handler.query_result import ShipmentTimeResult, ShipmentTimeGammaResult, ShipmentTimeSampleResult
@@ -10,14 +13,30 @@ from core.query_handler.query_result import ShipmentTimeResult, ShipmentTimeGamm
 from core.calculator.dt.dt_input_dto import DTInputDTO, DTDistributionInputDTO, DTShipmentTimeInputDTO, DTDistributionDTO, DTGammaDTO, DTSampleDTO
 from core.calculator.dt.dt_dto import DT_DTO
 from core.calculator.tfst.alpha.alpha_input_dto import AlphaInputDTO, AlphaBaseInputDTO, AlphaGammaDTO, AlphaSampleDTO
-from core.calculator.tfst.pt.pt_input_dto import PTInputDTO, PTBaseInputDTO
+from core.calculator.tfst.pt.pt_input_dto import PTInputDTO, PTBaseInputDTO, PTDisruptionDTO
 from core.calculator.tfst.tt.tt_input_dto import TTInputDTO, TTBaseInputDTO, TTGammaDTO, TTSampleDTO
 from core.calculator.tfst.tfst_dto import TFST_DTO
 from core.calculator.time_deviation.time_deviation_input_dto import TimeDeviationBaseInputDTO, TimeDeviationInputDTO, STDistributionDTO, STGammaDTO, STSampleDTO
 
+if TYPE_CHECKING:
+    from core.calculator.tfst.pt.pt_carrier_matrix import PTCarrierMatrix
+
 class DTOFactory:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, maybe_gamma_summary_table: Optional[GammaSummaryTable] = None, confidence_levels: Iterable[float] = ()) -> None:
+        self.maybe_gamma_summary_table: Optional[GammaSummaryTable] = maybe_gamma_summary_table
+        self.confidence_levels: Tuple[float, ...] = tuple(confidence_levels)
+
+    def _get_gamma_summary(self, gamma: Union[DispatchTimeGamma, ShipmentTimeGamma]) -> Optional[GammaSummary]:
+        if self.maybe_gamma_summary_table is None or gamma.id is None:
+            return None
+
+        return self.maybe_gamma_summary_table.get(
+            key=(gamma.__tablename__, gamma.id),
+            shape=gamma.shape,
+            scale=gamma.scale,
+            loc=gamma.loc,
+            confidence_levels=self.confidence_levels
+        )
 
     def _create_dt_distribution(self, dispatch_time_result: DispatchTimeResult) -> DTDistributionDTO:
         if isinstance(dispatch_time_result, DispatchTimeGammaResult):
@@ -25,7 +44,8 @@ class DTOFactory:
             return DTGammaDTO(
                 shape=dispatch_time_gamma.shape,
                 scale=dispatch_time_gamma.scale,
-                loc=dispatch_time_gamma.loc
+                loc=dispatch_time_gamma.loc,
+                maybe_summary=self._get_gamma_summary(dispatch_time_gamma)
                 )
         elif isinstance(dispatch_time_result, DispatchTimeSampleResult):
             dispatch_time_sample: DispatchTimeSample = dispatch_time_result.dt_sample
@@ -56,6 +76,7 @@ class DTOFactory:
                 shape=shipment_time_result.dt_gamma.shape,
                 scale=shipment_time_result.dt_gamma.scale,
                 loc=shipment_time_result.dt_gamma.loc,
+                maybe_summary=self._get_gamma_summary(shipment_time_result.dt_gamma)
             )
         elif isinstance(shipment_time_result, ShipmentTimeSampleResult):
             alpha_dist = AlphaSampleDTO(mean=shipment_time_result.dt_sample.mean)
@@ -68,13 +89,28 @@ class DTOFactory:
         return AlphaInputDTO(st_distribution=alpha_base_input.st_distribution, vertex_id=alpha_base_input.vertex_id)
 
 
-    def create_pt_base_input_dto(self, vertex_id: int, carrier_names: List[str]) -> PTBaseInputDTO:
-        return PTBaseInputDTO(vertex_id=vertex_id, carrier_names=carrier_names)
+    def create_pt_base_input_dto(self, 
+                                 vertex_id: int, 
+                                 carrier_names: List[str], 
+                                 maybe_carrier_matrix: Optional['PTCarrierMatrix'] = None,
+                                 bypass_cache: bool = False,
+                                 maybe_disruption: Optional[PTDisruptionDTO] = None
+                                 ) -> PTBaseInputDTO:
+        return PTBaseInputDTO(
+            vertex_id=vertex_id, 
+            carrier_names=carrier_names, 
+            maybe_carrier_matrix=maybe_carrier_matrix, 
+            bypass_cache=bypass_cache,
+            maybe_disruption=maybe_disruption
+        )
 
     def create_pt_input_dto(self, pt_base_input: PTBaseInputDTO) -> PTInputDTO:
         return PTInputDTO(
             vertex_id= pt_base_input.vertex_id,
-            carrier_names=pt_base_input.carrier_names)
+            carrier_names=pt_base_input.carrier_names,
+            maybe_carrier_matrix=pt_base_input.maybe_carrier_matrix,
+            bypass_cache=pt_base_input.bypass_cache,
+            maybe_disruption=pt_base_input.maybe_disruption)
 
 
     def create_tt_base_input_dto(self, shipment_time_result: ShipmentTimeResult) -> TTBaseInputDTO:
@@ -83,6 +119,7 @@ class DTOFactory:
                 shape=shipment_time_result.dt_gamma.shape,
                 scale=shipment_time_result.dt_gamma.scale,
                 loc=shipment_time_result.dt_gamma.loc,
+                maybe_summary=self._get_gamma_summary(shipment_time_result.dt_gamma)
             )
         elif isinstance(shipment_time_result, ShipmentTimeSampleResult):
             tt_dist = TTSampleDTO(x=shipment_time_result.dt_x, mean=shipment_time_result.dt_sample.mean)
@@ -107,6 +144,7 @@ class DTOFactory:
                 shape=shipment_time_result.dt_gamma.shape,
                 scale=shipment_time_result.dt_gamma.scale,
                 loc=shipment_time_result.dt_gamma.loc,
+                maybe_summary=self._get_gamma_summary(shipment_time_result.dt_gamma)
             )
         elif isinstance(shipment_time_result, ShipmentTimeSampleResult):
             st_dist = STSampleDTO(x=shipment_time_result.dt_x, mean=shipment_time_result.dt_sample.mean)
@@ -0,0 +1,8 @@
+from typing import Dict, Any
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class EstimatePayloadDTO:
+    """Order independent part of a formatted estimate, with the version of the format that produced it."""
+    data: Dict[str, Any]
+    version: int
@@ -1,3 +1,4 @@
+from typing import Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
@@ -33,6 +34,8 @@ from core.calculator.time_deviation.time_deviation_calculator import TimeDeviati
 from core.calculator.time_deviation.time_deviation_input_dto import TimeDeviationBaseInputDTO, TimeDeviationInputDTO
 from core.calculator.time_deviation.time_deviation_dto import TimeDeviationDTO
 
+from core.metrics.stage_metrics import StageMetrics, Stage, measure
+
 from logger import get_logger
 logger = get_logger(__name__)
 
@@ -76,10 +79,12 @@ class Executor:
             alpha_base_input: AlphaBaseInputDTO,
             pt_base_input: PTBaseInputDTO,
             tt_base_input: TTBaseInputDTO,
-            td_partial_input: TimeDeviationBaseInputDTO
+            td_partial_input: TimeDeviationBaseInputDTO,
+            maybe_metrics: Optional[StageMetrics] = None
     ) -> ExecutorResult:
         
-        dt: DT_DTO = self.dt_calculator.calculate(dt_input=dt_input, time_sequence_input=time_sequence_input)
+        with measure(maybe_metrics, Stage.DT):
+            dt: DT_DTO = self.dt_calculator.calculate(dt_input=dt_input, time_sequence_input=time_sequence_input)
         logger.debug(f"DT calculated successfully: {dt}")
 
         order_time: datetime = time_sequence_input.order_time
@@ -101,8 +106,56 @@ class Executor:
             time_sequence=time_sequence,
             alpha_input=alpha_input,
             pt_input=pt_input,
-            tt_input=tt_input
+            tt_input=tt_input,
+            maybe_metrics=maybe_metrics
+        )
+
+        return self._complete(time_sequence, dt, tfst_executor_result, td_partial_input, maybe_metrics)
+
+    def reexecute_pt(
+            self,
+            time_sequence: TimeSequenceDTO,
+            previous: ExecutorResult,
+            pt_base_input: PTBaseInputDTO,
+            td_partial_input: TimeDeviationBaseInputDTO,
+            maybe_metrics: Optional[StageMetrics] = None
+    ) -> ExecutorResult:
+        """
+        Incremental estimate of a previous result: DT, alpha and TT are reused, PT is recomputed and the indicators
+        depending on it are derived again. The time sequence must share the shipment time and stage of the previous one.
+        """
+        if time_sequence.shipment_time != previous.time_sequence.shipment_time or \
+           time_sequence.get_estimation_stage() != previous.time_sequence.get_estimation_stage():
+            raise ValueError("Incremental estimates must share the shipment time and the estimation stage of the previous one")
+
+        pt_input: PTInputDTO = self.dto_factory.create_pt_input_dto(pt_base_input=pt_base_input)
+        tfst_executor_result: TFSTExecutorResult = self.tfst_calculator_executor.reexecute_pt(
+            time_sequence=time_sequence,
+            previous=previous.tfst_executor_result,
+            pt_input=pt_input,
+            maybe_metrics=maybe_metrics
         )
+
+        return self._complete(time_sequence, previous.dt, tfst_executor_result, td_partial_input, maybe_metrics)
+
+    def _complete(
+            self,
+            time_sequence: TimeSequenceDTO,
+            dt: DT_DTO,
+            tfst_executor_result: TFSTExecutorResult,
+            td_partial_input: TimeDeviationBaseInputDTO,
+            maybe_metrics: Optional[StageMetrics] = None
+    ) -> ExecutorResult:
+        with measure(maybe_metrics, Stage.INDICATORS):
+            return self._calculate_indicators(time_sequence, dt, tfst_executor_result, td_partial_input)
+
+    def _calculate_indicators(
+            self,
+            time_sequence: TimeSequenceDTO,
+            dt: DT_DTO,
+            tfst_executor_result: TFSTExecutorResult,
+            td_partial_input: TimeDeviationBaseInputDTO
+    ) -> ExecutorResult:
         tfst: TFST_DTO = tfst_executor_result.tfst
 
         est: EST_DTO = self.est_calculator.calculate(tfst)
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from enum import Enum
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
@@ -20,6 +20,8 @@ from core.calculator.tfst.alpha.alpha_dto import AlphaDTO
 from core.calculator.tfst.tfst_calculator import TFSTCalculator
 from core.calculator.tfst.tfst_dto import TFST_DTO, TFSTCalculationDTO
 
+from core.metrics.stage_metrics import StageMetrics, Stage, measure
+
 from logger import get_logger
 logger = get_logger(__name__)
 
@@ -64,29 +66,40 @@ class TFSTExecutor:
             return TFSTCompute.TT
         
         return TFSTCompute.ALL
+
+    def _calculate_pt(self, pt_input: PTInputDTO, time_sequence: TimeSequenceDTO, maybe_metrics: Optional[StageMetrics] = None) -> PT_DTO:
+        with measure(maybe_metrics, Stage.PT):
+            return self.pt_calculator.calculate(pt_input, time_sequence, maybe_metrics=maybe_metrics)
+
+    def _calculate_tt(self, tt_input: TTInputDTO, time_sequence: TimeSequenceDTO, maybe_metrics: Optional[StageMetrics] = None) -> TT_DTO:
+        with measure(maybe_metrics, Stage.TT):
+            return self.tt_calculator.calculate(tt_input, time_sequence)
         
     def execute(self,
                 time_sequence: TimeSequenceDTO,
                 alpha_input: AlphaInputDTO,
                 pt_input: PTInputDTO,
                 tt_input: TTInputDTO,
+                maybe_metrics: Optional[StageMetrics] = None
                 ) -> TFSTExecutorResult:
         
-        alpha: AlphaDTO = self.alpha_calculator.calculate(alpha_input, time_sequence)
+        with measure(maybe_metrics, Stage.ALPHA):
+            alpha: AlphaDTO = self.alpha_calculator.calculate(alpha_input, time_sequence)
         logger.debug(f"Alpha calculated successfully: {alpha}")
       
         if self.parallelization > 0:
             logger.debug("Starting TFST calculation in parallel mode")
-            return self._execute_parallel(time_sequence, alpha, pt_input, tt_input)
+            return self._execute_parallel(time_sequence, alpha, pt_input, tt_input, maybe_metrics)
 
         logger.debug("Starting TFST calculation in sequential mode")
-        return self._execute_sequential(time_sequence, alpha, pt_input, tt_input)
+        return self._execute_sequential(time_sequence, alpha, pt_input, tt_input, maybe_metrics)
     
     def _execute_parallel(self,
                           time_sequence: TimeSequenceDTO,
                           alpha: AlphaDTO,
                           pt_input: PTInputDTO,
-                          tt_input: TTInputDTO
+                          tt_input: TTInputDTO,
+                          maybe_metrics: Optional[StageMetrics] = None
                           ) -> TFSTExecutorResult:
 
         with ThreadPoolExecutor() as executor:
@@ -96,14 +109,14 @@ class TFSTExecutor:
                 futures: Dict[str, Any] = {}
                 if to_compute == TFSTCompute.PT or to_compute == TFSTCompute.ALL:
                     logger.debug("Submitting PT calculation to executor")
-                    futures['pt'] = executor.submit(self.pt_calculator.calculate, pt_input, time_sequence)
+                    futures['pt'] = executor.submit(self._calculate_pt, pt_input, time_sequence, maybe_metrics)
                 else:
                     logger.debug("Skipping PT calculation due to negligible weight")
                     futures['pt'] = executor.submit(self.pt_calculator.empty_path_dto)
 
                 if to_compute == TFSTCompute.TT or to_compute == TFSTCompute.ALL:
                     logger.debug("Submitting TT calculation to executor")
-                    futures['tt'] = executor.submit(self.tt_calculator.calculate, tt_input, time_sequence)
+                    futures['tt'] = executor.submit(self._calculate_tt, tt_input, time_sequence, maybe_metrics)
                 else:
                     logger.debug("Skipping TT calculation due to negligible weight")
                     futures['tt'] = executor.submit(self.tt_calculator.empty)
@@ -129,25 +142,57 @@ class TFSTExecutor:
 
         return TFSTExecutorResult(alpha=alpha, pt=pt, tt=tt, tfst=tfst)
 
+    def reexecute_pt(self, 
+                     time_sequence: TimeSequenceDTO, 
+                     previous: TFSTExecutorResult, 
+                     pt_input: PTInputDTO, 
+                     maybe_metrics: Optional[StageMetrics] = None
+                     ) -> TFSTExecutorResult:
+        """
+        TFST of a previous result with only the PT recomputed: alpha, TT and the computed components are reused.
+        A PT with negligible weight is not recomputed.
+        """
+        to_compute: TFSTCompute = previous.tfst.computed
+
+        if to_compute == TFSTCompute.PT or to_compute == TFSTCompute.ALL:
+            pt: PT_DTO = self._calculate_pt(pt_input, time_sequence, maybe_metrics)
+            logger.debug(f"PT recalculated successfully: {pt}")
+        else:
+            pt: PT_DTO = previous.pt
+            logger.debug("PT recalculation skipped due to negligible weight")
+
+        tfst_calculation: TFSTCalculationDTO = self.tfst_calculator.calculate(pt=pt, tt=previous.tt, alpha=previous.alpha)
+        tfst: TFST_DTO = TFST_DTO(
+            lower=tfst_calculation.lower,
+            upper=tfst_calculation.upper,
+            alpha=tfst_calculation.alpha,
+            tolerance=self.tolerance,
+            computed=to_compute
+        )
+        logger.debug(f"TFST recalculated successfully: {tfst}")
+
+        return TFSTExecutorResult(alpha=previous.alpha, pt=pt, tt=previous.tt, tfst=tfst)
+
     def _execute_sequential(
         self,
         time_sequence: TimeSequenceDTO,
         alpha: AlphaDTO,
         pt_input: PTInputDTO,
-        tt_input: TTInputDTO
+        tt_input: TTInputDTO,
+        maybe_metrics: Optional[StageMetrics] = None
     ) -> TFSTExecutorResult:
         
         to_compute: TFSTCompute = self._optimize_by_alpha(alpha)
         
         if to_compute == TFSTCompute.PT or to_compute == TFSTCompute.ALL:
-            pt: PT_DTO = self.pt_calculator.calculate(pt_input, time_sequence)
+            pt: PT_DTO = self._calculate_pt(pt_input, time_sequence, maybe_metrics)
             logger.debug(f"PT calculated successfully: {pt}")
         else:
             pt: PT_DTO = self.pt_calculator.empty_path_dto()
             logger.debug("PT calculation skipped due to negligible weight")
 
         if to_compute == TFSTCompute.TT or to_compute == TFSTCompute.ALL:
-            tt: TT_DTO = self.tt_calculator.calculate(tt_input, time_sequence)
+            tt: TT_DTO = self._calculate_tt(tt_input, time_sequence, maybe_metrics)
             logger.debug(f"TT calculated successfully: {tt}")
         else:
             tt: TT_DTO = self.tt_calculator.empty()
@@ -14,6 +14,10 @@ from model.holiday import Holiday, HolidayCategory
 from core.executor.executor import ExecutorResult
 from core.calculator.tfst.alpha.alpha_dto import AlphaDTO
 from core.calculator.dt.holiday.holiday_dto import HolidayDTO
+from core.dto.payload.estimate_payload_dto import EstimatePayloadDTO
+
+# Version of the stored estimate payloads: bump it when _format_basic_info changes, so older payloads are formatted live
+PAYLOAD_VERSION: int = 2
 
 @dataclass(frozen=True)
 class EstimatedTimeSharedDTO:
@@ -42,10 +46,12 @@ class EstimatedTimeSharedDTO:
 
 if TYPE_CHECKING:
     from model.estimated_time import EstimatedTime
+    from model.latest_estimated_time import LatestEstimatedTime
     from model.site import Site
     from model.supplier import Supplier
     from model.carrier import Carrier
     from model.manufacturer import Manufacturer
+    from core.pipeline.estimation_request import EstimationResult
 
 class Formatter:
     def __init__(self) -> None:
@@ -180,6 +186,8 @@ class Formatter:
                             "max_paths": et.estimation_params.pt_max_paths,
                             "ext_data_min_prob": et.estimation_params.pt_ext_data_min_prob,
                             "confidence": et.estimation_params.pt_confidence,
+                            "mode": et.estimation_params.pt_mode,
+                            "dp_prefix_hops": et.estimation_params.pt_dp_prefix_hops,
                         },
                         "TT": {
                             "confidence": et.estimation_params.tt_confidence,
@@ -253,8 +261,18 @@ class Formatter:
                 }
             } 
 
+    def format_et_payload(self, et: 'EstimatedTime') -> EstimatePayloadDTO:
+        """Order independent part of a formatted estimate, stored with the estimate when it is saved."""
+        return EstimatePayloadDTO(data=self._format_basic_info(et), version=PAYLOAD_VERSION)
+
+    def _get_et_payload(self, et: 'EstimatedTime') -> Dict[str, Any]:
+        # Estimates saved without a payload, or with a payload of another format, are formatted live
+        if et.payload is not None and et.payload_version == PAYLOAD_VERSION:
+            return et.payload
+        return self._format_basic_info(et)
+
     def format_et(self, et: 'EstimatedTime') -> Dict[str, Any]:
-        basic_info = self._format_basic_info(et)
+        basic_info = self._get_et_payload(et)
         return {
             **basic_info,
             "order": {
@@ -284,6 +302,17 @@ class Formatter:
             }
         }
     
+    def format_latest_et(self, latest: 'LatestEstimatedTime') -> Dict[str, Any]:
+        return {
+            "order_id": latest.order_id,
+            "estimated_time_id": latest.estimated_time_id,
+            "vertex_id": latest.vertex_id,
+            "estimation_time": latest.estimation_time.isoformat(),
+            "status": latest.status,
+            "EODT": latest.EODT,
+            "EDD": latest.EDD.isoformat(),
+        }
+
     def format_et_by_order(self, shared: EstimatedTimeSharedDTO, ets: List['EstimatedTime']) -> Dict[str, Any]:
         return {
             "order_id": shared.order_id,
@@ -332,7 +361,7 @@ class Formatter:
             "status": shared.status,
 
             "data": [
-                self._format_basic_info(et)
+                self._get_et_payload(et)
                 for et in ets
             ]
         }
@@ -528,4 +557,84 @@ class Formatter:
                     }
                 }
             }
-        } 
\ No newline at end of file
+        } 
+
+    def _format_carrier_estimate(self, carrier: 'Carrier', result: 'EstimationResult') -> Dict[str, Any]:
+        carrier_data: Dict[str, Any] = {
+            "id": carrier.id,
+            "name": carrier.name
+        }
+        if result.maybe_executor_result is None:
+            return {"carrier": carrier_data, "message": result.maybe_error}
+
+        executor_result: ExecutorResult = result.maybe_executor_result
+        return {
+            "carrier": carrier_data,
+            "shipment_time": executor_result.time_sequence.shipment_time.isoformat(),
+            "indicators": {
+                "TMI": executor_result.tfst_executor_result.pt.avg_tmi,
+                "WMI": executor_result.tfst_executor_result.pt.avg_wmi,
+                "PT": {
+                    "n_paths": executor_result.tfst_executor_result.pt.n_paths,
+                    "lower": executor_result.tfst_executor_result.pt.lower,
+                    "upper": executor_result.tfst_executor_result.pt.upper,
+                },
+                "TFST": {
+                    "computed": executor_result.tfst_executor_result.tfst.computed.value,
+                    "lower": executor_result.tfst_executor_result.tfst.lower,
+                    "upper": executor_result.tfst_executor_result.tfst.upper,
+                },
+                "EST": executor_result.est.value,
+                "CFDI": {
+                    "lower": executor_result.cfdi.lower,
+                    "upper": executor_result.cfdi.upper,
+                },
+                "EODT": executor_result.eodt.value,
+                "EDD": executor_result.edd.value.isoformat(),
+            }
+        }
+
+    def format_carrier_matrix_result(self,
+                                     vertex: ig.Vertex,
+                                     site: 'Site',
+                                     supplier: 'Supplier',
+                                     carriers: List['Carrier'],
+                                     manufacturer: 'Manufacturer',
+                                     results: List['EstimationResult'],
+                                     status: OrderStatus
+                                     ) -> Dict[str, Any]:
+        carriers_by_id: Dict[int, 'Carrier'] = {carrier.id: carrier for carrier in carriers}
+        request = results[0].request
+
+        return {
+            "site": {
+                "id": site.id,
+                "location": site.location_name
+            },
+            "supplier": {
+                "id": supplier.id,
+                "manufacturer_id": supplier.manufacturer_supplier_id,
+                "name": supplier.name
+            },
+            "manufacturer": {
+                "id": manufacturer.id,
+                "name": manufacturer.name,
+                "location": manufacturer.location_name
+            },
+            "vertex": {
+                "id": vertex[V_ID_ATTR],
+                "name": vertex["name"],
+                "type": vertex[TYPE_ATTR]
+            },
+
+            "order_time": request.order_time.isoformat(),
+            "event_time": request.event_time.isoformat(),
+            "estimation_time": request.estimation_time.isoformat(),
+
+            "status": status.value,
+
+            "carriers": [
+                self._format_carrier_estimate(carriers_by_id[result.request.carrier_id], result)
+                for result in results
+            ]
+        }
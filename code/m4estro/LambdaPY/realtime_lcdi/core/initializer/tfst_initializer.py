@@ -1,3 +1,4 @@
+from typing import Optional
 from dataclasses import dataclass
 
 from utils.config import EXTERNAL_API_LAMBDA_ARN_KEY, RT_ESTIMATOR_LAMBDA_ARN_KEY, get_env
@@ -21,6 +22,7 @@ from core.calculator.tfst.pt.route_time.route_time_calculator import RouteTimeCa
 from core.calculator.tfst.pt.vertex_time.vertex_time_calculator import VertexTimeCalculator
 
 from core.calculator.tfst.pt.pt_calculator import PTCalculator
+from core.calculator.tfst.pt.cache.pt_cache import PTCache
 from core.calculator.tfst.tt.tt_calculator import TTCalculator
 from core.calculator.tfst.alpha.alpha_calculator import AlphaCalculator
 
@@ -33,15 +35,16 @@ logger = get_logger(__name__)
 
 @dataclass
 class TFSTInitializerResult:
-    alpha_calculator: AlphaCalculator
+    alpha_calculator: Optional[AlphaCalculator]
     pt_calculator: PTCalculator
     tt_calculator: TTCalculator
     tfst_calculator: TFSTCalculator
 
 class TFSTInitializer:
-    def __init__(self, alpha_initializer: AlphaInitializer, sc_graph: SCGraph) -> None:
-        self.alpha_initializer: AlphaInitializer = alpha_initializer
+    def __init__(self, alpha_initializer: Optional[AlphaInitializer], sc_graph: SCGraph, maybe_pt_cache: Optional[PTCache] = None) -> None:
+        self.alpha_initializer: Optional[AlphaInitializer] = alpha_initializer      # None when the alpha calculator depends on the request
         self.sc_graph: SCGraph = sc_graph
+        self.maybe_pt_cache: Optional[PTCache] = maybe_pt_cache
         
     def initialize(self, tfst_params: TFSTParams) -> TFSTInitializerResult:
         alpha_params = tfst_params.alpha_params
@@ -91,8 +94,10 @@ class TFSTInitializer:
         )
         logger.debug("WMI manager initialized successfully")
         
-        alpha_calculator: AlphaCalculator = self.alpha_initializer.initialize(alpha_type=alpha_params.alpha_type)
-        logger.debug("Alpha calculator initialized successfully")
+        alpha_calculator: Optional[AlphaCalculator] = None
+        if self.alpha_initializer is not None:
+            alpha_calculator = self.alpha_initializer.initialize(alpha_type=alpha_params.alpha_type)
+            logger.debug("Alpha calculator initialized successfully")
         
         pt_calculator = PTCalculator(
             sc_graph=self.sc_graph,
@@ -100,7 +105,8 @@ class TFSTInitializer:
             rt_calculator=rt_calculator,
             tmi_manager=tmi_manager,
             wmi_manager=wmi_manager,
-            params=pt_params
+            params=pt_params,
+            maybe_cache=self.maybe_pt_cache
         )
         logger.debug("PT calculator initialized successfully")
 
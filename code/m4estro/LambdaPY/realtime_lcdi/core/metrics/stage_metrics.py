@@ -0,0 +1,113 @@
+from typing import Dict, Any, Iterator, Optional, ContextManager
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from enum import Enum
+from threading import Lock
+import time
+
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+class Stage(Enum):
+    REFERENCE_DATA = "reference_data"
+    DT = "dt"
+    ALPHA = "alpha"
+    PT = "pt"
+    PT_PATHS = "pt_paths"               # Path extraction and probabilities
+    PT_TIMES = "pt_times"               # Vertex and route times of the paths, with TMI, WMI and RT estimator
+    TT = "tt"
+    INDICATORS = "indicators"           # EST, CFDI, EODT, EDD and time deviation
+    SAVE = "save"
+
+class Counter(Enum):
+    LAMBDA_INVOKES = "lambda_invokes"
+    DB_QUERIES = "db_queries"
+    CACHE_HITS = "cache_hits"
+    CACHE_MISSES = "cache_misses"
+    PATHS = "paths"
+    ROUTES = "routes"
+    PAYLOAD_ITEMS = "payload_items"     # Items sent to external services, e.g. weather waypoints
+    RECORDS = "records"
+
+@dataclass
+class StageStats:
+    calls: int = field(default=0, metadata={"description": "Times the stage ran"})
+    duration_ms: float = field(default=0.0, metadata={"description": "Total wall time of the stage, in milliseconds"})
+    counters: Dict[Counter, int] = field(default_factory=dict, metadata={"description": "Counters recorded within the stage"})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "duration_ms": round(self.duration_ms, 3),
+            **{counter.value: n for counter, n in self.counters.items()}
+        }
+
+class StageMetrics:
+    """
+    Wall time, calls and counters of the stages of a single estimate. Thread safe, as stages run on worker threads:
+    stages nested in others, e.g. pt_times within pt, are measured on their own and not subtracted.
+    """
+    def __init__(self) -> None:
+        self.stages: Dict[Stage, StageStats] = {}
+        self.lock: Lock = Lock()
+
+    @contextmanager
+    def measure(self, stage: Stage) -> Iterator[None]:
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms: float = (time.perf_counter() - start) * 1000.0
+            with self.lock:
+                stats: StageStats = self.stages.setdefault(stage, StageStats())
+                stats.calls += 1
+                stats.duration_ms += duration_ms
+
+    def count(self, stage: Stage, counter: Counter, n: int = 1) -> None:
+        with self.lock:
+            counters: Dict[Counter, int] = self.stages.setdefault(stage, StageStats()).counters
+            counters[counter] = counters.get(counter, 0) + n
+
+    @contextmanager
+    def count_db_queries(self, stage: Stage, session: Session) -> Iterator[None]:
+        """Counts the statements the session runs within the block, on its current connection only."""
+        connection: Connection = session.connection()
+
+        def on_execute(*_: Any) -> None:
+            self.count(stage, Counter.DB_QUERIES)
+
+        event.listen(connection, "before_cursor_execute", on_execute)
+        try:
+            yield
+        finally:
+            event.remove(connection, "before_cursor_execute", on_execute)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return {stage.value: stats.to_dict() for stage, stats in self.stages.items()}
+
+    def emit(self, namespace: str, dimensions: Dict[str, str]) -> None:
+        """Prints the stages as one CloudWatch embedded metric format record, isolated from other records."""
+        metrics: EphemeralMetrics = EphemeralMetrics(namespace=namespace)
+        metrics.add_dimensions(**dimensions)
+
+        with self.lock:
+            for stage, stats in self.stages.items():
+                metrics.add_metric(name=f"{stage.value}.calls", unit=MetricUnit.Count, value=stats.calls)
+                metrics.add_metric(name=f"{stage.value}.duration", unit=MetricUnit.Milliseconds, value=stats.duration_ms)
+                for counter, n in stats.counters.items():
+                    metrics.add_metric(name=f"{stage.value}.{counter.value}", unit=MetricUnit.Count, value=n)
+
+        metrics.flush_metrics()
+
+def measure(maybe_metrics: Optional[StageMetrics], stage: Stage) -> ContextManager[None]:
+    return maybe_metrics.measure(stage) if maybe_metrics is not None else nullcontext()
+
+def count(maybe_metrics: Optional[StageMetrics], stage: Stage, counter: Counter, n: int = 1) -> None:
+    if maybe_metrics is not None:
+        maybe_metrics.count(stage, counter, n)
+
+def count_db_queries(maybe_metrics: Optional[StageMetrics], stage: Stage, session: Session) -> ContextManager[None]:
+    return maybe_metrics.count_db_queries(stage, session) if maybe_metrics is not None else nullcontext()
@@ -0,0 +1,63 @@
+from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+
+from core.executor.executor import ExecutorResult
+from core.pipeline.estimation_request import EstimationRequest
+from core.query_handler.params.params_result import ParamsResult
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+DEFAULT_ESTIMATE_STORE_MAX_SIZE: int = 1024
+
+@dataclass(frozen=True)
+class StoredEstimate:
+    estimated_time_id: int = field(metadata={"description": "ID of the saved estimated time record"})
+    request: EstimationRequest = field(metadata={"description": "Request the estimate was computed for"})
+    executor_result: ExecutorResult = field(metadata={"description": "Estimate components, reused by incremental estimates"})
+    params: ParamsResult = field(metadata={"description": "Params the estimate was computed with"})
+    graph_version: str = field(metadata={"description": "Version of the graph the estimate was computed on"})
+
+    def matches(self, request: EstimationRequest, params: ParamsResult, graph_version: str) -> bool:
+        """
+        Whether the components of the estimate are valid for the request: only event and estimation times may differ,
+        and params and graph must be the same, since DT, alpha and TT depend on them.
+        """
+        previous: EstimationRequest = self.request
+        return (previous.site_id, previous.carrier_id, previous.vertex_id, previous.order_time, previous.maybe_shipment_time) == \
+               (request.site_id, request.carrier_id, request.vertex_id, request.order_time, request.maybe_shipment_time) and \
+               self.graph_version == graph_version and self.params == params
+
+class EstimateStore:
+    """
+    Last estimate saved for each order in the execution environment, LRU. The stored components are not persisted:
+    an estimate is only reusable while it is still the latest saved for its order.
+    """
+    def __init__(self, max_size: int = DEFAULT_ESTIMATE_STORE_MAX_SIZE) -> None:
+        self.max_size: int = max_size
+
+        self.estimates: 'OrderedDict[int, StoredEstimate]' = OrderedDict()
+        self.lock: Lock = Lock()
+
+    def put(self, order_id: int, estimate: StoredEstimate) -> None:
+        with self.lock:
+            self.estimates[order_id] = estimate
+            self.estimates.move_to_end(order_id)
+            while len(self.estimates) > self.max_size:
+                self.estimates.popitem(last=False)
+
+    def get(self, order_id: int, latest_estimated_time_id: Optional[int]) -> Optional[StoredEstimate]:
+        with self.lock:
+            maybe_estimate: Optional[StoredEstimate] = self.estimates.get(order_id)
+            if maybe_estimate is None:
+                return None
+
+            if maybe_estimate.estimated_time_id != latest_estimated_time_id:
+                logger.debug(f"Stored estimate of order ID {order_id} is not the latest saved: discarding it")
+                del self.estimates[order_id]
+                return None
+
+            self.estimates.move_to_end(order_id)
+            return maybe_estimate
@@ -0,0 +1,318 @@
+from typing import Dict, List, FrozenSet, Optional
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from gamma_summary import GammaSummaryTable
+
+from service.read_only_db_connector import ReadOnlyDBConnector
+
+from model.alpha_opt import AlphaOpt
+
+from core.executor.tfst_executor import TFSTExecutor
+from core.executor.executor import Executor, ExecutorResult
+
+from core.initializer.alpha_initializer import AlphaInitializer
+from core.initializer.tfst_initializer import TFSTInitializer, TFSTInitializerResult
+from core.initializer.initializer import Initializer, InitializerResult
+
+from core.query_handler.query_result import ShipmentTimeResult, DispatchTimeResult
+from core.query_handler.params.params_result import ParamsResult
+from core.query_handler.reference_data.reference_data_loader import ReferenceDataLoader
+from core.query_handler.reference_data.reference_data_result import ReferenceDataResult, SiteCarrierPair
+
+from core.dto.time_sequence.time_sequence_dto import TimeSequenceInputDTO, TimeSequenceDTO
+from core.dto.dto_factory import DTOFactory
+
+from core.sc_graph.sc_graph import SCGraph
+
+from core.exception.invalid_time_sequence_exception import InvalidTimeSequenceException
+
+from core.calculator.dt.dt_input_dto import DTInputDTO
+from core.calculator.tfst.pt.pt_input_dto import PTBaseInputDTO, PTDisruptionDTO
+from core.calculator.tfst.pt.cache.pt_cache import PTCache
+from core.calculator.tfst.pt.pt_carrier_matrix import PTCarrierMatrix
+from core.calculator.tfst.tt.tt_input_dto import TTBaseInputDTO
+from core.calculator.tfst.alpha.alpha_calculator import AlphaCalculator
+from core.calculator.tfst.alpha.alpha_input_dto import AlphaBaseInputDTO
+from core.calculator.time_deviation.time_deviation_input_dto import TimeDeviationBaseInputDTO
+
+from core.pipeline.estimation_request import EstimationRequest, EstimationResult
+
+from core.metrics.stage_metrics import StageMetrics, Stage, measure
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+class EstimationPipeline:
+    """
+    Estimation calculators and clients built once for a params and graph version and shared across requests.
+    Per request state lives in the DTOs and in the PT request context, so estimates can run concurrently.
+    """
+    def __init__(self,
+                 params: ParamsResult,
+                 sc_graph: SCGraph,
+                 ro_db_connector: ReadOnlyDBConnector,
+                 maybe_gamma_summary_table: Optional[GammaSummaryTable] = None,
+                 maybe_pt_cache: Optional[PTCache] = None
+                 ) -> None:
+
+        self.params: ParamsResult = params
+        self.sc_graph: SCGraph = sc_graph
+        self.ro_db_connector: ReadOnlyDBConnector = ro_db_connector
+
+        self.dto_factory: DTOFactory = DTOFactory(
+            maybe_gamma_summary_table=maybe_gamma_summary_table,
+            confidence_levels=params.confidence_levels()
+        )
+
+        initializer: Initializer = Initializer(TFSTInitializer(alpha_initializer=None, sc_graph=sc_graph, maybe_pt_cache=maybe_pt_cache))
+        self.initializer_result: InitializerResult = initializer.initialize(
+            params=params,
+            maybe_ro_db_connector=ro_db_connector
+        )
+        logger.debug("Estimation pipeline calculators initialized successfully")
+
+        self._alpha_calculators: Dict[float, AlphaCalculator] = {}
+        self._alpha_lock: Lock = Lock()
+
+    def matches(self, params: ParamsResult, sc_graph: SCGraph) -> bool:
+        """Same params and graph version: graphs deserialized separately from the same graph object match."""
+        return self.sc_graph.version == sc_graph.version and self.params == params
+
+    def _get_alpha_calculator(self, tt_weight: float) -> AlphaCalculator:
+        with self._alpha_lock:
+            maybe_alpha_calculator: Optional[AlphaCalculator] = self._alpha_calculators.get(tt_weight)
+            if maybe_alpha_calculator is not None:
+                return maybe_alpha_calculator
+
+            alpha_initializer: AlphaInitializer = AlphaInitializer(
+                alpha_const_value=self.params.tfst_params.alpha_params.const_alpha_value,
+                alpha_exp_tt_weight=tt_weight
+            )
+            alpha_calculator: AlphaCalculator = alpha_initializer.initialize(alpha_type=self.params.tfst_params.alpha_params.alpha_type)
+            self._alpha_calculators[tt_weight] = alpha_calculator
+
+            return alpha_calculator
+
+    def _create_executor(self, alpha_calculator: AlphaCalculator) -> Executor:
+        initializer_result: InitializerResult = self.initializer_result
+        tfst_initializer_result: TFSTInitializerResult = initializer_result.tfst_initializer_result
+
+        tfst_executor: TFSTExecutor = TFSTExecutor(
+            alpha_calculator=alpha_calculator,
+            pt_calculator=tfst_initializer_result.pt_calculator,
+            tt_calculator=tfst_initializer_result.tt_calculator,
+            tfst_calculator=tfst_initializer_result.tfst_calculator,
+            parallelization=self.params.parallelization,
+            tolerance=self.params.tfst_params.tolerance
+        )
+
+        return Executor(
+            dto_factory=self.dto_factory,
+            dt_calculator=initializer_result.dt_calculator,
+            tfst_calculator_executor=tfst_executor,
+            est_calculator=initializer_result.est_calculator,
+            cfdi_calculator=initializer_result.cfdi_calculator,
+            eodt_calculator=initializer_result.eodt_calculator,
+            edd_calculator=initializer_result.edd_calculator,
+            td_calculator=initializer_result.time_deviation_calculator
+        )
+
+    def _execute(self, 
+                 request: EstimationRequest, 
+                 reference_data: ReferenceDataResult, 
+                 maybe_carrier_matrix: Optional[PTCarrierMatrix] = None,
+                 maybe_metrics: Optional[StageMetrics] = None
+                 ) -> ExecutorResult:
+        dto_factory: DTOFactory = self.dto_factory
+
+        time_sequence_input: TimeSequenceInputDTO = TimeSequenceInputDTO(
+            order_time=request.order_time,
+            event_time=request.event_time,
+            estimation_time=request.estimation_time
+        )
+
+        alpha_opt: AlphaOpt = reference_data.alpha_opt
+        dispatch_time_result: DispatchTimeResult = reference_data.dispatch_time_result
+        shipment_time_result: ShipmentTimeResult = reference_data.shipment_time_result
+
+        dt_input: DTInputDTO
+        if request.maybe_shipment_time is not None:
+            dt_input = dto_factory.create_dt_input_dto(
+                site_id=request.site_id,
+                maybe_shipment_time=request.maybe_shipment_time
+            )
+        else:
+            dt_input = dto_factory.create_dt_input_dto(
+                site_id=request.site_id,
+                maybe_dispatch_time_result=dispatch_time_result
+            )
+
+        alpha_base_input_dto: AlphaBaseInputDTO = dto_factory.create_alpha_base_input_dto(
+            shipment_time_result=shipment_time_result,
+            vertex_id=request.vertex_id
+        )
+
+        pt_base_input_dto: PTBaseInputDTO = dto_factory.create_pt_base_input_dto(
+            vertex_id=request.vertex_id,
+            carrier_names=[request.carrier_name],
+            maybe_carrier_matrix=maybe_carrier_matrix
+        )
+
+        tt_base_input_dto: TTBaseInputDTO = dto_factory.create_tt_base_input_dto(
+            shipment_time_result=shipment_time_result
+        )
+
+        td_partial_input_dto: TimeDeviationBaseInputDTO = dto_factory.create_time_deviation_partial_input_dto(
+            dispatch_time_result=dispatch_time_result,
+            shipment_time_result=shipment_time_result
+        )
+
+        executor: Executor = self._create_executor(self._get_alpha_calculator(alpha_opt.tt_weight))
+        executor_result: ExecutorResult = executor.execute(
+            time_sequence_input=time_sequence_input,
+            dt_input=dt_input,
+            alpha_base_input=alpha_base_input_dto,
+            pt_base_input=pt_base_input_dto,
+            tt_base_input=tt_base_input_dto,
+            td_partial_input=td_partial_input_dto,
+            maybe_metrics=maybe_metrics
+        )
+        logger.debug(f"Calculators executed successfully with parallelization: {self.params.parallelization}")
+
+        return executor_result
+
+    def _get_incremental_time_sequence(self, request: EstimationRequest, previous: ExecutorResult) -> Optional[TimeSequenceDTO]:
+        """Time sequence of the request with the shipment time of the previous estimate, if the estimation stage is unchanged."""
+        try:
+            time_sequence: TimeSequenceDTO = TimeSequenceDTO(
+                order_time=request.order_time,
+                shipment_time=previous.time_sequence.shipment_time,
+                event_time=request.event_time,
+                estimation_time=request.estimation_time
+            )
+        except InvalidTimeSequenceException:
+            logger.debug("Previous shipment time is not valid for the request time sequence")
+            return None
+
+        if time_sequence.get_estimation_stage() != previous.time_sequence.get_estimation_stage():
+            logger.debug(f"Estimation stage changed since the previous estimate: {time_sequence.get_estimation_stage().value}")
+            return None
+
+        return time_sequence
+
+    def _reexecute_pt(self, 
+                      request: EstimationRequest, 
+                      reference_data: ReferenceDataResult, 
+                      time_sequence: TimeSequenceDTO, 
+                      previous: ExecutorResult,
+                      maybe_disrupted_vertex_ids: Optional[FrozenSet[int]] = None,
+                      maybe_metrics: Optional[StageMetrics] = None
+                      ) -> ExecutorResult:
+        dto_factory: DTOFactory = self.dto_factory
+
+        maybe_disruption: Optional[PTDisruptionDTO] = None
+        if maybe_disrupted_vertex_ids is not None:
+            maybe_disruption = PTDisruptionDTO(vertex_ids=maybe_disrupted_vertex_ids, previous_pt=previous.tfst_executor_result.pt)
+
+        pt_base_input_dto: PTBaseInputDTO = dto_factory.create_pt_base_input_dto(
+            vertex_id=request.vertex_id,
+            carrier_names=[request.carrier_name],
+            bypass_cache=True,
+            maybe_disruption=maybe_disruption
+        )
+
+        td_partial_input_dto: TimeDeviationBaseInputDTO = dto_factory.create_time_deviation_partial_input_dto(
+            dispatch_time_result=reference_data.dispatch_time_result,
+            shipment_time_result=reference_data.shipment_time_result
+        )
+
+        executor: Executor = self._create_executor(self._get_alpha_calculator(reference_data.alpha_opt.tt_weight))
+        executor_result: ExecutorResult = executor.reexecute_pt(
+            time_sequence=time_sequence,
+            previous=previous,
+            pt_base_input=pt_base_input_dto,
+            td_partial_input=td_partial_input_dto,
+            maybe_metrics=maybe_metrics
+        )
+        logger.debug("PT recalculated incrementally, reusing DT, alpha and TT of the previous estimate")
+
+        return executor_result
+
+    def estimate(self, 
+                 request: EstimationRequest, 
+                 maybe_previous: Optional[ExecutorResult] = None,
+                 maybe_disrupted_vertex_ids: Optional[FrozenSet[int]] = None,
+                 maybe_metrics: Optional[StageMetrics] = None
+                 ) -> ExecutorResult:
+        """
+        Estimate of the request. Given a previous estimate of the same request, only the PT is recomputed, bypassing
+        the PT cache, as long as the estimation stage has not changed: otherwise the estimate is computed in full.
+        Given the disrupted vertices too, only the paths of the PT traversing them are evaluated again.
+        """
+        with measure(maybe_metrics, Stage.REFERENCE_DATA), self.ro_db_connector.session_scope() as session:
+            reference_data_loader: ReferenceDataLoader = ReferenceDataLoader(session=session)
+            reference_data: ReferenceDataResult = reference_data_loader.load(site_id=request.site_id, carrier_id=request.carrier_id)
+        logger.debug(f"Reference data retrieved successfully: {reference_data}")
+
+        if maybe_previous is not None:
+            maybe_time_sequence: Optional[TimeSequenceDTO] = self._get_incremental_time_sequence(request, maybe_previous)
+            if maybe_time_sequence is not None:
+                return self._reexecute_pt(request, reference_data, maybe_time_sequence, maybe_previous, maybe_disrupted_vertex_ids, maybe_metrics)
+            logger.debug("Previous estimate not reusable: computing the estimate in full")
+
+        return self._execute(request, reference_data, maybe_metrics=maybe_metrics)
+
+    def _estimate_with(self, 
+                       request: EstimationRequest, 
+                       reference_data: Dict[SiteCarrierPair, ReferenceDataResult], 
+                       maybe_carrier_matrix: Optional[PTCarrierMatrix]
+                       ) -> EstimationResult:
+        maybe_reference_data: Optional[ReferenceDataResult] = reference_data.get(request.pair())
+        if maybe_reference_data is None:
+            error: ValueError = ValueError(f"Incomplete reference data for site ID {request.site_id} and carrier ID {request.carrier_id}")
+            return EstimationResult(request=request, maybe_error=str(error), maybe_exception=error)
+
+        metrics: StageMetrics = StageMetrics()
+        try:
+            executor_result: ExecutorResult = self._execute(request, maybe_reference_data, maybe_carrier_matrix, metrics)
+            return EstimationResult(request=request, maybe_executor_result=executor_result, maybe_metrics=metrics)
+        except Exception as e:
+            logger.exception(f"Error estimating vertex {request.vertex_id} for site ID {request.site_id} and carrier ID {request.carrier_id}")
+            return EstimationResult(request=request, maybe_error=str(e), maybe_exception=e, maybe_metrics=metrics)
+
+    def estimate_many(self, 
+                      requests: List[EstimationRequest], 
+                      maybe_carrier_matrix: Optional[PTCarrierMatrix] = None,
+                      max_workers: int = 1,
+                      maybe_metrics: Optional[StageMetrics] = None
+                      ) -> List[EstimationResult]:
+        """
+        Reference data is loaded once per site and carrier pair, then the requests are estimated on up to max_workers
+        threads. Results are in the order of the requests and failures are reported per request, each with the metrics 
+        of its own stages: the shared reference data loading is recorded in maybe_metrics.
+        """
+        with measure(maybe_metrics, Stage.REFERENCE_DATA), self.ro_db_connector.session_scope() as session:
+            reference_data_loader: ReferenceDataLoader = ReferenceDataLoader(session=session)
+            reference_data: Dict[SiteCarrierPair, ReferenceDataResult] = reference_data_loader.load_many(request.pair() for request in requests)
+        logger.debug(f"Reference data retrieved for {len(reference_data)} site and carrier pairs")
+
+        n_workers: int = min(max_workers, len(requests))
+        if n_workers <= 1:
+            return [self._estimate_with(request, reference_data, maybe_carrier_matrix) for request in requests]
+
+        logger.debug(f"Estimating {len(requests)} requests on {n_workers} threads")
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            return list(pool.map(lambda request: self._estimate_with(request, reference_data, maybe_carrier_matrix), requests))
+
+    def estimate_carriers(self, requests: List[EstimationRequest]) -> List[EstimationResult]:
+        """Estimates of the same shipment with different candidate carriers, sharing the PT paths and external data."""
+        if len({(request.site_id, request.vertex_id, request.order_time, request.event_time, 
+                 request.estimation_time, request.maybe_shipment_time) for request in requests}) > 1:
+            raise ValueError("Carrier estimates must share the site, the vertex and the times")
+
+        carrier_matrix: PTCarrierMatrix = PTCarrierMatrix(
+            vertex_id=requests[0].vertex_id, 
+            carrier_names=[request.carrier_name for request in requests]
+        )
+        return self.estimate_many(requests, maybe_carrier_matrix=carrier_matrix)
@@ -0,0 +1,33 @@
+from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from core.executor.executor import ExecutorResult
+from core.query_handler.reference_data.reference_data_result import SiteCarrierPair
+from core.metrics.stage_metrics import StageMetrics
+
+@dataclass(frozen=True)
+class EstimationRequest:
+    site_id: int = field(metadata={"description": "ID of the site shipping the order"})
+    carrier_id: int = field(metadata={"description": "ID of the carrier delivering the order"})
+    carrier_name: str = field(metadata={"description": "Name of the carrier, used to extract the carrier paths"})
+    vertex_id: int = field(metadata={"description": "ID of the vertex where the shipment currently is"})
+    order_time: datetime = field(metadata={"description": "Timestamp of the manufacturer order creation"})
+    event_time: datetime = field(metadata={"description": "Time of the last recorded event"})
+    estimation_time: datetime = field(metadata={"description": "Time when the estimation is made"})
+    maybe_shipment_time: Optional[datetime] = field(default=None, metadata={"description": "Timestamp of the carrier order creation, if already shipped"})
+
+    def pair(self) -> SiteCarrierPair:
+        return self.site_id, self.carrier_id
+
+@dataclass(frozen=True)
+class EstimationResult:
+    request: EstimationRequest = field(metadata={"description": "Request the result refers to"})
+    maybe_executor_result: Optional[ExecutorResult] = field(default=None, metadata={"description": "Estimation result, None if the estimation failed"})
+    maybe_error: Optional[str] = field(default=None, metadata={"description": "Error message, set if the estimation failed"})
+    maybe_exception: Optional[Exception] = field(default=None, metadata={"description": "Exception raised by the estimation, set if the estimation failed"})
+    maybe_metrics: Optional[StageMetrics] = field(default=None, metadata={"description": "Stage metrics of the estimation"})
+
+    @property
+    def success(self) -> bool:
+        return self.maybe_executor_result is not None
@@ -11,7 +11,7 @@ from core.query_handler.params.params_result import (
     AlphaParams,
     TMIParams, TMISpeedParameters, TMIDistanceParameters,
     WMIParams,
-    PTParams,
+    PTParams, PTMode,
     TTParams,
     RTEstimatorParams,
     TimeDeviationParams,
@@ -28,13 +28,16 @@ class ParamsHandler:
 
     def get_params(self) -> ParamsResult:
         try:
-            realtime_params_map: Dict[str, float] = self._get_param_values_by_general_category(ParamGeneralCategory.REALTIME)
+            params_maps: Dict[str, Dict[str, float]] = self._get_param_values_by_general_categories(
+                [ParamGeneralCategory.REALTIME, ParamGeneralCategory.SYSTEM]
+            )
+            realtime_params_map: Dict[str, float] = params_maps[ParamGeneralCategory.REALTIME.value]
 
             dt_params: DTParams = self._get_dt_params(realtime_params_map)
             tfst_params: TFSTParams = self._get_tfst_params(realtime_params_map)
             time_deviation_params: TimeDeviationParams = self._get_time_deviation_params(realtime_params_map)
 
-            system_params_map: Dict[str, float] = self._get_param_values_by_general_category(ParamGeneralCategory.SYSTEM)
+            system_params_map: Dict[str, float] = params_maps[ParamGeneralCategory.SYSTEM.value]
             parallelization: int = int(system_params_map[ParamName.PARALLELIZATION.value])
 
             return ParamsResult(
@@ -47,13 +50,17 @@ class ParamsHandler:
             logger.exception("Error retrieving parameters")
             raise
 
-    def _get_param_values_by_general_category(self, general_category: ParamGeneralCategory) -> Dict[str, float]:
+    def _get_param_values_by_general_categories(self, general_categories: List[ParamGeneralCategory]) -> Dict[str, Dict[str, float]]:
         rows: List[Any] = (
-            self.session.query(Param.name, Param.value)
-            .filter(Param.general_category == general_category.value)
+            self.session.query(Param.general_category, Param.name, Param.value)
+            .filter(Param.general_category.in_([c.value for c in general_categories]))
             .all()
         )
-        return {name: value for name, value in rows}
+
+        values: Dict[str, Dict[str, float]] = {c.value: {} for c in general_categories}
+        for general_category, name, value in rows:
+            values[general_category][name] = value
+        return values
 
     def _get_dt_params(self, values: Dict[str, float]) -> DTParams:
         holiday_params: HolidayParams = HolidayParams(
@@ -76,6 +83,13 @@ class ParamsHandler:
             alpha_type=alpha_type
         )
 
+        try:
+            pt_mode: PTMode = PTMode.from_code(int(values[ParamName.PT_MODE.value]))
+            dp_prefix_hops: int = int(values.get(ParamName.PT_DP_PREFIX_HOPS.value, 0))
+        except (KeyError, ValueError, TypeError):
+            logger.warning("Invalid or missing PT mode; using path enumeration.")
+            pt_mode, dp_prefix_hops = PTMode.ENUMERATION, 0
+
         pt_params: PTParams = PTParams(
             rte_estimator_params=self._get_rt_estimator_params(values),
             tmi_params=self._get_tmi_params(values),
@@ -84,6 +98,9 @@ class ParamsHandler:
             max_paths=int(values[ParamName.PT_MAX_PATHS.value]),
             ext_data_min_probability=float(values[ParamName.PT_EXT_DATA_MIN_PROBABILITY.value]),
             confidence=float(values[ParamName.PT_CONFIDENCE.value]),
+            mode=pt_mode,
+            dp_prefix_hops=dp_prefix_hops,
+            cache_time_bucket_seconds=float(values.get(ParamName.PT_CACHE_TIME_BUCKET_SECONDS.value, 0.0)),
         )
 
         tt_params: TTParams = TTParams(
@@ -1,5 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from dataclasses import dataclass
+from enum import Enum
 
 from model.alpha import AlphaType
 
@@ -181,6 +182,19 @@ class RTEstimatorParams:
             'use_model': self.use_model
         }
 
+class PTMode(Enum):
+    ENUMERATION = 'ENUMERATION'     # Every selected path evaluated over the path trie
+    DP = 'DP'                       # First dp_prefix_hops routes enumerated, remaining time from the DP over the graph
+
+    @classmethod
+    def from_code(cls, code: int) -> 'PTMode':
+        match code:
+            case 0:
+                return cls.ENUMERATION
+            case 1:
+                return cls.DP
+        raise ValueError(f"No PTMode enum with code: {code}")
+
 @dataclass(frozen=True)
 class PTParams:
     rte_estimator_params: RTEstimatorParams
@@ -190,6 +204,9 @@ class PTParams:
     max_paths: int
     ext_data_min_probability: float
     confidence: float
+    mode: PTMode = PTMode.ENUMERATION
+    dp_prefix_hops: int = 0
+    cache_time_bucket_seconds: float = 0.0      # Granularity of the event and estimation times in PT cache keys, 0 disables the cache
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -199,7 +216,10 @@ class PTParams:
             'path_min_probability': self.path_min_probability,
             'max_paths': self.max_paths,
             'ext_data_min_probability': self.ext_data_min_probability,
-            'confidence': self.confidence
+            'confidence': self.confidence,
+            'mode': self.mode.value,
+            'dp_prefix_hops': self.dp_prefix_hops,
+            'cache_time_bucket_seconds': self.cache_time_bucket_seconds
         }
     
 
@@ -248,6 +268,14 @@ class ParamsResult:
     time_deviation_params: TimeDeviationParams
     parallelization: int
 
+    def confidence_levels(self) -> Tuple[float, ...]:
+        return (
+            self.dt_params.confidence,
+            self.tfst_params.tt_params.confidence,
+            self.time_deviation_params.dt_time_deviation_confidence,
+            self.time_deviation_params.st_time_deviation_confidence
+        )
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             'dt_params': self.dt_params.to_dict(),
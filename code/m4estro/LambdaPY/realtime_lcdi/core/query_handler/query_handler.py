@@ -1,6 +1,8 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterable, Tuple, Callable
 from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from model.alpha import Alpha
 from model.alpha_opt import AlphaOpt
@@ -16,6 +18,7 @@ from model.dispatch_time_sample import DispatchTimeSample
 from model.dispatch_time import DispatchTime
 from model.estimated_time import EstimatedTime
 from model.estimated_time_holiday import EstimatedTimeHoliday
+from model.latest_estimated_time import LatestEstimatedTime
 from model.tmi import TMI
 from model.wmi import WMI
 from model.time_deviation import TimeDeviation
@@ -23,6 +26,7 @@ from model.estimation_params import EstimationParams
 
 from core.query_handler.params.params_result import RTEstimatorParams
 from core.dto.time_sequence.time_sequence_dto import TimeSequenceDTO
+from core.dto.payload.estimate_payload_dto import EstimatePayloadDTO
 from core.calculator.dt.dt_dto import DT_DTO
 from core.calculator.tfst.alpha.alpha_dto import AlphaDTO
 from core.calculator.tfst.pt.pt_dto import PT_DTO
@@ -36,6 +40,8 @@ from core.executor.tfst_executor import TFSTExecutorResult
 
 from core.calculator.time_deviation.time_deviation_dto import TimeDeviationDTO
 
+from core.metrics.stage_metrics import StageMetrics, Stage, Counter, measure, count, count_db_queries
+
 from core.query_handler.query_result import (
     ShipmentTimeResult, ShipmentTimeGammaResult, ShipmentTimeSampleResult,
     DispatchTimeResult, DispatchTimeGammaResult, DispatchTimeSampleResult
@@ -44,18 +50,55 @@ from core.query_handler.query_result import (
 from logger import get_logger
 logger = get_logger(__name__)
 
+# Order ID, vertex ID, order status and executor result of an estimate to save
+EstimatedTimeInput = Tuple[int, int, str, ExecutorResult]
+
+# Formats the payload stored with a saved estimate: without one, the estimate is formatted when it is retrieved
+PayloadFormatter = Callable[[EstimatedTime], EstimatePayloadDTO]
+
+LATEST_ESTIMATED_TIME_UPDATED_COLUMNS: List[str] = [
+    'estimated_time_id', 'vertex_id', 'estimation_time', 'status', 'EODT', 'EDD'
+]
+
 class QueryHandler:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: Session, maybe_payload_formatter: Optional[PayloadFormatter] = None) -> None:
         self.session: Session = session
+        self.maybe_payload_formatter: Optional[PayloadFormatter] = maybe_payload_formatter
 
-    def get_order(self, order_id: int) -> Order:
+    def get_order(self, order_id: int, with_site_and_carrier: bool = False) -> Order:
         try:
-            order: Order = self.session.query(Order).filter(Order.id == order_id).one()
+            query = self.session.query(Order)
+            if with_site_and_carrier:
+                query = query.options(joinedload(Order.site), joinedload(Order.carrier))        # Single round trip for estimation callers
+            order: Order = query.filter(Order.id == order_id).one()
         except Exception:
             logger.exception(f"Error retrieving order with ID {order_id}")
             raise
         
         return order
+
+    def get_orders(self, order_ids: Iterable[int], with_site_and_carrier: bool = False) -> Dict[int, Order]:
+        """Orders by ID in a single query: missing IDs are left out."""
+        ids: List[int] = list(set(order_ids))
+        try:
+            query = self.session.query(Order)
+            if with_site_and_carrier:
+                query = query.options(joinedload(Order.site), joinedload(Order.carrier))
+            orders: List[Order] = query.filter(Order.id.in_(ids)).all()
+        except Exception:
+            logger.exception(f"Error retrieving orders with IDs {ids}")
+            raise
+
+        return {order.id: order for order in orders}
+
+    def get_latest_estimated_time_id(self, order_id: int) -> Optional[int]:
+        try:
+            maybe_latest: Optional[LatestEstimatedTime] = self.session.get(LatestEstimatedTime, order_id)
+        except Exception:
+            logger.exception(f"Error retrieving latest estimated time for order ID {order_id}")
+            raise
+
+        return maybe_latest.estimated_time_id if maybe_latest is not None else None
     
     def get_site(self, site_id: int) -> 'Site':
         try:
@@ -120,6 +163,11 @@ class QueryHandler:
             carrier_id=carrier_id
         ).one_or_none()
         if dt_sample:
+            maybe_quantiles: Optional[List[float]] = dt_sample.get_current_quantiles()
+            if maybe_quantiles is not None:
+                logger.debug(f"Using quantile sketch for site ID {site_id} and carrier ID {carrier_id}")
+                return ShipmentTimeSampleResult(dt_sample=dt_sample, dt_x=maybe_quantiles)
+
             dt_x: List[float] = [
                 hours for (hours,) in session.query(ShipmentTime.hours).filter_by(
                     site_id=site_id,
@@ -140,6 +188,11 @@ class QueryHandler:
 
         dt_sample: Optional[DispatchTimeSample] = session.query(DispatchTimeSample).filter_by(site_id=site_id).one_or_none()
         if dt_sample:
+            maybe_quantiles: Optional[List[float]] = dt_sample.get_current_quantiles()
+            if maybe_quantiles is not None:
+                logger.debug(f"Using quantile sketch for site ID {site_id}")
+                return DispatchTimeSampleResult(dt_x=maybe_quantiles, dt_sample=dt_sample)
+
             dt_x: List[float] = [
                 hours for (hours,) in session.query(DispatchTime.hours).filter_by(
                     site_id=site_id,
@@ -150,7 +203,60 @@ class QueryHandler:
         logger.error(f"No dispatch time data found for site ID {site_id}")
         raise ValueError(f"No dispatch time data found for site ID {site_id}")
     
+    def _upsert_latest_estimated_time(self, estimated_time: EstimatedTime) -> None:
+        """Points the order projection to estimated_time, unless it already holds a newer estimate."""
+        dialect_name: str = self.session.get_bind().dialect.name
+        insert_fn = postgresql_insert if dialect_name == 'postgresql' else sqlite_insert
+
+        stmt = insert_fn(LatestEstimatedTime).values(
+            order_id=estimated_time.order_id,
+            estimated_time_id=estimated_time.id,
+            vertex_id=estimated_time.vertex_id,
+            estimation_time=estimated_time.estimation_time,
+            status=estimated_time.status,
+            EODT=estimated_time.EODT,
+            EDD=estimated_time.EDD,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LatestEstimatedTime.order_id],
+            set_={column: stmt.excluded[column] for column in LATEST_ESTIMATED_TIME_UPDATED_COLUMNS},
+            where=LatestEstimatedTime.estimation_time <= stmt.excluded.estimation_time      # Late, out of order estimates do not win
+        )
+        self.session.execute(stmt)
+
     def save_estimated_time(
+        self,  
+        order_id: int, 
+        vertex_id: int,
+        order_status: str,
+        executor_result: ExecutorResult,
+        maybe_metrics: Optional[StageMetrics] = None
+    ) -> EstimatedTime:
+        with measure(maybe_metrics, Stage.SAVE), count_db_queries(maybe_metrics, Stage.SAVE, self.session):
+            estimated_time: EstimatedTime = self._add_estimated_time(order_id, vertex_id, order_status, executor_result)
+            self.session.commit()
+        count(maybe_metrics, Stage.SAVE, Counter.RECORDS)
+
+        return estimated_time
+
+    def save_estimated_times(self, inputs: List[EstimatedTimeInput], maybe_metrics: Optional[StageMetrics] = None) -> List[EstimatedTime | Exception]:
+        """Saves several estimates in one transaction, each in its own savepoint so a failed one does not discard the others."""
+        results: List[EstimatedTime | Exception] = []
+        with measure(maybe_metrics, Stage.SAVE), count_db_queries(maybe_metrics, Stage.SAVE, self.session):
+            for order_id, vertex_id, order_status, executor_result in inputs:
+                try:
+                    with self.session.begin_nested():
+                        results.append(self._add_estimated_time(order_id, vertex_id, order_status, executor_result))
+                except Exception as e:
+                    logger.exception(f"Error saving estimated time for order ID {order_id} and vertex ID {vertex_id}")
+                    results.append(e)
+
+            self.session.commit()
+        count(maybe_metrics, Stage.SAVE, Counter.RECORDS, sum(not isinstance(result, Exception) for result in results))
+
+        return results
+
+    def _add_estimated_time(
         self,  
         order_id: int, 
         vertex_id: int,
@@ -207,6 +313,8 @@ class QueryHandler:
             pt_max_paths=pt_result.params.max_paths,
             pt_ext_data_min_prob=pt_result.params.ext_data_min_probability,
             pt_confidence=pt_result.params.confidence,
+            pt_mode=pt_result.params.mode.value,
+            pt_dp_prefix_hops=pt_result.params.dp_prefix_hops,
             tt_confidence=tt_result.confidence,
             tfst_tolerance=tfst_executor_result.tfst.tolerance,
         )
@@ -247,6 +355,8 @@ class QueryHandler:
         session.add(estimated_time)
         session.flush()
 
+        self._upsert_latest_estimated_time(estimated_time)
+
         for h_list in (holiday_result.closure_holidays, holiday_result.working_holidays): 
             for h in h_list:  
                 eth: EstimatedTimeHoliday = EstimatedTimeHoliday(
@@ -280,6 +390,12 @@ class QueryHandler:
             )
             session.add(wmi)
 
-        session.commit()
+        if self.maybe_payload_formatter is not None:
+            # Holidays were linked through EstimatedTimeHoliday rows: reload them before formatting the payload
+            session.flush()
+            session.expire(estimated_time, ['holidays'])
+            payload: EstimatePayloadDTO = self.maybe_payload_formatter(estimated_time)
+            estimated_time.payload = payload.data
+            estimated_time.payload_version = payload.version
 
         return estimated_time
\ No newline at end of file
@@ -14,7 +14,7 @@ class ShipmentTimeGammaResult:
 @dataclass(frozen=True)
 class ShipmentTimeSampleResult:
     dt_sample: ShipmentTimeSample
-    dt_x: List[float]
+    dt_x: List[float]                 # Raw hours, or the quantile sketch: percentiles over either give the sample CI
 
 ShipmentTimeResult = Union[ShipmentTimeGammaResult, ShipmentTimeSampleResult]
 
@@ -24,7 +24,7 @@ class DispatchTimeGammaResult:
 
 @dataclass(frozen=True)
 class DispatchTimeSampleResult:
-    dt_x: List[float]
+    dt_x: List[float]                 # Raw hours, or the quantile sketch: percentiles over either give the sample CI
     dt_sample: DispatchTimeSample
 
 DispatchTimeResult = Union[DispatchTimeGammaResult, DispatchTimeSampleResult]
@@ -0,0 +1,182 @@
+from typing import Dict, Iterable, List, Optional, Set, Any
+from collections import defaultdict
+
+from sqlalchemy import tuple_, literal, null, Integer
+from sqlalchemy.orm import Session, Query
+
+from model.site import Site
+from model.carrier import Carrier
+from model.alpha_opt import AlphaOpt
+from model.shipment_time_gamma import ShipmentTimeGamma
+from model.shipment_time_sample import ShipmentTimeSample
+from model.shipment_time import ShipmentTime
+from model.dispatch_time_gamma import DispatchTimeGamma
+from model.dispatch_time_sample import DispatchTimeSample
+from model.dispatch_time import DispatchTime
+
+from core.query_handler.query_result import (
+    ShipmentTimeResult, ShipmentTimeGammaResult, ShipmentTimeSampleResult,
+    DispatchTimeResult, DispatchTimeGammaResult, DispatchTimeSampleResult
+)
+from core.query_handler.reference_data.reference_data_result import ReferenceDataResult, SiteCarrierPair
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+SHIPMENT_SOURCE: str = 'shipment'
+DISPATCH_SOURCE: str = 'dispatch'
+
+class ReferenceDataLoader:
+    """
+    Loads the per (site, carrier) reference data of an estimate: optimal alpha, dispatch and shipment time distributions.
+    The distributions are fetched with a single joined query; raw hours are only read, with one unioned query,
+    for sample distributions that have no quantile sketch yet.
+    """
+    def __init__(self, session: Session) -> None:
+        self.session: Session = session
+
+    def _query_distributions(self, pairs: List[SiteCarrierPair]) -> List[Any]:
+        return (
+            self.session.query(
+                Site.id, Carrier.id,
+                AlphaOpt,
+                DispatchTimeGamma, DispatchTimeSample,
+                ShipmentTimeGamma, ShipmentTimeSample
+            )
+            .select_from(Site)
+            .join(Carrier, tuple_(Site.id, Carrier.id).in_(pairs))
+            .outerjoin(AlphaOpt, (AlphaOpt.site_id == Site.id) & (AlphaOpt.carrier_id == Carrier.id))
+            .outerjoin(DispatchTimeGamma, DispatchTimeGamma.site_id == Site.id)
+            .outerjoin(DispatchTimeSample, DispatchTimeSample.site_id == Site.id)
+            .outerjoin(ShipmentTimeGamma, (ShipmentTimeGamma.site_id == Site.id) & (ShipmentTimeGamma.carrier_id == Carrier.id))
+            .outerjoin(ShipmentTimeSample, (ShipmentTimeSample.site_id == Site.id) & (ShipmentTimeSample.carrier_id == Carrier.id))
+            .order_by(                                      # Latest distributions first when a pair has duplicated ones
+                Site.id, Carrier.id,
+                DispatchTimeGamma.id.desc(), DispatchTimeSample.id.desc(),
+                ShipmentTimeGamma.id.desc(), ShipmentTimeSample.id.desc()
+            )
+            .all()
+        )
+
+    def _query_raw_hours(self, shipment_pairs: Set[SiteCarrierPair], dispatch_site_ids: Set[int]) -> List[Any]:
+        queries: List[Query] = []
+        if shipment_pairs:
+            queries.append(
+                self.session.query(
+                    literal(SHIPMENT_SOURCE).label('source'),
+                    ShipmentTime.site_id.label('site_id'),
+                    ShipmentTime.carrier_id.label('carrier_id'),
+                    ShipmentTime.hours.label('hours')
+                ).filter(tuple_(ShipmentTime.site_id, ShipmentTime.carrier_id).in_(list(shipment_pairs)))
+            )
+        if dispatch_site_ids:
+            queries.append(
+                self.session.query(
+                    literal(DISPATCH_SOURCE).label('source'),
+                    DispatchTime.site_id.label('site_id'),
+                    null().cast(Integer).label('carrier_id'),
+                    DispatchTime.hours.label('hours')
+                ).filter(DispatchTime.site_id.in_(dispatch_site_ids))
+            )
+
+        if not queries:
+            return []
+        if len(queries) == 1:
+            return queries[0].all()
+
+        return queries[0].union_all(queries[1]).all()
+
+    def load_many(self, pairs: Iterable[SiteCarrierPair]) -> Dict[SiteCarrierPair, ReferenceDataResult]:
+        requested_pairs: List[SiteCarrierPair] = sorted(set(pairs))
+        if not requested_pairs:
+            return {}
+
+        try:
+            rows: List[Any] = self._query_distributions(requested_pairs)
+        except Exception:
+            logger.exception(f"Error retrieving reference data for {len(requested_pairs)} site and carrier pairs")
+            raise
+        logger.debug(f"Retrieved {len(rows)} reference data rows for {len(requested_pairs)} site and carrier pairs")
+
+        rows_by_pair: Dict[SiteCarrierPair, Any] = {}
+        duplicated_pairs: Set[SiteCarrierPair] = set()
+        for row in rows:
+            pair: SiteCarrierPair = (row[0], row[1])
+            if pair in rows_by_pair:
+                duplicated_pairs.add(pair)
+                continue
+            rows_by_pair[pair] = row
+
+        for pair in sorted(duplicated_pairs):
+            logger.warning(f"Duplicated reference data for site ID {pair[0]} and carrier ID {pair[1]}: using the latest distributions. Check data integrity.")
+
+        shipment_pairs: Set[SiteCarrierPair] = set()
+        dispatch_site_ids: Set[int] = set()
+        for pair, (_, _, _, dt_gamma, dt_sample, st_gamma, st_sample) in rows_by_pair.items():
+            if dt_gamma is None and dt_sample is not None and dt_sample.get_current_quantiles() is None:
+                dispatch_site_ids.add(pair[0])
+            if st_gamma is None and st_sample is not None and st_sample.get_current_quantiles() is None:
+                shipment_pairs.add(pair)
+
+        shipment_hours: Dict[SiteCarrierPair, List[float]] = defaultdict(list)
+        dispatch_hours: Dict[int, List[float]] = defaultdict(list)
+        for source, site_id, carrier_id, hours in self._query_raw_hours(shipment_pairs, dispatch_site_ids):
+            if source == SHIPMENT_SOURCE:
+                shipment_hours[(site_id, carrier_id)].append(hours)
+            else:
+                dispatch_hours[site_id].append(hours)
+        logger.debug(f"Raw hours loaded for {len(shipment_pairs)} shipment and {len(dispatch_site_ids)} dispatch sample distributions")
+
+        results: Dict[SiteCarrierPair, ReferenceDataResult] = {}
+        for pair in requested_pairs:
+            maybe_row: Optional[Any] = rows_by_pair.get(pair)
+            if maybe_row is None:
+                logger.error(f"No site or carrier found for site ID {pair[0]} and carrier ID {pair[1]}")
+                continue
+
+            _, _, alpha_opt, dt_gamma, dt_sample, st_gamma, st_sample = maybe_row
+            if alpha_opt is None:
+                logger.error(f"No alpha optimal parameters found for site ID {pair[0]} and carrier ID {pair[1]}")
+                continue
+
+            dispatch_time_result: DispatchTimeResult
+            if dt_gamma is not None:
+                dispatch_time_result = DispatchTimeGammaResult(dt_gamma=dt_gamma)
+            elif dt_sample is not None:
+                maybe_dt_quantiles: Optional[List[float]] = dt_sample.get_current_quantiles()
+                dt_x: List[float] = maybe_dt_quantiles if maybe_dt_quantiles is not None else dispatch_hours[pair[0]]
+                dispatch_time_result = DispatchTimeSampleResult(dt_x=dt_x, dt_sample=dt_sample)
+            else:
+                logger.error(f"No dispatch time data found for site ID {pair[0]}")
+                continue
+
+            shipment_time_result: ShipmentTimeResult
+            if st_gamma is not None:
+                shipment_time_result = ShipmentTimeGammaResult(dt_gamma=st_gamma)
+            elif st_sample is not None:
+                maybe_st_quantiles: Optional[List[float]] = st_sample.get_current_quantiles()
+                st_x: List[float] = maybe_st_quantiles if maybe_st_quantiles is not None else shipment_hours[pair]
+                shipment_time_result = ShipmentTimeSampleResult(dt_sample=st_sample, dt_x=st_x)
+            else:
+                logger.error(f"No delivery time data found for site ID {pair[0]} and carrier ID {pair[1]}")
+                continue
+
+            results[pair] = ReferenceDataResult(
+                site_id=pair[0],
+                carrier_id=pair[1],
+                alpha_opt=alpha_opt,
+                dispatch_time_result=dispatch_time_result,
+                shipment_time_result=shipment_time_result
+            )
+
+        return results
+
+    def load(self, site_id: int, carrier_id: int) -> ReferenceDataResult:
+        results: Dict[SiteCarrierPair, ReferenceDataResult] = self.load_many([(site_id, carrier_id)])
+
+        maybe_result: Optional[ReferenceDataResult] = results.get((site_id, carrier_id))
+        if maybe_result is None:
+            logger.error(f"Incomplete reference data for site ID {site_id} and carrier ID {carrier_id}")
+            raise ValueError(f"Incomplete reference data for site ID {site_id} and carrier ID {carrier_id}")
+
+        return maybe_result
@@ -0,0 +1,16 @@
+from typing import Tuple
+from dataclasses import dataclass, field
+
+from model.alpha_opt import AlphaOpt
+
+from core.query_handler.query_result import ShipmentTimeResult, DispatchTimeResult
+
+SiteCarrierPair = Tuple[int, int]
+
+@dataclass(frozen=True)
+class ReferenceDataResult:
+    site_id: int = field(metadata={"description": "ID of the site the reference data refers to."})
+    carrier_id: int = field(metadata={"description": "ID of the carrier the reference data refers to."})
+    alpha_opt: AlphaOpt = field(metadata={"description": "Optimal alpha parameters of the site and carrier pair."})
+    dispatch_time_result: DispatchTimeResult = field(metadata={"description": "Dispatch time distribution of the site."})
+    shipment_time_result: ShipmentTimeResult = field(metadata={"description": "Shipment time distribution of the site and carrier pair."})
@@ -1,6 +1,10 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, Callable
+from collections import defaultdict
 from core.sc_graph.utils import is_legal_index, IndexOutOfBoundsException, PathIndex, PathId, PathName
 
+PathRef = Tuple[int, int]           # (source vertex index, position of the path in the cached paths of the source)
+Edge = Tuple[int, int]              # (source vertex index, destination vertex index) of a hop of a cached path
+
 class PathMem:
     def __init__(self) -> None:
         self.paths: List[PathIndex] = []
@@ -15,6 +19,61 @@ class PathMem:
         return instance
 
 
+class PathReverseIndex:
+    """
+    Vertices and edges of cached paths, each mapped to the paths traversing it, source vertex included. Kept up to date
+    as paths are cached or invalidated, so lookups and invalidations only touch the affected paths.
+    """
+    def __init__(self) -> None:
+        self.by_vertex: Dict[int, Set[PathRef]] = defaultdict(set)
+        self.by_edge: Dict[Edge, Set[PathRef]] = defaultdict(set)
+
+    def add(self, source_index: int, path_id: int, path: PathIndex) -> None:
+        full_path: PathIndex = [source_index] + path
+        for v_index in full_path:
+            self.by_vertex[v_index].add((source_index, path_id))
+        for edge in zip(full_path, full_path[1:]):
+            self.by_edge[edge].add((source_index, path_id))
+
+    def remove(self, source_index: int, path_id: int, path: PathIndex) -> None:
+        full_path: PathIndex = [source_index] + path
+        for v_index in full_path:
+            self._discard(self.by_vertex, v_index, (source_index, path_id))
+        for edge in zip(full_path, full_path[1:]):
+            self._discard(self.by_edge, edge, (source_index, path_id))
+
+    @staticmethod
+    def _discard(refs_by_key: Dict[Any, Set[PathRef]], key: Any, ref: PathRef) -> None:
+        maybe_refs: Optional[Set[PathRef]] = refs_by_key.get(key)
+        if maybe_refs is None:
+            return
+        maybe_refs.discard(ref)
+        if not maybe_refs:
+            del refs_by_key[key]
+
+    @staticmethod
+    def group_by_source(refs: Iterable[PathRef]) -> Dict[int, List[int]]:
+        path_ids_by_source: Dict[int, List[int]] = defaultdict(list)
+        for source_index, path_id in sorted(refs):
+            path_ids_by_source[source_index].append(path_id)
+        return dict(path_ids_by_source)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "by_vertex": [[v_index, sorted(refs)] for v_index, refs in self.by_vertex.items()],
+            "by_edge": [[s_index, d_index, sorted(refs)] for (s_index, d_index), refs in self.by_edge.items()]
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'PathReverseIndex':
+        instance: PathReverseIndex = cls()
+        for v_index, refs in data.get("by_vertex", []):
+            instance.by_vertex[v_index] = {(source_index, path_id) for source_index, path_id in refs}
+        for s_index, d_index, refs in data.get("by_edge", []):
+            instance.by_edge[(s_index, d_index)] = {(source_index, path_id) for source_index, path_id in refs}
+        return instance
+
+
 class VertexPathDPManager:
     def __init__(self, n: int) -> None:
         self.n: int = n
@@ -22,6 +81,11 @@ class VertexPathDPManager:
 
         self.updated: bool = False
 
+        # Maintained as paths are cached, merged or invalidated, and serialized with them
+        self.reverse_index: PathReverseIndex = PathReverseIndex()
+        # Invalidated sources are recomputed, never filled again from other caches
+        self.invalidated_sources: Set[int] = set()
+
     def _is_legal_index(self, v_index: int) -> bool:
         return is_legal_index(v_index, self.n)
             
@@ -29,9 +93,12 @@ class VertexPathDPManager:
         if not self._is_legal_index(v_index):
             raise IndexOutOfBoundsException(v_index, self.n)
         
-        self.mem[v_index].paths.append(path)
+        paths: List[PathIndex] = self.mem[v_index].paths
+        paths.append(path)
+        self.reverse_index.add(v_index, len(paths) - 1, path)
 
         self.updated = True
+        self.invalidated_sources.discard(v_index)
 
     def contains(self, v_index: int) -> bool:
         if not self._is_legal_index(v_index):
@@ -45,10 +112,70 @@ class VertexPathDPManager:
         
         return self.mem[v_index].paths
     
+    def merge(self, other: 'VertexPathDPManager') -> bool:
+        """Fills the vertices with no cached paths from other. Returns True if any vertex was filled."""
+        if other.n != self.n:
+            return False
+
+        merged: bool = False
+        for v_index, (mem, other_mem) in enumerate(zip(self.mem, other.mem)):
+            if not mem.paths and other_mem.paths and v_index not in self.invalidated_sources:
+                mem.paths = other_mem.paths
+                self._index_source(v_index)
+                merged = True
+
+        return merged
+
+    def _index_source(self, v_index: int) -> None:
+        for path_id, path in enumerate(self.mem[v_index].paths):
+            self.reverse_index.add(v_index, path_id, path)
+
+    def get_paths_through_vertex(self, v_index: int) -> Dict[int, List[int]]:
+        """IDs of the cached paths traversing the vertex, by source vertex index."""
+        if not self._is_legal_index(v_index):
+            raise IndexOutOfBoundsException(v_index, self.n)
+
+        return PathReverseIndex.group_by_source(self.reverse_index.by_vertex.get(v_index, ()))
+
+    def get_paths_through_edge(self, s_index: int, d_index: int) -> Dict[int, List[int]]:
+        """IDs of the cached paths traversing the edge from s_index to d_index, by source vertex index."""
+        for v_index in (s_index, d_index):
+            if not self._is_legal_index(v_index):
+                raise IndexOutOfBoundsException(v_index, self.n)
+
+        return PathReverseIndex.group_by_source(self.reverse_index.by_edge.get((s_index, d_index), ()))
+
+    def invalidate_sources(self, source_indices: Iterable[int]) -> None:
+        for source_index in source_indices:
+            if not self._is_legal_index(source_index):
+                raise IndexOutOfBoundsException(source_index, self.n)
+
+            mem: PathMem = self.mem[source_index]
+            for path_id, path in enumerate(mem.paths):
+                self.reverse_index.remove(source_index, path_id, path)
+            mem.paths = []
+            self.invalidated_sources.add(source_index)
+
+    def invalidate_vertex(self, v_index: int) -> List[int]:
+        """Drops the cached paths of every source with a path through the vertex. Returns the invalidated sources."""
+        sources: List[int] = list(self.get_paths_through_vertex(v_index))
+        self.invalidate_sources(sources)
+        return sources
+
+    def invalidate_edge(self, s_index: int, d_index: int) -> List[int]:
+        """Drops the cached paths of every source with a path through the edge. Returns the invalidated sources."""
+        sources: List[int] = list(self.get_paths_through_edge(s_index, d_index))
+        self.invalidate_sources(sources)
+        return sources
+
+    def is_empty(self) -> bool:
+        return not any(mem.paths for mem in self.mem)
+
     def to_json(self) -> Dict[str, Any]:
         return {
             "n": self.n,
-            "mem": [mem.to_json() for mem in self.mem]
+            "mem": [mem.to_json() for mem in self.mem],
+            "reverse_index": self.reverse_index.to_json()
         }
     
     @classmethod
@@ -58,23 +185,49 @@ class VertexPathDPManager:
         
         instance: VertexPathDPManager = cls(n)
         instance.mem = [PathMem.from_json(paths) for paths in mem_data]
+
+        maybe_index_data: Optional[Dict[str, Any]] = data.get("reverse_index")
+        if maybe_index_data is not None:
+            instance.reverse_index = PathReverseIndex.from_json(maybe_index_data)
+        else:
+            # Shards written before the index was serialized
+            for v_index in range(len(instance.mem)):
+                instance._index_source(v_index)
         return instance
     
     
+ShardLoader = Callable[[int], Optional[VertexPathDPManager]]
+
 class PathDPManager():
-    def __init__(self, n: int) -> None:
+    def __init__(self, n: int, maybe_shard_loader: Optional[ShardLoader] = None) -> None:
         self.n: int = n
         self.v_path_dp_managers: List[VertexPathDPManager] = [VertexPathDPManager(n) for _ in range(n)]
 
+        # Target vertex caches are loaded on first access when stored as separate shards
+        self.maybe_shard_loader: Optional[ShardLoader] = maybe_shard_loader
+        self.loaded_targets: Set[int] = set()
+
     def get(self, v_index: int) -> VertexPathDPManager:
         if not is_legal_index(v_index, self.n):
             raise IndexOutOfBoundsException(v_index, self.n)
         
+        if self.maybe_shard_loader is not None and v_index not in self.loaded_targets:
+            self.loaded_targets.add(v_index)
+            maybe_v_dp_manager: Optional[VertexPathDPManager] = self.maybe_shard_loader(v_index)
+            if maybe_v_dp_manager is not None and maybe_v_dp_manager.n == self.n:
+                self.v_path_dp_managers[v_index].merge(maybe_v_dp_manager)
+
         return self.v_path_dp_managers[v_index]
 
     def is_updated(self) -> bool:
         return any(p_dp_manager.updated for p_dp_manager in self.v_path_dp_managers)
 
+    def get_updated_targets(self) -> List[int]:
+        return [v_index for v_index, v_dp_manager in enumerate(self.v_path_dp_managers) if v_dp_manager.updated]
+
+    def mark_saved(self, target_index: int) -> None:
+        self.v_path_dp_managers[target_index].updated = False
+
     def to_json(self) -> Dict[str, Any]:
         return {
             "n": self.n,
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple, Iterable, Callable
 
 from core.sc_graph.utils import IndexOutOfBoundsException, CarrierNotFoundException, is_legal_index
 
@@ -15,30 +15,59 @@ class ProbMem:
         instance.probs = data
         return instance
 
+ProbEntry = Tuple[str, int]         # (carrier, source vertex index)
+ProbShardLoader = Callable[[str, int], Optional[List[float]]]
+
 class PathProbDPManager:
-    def __init__(self, n: int) -> None:
+    def __init__(self, n: int, maybe_shard_loader: Optional[ProbShardLoader] = None) -> None:
         self.n: int = n
         self.mem: Dict[str, List[ProbMem]] = {}
 
         self.updated: bool = False
-                
+        self.added_entries: Set[ProbEntry] = set()
+
+        # Entries are loaded on first access when stored as separate shards
+        self.maybe_shard_loader: Optional[ProbShardLoader] = maybe_shard_loader
+        self.loaded_entries: Set[ProbEntry] = set()
+
+        # Sources whose paths were invalidated: their probabilities are recomputed, never loaded from shards
+        self.invalidated_sources: Set[int] = set()
+
+    def _get_carrier_mem(self, carrier: str) -> List[ProbMem]:
+        if not carrier in self.mem:
+            self.mem[carrier] = [ProbMem() for _ in range(self.n)]
+        return self.mem[carrier]
+
+    def _load(self, carrier: str, v_index: int) -> None:
+        if self.maybe_shard_loader is None or (carrier, v_index) in self.loaded_entries or not is_legal_index(v_index, self.n) \
+           or v_index in self.invalidated_sources:
+            return
+
+        self.loaded_entries.add((carrier, v_index))
+        maybe_probs: Optional[List[float]] = self.maybe_shard_loader(carrier, v_index)
+        if maybe_probs:
+            prob_mem: ProbMem = self._get_carrier_mem(carrier)[v_index]
+            if not prob_mem.probs:
+                prob_mem.probs = maybe_probs
+
     def add(self, carrier: str, v_index: int, prob: float) -> None:
         n: int = self.n
         if not is_legal_index(v_index, n):
             raise IndexOutOfBoundsException(v_index, n)
         
-        if not carrier in self.mem:
-            self.mem[carrier] = [ProbMem() for _ in range(n)]
-    
-        self.mem[carrier][v_index].probs.append(prob)
+        self._get_carrier_mem(carrier)[v_index].probs.append(prob)
 
         self.updated = True
+        self.added_entries.add((carrier, v_index))
 
     def contains(self, carrier: str, maybe_v_index: Optional[int] = None) -> bool:
+        if maybe_v_index is not None:
+            self._load(carrier, maybe_v_index)
+
         if not carrier in self.mem:
             return False
             
-        if not maybe_v_index:
+        if maybe_v_index is None:
             return True
 
         if not is_legal_index(maybe_v_index, self.n):
@@ -47,6 +76,7 @@ class PathProbDPManager:
         return len(self.mem[carrier][maybe_v_index].probs) > 0
     
     def get(self, carrier: str, v_index: int) -> List[float]:
+        self._load(carrier, v_index)
         if carrier not in self.mem:
             raise CarrierNotFoundException(carrier)
         
@@ -55,8 +85,26 @@ class PathProbDPManager:
         
         return self.mem[carrier][v_index].probs
     
+    def invalidate(self, v_indices: Iterable[int]) -> None:
+        """Drops the probabilities of the sources for every carrier, e.g. once their cached paths are invalidated."""
+        for v_index in v_indices:
+            if not is_legal_index(v_index, self.n):
+                raise IndexOutOfBoundsException(v_index, self.n)
+
+            for mems in self.mem.values():
+                mems[v_index].probs = []
+            self.invalidated_sources.add(v_index)
+            self.added_entries = {(carrier, index) for carrier, index in self.added_entries if index != v_index}
+
     def is_updated(self) -> bool:
         return self.updated
+
+    def get_entries(self) -> List[ProbEntry]:
+        return [(carrier, v_index) for carrier, mems in self.mem.items() for v_index, mem in enumerate(mems) if mem.probs]
+
+    def mark_saved(self) -> None:
+        self.updated = False
+        self.added_entries.clear()
        
     def to_json(self) -> Dict[str, Any]:
         return {
@@ -0,0 +1,176 @@
+from typing import Optional, List, Dict, Set, Tuple
+from dataclasses import dataclass
+import threading
+import igraph as ig
+import numpy as np
+
+from graph_config import N_ORDERS_BY_CARRIER_ATTR, TYPE_ATTR, AVG_ORI_ATTR, AVG_OTI_ATTR
+
+from model.vertex import VertexType
+
+from core.sc_graph.utils import PathIndex, CarrierNotFoundException
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+# Vertices with no time of their own in the PT
+UNTIMED_VERTEX_TYPES: Set[str] = {VertexType.MANUFACTURER.value, VertexType.SUPPLIER_SITE.value}
+
+@dataclass
+class RemainingTimeMem:
+    """
+    Sums over the paths from each vertex to the manufacturer with non-zero probability for a carrier:
+    mass is the total probability, ori and oti the probability weighted sums of the avg_ori of the vertices after
+    the first one and of the avg_oti of the routes.
+    """
+    mass: np.ndarray
+    n_paths: np.ndarray
+    ori: np.ndarray
+    oti: np.ndarray
+
+@dataclass(frozen=True)
+class RemainingTimePrefix:
+    path: PathIndex
+    prob: float             # Probability of all the paths starting with the prefix, normalized across carriers
+    n_paths: int
+    tail_ori: float         # Probability weighted sums of the ORIs and OTIs after the last vertex of the prefix
+    tail_oti: float
+
+class RemainingTimeDPManager:
+    """
+    Reverse topological DP over the SC graph, per carrier, of the static terms of the PT: without external data the
+    vertex and route times only depend on avg_ori and avg_oti, so the expected remaining time needs no path enumeration.
+    """
+    def __init__(self, graph: ig.Graph, maybe_manufacturer: Optional[ig.Vertex] = None) -> None:
+        self.graph: ig.Graph = graph
+        self.manufacturer: ig.Vertex = maybe_manufacturer or graph.vs.find(**{TYPE_ATTR: VertexType.MANUFACTURER.value})
+        self.mem: Dict[str, RemainingTimeMem] = {}
+
+        self.built: bool = False
+        self.available: bool = False
+        self._build_lock: threading.Lock = threading.Lock()          # Built on first use, possibly by concurrent estimates
+
+    def _get_transition_prob(self, carrier: str, v_orders: Dict[str, int], e_orders: Dict[str, int]) -> float:
+        if carrier not in v_orders or carrier not in e_orders:
+            return 0.0
+
+        v_n_orders: int = v_orders[carrier]
+        return e_orders[carrier] / v_n_orders if v_n_orders > 0 else 0.0
+
+    def build(self) -> None:
+        g: ig.Graph = self.graph
+
+        if not g.is_dag():
+            logger.error("SC graph is not a DAG: remaining time DP not available, falling back to path enumeration")
+            self.built = True
+            return
+
+        n: int = g.vcount()
+        target_index: int = self.manufacturer.index
+        order: List[int] = g.topological_sorting(mode="out")
+        out_edges: List[List[int]] = g.get_inclist(mode="out")
+        edge_targets: List[int] = [target for _, target in g.get_edgelist()]
+
+        v_orders: List[Dict[str, int]] = g.vs[N_ORDERS_BY_CARRIER_ATTR]
+        e_orders: List[Dict[str, int]] = g.es[N_ORDERS_BY_CARRIER_ATTR]
+        own_ori: List[float] = [0.0 if v[TYPE_ATTR] in UNTIMED_VERTEX_TYPES else v[AVG_ORI_ATTR] for v in g.vs]
+        avg_oti: List[float] = g.es[AVG_OTI_ATTR]
+
+        carriers: Set[str] = set().union(*(orders.keys() for orders in v_orders))
+        for carrier in carriers:
+            mem: RemainingTimeMem = RemainingTimeMem(
+                mass=np.zeros(n), n_paths=np.zeros(n, dtype=int), ori=np.zeros(n), oti=np.zeros(n)
+            )
+            mem.mass[target_index] = 1.0
+            mem.n_paths[target_index] = 1
+
+            for v_index in reversed(order):
+                if v_index == target_index:
+                    continue
+
+                for e_index in out_edges[v_index]:
+                    u_index: int = edge_targets[e_index]
+                    p: float = self._get_transition_prob(carrier, v_orders[v_index], e_orders[e_index])
+                    if p <= 0.0 or mem.mass[u_index] <= 0.0:
+                        continue
+
+                    mem.mass[v_index] += p * mem.mass[u_index]
+                    mem.n_paths[v_index] += mem.n_paths[u_index]
+                    mem.ori[v_index] += p * (own_ori[u_index] * mem.mass[u_index] + mem.ori[u_index])
+                    mem.oti[v_index] += p * (avg_oti[e_index] * mem.mass[u_index] + mem.oti[u_index])
+
+            self.mem[carrier] = mem
+
+        self.available = True
+        self.built = True
+        logger.debug(f"Remaining time DP built for {n} vertices and carriers {sorted(carriers)}")
+
+    def is_available(self) -> bool:
+        if not self.built:
+            with self._build_lock:
+                if not self.built:
+                    self.build()
+        return self.available
+
+    def get(self, carrier: str) -> RemainingTimeMem:
+        if not self.is_available() or carrier not in self.mem:
+            raise CarrierNotFoundException(carrier)
+        return self.mem[carrier]
+
+    def get_prefixes(self, source_index: int, carriers: List[str], k_hops: int) -> List[RemainingTimePrefix]:
+        """
+        Distinct prefixes of at most k_hops routes of the paths from the source to the manufacturer, merged across the
+        valid carriers, each with the DP sums of the paths below it. k_hops = 0 gives the source alone.
+        """
+        g: ig.Graph = self.graph
+        target_index: int = self.manufacturer.index
+
+        source_orders: Dict[str, int] = g.vs[source_index][N_ORDERS_BY_CARRIER_ATTR]
+        valid_carriers: List[str] = sorted(set(carriers) & set(source_orders.keys()))
+        if not valid_carriers or not self.is_available():
+            logger.debug(f"No remaining time prefixes for source index {source_index} and carriers {carriers}")
+            return []
+
+        total_orders: int = sum(source_orders[carrier] for carrier in valid_carriers)
+        norm_factors: Dict[str, float] = {
+            carrier: source_orders[carrier] / total_orders if total_orders > 0 else 1.0
+            for carrier in valid_carriers
+        }
+
+        out_edges: List[List[int]] = g.get_inclist(mode="out")
+        prefixes: List[RemainingTimePrefix] = []
+
+        stack: List[Tuple[PathIndex, Dict[str, float]]] = [(
+            [source_index],
+            {carrier: 1.0 for carrier in valid_carriers if self.get(carrier).mass[source_index] > 0.0}
+        )]
+        while stack:
+            path, probs = stack.pop()
+            if not probs:
+                continue
+
+            v_index: int = path[-1]
+            if v_index == target_index or len(path) - 1 >= k_hops:
+                prob, n_paths, tail_ori, tail_oti = 0.0, 0, 0.0, 0.0
+                for carrier, p in probs.items():
+                    mem: RemainingTimeMem = self.get(carrier)
+                    prob += norm_factors[carrier] * p * mem.mass[v_index]
+                    n_paths += int(mem.n_paths[v_index])
+                    tail_ori += norm_factors[carrier] * p * mem.ori[v_index]
+                    tail_oti += norm_factors[carrier] * p * mem.oti[v_index]
+
+                prefixes.append(RemainingTimePrefix(path=path, prob=float(prob), n_paths=n_paths, tail_ori=float(tail_ori), tail_oti=float(tail_oti)))
+                continue
+
+            for e_index in out_edges[v_index]:
+                e: ig.Edge = g.es[e_index]
+                u_index: int = e.target
+                next_probs: Dict[str, float] = {}
+                for carrier, p in probs.items():
+                    next_p: float = p * self._get_transition_prob(carrier, g.vs[v_index][N_ORDERS_BY_CARRIER_ATTR], e[N_ORDERS_BY_CARRIER_ATTR])
+                    if next_p > 0.0 and self.get(carrier).mass[u_index] > 0.0:
+                        next_probs[carrier] = next_p
+                stack.append((path + [u_index], next_probs))
+
+        logger.debug(f"{len(prefixes)} remaining time prefixes of at most {k_hops} hops from source index {source_index}")
+        return prefixes
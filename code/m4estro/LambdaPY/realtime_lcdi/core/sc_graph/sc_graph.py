@@ -1,6 +1,7 @@
-from typing import Optional, List, Dict, Union, Set, cast
+from typing import Optional, List, Dict, Union, Set, Tuple, Iterable, cast
 from enum import Enum
 from collections import defaultdict
+import uuid
 import igraph as ig
 import numpy as np
 
@@ -12,20 +13,32 @@ from core.dto.path.prob_path_dto import ProbPathIdDTO
 from core.dto.path.paths_dto import PathsIdDTO, PathsNameDTO
 
 from core.sc_graph.path_extraction.path_extraction_manager import PathExtractionManager
+from core.sc_graph.path_extraction.path_dp_manager import VertexPathDPManager
 from core.sc_graph.path_prob.path_prob_manager import PathProbManager
-from core.sc_graph.utils import VertexIdentifier, PathIndex, Path
+from core.sc_graph.remaining_time.remaining_time_dp_manager import RemainingTimeDPManager
+from core.sc_graph.utils import VertexIdentifier, PathIndex, Path, resolve_path
 
 from logger import get_logger
 
 logger = get_logger(__name__)
 
 class SCGraph:
-    def __init__(self, graph: ig.Graph, path_extraction_manager: PathExtractionManager, path_prob_manager: PathProbManager, maybe_manufacturer: Optional[ig.Vertex] = None):
+    def __init__(self, 
+                 graph: ig.Graph, 
+                 path_extraction_manager: PathExtractionManager, 
+                 path_prob_manager: PathProbManager, 
+                 maybe_manufacturer: Optional[ig.Vertex] = None,
+                 maybe_remaining_time_dp_manager: Optional[RemainingTimeDPManager] = None,
+                 maybe_version: Optional[str] = None):
         self.graph: ig.Graph = graph
         self.manufacturer: ig.Vertex = maybe_manufacturer or graph.vs.find(**{TYPE_ATTR: VertexType.MANUFACTURER.value})
         
         self.path_extraction_manager: PathExtractionManager = path_extraction_manager
         self.path_prob_manager: PathProbManager = path_prob_manager
+        self.remaining_time_dp_manager: RemainingTimeDPManager = maybe_remaining_time_dp_manager or RemainingTimeDPManager(graph, self.manufacturer)
+
+        # Identifies the graph in cache keys: unknown versions get a unique one, so their results are never shared
+        self.version: str = maybe_version or f"local-{uuid.uuid4().hex}"
 
     def extract_paths(self, 
                       source: Union[int, str, ig.Vertex], 
@@ -47,6 +60,42 @@ class SCGraph:
             by=by
         )
 
+    def _get_manufacturer_path_dp_manager(self) -> VertexPathDPManager:
+        return self.path_extraction_manager.dp_manager.get(self.manufacturer.index)
+
+    def get_paths_through_vertex(self, v_index: int) -> Dict[int, List[int]]:
+        """IDs of the cached paths to the manufacturer traversing the vertex, by source vertex index."""
+        return self._get_manufacturer_path_dp_manager().get_paths_through_vertex(v_index)
+
+    def get_paths_through_edge(self, s_index: int, d_index: int) -> Dict[int, List[int]]:
+        """IDs of the cached paths to the manufacturer traversing the edge, by source vertex index."""
+        return self._get_manufacturer_path_dp_manager().get_paths_through_edge(s_index, d_index)
+
+    def get_paths_through_vertices(self, source: ig.Vertex, v_indices: Iterable[int]) -> Set[Tuple[int, ...]]:
+        """
+        Cached paths to the manufacturer from the source traversing any of the vertices, as vertex IDs from the source
+        like the extracted paths. Paths of the source not extracted yet are not cached, so they are not returned.
+        """
+        v_dp_manager: VertexPathDPManager = self._get_manufacturer_path_dp_manager()
+        path_ids: Set[int] = {
+            path_id for v_index in v_indices for path_id in v_dp_manager.get_paths_through_vertex(v_index).get(source.index, [])
+        }
+        source_paths: List[PathIndex] = v_dp_manager.get(source.index)
+        return {tuple(resolve_path(self.graph, [source.index] + source_paths[path_id], VertexIdentifier.ID)) for path_id in path_ids}
+
+    def invalidate_vertex(self, v_index: int) -> List[int]:
+        """
+        Drops the cached paths and probabilities of the sources with a path through the vertex, so they are recomputed
+        on the next extraction. Only affects this instance: shards are rebuilt by the graph manager.
+        """
+        sources: List[int] = self._get_manufacturer_path_dp_manager().invalidate_vertex(v_index)
+        self.path_prob_manager.dp_manager.invalidate(sources)
+        logger.debug(f"Invalidated the cached paths of {len(sources)} sources through vertex index {v_index}")
+        return sources
 
-    
-   
\ No newline at end of file
+    def invalidate_edge(self, s_index: int, d_index: int) -> List[int]:
+        """Same as invalidate_vertex, for the sources with a path through the edge."""
+        sources: List[int] = self._get_manufacturer_path_dp_manager().invalidate_edge(s_index, d_index)
+        self.path_prob_manager.dp_manager.invalidate(sources)
+        logger.debug(f"Invalidated the cached paths of {len(sources)} sources through edge {s_index} -> {d_index}")
+        return sources
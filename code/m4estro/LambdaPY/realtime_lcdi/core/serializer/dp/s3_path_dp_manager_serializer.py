@@ -1,71 +1,110 @@
-from typing import Dict, TYPE_CHECKING, Optional
+from typing import Dict, List, TYPE_CHECKING, Optional, Tuple
 import json
 import boto3
 
+from serializer import s3_transfer
+
 from logger import get_logger
-from core.sc_graph.path_extraction.path_dp_manager import PathDPManager
+from core.sc_graph.path_extraction.path_dp_manager import PathDPManager, VertexPathDPManager
 
 if TYPE_CHECKING:
     import botocore.client
 
 s3: 'botocore.client.BaseClient' = boto3.client('s3')
 
-from graph_config import PATH_DP_MANAGER_KEY
+from graph_config import PATH_DP_SHARD_PREFIX, get_path_dp_shard_key
 logger = get_logger(__name__)
 
+MAX_MERGE_ATTEMPTS: int = 3
+
 class S3PathDPManagerSerializer:
+    """
+    Stores the PathDPManager as one shard per target vertex, under the path DP version of the graph. Shards are
+    written with ETag-conditional merges, so concurrent writers accumulate their cached paths instead of overwriting
+    each other.
+    """
     def __init__(self):
         pass
 
-    def serialize(self, dp_manager: PathDPManager, bucket_name: str, key: str = PATH_DP_MANAGER_KEY, force: bool = False) -> None:
-        if not force and not dp_manager.is_updated():
+    def _get_shard(self, bucket_name: str, key: str) -> Optional[Tuple[VertexPathDPManager, Optional[str]]]:
+        maybe_version: Optional[Tuple[bytes, Optional[str]]] = s3_transfer.get_object_version(s3, bucket_name, key)
+        if maybe_version is None:
+            return None
+
+        content, maybe_etag = maybe_version
+        return VertexPathDPManager.from_json(json.loads(content.decode('utf-8'))), maybe_etag
+
+    def _merge_shard(self, v_dp_manager: VertexPathDPManager, bucket_name: str, key: str) -> None:
+        for _ in range(MAX_MERGE_ATTEMPTS):
+            maybe_shard: Optional[Tuple[VertexPathDPManager, Optional[str]]] = self._get_shard(bucket_name, key)
+
+            maybe_etag: Optional[str] = None
+            if maybe_shard is not None:
+                shard, maybe_etag = maybe_shard
+                if shard.n == v_dp_manager.n:
+                    v_dp_manager.merge(shard)
+
+                    if not shard.merge(v_dp_manager):
+                        logger.debug(f"PathDPManager shard {bucket_name}/{key} already up to date")
+                        return
+
+            try:
+                s3_transfer.put_object(
+                    s3, bucket_name, key,
+                    json.dumps(v_dp_manager.to_json()).encode('utf-8'),
+                    'application/json',
+                    maybe_if_match=maybe_etag,
+                    if_none_match=maybe_shard is None
+                )
+                return
+            except Exception as e:
+                if not s3_transfer.is_precondition_failed(e):
+                    raise
+                logger.debug(f"PathDPManager shard {bucket_name}/{key} changed concurrently: merging again")
+
+        logger.warning(f"Could not merge PathDPManager shard {bucket_name}/{key} after {MAX_MERGE_ATTEMPTS} attempts: skipping")
+
+    def serialize(self, dp_manager: PathDPManager, bucket_name: str, version: str, key: str = PATH_DP_SHARD_PREFIX, force: bool = False) -> None:
+        target_indices: List[int] = list(range(dp_manager.n)) if force else dp_manager.get_updated_targets()
+        if not target_indices:
             logger.debug("No PathDPManager update to save: skipping serialization")
             return
-        
-        try:
-            dp_data: Dict = dp_manager.to_json()
-        except Exception:
-            logger.exception(f"Error converting PathDPManager to serializable format")
-            raise
 
-        logger.debug("PathDPManager converted to serializable format successfully")
-        
+        for target_index in target_indices:
+            v_dp_manager: VertexPathDPManager = dp_manager.v_path_dp_managers[target_index]
+            if v_dp_manager.is_empty():
+                continue
+
+            shard_key: str = get_path_dp_shard_key(target_index, version, key)
+            try:
+                self._merge_shard(v_dp_manager, bucket_name, shard_key)
+            except Exception:
+                logger.exception(f"Error serializing PathDPManager shard to {bucket_name}/{shard_key}")
+                raise
+
+            dp_manager.mark_saved(target_index)
+
+        logger.debug(f"PathDPManager serialized successfully to {len(target_indices)} shards of version {version} in {bucket_name}/{key}")
+
+    def _load_shard(self, bucket_name: str, version: str, key: str, target_index: int) -> Optional[VertexPathDPManager]:
+        shard_key: str = get_path_dp_shard_key(target_index, version, key)
         try:
-            s3.put_object(
-                Bucket=bucket_name,
-                Key=key,
-                Body=json.dumps(dp_data).encode('utf-8'),
-                ContentType='application/json'
-            )
+            maybe_shard: Optional[Tuple[VertexPathDPManager, Optional[str]]] = self._get_shard(bucket_name, shard_key)
         except Exception:
-            logger.exception(f"Error serializing PathDPManager data to {bucket_name}/{key}")
+            logger.exception(f"Error retrieving PathDPManager shard from {bucket_name}/{shard_key}")
             raise
-        
-        logger.debug(f"PathDPManager serialized successfully to {bucket_name}/{key}")
 
-    def deserialize(self, bucket_name: str, key: str = PATH_DP_MANAGER_KEY) -> Optional[PathDPManager]:
-        try:
-            # Check if the key exists
-            s3.head_object(Bucket=bucket_name, Key=key)
-        except Exception as e:
-            logger.debug(f"PathDPManager not found at key {key} in bucket {bucket_name}")
+        if maybe_shard is None:
+            logger.debug(f"PathDPManager shard not found at key {shard_key} in bucket {bucket_name}")
             return None
 
-        try:
-            response = s3.get_object(Bucket=bucket_name, Key=key)
-            content: str = response['Body'].read().decode('utf-8')
-            dp_data: Dict = json.loads(content)
-        except Exception:
-            logger.exception(f"Error retrieving PathDPManager data from {bucket_name}/{key}")
-            raise
+        logger.debug(f"PathDPManager shard retrieved successfully from {bucket_name}/{shard_key}")
+        return maybe_shard[0]
 
-        logger.debug(f"PathDPManager data retrieved successfully from {bucket_name}/{key}")
-        
-        try:
-            dp_manager: PathDPManager = PathDPManager.from_json(dp_data)
-        except Exception:
-            logger.exception(f"Error initializing PathDPManager from data")
-            raise
-        
-        logger.debug("PathDPManager initialized successfully")
-        return dp_manager
\ No newline at end of file
+    def deserialize(self, bucket_name: str, n: int, version: str, key: str = PATH_DP_SHARD_PREFIX) -> PathDPManager:
+        dp_manager: PathDPManager = PathDPManager(
+            n,
+            maybe_shard_loader=lambda target_index: self._load_shard(bucket_name, version, key, target_index)
+        )
+        logger.debug("PathDPManager initialized successfully with lazily loaded shards")
+        return dp_manager
@@ -1,71 +1,73 @@
-from typing import Dict, TYPE_CHECKING, Optional
+from typing import List, TYPE_CHECKING, Optional
 import json
 import boto3
 
+from serializer import s3_transfer
+
 from logger import get_logger
-from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager
+from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager, ProbEntry
 
 if TYPE_CHECKING:
     import botocore.client
 
 s3: 'botocore.client.BaseClient' = boto3.client('s3')
 
-from graph_config import PATH_PROB_DP_MANAGER_KEY
+from graph_config import PATH_PROB_DP_SHARD_PREFIX, get_path_prob_dp_shard_key
+from dp_version import DPVersions
 logger = get_logger(__name__)
 
 class S3PathProbDPManagerSerializer:
+    """
+    Stores the PathProbDPManager as one shard per (carrier, source vertex), under the path probability DP version
+    of the carrier. Probabilities of an entry only depend on the graph data that version hashes, so shards are
+    create-only: a shard already written by a concurrent worker is left as is.
+    """
     def __init__(self):
         pass
 
-    def serialize(self, dp_manager: PathProbDPManager, bucket_name: str, key: str = PATH_PROB_DP_MANAGER_KEY, force: bool = False) -> None:
-        if not force and not dp_manager.is_updated():
+    def serialize(self, dp_manager: PathProbDPManager, bucket_name: str, versions: DPVersions, key: str = PATH_PROB_DP_SHARD_PREFIX, force: bool = False) -> None:
+        entries: List[ProbEntry] = dp_manager.get_entries() if force else sorted(dp_manager.added_entries)
+        if not entries:
             logger.debug("No PathProbDPManager update to save: skipping serialization")
             return
-        
-        try:
-            dp_data: Dict = dp_manager.to_json()
-        except Exception:
-            logger.exception(f"Error converting PathProbDPManager to serializable format")
-            raise
 
-        logger.debug("PathProbDPManager converted to serializable format successfully")
-        
+        for carrier, v_index in entries:
+            shard_key: str = get_path_prob_dp_shard_key(carrier, versions.path_prob_dp(carrier), v_index, key)
+            try:
+                s3_transfer.put_object(
+                    s3, bucket_name, shard_key,
+                    json.dumps(dp_manager.get(carrier, v_index)).encode('utf-8'),
+                    'application/json',
+                    if_none_match=True
+                )
+            except Exception as e:
+                if not s3_transfer.is_precondition_failed(e):
+                    logger.exception(f"Error serializing PathProbDPManager shard to {bucket_name}/{shard_key}")
+                    raise
+                logger.debug(f"PathProbDPManager shard {bucket_name}/{shard_key} already written: skipping")
+
+        dp_manager.mark_saved()
+        logger.debug(f"PathProbDPManager serialized successfully to {len(entries)} shards in {bucket_name}/{key}")
+
+    def _load_shard(self, bucket_name: str, versions: DPVersions, key: str, carrier: str, v_index: int) -> Optional[List[float]]:
+        shard_key: str = get_path_prob_dp_shard_key(carrier, versions.path_prob_dp(carrier), v_index, key)
         try:
-            s3.put_object(
-                Bucket=bucket_name,
-                Key=key,
-                Body=json.dumps(dp_data).encode('utf-8'),
-                ContentType='application/json'
-            )
+            maybe_content: Optional[bytes] = s3_transfer.get_object(s3, bucket_name, shard_key)
         except Exception:
-            logger.exception(f"Error serializing PathProbDPManager data to {bucket_name}/{key}")
+            logger.exception(f"Error retrieving PathProbDPManager shard from {bucket_name}/{shard_key}")
             raise
-        
-        logger.debug(f"PathProbDPManager serialized successfully to {bucket_name}/{key}")
 
-    def deserialize(self, bucket_name: str, key: str = PATH_PROB_DP_MANAGER_KEY) -> Optional[PathProbDPManager]:
-        try:
-            # Check if the key exists
-            s3.head_object(Bucket=bucket_name, Key=key)
-        except Exception as e:
-            logger.debug(f"PathProbDPManager not found at key {key} in bucket {bucket_name}")
+        if maybe_content is None:
+            logger.debug(f"PathProbDPManager shard not found at key {shard_key} in bucket {bucket_name}")
             return None
 
-        try:
-            response = s3.get_object(Bucket=bucket_name, Key=key)
-            content: str = response['Body'].read().decode('utf-8')
-            dp_data: Dict = json.loads(content)
-        except Exception:
-            logger.exception(f"Error retrieving PathProbDPManager data from {bucket_name}/{key}")
-            raise
+        logger.debug(f"PathProbDPManager shard retrieved successfully from {bucket_name}/{shard_key}")
+        return json.loads(maybe_content.decode('utf-8'))
 
-        logger.debug(f"PathProbDPManager data retrieved successfully from {bucket_name}/{key}")
-        
-        try:
-            dp_manager: PathProbDPManager = PathProbDPManager.from_json(dp_data)
-        except Exception:
-            logger.exception(f"Error initializing PathProbDPManager from data")
-            raise
-        
-        logger.debug("PathProbDPManager initialized successfully")
-        return dp_manager
\ No newline at end of file
+    def deserialize(self, bucket_name: str, n: int, versions: DPVersions, key: str = PATH_PROB_DP_SHARD_PREFIX) -> PathProbDPManager:
+        dp_manager: PathProbDPManager = PathProbDPManager(
+            n,
+            maybe_shard_loader=lambda carrier, v_index: self._load_shard(bucket_name, versions, key, carrier, v_index)
+        )
+        logger.debug("PathProbDPManager initialized successfully with lazily loaded shards")
+        return dp_manager
@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING, Optional, override
+import boto3
+
+from serializer import s3_transfer
+
+from core.calculator.tfst.pt.cache.pt_cache import PTCacheBackend
+
+if TYPE_CHECKING:
+    import botocore.client
+
+s3: 'botocore.client.BaseClient' = boto3.client('s3')
+
+from logger import get_logger
+logger = get_logger(__name__)
+
+PT_CACHE_PREFIX: str = 'pt_cache/'
+
+class S3PTCacheBackend(PTCacheBackend):
+    """
+    One object per PT cache key. Entries only depend on their key, so they are create-only: an entry already written
+    by a concurrent worker is left as is. Old graph versions are never read again and are left to a bucket lifecycle rule.
+    Entries are not kept in the local object cache: the PTCache LRU already keeps the recent ones in memory, and
+    create-only objects would never be evicted from the disk.
+    """
+    def __init__(self, bucket_name: str, prefix: str = PT_CACHE_PREFIX) -> None:
+        self.bucket_name: str = bucket_name
+        self.prefix: str = prefix
+
+    @override
+    def get(self, key: str) -> Optional[bytes]:
+        return s3_transfer.get_object(s3, self.bucket_name, f"{self.prefix}{key}.json", keep_local_copy=False)
+
+    @override
+    def put(self, key: str, content: bytes) -> None:
+        object_key: str = f"{self.prefix}{key}.json"
+        try:
+            s3_transfer.put_object(s3, self.bucket_name, object_key, content, 'application/json', if_none_match=True, keep_local_copy=False)
+        except Exception as e:
+            if not s3_transfer.is_precondition_failed(e):
+                raise
+            logger.debug(f"PT cache entry {self.bucket_name}/{object_key} already written: skipping")
@@ -1,7 +1,8 @@
-from typing import Optional
+from typing import Optional, Tuple
 import igraph as ig
 
 from graph_config import TYPE_ATTR
+from dp_version import DPVersions, get_dp_versions
 
 from serializer.s3_graph_serializer import S3GraphSerializer
 
@@ -13,6 +14,8 @@ from core.sc_graph.path_extraction.path_dp_manager import PathDPManager
 from core.sc_graph.path_prob.path_prob_manager import PathProbManager
 from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager
 
+from core.sc_graph.remaining_time.remaining_time_dp_manager import RemainingTimeDPManager
+
 from core.serializer.dp.s3_path_dp_manager_serializer import S3PathDPManagerSerializer
 from core.serializer.dp.s3_path_prob_dp_manager_serializer import S3PathProbDPManagerSerializer
 
@@ -21,6 +24,9 @@ from model.vertex import VertexType
 from logger import get_logger
 logger = get_logger(__name__)
 
+# Shared across warm invocations: reused, with its DP caches, while the graph object keeps the same version
+_cached_sc_graph: Optional[SCGraph] = None
+
 class S3SCGraphSerializer:
     def __init__(self, 
                  graph_serializer: Optional[S3GraphSerializer] = None,
@@ -36,8 +42,9 @@ class S3SCGraphSerializer:
         self.graph_serializer.serialize(graph, bucket_name)
 
     def serialize_dp_managers(self, path_extraction_manager: PathExtractionManager, path_prob_manager: PathProbManager, bucket_name: str, force: bool = False) -> None:
-        self.path_dp_manager_serializer.serialize(path_extraction_manager.dp_manager, bucket_name, force=force)
-        self.path_prob_dp_manager_serializer.serialize(path_prob_manager.dp_manager, bucket_name, force=force)
+        versions: DPVersions = get_dp_versions(path_extraction_manager.graph)
+        self.path_dp_manager_serializer.serialize(path_extraction_manager.dp_manager, bucket_name, versions.path_dp, force=force)
+        self.path_prob_dp_manager_serializer.serialize(path_prob_manager.dp_manager, bucket_name, versions, force=force)
 
     def serialize(self, sc_graph: SCGraph, bucket_name: str, force: bool = False) -> None:
         self.serialize_graph(sc_graph.graph, bucket_name)
@@ -49,34 +56,56 @@ class S3SCGraphSerializer:
         )
 
     def deserialize(self, bucket_name: str) -> SCGraph:
-        graph: ig.Graph = self.graph_serializer.deserialize(bucket_name)
+        """SCGraph of the current graph version: the cached one, if the graph object has not changed since it was loaded."""
+        global _cached_sc_graph
+
+        maybe_cached: Optional[SCGraph] = _cached_sc_graph
+        maybe_graph: Optional[Tuple[ig.Graph, Optional[str]]] = self.graph_serializer.deserialize_if_changed(
+            maybe_cached.version if maybe_cached is not None else None, 
+            bucket_name
+        )
+        if maybe_graph is None:
+            assert maybe_cached is not None
+            logger.debug(f"Reusing SCGraph of version {maybe_cached.version}")
+            return maybe_cached
+
+        graph, maybe_version = maybe_graph
         try:
             manufacturer: ig.Vertex = graph.vs.find(**{TYPE_ATTR: VertexType.MANUFACTURER.value})
         except ValueError:
             logger.error("Could not initialize SCGraph: Manufacturer vertex not found")
             raise ValueError("Could not initialize SCGraph: Manufacturer vertex not found")
 
-        maybe_path_dp_manager: Optional[PathDPManager] = self.path_dp_manager_serializer.deserialize(bucket_name)
+        versions: DPVersions = get_dp_versions(graph)
+        path_dp_manager: PathDPManager = self.path_dp_manager_serializer.deserialize(bucket_name, n=graph.vcount(), version=versions.path_dp)
         path_extraction_manager: PathExtractionManager = PathExtractionManager(
             graph=graph,
             maybe_manufacturer=manufacturer,
-            maybe_dp_manager=maybe_path_dp_manager
+            maybe_dp_manager=path_dp_manager
         )
         logger.debug("PathExtractionManager initialized successfully")
 
-        maybe_path_prob_dp_manager: Optional[PathProbDPManager] = self.path_prob_dp_manager_serializer.deserialize(bucket_name)
+        path_prob_dp_manager: PathProbDPManager = self.path_prob_dp_manager_serializer.deserialize(bucket_name, n=graph.vcount(), versions=versions)
         path_prob_manager: PathProbManager = PathProbManager(
             graph=graph,
             maybe_manufacturer=manufacturer,
-            maybe_dp_manager=maybe_path_prob_dp_manager
+            maybe_dp_manager=path_prob_dp_manager
         )
         logger.debug("PathProbManager initialized successfully")
 
+        # Built on first use: graphs only estimated with path enumeration never pay for it
+        remaining_time_dp_manager: RemainingTimeDPManager = RemainingTimeDPManager(graph=graph, maybe_manufacturer=manufacturer)
+
         sc_graph: SCGraph = SCGraph(graph=graph, 
                                     maybe_manufacturer=manufacturer, 
                                     path_extraction_manager=path_extraction_manager,
-                                    path_prob_manager=path_prob_manager
+                                    path_prob_manager=path_prob_manager,
+                                    maybe_remaining_time_dp_manager=remaining_time_dp_manager,
+                                    maybe_version=maybe_version
                                     )
         logger.debug("SCGraph initialized successfully")
+
+        if maybe_version is not None:
+            _cached_sc_graph = sc_graph
         
         return sc_graph
\ No newline at end of file
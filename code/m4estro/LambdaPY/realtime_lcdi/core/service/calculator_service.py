@@ -1,9 +1,13 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, FrozenSet
+from dataclasses import dataclass
+from threading import Lock
+import os
 from datetime import datetime, timezone
 
 import igraph as ig
 
 from graph_config import V_ID_ATTR, TYPE_ATTR
+from gamma_summary import GammaSummaryTable
 
 from service.db_utils import get_db_connector, get_read_only_db_connector
 from service.db_connector import DBConnector
@@ -13,37 +17,66 @@ from model.order import Order, OrderStatus
 from model.vertex import VertexType
 from model.site import Site
 from model.carrier import Carrier
-from model.alpha_opt import AlphaOpt
+from model.estimated_time import EstimatedTime
 
 from core.serializer.bucket_data_loader import BucketDataLoader
+from core.serializer.s3_pt_cache_backend import S3PTCacheBackend
 
-from core.executor.tfst_executor import TFSTExecutor
-from core.executor.executor import Executor, ExecutorResult
+from core.executor.executor import ExecutorResult
 
-from core.initializer.alpha_initializer import AlphaInitializer
-from core.initializer.tfst_initializer import TFSTInitializer, TFSTInitializerResult
-from core.initializer.initializer import Initializer, InitializerResult
-
-from core.query_handler.query_handler import QueryHandler
-from core.query_handler.query_result import ShipmentTimeResult, DispatchTimeResult
+from core.query_handler.query_handler import QueryHandler, EstimatedTimeInput
 from core.query_handler.params.params_result import ParamsResult
 from core.query_handler.params.params_handler import ParamsHandler
 
-from core.dto.time_sequence.time_sequence_dto import TimeSequenceInputDTO
-from core.dto.dto_factory import DTOFactory
+from core.pipeline.estimation_pipeline import EstimationPipeline
+from core.pipeline.estimation_request import EstimationRequest, EstimationResult
+from core.pipeline.estimate_store import EstimateStore, StoredEstimate
 
 from core.sc_graph.sc_graph import SCGraph
 from core.formatter.formatter import Formatter
 
-from core.calculator.dt.dt_input_dto import DTInputDTO
-from core.calculator.tfst.pt.pt_input_dto import PTBaseInputDTO
-from core.calculator.tfst.tt.tt_input_dto import TTBaseInputDTO
-from core.calculator.tfst.alpha.alpha_input_dto import AlphaBaseInputDTO
-from core.calculator.time_deviation.time_deviation_input_dto import TimeDeviationBaseInputDTO 
+from core.calculator.tfst.pt.cache.pt_cache import PTCache, DEFAULT_PT_CACHE_MAX_SIZE
+
+from core.metrics.stage_metrics import StageMetrics
+
+from utils.config import PT_CACHE_BUCKET_NAME_KEY, PT_CACHE_MAX_SIZE_KEY, ORDER_BATCH_MAX_WORKERS_KEY, STAGE_METRICS_NAMESPACE_KEY
 
 from logger import get_logger
 logger = get_logger(__name__)
 
+DEFAULT_ORDER_BATCH_MAX_WORKERS: int = 8
+METRICS_RESULT_KEY: str = 'metrics'
+
+gamma_summary_table: GammaSummaryTable = GammaSummaryTable()      # Shared across warm invocations
+
+def _build_pt_cache() -> PTCache:
+    maybe_bucket_name: Optional[str] = os.environ.get(PT_CACHE_BUCKET_NAME_KEY)
+    max_size: int = int(os.environ.get(PT_CACHE_MAX_SIZE_KEY, DEFAULT_PT_CACHE_MAX_SIZE))
+    return PTCache(max_size=max_size, maybe_backend=S3PTCacheBackend(maybe_bucket_name) if maybe_bucket_name else None)
+
+pt_cache: PTCache = _build_pt_cache()                               # Shared across warm invocations and pipelines
+estimate_store: EstimateStore = EstimateStore()                     # Last saved estimate of each order, for incremental estimates
+
+_estimation_pipeline: Optional[EstimationPipeline] = None         # Rebuilt when params or graph change
+_estimation_pipeline_lock: Lock = Lock()
+
+@dataclass(frozen=True)
+class OrderEstimationInput:
+    vertex: ig.Vertex
+    order_id: int
+    event_time: datetime
+    maybe_estimation_time: Optional[datetime] = None
+
+def _emit_metrics(metrics: StageMetrics, operation: str) -> None:
+    maybe_namespace: Optional[str] = os.environ.get(STAGE_METRICS_NAMESPACE_KEY)
+    if not maybe_namespace:
+        return
+
+    try:
+        metrics.emit(maybe_namespace, {"operation": operation})
+    except Exception:
+        logger.warning(f"Could not emit the stage metrics of operation {operation}", exc_info=True)
+
 def get_status(v: ig.Vertex, maybe_shipment_time: Optional[datetime]) -> OrderStatus:
     if v[TYPE_ATTR] == VertexType.MANUFACTURER.value:
         return OrderStatus.DELIVERED
@@ -59,11 +92,17 @@ def compute_order_realtime_lcdi(
         event_time: datetime,
         maybe_estimation_time: Optional[datetime] = None,
         maybe_sc_graph: Optional[SCGraph] = None,
-        use_order_status: bool = True
+        use_order_status: bool = True,
+        maybe_disrupted_vertex_ids: Optional[FrozenSet[int]] = None
         ) -> Dict[str, Any]:
-    
+    """
+    Estimates the order and saves the estimate. Given the vertices of a disruption, the latest saved estimate of the order,
+    if still in memory and for the same vertex, shipment stage, params and graph, is re-estimated recomputing only the PT
+    of its paths traversing them.
+    """
     vertex_id: int = vertex[V_ID_ATTR]
     estimation_time: datetime = maybe_estimation_time or datetime.now(timezone.utc)
+    metrics: StageMetrics = StageMetrics()
 
     bucket_loader: BucketDataLoader = BucketDataLoader()
 
@@ -74,7 +113,7 @@ def compute_order_realtime_lcdi(
     with ro_db_connector.session_scope() as session:
         query_handler: QueryHandler = QueryHandler(session=session)
 
-        order: Order = query_handler.get_order(order_id=order_id)
+        order: Order = query_handler.get_order(order_id=order_id, with_site_and_carrier=True)
         site: Site = order.site
         carrier: Carrier = order.carrier
 
@@ -82,38 +121,194 @@ def compute_order_realtime_lcdi(
         maybe_shipment_time: Optional[datetime] = order.carrier_creation_timestamp   
         order_status: str = order.status if use_order_status else get_status(vertex, maybe_shipment_time).value
 
+        params: ParamsResult = ParamsHandler(session=session).get_params()
+        logger.debug(f"Parameters retrieved successfully: {params}")
+
+        maybe_previous: Optional[StoredEstimate] = None
+        if maybe_disrupted_vertex_ids is not None:
+            maybe_previous = estimate_store.get(order_id, query_handler.get_latest_estimated_time_id(order_id))
+
     logger.debug(f"Order data retrieved successfully: {order_time}")
 
-    executor_result: ExecutorResult = compute_realtime_lcdi(
-        sc_graph,
-        site,
-        carrier,
-        vertex_id,
-        order_time,
+    request: EstimationRequest = EstimationRequest(
+        site_id=site.id,
+        carrier_id=carrier.id,
+        carrier_name=carrier.name,
+        vertex_id=vertex_id,
+        order_time=order_time,
         event_time=event_time,
         estimation_time=estimation_time,
-        maybe_shipment_time=maybe_shipment_time,
+        maybe_shipment_time=maybe_shipment_time
+    )
+    if maybe_previous is not None and not maybe_previous.matches(request, params, sc_graph.version):
+        logger.debug(f"Previous estimate of order ID {order_id} was for another vertex, shipment, params or graph: not reused")
+        maybe_previous = None
+
+    pipeline: EstimationPipeline = get_estimation_pipeline(params, sc_graph, ro_db_connector)
+    executor_result: ExecutorResult = pipeline.estimate(
+        request, 
+        maybe_previous=maybe_previous.executor_result if maybe_previous is not None else None,
+        maybe_disrupted_vertex_ids=maybe_disrupted_vertex_ids,
+        maybe_metrics=metrics
     )
 
     formatter: Formatter = Formatter()
     db_connector: DBConnector = get_db_connector()
     with db_connector.session_scope() as session:
-        query_handler: QueryHandler = QueryHandler(session=session)
+        query_handler: QueryHandler = QueryHandler(session=session, maybe_payload_formatter=formatter.format_et_payload)
         et: int = query_handler.save_estimated_time(
             order_id=order_id,
             vertex_id=vertex_id,
             order_status=order_status,
-            executor_result=executor_result
+            executor_result=executor_result,
+            maybe_metrics=metrics
         )
 
         et_data: Dict[str, Any] = formatter.format_et(et)
     
     logger.debug(f"Successfully saved realtime lcdi record with ID: {et.id}")
+    estimate_store.put(order_id, StoredEstimate(
+        estimated_time_id=et.id, request=request, executor_result=executor_result, params=params, graph_version=sc_graph.version
+    ))
+    _emit_metrics(metrics, "order")
 
     bucket_loader.save_dp_managers(sc_graph, force=False)
+    pt_cache.flush()
 
     return et_data
 
+def compute_orders_realtime_lcdi(
+        inputs: List[OrderEstimationInput],
+        maybe_sc_graph: Optional[SCGraph] = None,
+        use_order_status: bool = True,
+        maybe_max_workers: Optional[int] = None,
+        include_metrics: bool = False
+        ) -> List[Dict[str, Any] | Exception]:
+    """
+    Batch of compute_order_realtime_lcdi: orders and params are read once, reference data once per site and carrier,
+    the estimates run on a bounded thread pool and are saved in one transaction. Results are in the order of the inputs,
+    with the exception of each failed order in place of its data. With include_metrics, the data of each order has
+    the summary of its stage metrics: the stages shared by the batch are only emitted.
+    """
+    max_workers: int = maybe_max_workers or int(os.environ.get(ORDER_BATCH_MAX_WORKERS_KEY, DEFAULT_ORDER_BATCH_MAX_WORKERS))
+    batch_metrics: StageMetrics = StageMetrics()
+    results: List[Optional[Dict[str, Any] | Exception]] = [None] * len(inputs)
+
+    bucket_loader: BucketDataLoader = BucketDataLoader()
+
+    sc_graph: SCGraph = maybe_sc_graph or bucket_loader.load_sc_graph()
+    logger.debug(f"SCGraph retrieved successfully")
+
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+    requests: List[EstimationRequest] = []
+    request_indices: List[int] = []
+    order_statuses: List[str] = []
+    with ro_db_connector.session_scope() as session:
+        params: ParamsResult = ParamsHandler(session=session).get_params()
+        logger.debug(f"Parameters retrieved successfully: {params}")
+
+        orders: Dict[int, Order] = QueryHandler(session=session).get_orders(
+            order_ids=(estimation_input.order_id for estimation_input in inputs), 
+            with_site_and_carrier=True
+        )
+
+        for i, estimation_input in enumerate(inputs):
+            maybe_order: Optional[Order] = orders.get(estimation_input.order_id)
+            if maybe_order is None:
+                results[i] = ValueError(f"Order with ID {estimation_input.order_id} not found")
+                continue
+
+            maybe_shipment_time: Optional[datetime] = maybe_order.carrier_creation_timestamp
+            requests.append(EstimationRequest(
+                site_id=maybe_order.site.id,
+                carrier_id=maybe_order.carrier.id,
+                carrier_name=maybe_order.carrier.name,
+                vertex_id=estimation_input.vertex[V_ID_ATTR],
+                order_time=maybe_order.manufacturer_creation_timestamp,
+                event_time=estimation_input.event_time,
+                estimation_time=estimation_input.maybe_estimation_time or datetime.now(timezone.utc),
+                maybe_shipment_time=maybe_shipment_time
+            ))
+            request_indices.append(i)
+            order_statuses.append(maybe_order.status if use_order_status else get_status(estimation_input.vertex, maybe_shipment_time).value)
+
+    logger.debug(f"Order data retrieved successfully for {len(requests)} of {len(inputs)} orders")
+
+    pipeline: EstimationPipeline = get_estimation_pipeline(params, sc_graph, ro_db_connector)
+    estimation_results: List[EstimationResult] = pipeline.estimate_many(requests, max_workers=max_workers, maybe_metrics=batch_metrics)
+
+    save_indices: List[int] = []
+    save_requests: List[EstimationRequest] = []
+    save_inputs: List[EstimatedTimeInput] = []
+    order_metrics: Dict[int, StageMetrics] = {}
+    for i, order_status, estimation_result in zip(request_indices, order_statuses, estimation_results):
+        if estimation_result.maybe_metrics is not None:
+            order_metrics[i] = estimation_result.maybe_metrics
+            _emit_metrics(estimation_result.maybe_metrics, "order")
+
+        if estimation_result.maybe_executor_result is None:
+            results[i] = estimation_result.maybe_exception or RuntimeError(estimation_result.maybe_error)
+            continue
+
+        save_indices.append(i)
+        save_requests.append(estimation_result.request)
+        save_inputs.append((inputs[i].order_id, estimation_result.request.vertex_id, order_status, estimation_result.maybe_executor_result))
+
+    formatter: Formatter = Formatter()
+    db_connector: DBConnector = get_db_connector()
+    with db_connector.session_scope() as session:
+        saved: List[EstimatedTime | Exception] = QueryHandler(session=session, maybe_payload_formatter=formatter.format_et_payload).save_estimated_times(save_inputs, maybe_metrics=batch_metrics)
+        for i, request, (order_id, _, _, executor_result), et in zip(save_indices, save_requests, save_inputs, saved):
+            if isinstance(et, Exception):
+                results[i] = et
+                continue
+
+            et_data: Dict[str, Any] = formatter.format_et(et)
+            if include_metrics and i in order_metrics:
+                et_data[METRICS_RESULT_KEY] = order_metrics[i].summary()
+            results[i] = et_data
+            estimate_store.put(order_id, StoredEstimate(
+                estimated_time_id=et.id, request=request, executor_result=executor_result, params=params, graph_version=sc_graph.version
+            ))
+
+    logger.debug(f"Successfully saved {sum(not isinstance(et, Exception) for et in saved)} realtime lcdi records")
+    _emit_metrics(batch_metrics, "order_batch")
+
+    bucket_loader.save_dp_managers(sc_graph, force=False)
+    pt_cache.flush()
+
+    return results
+
+def get_estimation_pipeline(params: ParamsResult, sc_graph: SCGraph, ro_db_connector: ReadOnlyDBConnector) -> EstimationPipeline:
+    global _estimation_pipeline
+
+    with _estimation_pipeline_lock:
+        if _estimation_pipeline is not None and _estimation_pipeline.matches(params, sc_graph):
+            logger.debug("Reusing estimation pipeline")
+            return _estimation_pipeline
+
+        logger.debug("Params or graph changed: building estimation pipeline")
+        _estimation_pipeline = EstimationPipeline(
+            params=params,
+            sc_graph=sc_graph,
+            ro_db_connector=ro_db_connector,
+            maybe_gamma_summary_table=gamma_summary_table,
+            maybe_pt_cache=pt_cache
+        )
+        return _estimation_pipeline
+
+def _estimate(sc_graph: SCGraph, request: EstimationRequest, maybe_metrics: Optional[StageMetrics] = None) -> ExecutorResult:
+    ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
+
+    with ro_db_connector.session_scope() as session:
+        params_handler: ParamsHandler = ParamsHandler(session=session)
+        params: ParamsResult = params_handler.get_params()
+        logger.debug(f"Parameters retrieved successfully: {params}")
+
+    pipeline: EstimationPipeline = get_estimation_pipeline(params, sc_graph, ro_db_connector)
+
+    return pipeline.estimate(request, maybe_metrics=maybe_metrics)
+
 def compute_realtime_lcdi(
         sc_graph: SCGraph,
         site: Site,
@@ -124,111 +319,48 @@ def compute_realtime_lcdi(
         estimation_time: datetime,
         maybe_shipment_time: Optional[datetime] = None,
         ) -> ExecutorResult:
-    
-    time_sequence_input: TimeSequenceInputDTO = TimeSequenceInputDTO(
+
+    return _estimate(sc_graph, EstimationRequest(
+        site_id=site.id,
+        carrier_id=carrier.id,
+        carrier_name=carrier.name,
+        vertex_id=vertex_id,
         order_time=order_time,
         event_time=event_time,
-        estimation_time=estimation_time
-    )
+        estimation_time=estimation_time,
+        maybe_shipment_time=maybe_shipment_time
+    ))
+
+def compute_realtime_lcdi_by_carrier(
+        sc_graph: SCGraph,
+        site: Site,
+        carriers: List[Carrier],
+        vertex_id: int,
+        order_time: datetime,
+        event_time: datetime,
+        estimation_time: datetime,
+        maybe_shipment_time: Optional[datetime] = None,
+        ) -> List[EstimationResult]:
 
-    site_id: int = site.id
-    
-    dto_factory: DTOFactory = DTOFactory()
     ro_db_connector: ReadOnlyDBConnector = get_read_only_db_connector()
-    
+
     with ro_db_connector.session_scope() as session:
         params_handler: ParamsHandler = ParamsHandler(session=session)
         params: ParamsResult = params_handler.get_params()
         logger.debug(f"Parameters retrieved successfully: {params}")
 
-        query_handler: QueryHandler = QueryHandler(session=session)
+    pipeline: EstimationPipeline = get_estimation_pipeline(params, sc_graph, ro_db_connector)
 
-        alpha_opt: AlphaOpt = query_handler.get_alpha_opt(site_id=site_id, carrier_id=carrier.id)
-        logger.debug(f"Alpha optimal parameters retrieved successfully: {alpha_opt}")
-
-        dispatch_time_result: DispatchTimeResult = query_handler.get_dispatch_time(site_id=site_id)
-        logger.debug(f"Dispatch times retrieved successfully: {dispatch_time_result}")
-        
-        dt_input: DTInputDTO
-        if maybe_shipment_time is not None:
-            dt_input = dto_factory.create_dt_input_dto(
-                site_id=site_id,
-                maybe_shipment_time=maybe_shipment_time
-            )
-        else:
-            dt_input = dto_factory.create_dt_input_dto(
-                site_id=site_id,
-                maybe_dispatch_time_result=dispatch_time_result
-            )
-
-        shipment_time_result: ShipmentTimeResult = query_handler.get_delivery_time(site_id=site_id, carrier_id=carrier.id)
-        logger.debug(f"Delivery times retrieved successfully: {shipment_time_result}")
-
-        alpha_base_input_dto: AlphaBaseInputDTO = dto_factory.create_alpha_base_input_dto(
-            shipment_time_result=shipment_time_result,
-            vertex_id=vertex_id
-        )
-
-        pt_base_input_dto: PTBaseInputDTO = dto_factory.create_pt_base_input_dto(
+    return pipeline.estimate_carriers([
+        EstimationRequest(
+            site_id=site.id,
+            carrier_id=carrier.id,
+            carrier_name=carrier.name,
             vertex_id=vertex_id,
-            carrier_names=[carrier.name]
-        )
-        
-        tt_base_input_dto: TTBaseInputDTO = dto_factory.create_tt_base_input_dto(
-            shipment_time_result=shipment_time_result
-        ) 
-
-        td_partial_input_dto: TimeDeviationBaseInputDTO = dto_factory.create_time_deviation_partial_input_dto(
-            dispatch_time_result=dispatch_time_result,
-            shipment_time_result=shipment_time_result
+            order_time=order_time,
+            event_time=event_time,
+            estimation_time=estimation_time,
+            maybe_shipment_time=maybe_shipment_time
         )
-
-    alpha_initializer: AlphaInitializer = AlphaInitializer(
-        alpha_const_value=params.tfst_params.alpha_params.const_alpha_value,
-        alpha_exp_tt_weight=alpha_opt.tt_weight
-    )
-        
-    tfst_initializer: TFSTInitializer = TFSTInitializer(
-        alpha_initializer=alpha_initializer,
-        sc_graph=sc_graph
-    )
-    initializer: Initializer = Initializer(tfst_initializer)
-
-    initializer_result: InitializerResult = initializer.initialize(
-        params=params, 
-        maybe_ro_db_connector=ro_db_connector
-    )
-    tfst_initializer_result: TFSTInitializerResult = initializer_result.tfst_initializer_result
-    logger.debug(f"Calculators initialized successfully")
-
-    tfst_executor: TFSTExecutor = TFSTExecutor(
-        alpha_calculator=tfst_initializer_result.alpha_calculator,
-        pt_calculator=tfst_initializer_result.pt_calculator,
-        tt_calculator=tfst_initializer_result.tt_calculator,
-        tfst_calculator=tfst_initializer_result.tfst_calculator,
-        parallelization=params.parallelization,
-        tolerance=params.tfst_params.tolerance
-    )
-
-    executor: Executor = Executor(
-        dto_factory=dto_factory,
-        dt_calculator=initializer_result.dt_calculator,
-        tfst_calculator_executor=tfst_executor,
-        est_calculator=initializer_result.est_calculator,
-        cfdi_calculator=initializer_result.cfdi_calculator,
-        eodt_calculator=initializer_result.eodt_calculator,
-        edd_calculator=initializer_result.edd_calculator,
-        td_calculator=initializer_result.time_deviation_calculator
-    )
-
-    executor_result: ExecutorResult = executor.execute(
-        time_sequence_input=time_sequence_input,
-        dt_input=dt_input,
-        alpha_base_input=alpha_base_input_dto,   
-        pt_base_input=pt_base_input_dto,
-        tt_base_input=tt_base_input_dto,
-        td_partial_input=td_partial_input_dto
-    )
-    logger.debug(f"Calculators executed successfully with parallelization: {params.parallelization}")
-
-    return executor_result
\ No newline at end of file
+        for carrier in carriers
+    ])
@@ -1,19 +1,25 @@
-from typing import Dict, Any, List, override, TYPE_CHECKING
+from typing import Dict, Any, List, FrozenSet, Optional, override, TYPE_CHECKING
 from datetime import datetime
 
+import igraph as ig
+
+from geo_calculator import GeoCalculator
+from graph_config import V_ID_ATTR, LATITUDE_ATTR, LONGITUDE_ATTR
+
 from service.db_utils import get_read_only_db_connector
 
 from model.vertex import VertexType
 
 from resolver.vertex_dto import VertexDTO, VertexNameDTO
 
+from core.sc_graph.sc_graph import SCGraph
 from core.sc_graph.sc_graph_resolver import SCGraphResolver, SCGraphVertexResult
 from core.service.calculator_service import compute_order_realtime_lcdi
 
 from sqs.handler.event_handler import EventHandler
 from sqs.handler.event_query_handler import EventQueryHandler
 from sqs.dto.sqs_event_dto import SqsEventDataDTO, EventType
-from sqs.dto.disruption_event_dto import DisruptionEventDataDTO, DisruptionDTO, AffectedOrdersDTO
+from sqs.dto.disruption_event_dto import DisruptionEventDataDTO, DisruptionDTO, DisruptionLocationDTO, AffectedOrdersDTO
 from sqs.dto.reconfiguration_dto import ReconfigurationEvent, ExternalDisruptionDTO
 
 if TYPE_CHECKING:
@@ -24,8 +30,20 @@ from logger import get_logger
 logger = get_logger(__name__)
 
 class DisruptionEventHandler(EventHandler):
-    def __init__(self, sc_graph_resolver: SCGraphResolver) -> None:
+    def __init__(self, sc_graph_resolver: SCGraphResolver, maybe_geo_calculator: Optional[GeoCalculator] = None) -> None:
         super().__init__(sc_graph_resolver)
+        self.geo_calculator: GeoCalculator = maybe_geo_calculator or GeoCalculator()
+
+    def _get_disrupted_vertex_ids(self, sc_graph: SCGraph, location: DisruptionLocationDTO) -> FrozenSet[int]:
+        """IDs of the vertices within the radius of the disruption: the external conditions of their routes changed."""
+        latitude, longitude = location.coordinates[0], location.coordinates[1]
+        g: ig.Graph = sc_graph.graph
+        disrupted_vertex_ids: FrozenSet[int] = frozenset(
+            v_id for v_id, v_latitude, v_longitude in zip(g.vs[V_ID_ATTR], g.vs[LATITUDE_ATTR], g.vs[LONGITUDE_ATTR])
+            if self.geo_calculator.geodesic_distance(latitude, longitude, v_latitude, v_longitude) <= location.radius_km
+        )
+        logger.debug(f"{len(disrupted_vertex_ids)} vertices within {location.radius_km} km of disruption location {location.name}")
+        return disrupted_vertex_ids
 
     #TODO: implement this method to check if the order meets the criteria for delay computation
     def _meets_delay_computation_criteria(self, order_id: int, order_location: str) -> bool:
@@ -58,6 +76,7 @@ class DisruptionEventHandler(EventHandler):
             raise ValueError("Order IDs and locations must match in length")
 
         reconfiguration_events: List[ReconfigurationEvent] = []
+        disrupted_vertex_ids_by_graph: Dict[str, FrozenSet[int]] = {}        # Orders resolved on the same graph share them
 
         for order_id, order_location in zip(order_ids, order_locations):
             logger.debug(f"Processing order ID {order_id} at location {order_location}")
@@ -103,13 +122,18 @@ class DisruptionEventHandler(EventHandler):
                 ))
                 continue
  
+            sc_graph: SCGraph = vertex_result.sc_graph
+            if sc_graph.version not in disrupted_vertex_ids_by_graph:
+                disrupted_vertex_ids_by_graph[sc_graph.version] = self._get_disrupted_vertex_ids(sc_graph, disruption_data.disruption_location)
+
             et_data: Dict[str, Any] = compute_order_realtime_lcdi(
                 vertex=vertex_result.vertex,
                 order_id=order_id,
                 event_time=event_timestamp,
                 maybe_estimation_time=timestamp,
-                maybe_sc_graph=vertex_result.sc_graph,
-                use_order_status=True
+                maybe_sc_graph=sc_graph,
+                use_order_status=True,
+                maybe_disrupted_vertex_ids=disrupted_vertex_ids_by_graph[sc_graph.version]      # Only the PT of their paths changes
             )
             logger.debug(f"Estimated time computed: {et_data}")
 
@@ -0,0 +1,93 @@
+from typing import Dict, Hashable, Iterable, Tuple, Optional
+from collections import OrderedDict
+from threading import Lock
+from dataclasses import dataclass, field
+import numpy as np
+import scipy.stats as stats
+
+from stats_utils import compute_gamma_mean, compute_gamma_ci
+
+GAMMA_SUMMARY_TABLE_SIZE: int = 4096
+
+@dataclass(frozen=True)
+class GammaSummary:
+    shape: float = field(metadata={"description": "Shape parameter of the fitted gamma distribution."})
+    scale: float = field(metadata={"description": "Scale parameter of the fitted gamma distribution."})
+    loc: float = field(metadata={"description": "Location parameter of the fitted gamma distribution."})
+    mean: float = field(metadata={"description": "Mean of the fitted gamma distribution."})
+    cis: Dict[float, Tuple[float, float]] = field(metadata={"description": "Central confidence intervals, keyed by confidence level."})
+
+    def params(self) -> Tuple[float, float, float]:
+        return self.shape, self.scale, self.loc
+
+    def ci(self, confidence_level: float) -> Tuple[float, float]:
+        maybe_ci: Optional[Tuple[float, float]] = self.cis.get(confidence_level)
+        if maybe_ci is not None:
+            return maybe_ci
+
+        return compute_gamma_ci(shape=self.shape, scale=self.scale, loc=self.loc, confidence_level=confidence_level)
+
+def summarize_gamma(shape: float, scale: float, loc: float, confidence_levels: Iterable[float]) -> GammaSummary:
+    levels: Tuple[float, ...] = tuple(sorted(set(confidence_levels)))
+    for confidence_level in levels:
+        assert 0 < confidence_level < 1, "Confidence level must be between 0 and 1"
+
+    alphas: np.ndarray = 1 - np.array(levels, dtype=float)
+    qs: np.ndarray = np.concatenate([alphas / 2, 1 - alphas / 2])
+    bounds: np.ndarray = stats.gamma.ppf(qs, a=shape, scale=scale, loc=loc)     # One ppf evaluation for every level
+
+    n: int = len(levels)
+    cis: Dict[float, Tuple[float, float]] = {
+        level: (float(bounds[i]), float(bounds[n + i])) for i, level in enumerate(levels)
+    }
+
+    return GammaSummary(
+        shape=shape,
+        scale=scale,
+        loc=loc,
+        mean=compute_gamma_mean(shape=shape, scale=scale, loc=loc),
+        cis=cis
+    )
+
+class GammaSummaryTable:
+    """
+    Precomputed gamma summaries keyed by fitted distribution (e.g. a gamma table row),
+    refreshed whenever the stored parameters no longer match the requested ones.
+    """
+    def __init__(self, maxsize: int = GAMMA_SUMMARY_TABLE_SIZE) -> None:
+        self.maxsize: int = maxsize
+        self._summaries: OrderedDict[Hashable, GammaSummary] = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def get(self, key: Hashable, shape: float, scale: float, loc: float, confidence_levels: Iterable[float]) -> GammaSummary:
+        levels: Tuple[float, ...] = tuple(confidence_levels)
+        with self._lock:
+            maybe_summary: Optional[GammaSummary] = self._summaries.get(key)
+
+            if maybe_summary is not None \
+                and maybe_summary.params() == (shape, scale, loc) \
+                and all(level in maybe_summary.cis for level in levels):
+                self._summaries.move_to_end(key)
+                return maybe_summary
+
+            if maybe_summary is not None and maybe_summary.params() == (shape, scale, loc):
+                levels = levels + tuple(maybe_summary.cis.keys())
+
+            summary: GammaSummary = summarize_gamma(shape=shape, scale=scale, loc=loc, confidence_levels=levels)
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            if len(self._summaries) > self.maxsize:
+                self._summaries.popitem(last=False)
+
+            return summary
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._summaries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._summaries.clear()
@@ -0,0 +1,67 @@
+from numbers import Number
+from typing import List, Sequence, Tuple
+from dataclasses import dataclass, field
+import numpy as np
+
+QUANTILE_GRID_SIZE: int = 201
+QUANTILE_GRID: np.ndarray = np.linspace(0.0, 1.0, QUANTILE_GRID_SIZE)           # Steps of 0.005: common CI bounds fall on the grid
+
+@dataclass(frozen=True)
+class QuantileSketch:
+    """
+    Empirical distribution summarized by its quantiles on a fixed grid of probability levels.
+
+    Quantiles between grid levels are linearly interpolated: on grid levels the sketch of a sample
+    matches np.percentile on the raw values, so CIs whose bounds fall on the grid are exact.
+    Merging new observations uses the count-weighted mixture of the two empirical CDFs.
+    """
+    n: int = field(metadata={"description": "Number of observations summarized by the sketch."})
+    quantiles: Tuple[float, ...] = field(metadata={"description": "Quantiles at the QUANTILE_GRID probability levels."})
+
+    def __post_init__(self) -> None:
+        if len(self.quantiles) != QUANTILE_GRID_SIZE:
+            raise ValueError(f"Quantile sketch must hold {QUANTILE_GRID_SIZE} quantiles, got {len(self.quantiles)}")
+
+    @staticmethod
+    def from_sample(x: Sequence[float]) -> 'QuantileSketch':
+        if len(x) == 0:
+            raise ValueError("Cannot build a quantile sketch from an empty sample")
+
+        quantiles: np.ndarray = np.percentile(np.asarray(x, dtype=float), QUANTILE_GRID * 100)
+        return QuantileSketch(n=len(x), quantiles=tuple(float(q) for q in quantiles))
+
+    @staticmethod
+    def from_list(n: int, quantiles: Sequence[float]) -> 'QuantileSketch':
+        return QuantileSketch(n=n, quantiles=tuple(float(q) for q in quantiles))
+
+    def to_list(self) -> List[float]:
+        return list(self.quantiles)
+
+    def _cdf(self, values: np.ndarray) -> np.ndarray:
+        q: np.ndarray = np.asarray(self.quantiles)
+        return np.interp(values, q, QUANTILE_GRID, left=0.0, right=1.0)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        n: int = self.n + other.n
+        candidates: np.ndarray = np.union1d(self.quantiles, other.quantiles)
+        cdf: np.ndarray = (self.n * self._cdf(candidates) + other.n * other._cdf(candidates)) / n
+
+        quantiles: np.ndarray = np.interp(QUANTILE_GRID, cdf, candidates)
+        quantiles[0], quantiles[-1] = candidates[0], candidates[-1]                 # Keep min and max exact
+
+        return QuantileSketch(n=n, quantiles=tuple(float(q) for q in quantiles))
+
+    def update(self, x: Sequence[float]) -> 'QuantileSketch':
+        if len(x) == 0:
+            return self
+
+        return self.merge(QuantileSketch.from_sample(x))
+
+    def quantile(self, q: float) -> float:
+        return float(np.interp(q, QUANTILE_GRID, self.quantiles))
+
+    def ci(self, confidence_level: float) -> Tuple[float, float]:
+        assert isinstance(confidence_level, Number) and 0 < confidence_level < 1, "Confidence level must be between 0 and 1"
+
+        alpha: float = 1 - confidence_level
+        return self.quantile(alpha / 2), self.quantile(1 - alpha / 2)
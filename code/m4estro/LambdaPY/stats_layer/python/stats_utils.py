@@ -1,15 +1,24 @@
 from numbers import Number
+from functools import lru_cache
 from typing import List, Tuple
 import numpy as np
 import scipy.stats as stats
 
+GAMMA_CACHE_SIZE: int = 4096
+
+@lru_cache(maxsize=GAMMA_CACHE_SIZE)
+def _gamma_ci(shape: float, scale: float, loc: float, confidence_level: float) -> Tuple[float, float]:
+    alpha: float = 1 - confidence_level
+    bounds: np.ndarray = stats.gamma.ppf([alpha / 2, 1 - alpha / 2], a=shape, scale=scale, loc=loc)
+
+    return float(bounds[0]), float(bounds[1])
+
 def compute_gamma_mean(shape: float, scale: float, loc: float) -> float:
     assert isinstance(shape, Number)
     assert isinstance(scale, Number)
     assert isinstance(loc, Number), "Location parameter must be a number"
 
-    gamma = stats.gamma(a=shape, scale=scale, loc=loc)
-    return float(gamma.mean())
+    return float(loc + shape * scale)
 
 def compute_gamma_ci(shape: float, scale: float, loc: float, confidence_level: float) -> Tuple[float, float]:
     assert isinstance(shape, Number)
@@ -17,13 +26,10 @@ def compute_gamma_ci(shape: float, scale: float, loc: float, confidence_level: f
     assert isinstance(loc, Number)
     assert isinstance(confidence_level, Number) and 0 < confidence_level < 1, "Confidence level must be between 0 and 1"
 
-    gamma = stats.gamma(a=shape, scale=scale, loc=loc)
-
-    alpha: float = 1 - confidence_level
-    lower_bound: float = float(gamma.ppf(alpha / 2))
-    upper_bound: float = float(gamma.ppf(1 - alpha / 2))
+    return _gamma_ci(float(shape), float(scale), float(loc), float(confidence_level))
 
-    return lower_bound, upper_bound
+def clear_gamma_cache() -> None:
+    _gamma_ci.cache_clear()
 
 def compute_sample_ci(x: List[float], confidence_level: float) -> Tuple[float, float]:
     assert isinstance(confidence_level, Number) and 0 < confidence_level < 1, "Confidence level must be between 0 and 1"
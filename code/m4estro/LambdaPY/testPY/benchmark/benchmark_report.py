@@ -0,0 +1,123 @@
+from typing import Callable, Dict, List, Optional, Any
+from dataclasses import dataclass, asdict
+import json
+import logging
+import math
+import os
+import time
+import tracemalloc
+
+# Where to write the reports of the run, as JSON, e.g. to keep them as a baseline
+REPORT_PATH_KEY: str = "REALTIME_BENCHMARK_REPORT"
+# Reports of a previous run: a scenario fails if its p95 or peak memory grew by more than the tolerance
+BASELINE_PATH_KEY: str = "REALTIME_BENCHMARK_BASELINE"
+TOLERANCE_KEY: str = "REALTIME_BENCHMARK_TOLERANCE"
+
+DEFAULT_TOLERANCE: float = 0.25
+
+logger = logging.getLogger(__name__)
+
+def percentile(samples: List[float], q: float) -> float:
+    """Linear interpolation between the closest ranks, as numpy's default."""
+    ordered: List[float] = sorted(samples)
+    rank: float = (len(ordered) - 1) * q / 100.0
+    lower: int = math.floor(rank)
+    upper: int = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+@dataclass(frozen=True)
+class ScenarioReport:
+    scenario: str
+    n_runs: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_memory_mb: float
+
+    @classmethod
+    def from_samples(cls, scenario: str, durations_ms: List[float], peak_memory_bytes: int) -> 'ScenarioReport':
+        return cls(
+            scenario=scenario,
+            n_runs=len(durations_ms),
+            p50_ms=percentile(durations_ms, 50),
+            p95_ms=percentile(durations_ms, 95),
+            p99_ms=percentile(durations_ms, 99),
+            max_ms=max(durations_ms),
+            peak_memory_mb=peak_memory_bytes / 2 ** 20
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def format(self) -> str:
+        return (f"{self.scenario}: {self.n_runs} runs, p50 {self.p50_ms:.1f} ms, p95 {self.p95_ms:.1f} ms, "
+                f"p99 {self.p99_ms:.1f} ms, max {self.max_ms:.1f} ms, peak memory {self.peak_memory_mb:.1f} MB")
+
+def run_scenario(scenario: str,
+                 run: Callable[[], Any],
+                 n_runs: int,
+                 maybe_setup: Optional[Callable[[], Any]] = None
+                 ) -> ScenarioReport:
+    """
+    Times n_runs calls of run, each after an untimed maybe_setup. Peak memory is measured on one more call,
+    traced on its own: tracing slows allocations down, so it would skew the timed runs.
+    """
+    durations_ms: List[float] = []
+    for _ in range(n_runs):
+        if maybe_setup is not None:
+            maybe_setup()
+        start: float = time.perf_counter()
+        run()
+        durations_ms.append((time.perf_counter() - start) * 1000.0)
+
+    if maybe_setup is not None:
+        maybe_setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return ScenarioReport.from_samples(scenario, durations_ms, peak_memory_bytes)
+
+class BenchmarkReporter:
+    """Collects the scenario reports of a run, checks them against the baseline and writes them out."""
+    def __init__(self) -> None:
+        self.reports: Dict[str, ScenarioReport] = {}
+        self.tolerance: float = float(os.environ.get(TOLERANCE_KEY, DEFAULT_TOLERANCE))
+
+        self.baseline: Dict[str, Dict[str, Any]] = {}
+        maybe_baseline_path: Optional[str] = os.environ.get(BASELINE_PATH_KEY)
+        if maybe_baseline_path:
+            with open(maybe_baseline_path, 'r', encoding='utf-8') as f:
+                self.baseline = json.load(f)
+
+    def get_regressions(self, report: ScenarioReport) -> List[str]:
+        maybe_baseline: Optional[Dict[str, Any]] = self.baseline.get(report.scenario)
+        if maybe_baseline is None:
+            return []
+
+        regressions: List[str] = []
+        for metric in ("p95_ms", "peak_memory_mb"):
+            limit: float = maybe_baseline[metric] * (1.0 + self.tolerance)
+            value: float = getattr(report, metric)
+            if value > limit:
+                regressions.append(f"{report.scenario} {metric} {value:.1f} above baseline {maybe_baseline[metric]:.1f} + {self.tolerance:.0%}")
+        return regressions
+
+    def add(self, report: ScenarioReport) -> None:
+        logger.info(report.format())
+        self.reports[report.scenario] = report
+
+        regressions: List[str] = self.get_regressions(report)
+        assert not regressions, "; ".join(regressions)
+
+    def write(self) -> None:
+        maybe_report_path: Optional[str] = os.environ.get(REPORT_PATH_KEY)
+        if not maybe_report_path or not self.reports:
+            return
+
+        with open(maybe_report_path, 'w', encoding='utf-8') as f:
+            json.dump({scenario: report.to_dict() for scenario, report in self.reports.items()}, f, indent=2)
@@ -0,0 +1,65 @@
+import pytest
+import os
+import sys
+
+PLATFORM_COMM_LAYER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../platform_comm_layer/python/'))
+if PLATFORM_COMM_LAYER_PATH not in sys.path:
+    sys.path.insert(0, PLATFORM_COMM_LAYER_PATH)
+
+GRAPH_LAYER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../graph_layer/python/'))
+if GRAPH_LAYER_PATH not in sys.path:
+    sys.path.insert(0, GRAPH_LAYER_PATH)
+
+STATS_LAYER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../stats_layer/python/'))
+if STATS_LAYER_PATH not in sys.path:
+    sys.path.insert(0, STATS_LAYER_PATH)
+
+REALTIME_LCDI_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../realtime_lcdi/'))
+if REALTIME_LCDI_PATH not in sys.path:
+    sys.path.insert(0, REALTIME_LCDI_PATH)
+
+GRAPH_MANAGER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../graph_manager/'))
+if GRAPH_MANAGER_PATH not in sys.path:
+    sys.path.insert(0, GRAPH_MANAGER_PATH)
+
+BENCHMARK_PATH = os.path.abspath(os.path.dirname(__file__))
+if BENCHMARK_PATH not in sys.path:
+    sys.path.insert(0, BENCHMARK_PATH)
+
+from benchmark_report import BenchmarkReporter
+
+# Benchmarks are opt-in, e.g. RUN_BENCHMARKS=1 python -m pytest --log-cli-level=INFO
+RUN_BENCHMARKS_KEY: str = "RUN_BENCHMARKS"
+
+RT_ESTIMATOR_LAMBDA_ARN: str = "benchmark-rt-estimator-lambda-arn"
+SC_GRAPH_BUCKET: str = "benchmark-sc-graph-bucket"
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", f"benchmark: timing benchmark, run only when {RUN_BENCHMARKS_KEY} is set")
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get(RUN_BENCHMARKS_KEY):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason=f"benchmark: set {RUN_BENCHMARKS_KEY} to run it")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+@pytest.fixture(autouse=True)
+def set_env_vars(monkeypatch):
+    monkeypatch.setenv("AWS_REGION", "mock-region")
+    monkeypatch.setenv("DATABASE_SECRET_ARN", "mock-secret-arn")
+    monkeypatch.setenv("EXTERNAL_API_LAMBDA_ARN", "benchmark-external-api-lambda-arn")
+    monkeypatch.setenv("SC_GRAPH_BUCKET", SC_GRAPH_BUCKET)
+    monkeypatch.setenv("RECONFIGURATION_QUEUE_URL", "https://dummy.queue")
+    monkeypatch.setenv("ROUTE_TIME_ESTIMATOR_MODEL_KEY", "rt_estimator_xgboost.json")
+    monkeypatch.setenv("RT_ESTIMATOR_LAMBDA_ARN", RT_ESTIMATOR_LAMBDA_ARN)
+    monkeypatch.delenv("PT_CACHE_BUCKET", raising=False)
+    monkeypatch.delenv("STAGE_METRICS_NAMESPACE", raising=False)
+
+@pytest.fixture(scope="session")
+def benchmark_reporter():
+    reporter = BenchmarkReporter()
+    yield reporter
+    reporter.write()
@@ -0,0 +1,288 @@
+from typing import Dict, List, Optional, Any, Iterator
+from collections import Counter
+from dataclasses import dataclass, field
+from threading import Lock
+import hashlib
+import io
+import json
+import math
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Session
+
+from model.base import Base
+
+from synthetic_supply_chain import SyntheticSupplyChain, seed_database
+
+META_SUFFIX: str = '.meta.json'
+
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+class FileSystemS3Client:
+    """
+    Subset of the S3 client used by the lambdas, one file per object under root_dir, with conditional reads and writes.
+    ETags are the MD5 of the stored bytes, as for single part uploads.
+    """
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir: str = root_dir
+        self.calls: Counter = Counter()
+        self.lock: Lock = Lock()
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root_dir, bucket, *key.split('/'))
+
+    def _read_meta(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(f"{path}{META_SUFFIX}", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, ContentType: str = 'application/octet-stream',
+                   ContentEncoding: Optional[str] = None, IfMatch: Optional[str] = None, IfNoneMatch: Optional[str] = None) -> Dict[str, Any]:
+        path: str = self._path(Bucket, Key)
+        etag: str = f'"{hashlib.md5(Body).hexdigest()}"'
+        with self.lock:
+            self.calls['put_object'] += 1
+            maybe_meta: Optional[Dict[str, Any]] = self._read_meta(path)
+            if IfNoneMatch == '*' and maybe_meta is not None:
+                raise _client_error('PreconditionFailed', 'PutObject')
+            if IfMatch is not None and (maybe_meta is None or maybe_meta['ETag'] != IfMatch):
+                raise _client_error('PreconditionFailed', 'PutObject')
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(Body)
+            with open(f"{path}{META_SUFFIX}", 'w', encoding='utf-8') as f:
+                json.dump({'ETag': etag, 'ContentType': ContentType, 'ContentEncoding': ContentEncoding}, f)
+
+        return {'ETag': etag}
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: Optional[str] = None) -> Dict[str, Any]:
+        path: str = self._path(Bucket, Key)
+        with self.lock:
+            self.calls['get_object'] += 1
+            maybe_meta: Optional[Dict[str, Any]] = self._read_meta(path)
+            if maybe_meta is None:
+                raise _client_error('NoSuchKey', 'GetObject')
+            if IfNoneMatch is not None and IfNoneMatch == maybe_meta['ETag']:
+                raise _client_error('304', 'GetObject')
+
+            with open(path, 'rb') as f:
+                body: bytes = f.read()
+
+        response: Dict[str, Any] = {'Body': io.BytesIO(body), 'ETag': maybe_meta['ETag'], 'ContentType': maybe_meta['ContentType']}
+        if maybe_meta['ContentEncoding'] is not None:
+            response['ContentEncoding'] = maybe_meta['ContentEncoding']
+        return response
+
+    def delete_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        path: str = self._path(Bucket, Key)
+        with self.lock:
+            self.calls['delete_object'] += 1
+            for p in (path, f"{path}{META_SUFFIX}"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any]) -> Dict[str, Any]:
+        for obj in Delete['Objects']:
+            self.delete_object(Bucket=Bucket, Key=obj['Key'])
+        return {}
+
+    def list_keys(self, bucket: str, prefix: str = '') -> List[str]:
+        bucket_dir: str = os.path.join(self.root_dir, bucket)
+        keys: List[str] = []
+        for dir_path, _, file_names in os.walk(bucket_dir):
+            for file_name in file_names:
+                if file_name.endswith(META_SUFFIX):
+                    key: str = os.path.relpath(os.path.join(dir_path, file_name[:-len(META_SUFFIX)]), bucket_dir).replace(os.sep, '/')
+                    if key.startswith(prefix):
+                        keys.append(key)
+        return sorted(keys)
+
+    def get_paginator(self, operation: str) -> 'FileSystemS3Client':
+        assert operation == 'list_objects_v2', f"Unsupported paginator {operation}"
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str = '') -> Iterator[Dict[str, Any]]:
+        self.calls['list_objects_v2'] += 1
+        yield {'Contents': [{'Key': key} for key in self.list_keys(Bucket, Prefix)]}
+
+@dataclass(frozen=True)
+class Latency:
+    """Simulated latency of a call: fixed, plus a share for each item of a batched payload."""
+    base_ms: float = 0.0
+    per_item_ms: float = 0.0
+
+    def sleep(self, n_items: int = 1) -> None:
+        duration_ms: float = self.base_ms + self.per_item_ms * n_items
+        if duration_ms > 0:
+            time.sleep(duration_ms / 1000.0)
+
+@dataclass(frozen=True)
+class LambdaLatencies:
+    traffic: Latency = field(default_factory=Latency)
+    weather: Latency = field(default_factory=Latency)
+    rt_estimator: Latency = field(default_factory=Latency)
+    geo: Latency = field(default_factory=Latency)
+
+def _unit(*values: Any) -> float:
+    """Deterministic number in [0, 1) from the values."""
+    digest: bytes = hashlib.sha256(repr(values).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a: float = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+class FakeLambdaClient:
+    """
+    Stand-in for the Lambda client of the external API and RT estimator functions. Responses are a deterministic
+    function of the request, so runs are comparable, and each call sleeps for its configured latency.
+    """
+    def __init__(self, rt_estimator_arn: str, latencies: LambdaLatencies = LambdaLatencies()) -> None:
+        self.rt_estimator_arn: str = rt_estimator_arn
+        self.latencies: LambdaLatencies = latencies
+        self.calls: Counter = Counter()
+        self.items: Counter = Counter()
+        self.lock: Lock = Lock()
+
+    def _count(self, service: str, n_items: int) -> None:
+        with self.lock:
+            self.calls[service] += 1
+            self.items[service] += n_items
+
+    def _traffic(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        distance_km: float = 1.25 * _haversine_km(data["source_latitude"], data["source_longitude"],
+                                                  data["destination_latitude"], data["destination_longitude"])
+        no_traffic_hours: float = distance_km / 80.0
+        delay_hours: float = no_traffic_hours * 0.3 * _unit("traffic", data["source_latitude"], data["destination_latitude"], data["departure_time"][:13])
+        return {"data": {
+            "distance_km": distance_km,
+            "travel_time_hours": no_traffic_hours + delay_hours,
+            "no_traffic_travel_time_hours": no_traffic_hours,
+            "traffic_delay_hours": delay_hours,
+        }}
+
+    def _weather(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        docs: List[Dict[str, Any]] = []
+        for point in data:
+            u: float = _unit("weather", round(point["latitude"], 1), round(point["longitude"], 1), point["timestamp"][:13])
+            docs.append({
+                "weather_codes": f"type_{1 + int(u * 40)}",
+                "temperature_celsius": -5.0 + 35.0 * u,
+                "humidity": 100.0 * u,
+                "wind_speed": 20.0 * u,
+                "visibility": 10.0 * (1.0 - u),
+            })
+        return {"data": docs}
+
+    def _rt_estimator(self, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        predictions: List[Dict[str, float]] = [
+            {"time": request["distance"] / 70.0 * (1.0 + 0.3 * request["tmi"] + 0.3 * request["wmi"]) + 0.2 * request["avg_oti"]}
+            for request in batch
+        ]
+        return {"statusCode": 200, "body": json.dumps({"predictions": {"batch": predictions}})}
+
+    def _geo(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"data": {
+            "name": f"{data['city']}, {data['country']}", "city": data["city"], "state": None,
+            "country": data["country"], "country_code": data["country"],
+            "latitude": 45.0, "longitude": 9.0,
+        }}
+
+    def invoke(self, FunctionName: str, InvocationType: str, Payload: str) -> Dict[str, Any]:
+        payload: Dict[str, Any] = json.loads(Payload)
+
+        result: Dict[str, Any]
+        if FunctionName == self.rt_estimator_arn:
+            self._count("rt_estimator", len(payload["batch"]))
+            self.latencies.rt_estimator.sleep(len(payload["batch"]))
+            result = self._rt_estimator(payload["batch"])
+        elif payload.get("service") == "traffic":
+            self._count("traffic", 1)
+            self.latencies.traffic.sleep()
+            result = self._traffic(payload["data"])
+        elif payload.get("service") == "weather":
+            self._count("weather", len(payload["data"]))
+            self.latencies.weather.sleep(len(payload["data"]))
+            result = self._weather(payload["data"])
+        elif payload.get("service") == "location":
+            self._count("geo", 1)
+            self.latencies.geo.sleep()
+            result = self._geo(payload["data"])
+        else:
+            raise ValueError(f"Unsupported payload for {FunctionName}: {payload}")
+
+        return {"StatusCode": 200, "Payload": io.BytesIO(json.dumps(result).encode("utf-8"))}
+
+class FakeSqsClient:
+    def __init__(self) -> None:
+        self.messages: List[Dict[str, Any]] = []
+        self.lock: Lock = Lock()
+
+    def send_message(self, QueueUrl: str, MessageBody: str) -> Dict[str, Any]:
+        with self.lock:
+            self.messages.append(json.loads(MessageBody))
+            message_id: str = str(len(self.messages))
+        return {"MessageId": message_id, "ResponseMetadata": {"HTTPStatusCode": 200}}
+
+class LocalDatabase:
+    """SQLite file with the platform schema, a stand-in for Postgres shared by every connector of a run."""
+    def __init__(self, path: str) -> None:
+        self.url: str = f"sqlite:///{path}"
+        self._engine = create_engine(self.url, future=True)
+        Base.metadata.create_all(self._engine)
+        self._SessionLocal = sessionmaker(bind=self._engine, future=True, expire_on_commit=False)
+
+    def seed(self, chain: SyntheticSupplyChain) -> None:
+        session: Session = self._SessionLocal()
+        try:
+            seed_database(session, chain)
+        finally:
+            session.close()
+
+    def session(self) -> Session:
+        return self._SessionLocal()
+
+    def dispose(self) -> None:
+        self._engine.dispose()
+
+@dataclass
+class LocalStandIns:
+    s3: FileSystemS3Client
+    lambda_client: FakeLambdaClient
+    sqs: FakeSqsClient
+    database: LocalDatabase
+
+# Modules holding an S3 client created at import time
+S3_CLIENT_MODULES: List[str] = [
+    "serializer.s3_graph_serializer",
+    "serializer.s3_orders_overlay_serializer",
+    "core.serializer.dp.s3_path_dp_manager_serializer",
+    "core.serializer.dp.s3_path_prob_dp_manager_serializer",
+    "core.serializer.s3_pt_cache_backend",
+    "builder_service.graph_builder_service",
+]
+
+def install_stand_ins(monkeypatch: Any, stand_ins: LocalStandIns) -> None:
+    """Routes the AWS clients and database connections of the lambdas to the stand-ins, for the duration of a test."""
+    clients: Dict[str, Any] = {'s3': stand_ins.s3, 'lambda': stand_ins.lambda_client, 'sqs': stand_ins.sqs}
+    monkeypatch.setattr(boto3, "client", lambda service_name, *args, **kwargs: clients[service_name])
+    for module in S3_CLIENT_MODULES:
+        monkeypatch.setattr(f"{module}.s3", stand_ins.s3)
+
+    database_url: str = stand_ins.database.url
+    for module in ("service.db_utils", "builder_service.graph_builder_service"):
+        monkeypatch.setattr(f"{module}.get_db_credentials", lambda secret_arn, region: {})
+        monkeypatch.setattr(f"{module}.build_connection_url", lambda config: database_url)
@@ -0,0 +1,371 @@
+from typing import List, Dict, Tuple, Optional, Any
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import math
+import random
+
+from sqlalchemy.orm import Session
+
+from model.country import Country
+from model.location import Location
+from model.supplier import Supplier
+from model.manufacturer import Manufacturer
+from model.carrier import Carrier
+from model.site import Site
+from model.vertex import Vertex, VertexType
+from model.route import Route
+from model.order import Order, OrderStatus
+from model.route_order import RouteOrder
+from model.ori import ORI
+from model.oti import OTI
+from model.alpha_opt import AlphaOpt
+from model.dispatch_time_gamma import DispatchTimeGamma
+from model.shipment_time_gamma import ShipmentTimeGamma
+from model.param import Param, ParamName, ParamCategory, ParamGeneralCategory
+
+from sqs.dto.order_event_dto import OrderEventType
+
+# Naive UTC, as timestamps are read back from the database
+REFERENCE_TIME: datetime = datetime(2025, 6, 2, 9, 0, 0)
+
+COUNTRY_CODE: str = "IT"
+MANUFACTURER_NAME: str = "Manufacturer"
+
+@dataclass(frozen=True)
+class SupplyChainConfig:
+    """Size of a synthetic supply chain: sites, then layers of intermediates, then the manufacturer."""
+    n_sites: int = 10
+    n_intermediates: int = 30
+    n_layers: int = 3
+    fan_out: int = 3                        # Routes from each vertex to the next layer
+    n_carriers: int = 3
+    n_history_orders: int = 500             # Delivered orders, the history the graph is built from
+    n_active_orders: int = 50               # Orders in progress, the ones estimated
+    seed: int = 42
+
+    @property
+    def n_vertices(self) -> int:
+        return self.n_sites + self.n_intermediates + 1
+
+    def scaled(self, scale: int) -> 'SupplyChainConfig':
+        return SupplyChainConfig(
+            n_sites=self.n_sites * scale,
+            n_intermediates=self.n_intermediates * scale,
+            n_layers=self.n_layers,
+            fan_out=self.fan_out,
+            n_carriers=self.n_carriers,
+            n_history_orders=self.n_history_orders * scale,
+            n_active_orders=self.n_active_orders * scale,
+            seed=self.seed
+        )
+
+@dataclass(frozen=True)
+class SyntheticVertex:
+    id: int
+    name: str
+    type: VertexType
+    location_name: str
+    latitude: float
+    longitude: float
+    layer: int
+
+@dataclass(frozen=True)
+class SyntheticOrder:
+    id: int
+    site_id: int
+    carrier_id: int
+    walk: List[int] = field(metadata={"description": "Vertex IDs from the site to the manufacturer"})
+    order_time: datetime
+    maybe_shipment_time: Optional[datetime]
+    status: OrderStatus
+
+@dataclass(frozen=True)
+class ActiveOrder:
+    order_id: int
+    vertex_id: int
+    vertex_name: str
+    vertex_type: VertexType
+    event_time: datetime = field(metadata={"description": "Time the order reached its current vertex"})
+
+@dataclass
+class SyntheticSupplyChain:
+    config: SupplyChainConfig
+    vertices: List[SyntheticVertex]
+    routes: List[Tuple[int, int]]
+    carrier_names: List[str]
+    history_orders: List[SyntheticOrder]
+    active_orders: List[ActiveOrder]
+    active_order_rows: List[SyntheticOrder]
+
+    @property
+    def manufacturer(self) -> SyntheticVertex:
+        return self.vertices[-1]
+
+    @property
+    def sites(self) -> List[SyntheticVertex]:
+        return [v for v in self.vertices if v.type == VertexType.SUPPLIER_SITE]
+
+    def vertex(self, vertex_id: int) -> SyntheticVertex:
+        return self.vertices[vertex_id - 1]
+
+    def orders_through(self, vertex_name: str) -> List[ActiveOrder]:
+        return [order for order in self.active_orders if order.vertex_name == vertex_name]
+
+def _layer_sizes(n: int, n_layers: int) -> List[int]:
+    base, extra = divmod(n, n_layers)
+    return [base + (1 if i < extra else 0) for i in range(n_layers)]
+
+def _build_vertices(config: SupplyChainConfig, rng: random.Random) -> List[List[SyntheticVertex]]:
+    """Vertices by layer, placed west to east so routes point towards the manufacturer."""
+    n_layers: int = max(1, min(config.n_layers, config.n_intermediates))
+    layer_sizes: List[int] = [config.n_sites] + _layer_sizes(config.n_intermediates, n_layers) + [1]
+    lon_step: float = 8.0 / (len(layer_sizes) - 1)
+
+    layers: List[List[SyntheticVertex]] = []
+    next_id: int = 1
+    for layer, size in enumerate(layer_sizes):
+        vertices: List[SyntheticVertex] = []
+        for _ in range(size):
+            latitude: float = round(rng.uniform(38.0, 46.0), 4)
+            longitude: float = round(7.0 + layer * lon_step + rng.uniform(-0.2, 0.2), 4)
+            if layer == 0:
+                vertex = SyntheticVertex(next_id, str(next_id), VertexType.SUPPLIER_SITE, f"Site Location {next_id}", latitude, longitude, layer)
+            elif layer == len(layer_sizes) - 1:
+                vertex = SyntheticVertex(next_id, MANUFACTURER_NAME, VertexType.MANUFACTURER, "Manufacturer Location", latitude, longitude, layer)
+            else:
+                name: str = f"City {next_id}, {COUNTRY_CODE}"
+                vertex = SyntheticVertex(next_id, name, VertexType.INTERMEDIATE, name, latitude, longitude, layer)
+            vertices.append(vertex)
+            next_id += 1
+        layers.append(vertices)
+
+    return layers
+
+def _build_routes(config: SupplyChainConfig, layers: List[List[SyntheticVertex]], rng: random.Random) -> Dict[int, List[int]]:
+    successors: Dict[int, List[int]] = {}
+    for layer, next_layer in zip(layers, layers[1:]):
+        next_ids: List[int] = [v.id for v in next_layer]
+        for v in layer:
+            successors[v.id] = sorted(rng.sample(next_ids, min(config.fan_out, len(next_ids))))
+    return successors
+
+def _walk(site_id: int, successors: Dict[int, List[int]], weights: Dict[int, List[float]], rng: random.Random) -> List[int]:
+    walk: List[int] = [site_id]
+    while walk[-1] in successors:
+        walk.append(rng.choices(successors[walk[-1]], weights=weights[walk[-1]])[0])
+    return walk
+
+def generate_supply_chain(config: SupplyChainConfig) -> SyntheticSupplyChain:
+    """
+    Layered DAG with an order history following it. Every order walks from its site to the manufacturer, so
+    the order counts of each vertex match those of its routes, as in a graph built from real tracking data.
+    """
+    rng: random.Random = random.Random(config.seed)
+
+    layers: List[List[SyntheticVertex]] = _build_vertices(config, rng)
+    vertices: List[SyntheticVertex] = [v for layer in layers for v in layer]
+    successors: Dict[int, List[int]] = _build_routes(config, layers, rng)
+    weights: Dict[int, List[float]] = {v_id: [rng.uniform(0.2, 1.0) for _ in nexts] for v_id, nexts in successors.items()}
+    routes: List[Tuple[int, int]] = [(source, dest) for source, nexts in successors.items() for dest in nexts]
+
+    site_ids: List[int] = [v.id for v in layers[0]]
+    carrier_names: List[str] = [f"carrier-{i}" for i in range(1, config.n_carriers + 1)]
+
+    history_orders: List[SyntheticOrder] = []
+    for order_id in range(1, config.n_history_orders + 1):
+        site_id: int = rng.choice(site_ids)
+        order_time: datetime = REFERENCE_TIME - timedelta(days=rng.uniform(7.0, 90.0))
+        history_orders.append(SyntheticOrder(
+            id=order_id,
+            site_id=site_id,
+            carrier_id=rng.randint(1, config.n_carriers),
+            walk=_walk(site_id, successors, weights, rng),
+            order_time=order_time,
+            maybe_shipment_time=order_time + timedelta(hours=rng.uniform(12.0, 72.0)),
+            status=OrderStatus.DELIVERED
+        ))
+
+    # Active orders are where a delivered order of the same carrier went, so their carrier has paths from there
+    active_order_rows: List[SyntheticOrder] = []
+    active_orders: List[ActiveOrder] = []
+    for i in range(config.n_active_orders):
+        order_id: int = config.n_history_orders + i + 1
+        template: SyntheticOrder = rng.choice(history_orders)
+        position: int = rng.randrange(len(template.walk) - 1)
+        vertex: SyntheticVertex = vertices[template.walk[position] - 1]
+
+        order_time: datetime = REFERENCE_TIME - timedelta(hours=rng.uniform(48.0, 96.0))
+        maybe_shipment_time: Optional[datetime] = None
+        event_time: datetime = order_time + timedelta(hours=rng.uniform(0.5, 12.0))
+        status: OrderStatus = OrderStatus.PENDING
+        if position > 0:
+            # Further along the walk, later the event: always before the estimation at REFERENCE_TIME
+            maybe_shipment_time = order_time + timedelta(hours=rng.uniform(12.0, 20.0))
+            event_time = maybe_shipment_time + (REFERENCE_TIME - maybe_shipment_time) * (position / len(template.walk))
+            status = OrderStatus.IN_TRANSIT
+
+        active_order_rows.append(SyntheticOrder(order_id, template.site_id, template.carrier_id, template.walk[:position + 1], order_time, maybe_shipment_time, status))
+        active_orders.append(ActiveOrder(order_id=order_id, vertex_id=vertex.id, vertex_name=vertex.name, vertex_type=vertex.type, event_time=event_time))
+
+    return SyntheticSupplyChain(
+        config=config,
+        vertices=vertices,
+        routes=routes,
+        carrier_names=carrier_names,
+        history_orders=history_orders,
+        active_orders=active_orders,
+        active_order_rows=active_order_rows
+    )
+
+def get_realtime_params() -> List[Param]:
+    """Realtime and system params: the external services and the RT estimator are on, so every stage is exercised."""
+    values: Dict[Tuple[ParamName, ParamCategory], float] = {
+        (ParamName.DT_CONFIDENCE, ParamCategory.DISPATCH_TIME): 0.95,
+        (ParamName.CONSIDER_CLOSURE_HOLIDAYS, ParamCategory.HOLIDAY): 1,
+        (ParamName.CONSIDER_WORKING_HOLIDAYS, ParamCategory.HOLIDAY): 0,
+        (ParamName.CONSIDER_WEEKENDS_HOLIDAYS, ParamCategory.HOLIDAY): 1,
+        (ParamName.TFST_TOLERANCE, ParamCategory.TFST): 0.1,
+        (ParamName.ALPHA_CONST_VALUE, ParamCategory.ALPHA): 0.8,
+        (ParamName.ALPHA_CALCULATOR_TYPE, ParamCategory.ALPHA): 1,
+        (ParamName.PT_PATH_MIN_PROBABILITY, ParamCategory.PT): 0.01,
+        (ParamName.PT_MAX_PATHS, ParamCategory.PT): 10,
+        (ParamName.PT_EXT_DATA_MIN_PROBABILITY, ParamCategory.PT): 0.05,
+        (ParamName.PT_CONFIDENCE, ParamCategory.PT): 0.95,
+        (ParamName.TT_CONFIDENCE, ParamCategory.TT): 0.9,
+        (ParamName.RT_ESTIMATOR_MODEL_MAPE, ParamCategory.ROUTE_TIME_ESTIMATOR): 0.15,
+        (ParamName.RT_ESTIMATOR_USE_MODEL, ParamCategory.ROUTE_TIME_ESTIMATOR): 1,
+        (ParamName.TMI_AIR_MIN_SPEED_KM_H, ParamCategory.TMI): 500.0,
+        (ParamName.TMI_AIR_MAX_SPEED_KM_H, ParamCategory.TMI): 900.0,
+        (ParamName.TMI_SEA_MIN_SPEED_KM_H, ParamCategory.TMI): 30.0,
+        (ParamName.TMI_SEA_MAX_SPEED_KM_H, ParamCategory.TMI): 50.0,
+        (ParamName.TMI_RAIL_MIN_SPEED_KM_H, ParamCategory.TMI): 60.0,
+        (ParamName.TMI_RAIL_MAX_SPEED_KM_H, ParamCategory.TMI): 120.0,
+        (ParamName.TMI_ROAD_MIN_SPEED_KM_H, ParamCategory.TMI): 70.0,
+        (ParamName.TMI_ROAD_MAX_SPEED_KM_H, ParamCategory.TMI): 130.0,
+        (ParamName.TMI_AIR_MIN_DISTANCE_KM, ParamCategory.TMI): 100.0,
+        (ParamName.TMI_AIR_MAX_DISTANCE_KM, ParamCategory.TMI): 10000.0,
+        (ParamName.TMI_SEA_MIN_DISTANCE_KM, ParamCategory.TMI): 50.0,
+        (ParamName.TMI_SEA_MAX_DISTANCE_KM, ParamCategory.TMI): 15000.0,
+        (ParamName.TMI_RAIL_MIN_DISTANCE_KM, ParamCategory.TMI): 30.0,
+        (ParamName.TMI_RAIL_MAX_DISTANCE_KM, ParamCategory.TMI): 5000.0,
+        (ParamName.TMI_ROAD_MIN_DISTANCE_KM, ParamCategory.TMI): 10.0,
+        (ParamName.TMI_ROAD_MAX_DISTANCE_KM, ParamCategory.TMI): 2000.0,
+        (ParamName.TMI_USE_TRAFFIC_SERVICE, ParamCategory.TMI): 1,
+        (ParamName.TMI_TRAFFIC_MAX_TIMEDIFF, ParamCategory.TMI): 3.0,
+        (ParamName.WMI_USE_WEATHER_SERVICE, ParamCategory.WMI): 1,
+        (ParamName.WMI_WEATHER_MAX_TIMEDIFF, ParamCategory.WMI): 2.0,
+        (ParamName.WMI_STEP_DISTANCE_KM, ParamCategory.WMI): 50.0,
+        (ParamName.WMI_MAX_POINTS, ParamCategory.WMI): 10,
+        (ParamName.DELAY_DT_CONFIDENCE, ParamCategory.SYSTEM): 0.85,
+        (ParamName.DELAY_ST_CONFIDENCE, ParamCategory.SYSTEM): 0.9,
+    }
+    params: List[Param] = [
+        Param(name=name.value, general_category=ParamGeneralCategory.REALTIME.value, category=category.value, description="", value=value)
+        for (name, category), value in values.items()
+    ]
+    params.append(Param(
+        name=ParamName.PARALLELIZATION.value, general_category=ParamGeneralCategory.SYSTEM.value,
+        category=ParamCategory.SYSTEM.value, description="", value=4
+    ))
+    return params
+
+def _order_row(order: SyntheticOrder, manufacturer_id: int) -> Order:
+    return Order(
+        id=order.id, manufacturer_id=manufacturer_id, manufacturer_order_id=order.id,
+        site_id=order.site_id, carrier_id=order.carrier_id, status=order.status.value,
+        n_steps=len(order.walk), tracking_number=f"TRACK{order.id}", tracking_link=None,
+        manufacturer_creation_timestamp=order.order_time, carrier_creation_timestamp=order.maybe_shipment_time,
+        SLS=False
+    )
+
+def seed_database(session: Session, chain: SyntheticSupplyChain) -> None:
+    """Writes the supply chain with its order history, reference distributions and params."""
+    rng: random.Random = random.Random(chain.config.seed)
+    manufacturer_id: int = 1
+
+    session.add(Country(id=1, code=COUNTRY_CODE, name="Italy", total_holidays=12, weekend_start=6, weekend_end=7))
+    session.add_all([
+        Location(name=v.location_name, city=v.location_name.split(",")[0], state=None, country_code=COUNTRY_CODE,
+                 latitude=v.latitude, longitude=v.longitude)
+        for v in chain.vertices
+    ])
+    session.add(Supplier(id=1, manufacturer_supplier_id=1, name="Supplier"))
+    session.add(Manufacturer(id=manufacturer_id, name=MANUFACTURER_NAME, location_name=chain.manufacturer.location_name))
+    session.add_all([Carrier(id=i, name=name, carrier_17track_id=str(i)) for i, name in enumerate(chain.carrier_names, start=1)])
+    session.flush()
+
+    session.add_all([
+        Site(id=v.id, supplier_id=1, location_name=v.location_name, n_rejections=0, n_orders=0)
+        for v in chain.sites
+    ])
+    session.add_all([Vertex(id=v.id, name=v.name, type=v.type) for v in chain.vertices])
+    session.flush()
+    session.add_all([Route(id=i, source_id=s, destination_id=d) for i, (s, d) in enumerate(chain.routes, start=1)])
+
+    route_orders: List[RouteOrder] = []
+    otis: List[OTI] = []
+    oris: List[ORI] = []
+    session.add_all([_order_row(order, manufacturer_id) for order in chain.history_orders + chain.active_order_rows])
+    session.flush()
+
+    # Active orders have no route orders yet: the graph only counts the routes of delivered orders
+    for order in chain.history_orders:
+        for source_id, dest_id in zip(order.walk, order.walk[1:]):
+            route_orders.append(RouteOrder(order_id=order.id, source_id=source_id, destination_id=dest_id))
+            otis.append(OTI(source_id=source_id, destination_id=dest_id, hours=rng.uniform(2.0, 30.0)))
+        oris.extend(ORI(vertex_id=v_id, hours=rng.uniform(0.5, 6.0)) for v_id in order.walk[1:-1])
+    session.add_all(route_orders)
+    session.add_all(otis)
+    session.add_all(oris)
+
+    for site in chain.sites:
+        mean_dt: float = rng.uniform(12.0, 36.0)
+        session.add(DispatchTimeGamma(site_id=site.id, shape=4.0, scale=mean_dt / 4.0, loc=0.0,
+                                      skewness=1.0, kurtosis=1.5, mean=mean_dt, std_dev=mean_dt / 2.0, n=100))
+        for carrier_id in range(1, len(chain.carrier_names) + 1):
+            mean_st: float = rng.uniform(48.0, 120.0)
+            session.add(ShipmentTimeGamma(site_id=site.id, carrier_id=carrier_id, shape=6.0, scale=mean_st / 6.0, loc=0.0,
+                                          skewness=0.8, kurtosis=1.0, mean=mean_st, std_dev=mean_st / math.sqrt(6.0), n=100))
+            session.add(AlphaOpt(site_id=site.id, carrier_id=carrier_id, tt_weight=round(rng.uniform(0.3, 0.7), 2)))
+
+    session.add_all(get_realtime_params())
+    session.commit()
+
+def get_order_event(order: ActiveOrder, chain: SyntheticSupplyChain, estimation_time: datetime) -> Dict[str, Any]:
+    """SQS tracking event moving the order to its current vertex."""
+    event_type: OrderEventType = OrderEventType.CARRIER_UPDATE if order.vertex_type == VertexType.INTERMEDIATE else OrderEventType.ORDER_CREATION
+    return {
+        "eventType": "TRACKING_UPDATE",
+        "timestamp": estimation_time.isoformat(),
+        "data": {
+            "type": event_type.value,
+            "orderId": order.order_id,
+            "trackingNumber": f"TRACK{order.order_id}",
+            "eventTimestamps": [order.event_time.isoformat()],
+            "orderNewStepsIds": [1],
+            "orderNewLocations": [order.vertex_name],
+        }
+    }
+
+def get_disruption_event(vertex: SyntheticVertex, orders: List[ActiveOrder], event_time: datetime, estimation_time: datetime) -> Dict[str, Any]:
+    """SQS disruption alert at the vertex, affecting the orders waiting there."""
+    return {
+        "eventType": "DISRUPTION_EVENT",
+        "timestamp": estimation_time.isoformat(),
+        "data": {
+            "eventTimestamp": event_time.isoformat(),
+            "disruption": {
+                "disruptionType": "STORM",
+                "disruptionLocation": {"name": vertex.name, "coordinates": [vertex.latitude, vertex.longitude], "radiusKm": 50.0},
+                "measurements": {"severity": 0.7},
+            },
+            "affectedOrders": {
+                "total": len(orders),
+                "summary": {
+                    "orderIds": [order.order_id for order in orders],
+                    "statuses": [OrderStatus.IN_TRANSIT.value] * len(orders),
+                    "locations": [vertex.name] * len(orders),
+                },
+            },
+        }
+    }
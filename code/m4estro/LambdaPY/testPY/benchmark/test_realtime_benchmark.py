@@ -0,0 +1,187 @@
+import os
+import json
+import logging
+import shutil
+from itertools import cycle
+from typing import Any, Dict, Iterator, List
+
+import pytest
+import igraph as ig
+
+from graph_config import V_ID_ATTR
+
+from model.estimated_time import EstimatedTime
+from model.vertex import VertexType
+
+from gamma_summary import GammaSummaryTable
+from serializer import s3_transfer
+from serializer.s3_graph_serializer import S3GraphSerializer
+
+from builder_service import graph_builder_service
+
+from core.service import calculator_service
+from core.pipeline.estimate_store import EstimateStore
+from core.calculator.tfst.pt.cache.pt_cache import PTCache
+from core.serializer import s3_sc_graph_serializer
+from core.serializer.bucket_data_loader import BucketDataLoader
+from core.sc_graph.sc_graph import SCGraph
+
+from sqs import realtime_lcdi_sqs_handler
+
+from synthetic_supply_chain import (
+    SupplyChainConfig, SyntheticSupplyChain, SyntheticVertex, ActiveOrder, REFERENCE_TIME,
+    generate_supply_chain, get_order_event, get_disruption_event
+)
+from local_stand_ins import (
+    FileSystemS3Client, FakeLambdaClient, FakeSqsClient, LocalDatabase, LocalStandIns,
+    Latency, LambdaLatencies, install_stand_ins
+)
+from benchmark_report import run_scenario
+from conftest import RT_ESTIMATOR_LAMBDA_ARN, SC_GRAPH_BUCKET
+
+logger = logging.getLogger(__name__)
+
+pytestmark = pytest.mark.benchmark
+
+# Multiplies the synthetic supply chain sizes, e.g. REALTIME_BENCHMARK_SCALE=10 for a production-like run
+SCALE: int = int(os.environ.get("REALTIME_BENCHMARK_SCALE", "1"))
+# Timed runs of each scenario
+N_RUNS: int = int(os.environ.get("REALTIME_BENCHMARK_RUNS", "5"))
+# Simulated latency of each external API and RT estimator call, and of each item of their batched payloads
+LAMBDA_LATENCY_MS: float = float(os.environ.get("REALTIME_BENCHMARK_LAMBDA_LATENCY_MS", "2"))
+LAMBDA_ITEM_LATENCY_MS: float = float(os.environ.get("REALTIME_BENCHMARK_LAMBDA_ITEM_LATENCY_MS", "0.1"))
+
+SQS_BATCH_SIZE: int = 10
+
+CONFIG: SupplyChainConfig = SupplyChainConfig().scaled(SCALE)
+
+def reset_execution_environment(monkeypatch) -> None:
+    """Drops the state a new execution environment starts without: estimation pipeline, graph, caches and local S3 copies."""
+    monkeypatch.setattr(calculator_service, "_estimation_pipeline", None)
+    monkeypatch.setattr(s3_sc_graph_serializer, "_cached_sc_graph", None)
+    monkeypatch.setattr(calculator_service, "pt_cache", PTCache())
+    monkeypatch.setattr(calculator_service, "estimate_store", EstimateStore())
+    monkeypatch.setattr(calculator_service, "gamma_summary_table", GammaSummaryTable())
+    shutil.rmtree(s3_transfer.LOCAL_CACHE_DIR, ignore_errors=True)
+
+def count_estimated_times(stand_ins: LocalStandIns) -> int:
+    with stand_ins.database.session() as session:
+        return session.query(EstimatedTime).count()
+
+def sqs_event(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"Records": [{"body": json.dumps(event)} for event in events]}
+
+def tracking_event(chain: SyntheticSupplyChain, orders: List[ActiveOrder]) -> Dict[str, Any]:
+    return sqs_event([get_order_event(order, chain, REFERENCE_TIME) for order in orders])
+
+@pytest.fixture(scope="module")
+def chain() -> SyntheticSupplyChain:
+    return generate_supply_chain(CONFIG)
+
+@pytest.fixture
+def stand_ins(chain, tmp_path, monkeypatch):
+    latency: Latency = Latency(base_ms=LAMBDA_LATENCY_MS, per_item_ms=LAMBDA_ITEM_LATENCY_MS)
+    database: LocalDatabase = LocalDatabase(str(tmp_path / "platform.db"))
+    database.seed(chain)
+
+    stand_ins: LocalStandIns = LocalStandIns(
+        s3=FileSystemS3Client(str(tmp_path / "s3")),
+        lambda_client=FakeLambdaClient(RT_ESTIMATOR_LAMBDA_ARN, LambdaLatencies(latency, latency, latency, latency)),
+        sqs=FakeSqsClient(),
+        database=database
+    )
+    install_stand_ins(monkeypatch, stand_ins)
+    monkeypatch.setattr(s3_transfer, "LOCAL_CACHE_DIR", str(tmp_path / "s3_object_cache"))
+    reset_execution_environment(monkeypatch)
+
+    yield stand_ins
+
+    logger.info(f"Lambda calls: {dict(stand_ins.lambda_client.calls)}, S3 calls: {dict(stand_ins.s3.calls)}")
+    database.dispose()
+
+@pytest.fixture
+def built_graph(stand_ins) -> None:
+    graph_builder_service.build_graph()
+
+def test_graph_build_benchmark(chain, stand_ins, benchmark_reporter):
+    benchmark_reporter.add(run_scenario("graph_build", graph_builder_service.build_graph, N_RUNS))
+
+    graph: ig.Graph = S3GraphSerializer().deserialize(SC_GRAPH_BUCKET)
+    assert graph.vcount() == CONFIG.n_vertices
+    assert graph.ecount() == len(chain.routes)
+    assert graph.is_dag()
+    assert sum(graph.vs.find(type=VertexType.MANUFACTURER.value)["n_orders_by_carrier"].values()) == CONFIG.n_history_orders
+
+def test_cold_start_benchmark(chain, stand_ins, built_graph, monkeypatch, benchmark_reporter):
+    """First tracking event of a new execution environment: graph load, pipeline build and estimate."""
+    orders: Iterator[ActiveOrder] = cycle(chain.active_orders)
+    n_saved: int = count_estimated_times(stand_ins)
+
+    benchmark_reporter.add(run_scenario(
+        "cold_start",
+        lambda: realtime_lcdi_sqs_handler.handler(tracking_event(chain, [next(orders)]), None),
+        N_RUNS,
+        maybe_setup=lambda: reset_execution_environment(monkeypatch)
+    ))
+
+    assert count_estimated_times(stand_ins) == n_saved + N_RUNS + 1
+
+def test_warm_single_estimate_benchmark(chain, stand_ins, built_graph, benchmark_reporter):
+    sc_graph: SCGraph = BucketDataLoader().load_sc_graph()
+    orders: Iterator[ActiveOrder] = cycle(chain.active_orders)
+
+    def estimate() -> None:
+        order: ActiveOrder = next(orders)
+        calculator_service.compute_order_realtime_lcdi(
+            vertex=sc_graph.graph.vs.find(**{V_ID_ATTR: order.vertex_id}),
+            order_id=order.order_id,
+            event_time=order.event_time,
+            maybe_estimation_time=REFERENCE_TIME,
+            maybe_sc_graph=sc_graph
+        )
+
+    estimate()                  # Warm up: pipeline and graph DP caches
+    n_saved: int = count_estimated_times(stand_ins)
+
+    benchmark_reporter.add(run_scenario("warm_single_estimate", estimate, N_RUNS))
+
+    assert count_estimated_times(stand_ins) == n_saved + N_RUNS + 1
+
+def test_sqs_batch_benchmark(chain, stand_ins, built_graph, benchmark_reporter):
+    batches: Iterator[int] = cycle(range(0, len(chain.active_orders), SQS_BATCH_SIZE))
+
+    def handle_batch() -> None:
+        start: int = next(batches)
+        realtime_lcdi_sqs_handler.handler(tracking_event(chain, chain.active_orders[start:start + SQS_BATCH_SIZE]), None)
+
+    handle_batch()              # Warm up
+    n_saved: int = count_estimated_times(stand_ins)
+
+    benchmark_reporter.add(run_scenario(f"sqs_batch_{SQS_BATCH_SIZE}", handle_batch, N_RUNS))
+
+    assert count_estimated_times(stand_ins) - n_saved == (N_RUNS + 1) * SQS_BATCH_SIZE
+
+def test_disruption_fan_out_benchmark(chain, stand_ins, built_graph, benchmark_reporter):
+    """Disruption at the intermediate with the most orders waiting: each of them is re-estimated."""
+    vertex: SyntheticVertex = max(
+        (v for v in chain.vertices if v.type == VertexType.INTERMEDIATE),
+        key=lambda v: len(chain.orders_through(v.name))
+    )
+    orders: List[ActiveOrder] = chain.orders_through(vertex.name)
+    assert orders
+
+    # The orders were estimated when they reached the vertex, so the disruption re-estimates them incrementally
+    realtime_lcdi_sqs_handler.handler(tracking_event(chain, orders), None)
+    event_time = max(order.event_time for order in orders)
+    disruption: Dict[str, Any] = sqs_event([get_disruption_event(vertex, orders, event_time, REFERENCE_TIME)])
+    n_saved: int = count_estimated_times(stand_ins)
+    n_messages: int = len(stand_ins.sqs.messages)
+
+    benchmark_reporter.add(run_scenario(
+        f"disruption_fan_out_{len(orders)}",
+        lambda: realtime_lcdi_sqs_handler.handler(disruption, None),
+        N_RUNS
+    ))
+
+    assert count_estimated_times(stand_ins) - n_saved == (N_RUNS + 1) * len(orders)
+    assert len(stand_ins.sqs.messages) - n_messages == (N_RUNS + 1) * len(orders)          # External disruptions are always forwarded
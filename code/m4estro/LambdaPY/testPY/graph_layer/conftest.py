@@ -16,4 +16,8 @@ def set_env_vars(monkeypatch):
     monkeypatch.setenv("AWS_REGION", "mock-region")
     monkeypatch.setenv("DATABASE_SECRET_ARN", "mock-secret-arn")
     monkeypatch.setenv("EXTERNAL_API_LAMBDA_ARN", "mock-external-api-lambda-arn")
-    monkeypatch.setenv("SC_GRAPH_BUCKET", "mock-sc-graph-bucket-name")
\ No newline at end of file
+    monkeypatch.setenv("SC_GRAPH_BUCKET", "mock-sc-graph-bucket-name")
+
+@pytest.fixture(autouse=True)
+def isolate_s3_local_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr("serializer.s3_transfer.LOCAL_CACHE_DIR", str(tmp_path / "s3_object_cache"))
@@ -0,0 +1,53 @@
+import igraph as ig
+
+from serializer.columnar_graph_codec import encode_columnar, decode_columnar
+
+def make_graph() -> ig.Graph:
+    g = ig.Graph(directed=True)
+    g.add_vertices(4)
+    g.add_edges([(0, 2), (1, 2), (2, 3)])
+    g.vs["name"] = ["1", "2", "Hub", "Manufacturer"]
+    g.vs["v_id"] = [1, 2, 3, 4]
+    g.vs["site_id"] = [10, 20, None, None]
+    g.vs["avg_ori"] = [0.0, 0.0, 1.5, 0.0]
+    g.vs["n_orders_by_carrier"] = [{"dhl": 2}, {"fedex": 1}, {}, {"dhl": 2, "fedex": 1}]
+    g.vs["location"] = ["Turin", None, "Milan", "Rome"]
+    g.es["distance"] = [12.5, 30.0, 100.25]
+    g.es["n_orders"] = [2, 1, 3]
+    g.es["n_orders_by_carrier"] = [{"dhl": 2}, {"fedex": 1}, {"dhl": 2, "fedex": 1}]
+    g.es["tags"] = [["a"], [], ["b", "c"]]
+    return g
+
+def test_round_trip_preserves_topology_and_attributes():
+    g = make_graph()
+
+    decoded = decode_columnar(encode_columnar(g))
+
+    assert decoded.is_directed()
+    assert decoded.get_edgelist() == g.get_edgelist()
+    for attr in g.vs.attributes():
+        assert decoded.vs[attr] == g.vs[attr], attr
+    for attr in g.es.attributes():
+        assert decoded.es[attr] == g.es[attr], attr
+
+def test_round_trip_preserves_value_types():
+    decoded = decode_columnar(encode_columnar(make_graph()))
+
+    assert all(isinstance(v_id, int) for v_id in decoded.vs["v_id"])
+    assert all(isinstance(n_orders, int) for n_orders in decoded.es["n_orders"])
+    assert all(isinstance(avg_ori, float) for avg_ori in decoded.vs["avg_ori"])
+    assert decoded.vs["site_id"][2] is None
+
+def test_round_trip_empty_graph():
+    decoded = decode_columnar(encode_columnar(ig.Graph(directed=True)))
+
+    assert decoded.vcount() == 0
+    assert decoded.ecount() == 0
+
+def test_round_trip_preserves_graph_attributes():
+    g = make_graph()
+    g["transportation_mode_params"] = {"road_max_speed_km_h": 120.0}
+
+    decoded = decode_columnar(encode_columnar(g))
+
+    assert decoded["transportation_mode_params"] == {"road_max_speed_km_h": 120.0}
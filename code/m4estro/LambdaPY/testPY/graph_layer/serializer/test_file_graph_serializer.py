@@ -4,6 +4,7 @@ import igraph as ig
 from tempfile import NamedTemporaryFile
 
 from serializer.file_graph_serializer import FileGraphSerializer
+from serializer.graph_serializer import GraphFormat
 
 # ------------------ TESTS ------------------
 
@@ -61,3 +62,21 @@ def test_serialize_empty_graph():
 
     finally:
         os.remove(file_path)
+
+def test_serialize_and_deserialize_columnar_graph(sample_graph):
+    with NamedTemporaryFile(delete=False) as tmp:
+        file_path = tmp.name
+
+    try:
+        serializer = FileGraphSerializer(graph_format=GraphFormat.COLUMNAR)
+        serializer.serialize(sample_graph, file_path)
+
+        new_graph = FileGraphSerializer(graph_format=GraphFormat.COLUMNAR).deserialize(file_path)
+
+        assert new_graph.get_edgelist() == sample_graph.get_edgelist()
+        assert new_graph.vs["name"] == sample_graph.vs["name"]
+        assert new_graph.vs["label"] == sample_graph.vs["label"]
+        assert new_graph.es["weight"] == sample_graph.es["weight"]
+
+    finally:
+        os.remove(file_path)
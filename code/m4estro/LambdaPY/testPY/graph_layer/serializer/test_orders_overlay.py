@@ -0,0 +1,60 @@
+import json
+import igraph as ig
+
+from graph_config import V_ID_ATTR, ORDERS_ATTR
+from serializer.orders_overlay import OrdersOverlay
+
+def make_order(order_id: int) -> dict:
+    return {"order_id": order_id, "manufacturer_order_id": 100 + order_id, "tracking_number": str(order_id), "carrier_name": "dhl"}
+
+def make_graph() -> ig.Graph:
+    g = ig.Graph(directed=True)
+    g.add_vertices(3)
+    g.add_edges([(0, 1), (1, 2)])
+    g.vs[V_ID_ATTR] = [10, 20, 30]
+    g.vs["n_orders"] = [2, 2, 2]
+    g.vs[ORDERS_ATTR] = [
+        [make_order(1), make_order(2)],
+        [make_order(1), make_order(2), make_order(1), make_order(2)],
+        [make_order(1), make_order(2)],
+    ]
+    g.es[ORDERS_ATTR] = [[make_order(1), make_order(2)], [make_order(1), make_order(2)]]
+    return g
+
+def test_extract_leaves_lean_graph():
+    g = make_graph()
+
+    overlay = OrdersOverlay.extract(g)
+
+    assert ORDERS_ATTR not in g.vs.attributes()
+    assert ORDERS_ATTR not in g.es.attributes()
+    assert g.vs["n_orders"] == [2, 2, 2]
+    assert sorted(overlay.orders.keys()) == [1, 2]
+    assert overlay.vertex_order_ids[20] == [1, 2, 1, 2]
+    assert overlay.edge_order_ids[(20, 30)] == [1, 2]
+
+def test_json_round_trip_restores_orders():
+    expected = make_graph()
+    g = make_graph()
+
+    overlay = OrdersOverlay.extract(g)
+    restored = OrdersOverlay.from_json(json.loads(json.dumps(overlay.to_json())))
+    restored.apply(g)
+
+    assert g.vs[ORDERS_ATTR] == expected.vs[ORDERS_ATTR]
+    assert g.es[ORDERS_ATTR] == expected.es[ORDERS_ATTR]
+
+def test_apply_empty_overlay():
+    g = make_graph()
+    OrdersOverlay.extract(g)
+
+    OrdersOverlay().apply(g)
+
+    assert g.vs[ORDERS_ATTR] == [[], [], []]
+    assert g.es[ORDERS_ATTR] == [[], []]
+
+def test_extract_empty_graph():
+    overlay = OrdersOverlay.extract(ig.Graph(directed=True))
+
+    assert overlay.orders == {}
+    assert overlay.to_json() == {"orders": [], "vertices": [], "edges": []}
@@ -0,0 +1,75 @@
+import io
+import os
+import hashlib
+import pytest
+from botocore.exceptions import ClientError
+
+from serializer import s3_transfer
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.get_calls = []
+
+    def put_object(self, Bucket, Key, Body, ContentType, ContentEncoding=None):
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.objects[(Bucket, Key)] = (Body, ContentEncoding, etag)
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.get_calls.append((Key, IfNoneMatch))
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+
+        body, encoding, etag = self.objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+
+        response = {"Body": io.BytesIO(body), "ETag": etag}
+        if encoding:
+            response["ContentEncoding"] = encoding
+        return response
+
+@pytest.fixture
+def fake_s3():
+    return FakeS3()
+
+def test_put_object_gzip_encodes(fake_s3):
+    s3_transfer.put_object(fake_s3, "bucket", "key.json", b'{"a": 1}' * 100, "application/json")
+
+    body, encoding, _ = fake_s3.objects[("bucket", "key.json")]
+    assert encoding == "gzip"
+    assert len(body) < 800
+
+def test_get_object_decodes_and_revalidates(fake_s3):
+    fake_s3.objects[("bucket", "key.json")] = (b'{"a": 1}', None, '"etag-1"')
+
+    assert s3_transfer.get_object(fake_s3, "bucket", "key.json") == b'{"a": 1}'
+    assert s3_transfer.get_object(fake_s3, "bucket", "key.json") == b'{"a": 1}'
+
+    assert fake_s3.get_calls == [("key.json", None), ("key.json", '"etag-1"')]
+
+def test_get_object_downloads_changed_object(fake_s3):
+    s3_transfer.put_object(fake_s3, "bucket", "key.json", b"old", "application/json")
+    fake_s3.objects[("bucket", "key.json")] = (b"new", None, '"etag-2"')          # Overwritten by another execution environment
+
+    assert s3_transfer.get_object(fake_s3, "bucket", "key.json") == b"new"
+    assert fake_s3.get_calls[-1][1] is not None
+
+def test_objects_without_local_copy_are_not_kept_on_disk(fake_s3):
+    s3_transfer.put_object(fake_s3, "bucket", "key.json", b"entry", "application/json", keep_local_copy=False)
+
+    assert s3_transfer.get_object(fake_s3, "bucket", "key.json", keep_local_copy=False) == b"entry"
+    assert fake_s3.get_calls == [("key.json", None)]
+    assert not any(os.path.exists(path) for path in s3_transfer._get_local_paths("bucket", "key.json"))
+
+def test_get_object_missing_key(fake_s3):
+    assert s3_transfer.get_object(fake_s3, "bucket", "missing.json") is None
+
+def test_get_object_raises_other_errors():
+    class FailingS3:
+        def get_object(self, **kwargs):
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "GetObject")
+
+    with pytest.raises(ClientError):
+        s3_transfer.get_object(FailingS3(), "bucket", "key.json")
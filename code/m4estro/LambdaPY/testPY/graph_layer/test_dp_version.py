@@ -0,0 +1,46 @@
+import igraph as ig
+
+from graph_config import V_ID_ATTR, N_ORDERS_BY_CARRIER_ATTR, PATH_DP_VERSION_ATTR, PATH_PROB_DP_VERSIONS_ATTR
+from dp_version import compute_dp_versions, get_dp_versions, set_dp_versions
+
+def make_graph() -> ig.Graph:
+    g: ig.Graph = ig.Graph(n=3, edges=[(0, 1), (1, 2)], directed=True)
+    g.vs[V_ID_ATTR] = [10, 11, 12]
+    g.vs[N_ORDERS_BY_CARRIER_ATTR] = [{"dhl": 2, "ups": 1}, {"dhl": 2, "ups": 1}, {"dhl": 2, "ups": 1}]
+    g.es[N_ORDERS_BY_CARRIER_ATTR] = [{"dhl": 2, "ups": 1}, {"dhl": 2, "ups": 1}]
+    return g
+
+def test_versions_are_deterministic():
+    assert compute_dp_versions(make_graph()) == compute_dp_versions(make_graph())
+
+def test_carrier_counts_change_only_that_carrier_version():
+    g: ig.Graph = make_graph()
+    before = compute_dp_versions(g)
+
+    g.vs[1][N_ORDERS_BY_CARRIER_ATTR] = {"dhl": 3, "ups": 1}
+    after = compute_dp_versions(g)
+
+    assert after.path_dp == before.path_dp
+    assert after.path_prob_dp("dhl") != before.path_prob_dp("dhl")
+    assert after.path_prob_dp("ups") == before.path_prob_dp("ups")
+    assert after.path_prob_dp("gls") == after.path_dp
+
+def test_vertex_reorder_changes_all_versions():
+    g: ig.Graph = make_graph()
+    reordered: ig.Graph = g.permute_vertices([2, 1, 0])
+
+    before, after = compute_dp_versions(g), compute_dp_versions(reordered)
+    assert after.path_dp != before.path_dp
+    assert after.path_prob_dp("ups") != before.path_prob_dp("ups")
+
+def test_get_dp_versions_reads_stored_versions():
+    g: ig.Graph = make_graph()
+    assert PATH_DP_VERSION_ATTR not in g.attributes()
+
+    versions = get_dp_versions(g)
+    assert g[PATH_DP_VERSION_ATTR] == versions.path_dp
+    assert g[PATH_PROB_DP_VERSIONS_ATTR] == versions.path_prob_dp_by_carrier
+
+    g[PATH_DP_VERSION_ATTR] = "stored"
+    assert get_dp_versions(g).path_dp == "stored"
+    assert set_dp_versions(g) == versions
@@ -0,0 +1,29 @@
+import pytest
+
+from model.tmi import TransportationMode
+from model.param import ParamName
+
+from transportation_mode_classifier import TRANSPORTATION_MODE_PARAM_NAMES, get_mode_param_key, get_transportation_mode
+
+MODE_PARAMS = {
+    'air_min_speed_km_h': 500.0, 'air_max_speed_km_h': 1000.0, 'air_min_distance_km': 1000.0, 'air_max_distance_km': 20000.0,
+    'sea_min_speed_km_h': 10.0, 'sea_max_speed_km_h': 40.0, 'sea_min_distance_km': 1000.0, 'sea_max_distance_km': 20000.0,
+    'rail_min_speed_km_h': 60.0, 'rail_max_speed_km_h': 120.0, 'rail_min_distance_km': 500.0, 'rail_max_distance_km': 3000.0,
+    'road_min_speed_km_h': 20.0, 'road_max_speed_km_h': 110.0, 'road_min_distance_km': 0.0, 'road_max_distance_km': 3000.0,
+}
+
+def test_param_names_cover_all_mode_params():
+    assert len(TRANSPORTATION_MODE_PARAM_NAMES) == 16
+    assert {get_mode_param_key(param_name) for param_name in TRANSPORTATION_MODE_PARAM_NAMES} == set(MODE_PARAMS)
+    assert get_mode_param_key(ParamName.TMI_AIR_MIN_SPEED_KM_H) == 'air_min_speed_km_h'
+
+@pytest.mark.parametrize("distance_km, time_hours, expected", [
+    (8000.0, 10.0, TransportationMode.AIR),
+    (8000.0, 400.0, TransportationMode.SEA),
+    (1000.0, 10.0, TransportationMode.RAIL),            # Also in the road ranges: rail is checked first
+    (100.0, 2.0, TransportationMode.ROAD),
+    (100.0, 20.0, TransportationMode.UNKNOWN),
+    (100.0, 0.0, TransportationMode.UNKNOWN),
+])
+def test_get_transportation_mode(distance_km, time_hours, expected):
+    assert get_transportation_mode(distance_km, time_hours, MODE_PARAMS) == expected
@@ -0,0 +1,24 @@
+from dp_version import DPVersions
+
+from builder_service.dp_cache_invalidator import get_stale_dp_shard_prefixes
+
+def test_get_stale_dp_shard_prefixes():
+    previous = DPVersions(path_dp="p1", path_prob_dp_by_carrier={"dhl": "d1", "ups express": "u1", "fedex": "f1"})
+    current = DPVersions(path_dp="p1", path_prob_dp_by_carrier={"dhl": "d2", "ups express": "u1", "gls": "g1"})
+
+    assert get_stale_dp_shard_prefixes(previous, current) == [
+        "path_prob_dp/dhl/d1/",
+        "path_prob_dp/fedex/f1/",
+        "path_prob_dp/gls/p1/",            # Had no orders: its shards were under the path DP version
+    ]
+
+def test_get_stale_dp_shard_prefixes_topology_changed():
+    previous = DPVersions(path_dp="p1", path_prob_dp_by_carrier={})
+    current = DPVersions(path_dp="p2", path_prob_dp_by_carrier={})
+
+    assert get_stale_dp_shard_prefixes(previous, current) == ["path_dp/p1/"]
+
+def test_get_stale_dp_shard_prefixes_no_changes():
+    versions = DPVersions(path_dp="p1", path_prob_dp_by_carrier={"dhl": "d1"})
+
+    assert get_stale_dp_shard_prefixes(versions, versions) == []
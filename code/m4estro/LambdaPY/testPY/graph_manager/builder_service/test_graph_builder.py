@@ -1,5 +1,7 @@
 import pytest
 import igraph as ig
+
+from dp_version import get_dp_versions
 from collections import defaultdict
 from dataclasses import astuple
 
@@ -15,8 +17,9 @@ from model.supplier import Supplier
 from model.carrier import Carrier
 from model.manufacturer import Manufacturer
 from model.location import Location
+from model.tmi import TransportationMode
 
-from graph_config import N_ORDERS_BY_CARRIER_ATTR, V_ID_ATTR, TYPE_ATTR
+from graph_config import N_ORDERS_BY_CARRIER_ATTR, V_ID_ATTR, TYPE_ATTR, TRANSPORTATION_MODE_ATTR, TRANSPORTATION_MODE_PARAMS_ATTR
 
 from builder_service.query_handler import AvgVertexMetricResult, AvgRouteMetricResult, CarrierOrderCountResult, OrderRoutesResult
 from builder_service.graph_builder import GraphBuilder
@@ -814,4 +817,208 @@ def test_build_graph_empty_db(patch_connector_empty_db):
 
     graph: ig.Graph = builder.build()
     assert len(graph.vs) == 0
-    assert len(graph.es) == 0
\ No newline at end of file
+    assert len(graph.es) == 0
+
+def _add_delta_rows(session) -> None:
+    from datetime import datetime
+    from model.order import Order, OrderStatus
+    from model.route_order import RouteOrder
+    from model.ori import ORI
+    from model.oti import OTI
+
+    session.add(Order(id=4, manufacturer_id=1, manufacturer_order_id=104, site_id=2, carrier_id=2, status=OrderStatus.DELIVERED.value, n_steps=3, tracking_link=None, tracking_number="103", manufacturer_creation_timestamp=datetime(2025, 6, 6, 9, 0, 0), SLS=False))
+    session.add_all([
+        RouteOrder(id=7, order_id=4, source_id=2, destination_id=4),
+        RouteOrder(id=8, order_id=4, source_id=4, destination_id=5),
+        ORI(vertex_id=4, created_at=datetime(2025, 6, 6, 12, 0, 0), hours=1.25),
+        OTI(source_id=2, destination_id=4, created_at=datetime(2025, 6, 6, 12, 0, 0), hours=3.5),
+    ])
+    session.commit()
+
+def test_update_graph_matches_full_build(patch_connector, in_memory_db):
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+    assert watermark is not None
+
+    _add_delta_rows(in_memory_db)
+
+    result = GraphBuilder("dummy_connection_string").update(graph, watermark)
+    assert result is not None
+    assert result.watermark.route_order_id == 8
+    assert result.watermark.ori_id > watermark.ori_id
+
+    expected: ig.Graph = GraphBuilder("dummy_connection_string").build()
+    for attr in ("n_orders", N_ORDERS_BY_CARRIER_ATTR, "avg_ori", "ori_count"):
+        assert result.graph.vs[attr] == expected.vs[attr], attr
+    for attr in ("n_orders", N_ORDERS_BY_CARRIER_ATTR, "avg_oti", "oti_count"):
+        assert result.graph.es[attr] == expected.es[attr], attr
+
+    site_2: int = result.graph.vs.find(v_id=2).index
+    intermediate_4: int = result.graph.vs.find(v_id=4).index
+    assert result.changed_vertices_by_carrier == {"fedex": {site_2, intermediate_4}}
+
+    assert result.dp_versions.path_dp == result.previous_dp_versions.path_dp
+    assert {
+        carrier for carrier in result.dp_versions.carriers() | result.previous_dp_versions.carriers()
+        if result.dp_versions.path_prob_dp(carrier) != result.previous_dp_versions.path_prob_dp(carrier)
+    } == {"fedex"}
+    assert result.dp_versions == get_dp_versions(expected)
+
+def test_update_graph_does_not_count_site_orders_twice(patch_connector, in_memory_db):
+    from model.site import Site
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+
+    # The new order is also counted by its site
+    _add_delta_rows(in_memory_db)
+    site: Site = in_memory_db.get(Site, 2)
+    site.n_orders += 1
+    in_memory_db.commit()
+
+    result = GraphBuilder("dummy_connection_string").update(graph, watermark)
+    assert result is not None
+
+    expected: ig.Graph = GraphBuilder("dummy_connection_string").build()
+    assert result.graph.vs["n_orders"] == expected.vs["n_orders"]
+
+    site_2: ig.Vertex = result.graph.vs.find(v_id=2)
+    assert site_2["n_orders"] == sum(e["n_orders"] for e in site_2.out_edges())
+
+def test_update_graph_topology_changed(patch_connector, in_memory_db):
+    from model.route import Route as RouteModel
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+
+    in_memory_db.add(RouteModel(id=6, source_id=1, destination_id=4))
+    in_memory_db.commit()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, watermark) is None
+
+def _set_mode_params(session, road_max_speed_km_h: float) -> None:
+    from model.param import Param, ParamCategory, ParamGeneralCategory
+    from transportation_mode_classifier import TRANSPORTATION_MODE_PARAM_NAMES, get_mode_param_key
+
+    values = {
+        'air_min_speed_km_h': 500.0, 'air_max_speed_km_h': 1000.0, 'air_min_distance_km': 1000.0, 'air_max_distance_km': 20000.0,
+        'sea_min_speed_km_h': 10.0, 'sea_max_speed_km_h': 40.0, 'sea_min_distance_km': 1000.0, 'sea_max_distance_km': 20000.0,
+        'rail_min_speed_km_h': 60.0, 'rail_max_speed_km_h': 120.0, 'rail_min_distance_km': 500.0, 'rail_max_distance_km': 3000.0,
+        'road_min_speed_km_h': 0.0, 'road_max_speed_km_h': road_max_speed_km_h, 'road_min_distance_km': 0.0, 'road_max_distance_km': 3000.0,
+    }
+    for param_name in TRANSPORTATION_MODE_PARAM_NAMES:
+        maybe_param = session.query(Param).filter(Param.name == param_name.value).one_or_none()
+        if maybe_param is None:
+            session.add(Param(
+                name=param_name.value, general_category=ParamGeneralCategory.REALTIME.value, category=ParamCategory.TMI.value,
+                description=param_name.value, value=values[get_mode_param_key(param_name)]
+            ))
+        else:
+            maybe_param.value = values[get_mode_param_key(param_name)]
+    session.commit()
+
+def test_build_graph_without_mode_params(patch_connector):
+    graph: ig.Graph = GraphBuilder("dummy_connection_string").build()
+
+    assert graph[TRANSPORTATION_MODE_PARAMS_ATTR] is None
+    assert graph.es[TRANSPORTATION_MODE_ATTR] == [None] * graph.ecount()
+
+def test_build_and_update_graph_transportation_modes(patch_connector, in_memory_db):
+    _set_mode_params(in_memory_db, road_max_speed_km_h=10000.0)
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    assert graph[TRANSPORTATION_MODE_PARAMS_ATTR]["road_max_speed_km_h"] == 10000.0
+    for avg_oti, mode in zip(graph.es["avg_oti"], graph.es[TRANSPORTATION_MODE_ATTR]):
+        assert mode == (TransportationMode.ROAD.value if avg_oti > 0 else TransportationMode.UNKNOWN.value)      # No OTI: no speed
+
+    _set_mode_params(in_memory_db, road_max_speed_km_h=1.0)
+
+    result = GraphBuilder("dummy_connection_string").update(graph, builder.maybe_watermark)
+    assert result is not None
+    assert result.graph[TRANSPORTATION_MODE_PARAMS_ATTR]["road_max_speed_km_h"] == 1.0
+    assert set(result.graph.es[TRANSPORTATION_MODE_ATTR]) == {TransportationMode.UNKNOWN.value}
+
+def test_update_graph_rows_changed_below_watermark(patch_connector, in_memory_db):
+    from model.ori import ORI
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+
+    ori = in_memory_db.query(ORI).order_by(ORI.id).first()
+    ori.hours += 1.0
+    in_memory_db.commit()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, watermark) is None
+
+def test_update_graph_row_committed_late_below_watermark(patch_connector, in_memory_db):
+    from datetime import datetime
+    from model.ori import ORI
+
+    first_ori_id = in_memory_db.query(ORI).order_by(ORI.id).first().id
+    in_memory_db.delete(in_memory_db.get(ORI, first_ori_id))
+    in_memory_db.commit()
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+    assert watermark.ori_id > first_ori_id
+
+    in_memory_db.add(ORI(id=first_ori_id, vertex_id=4, created_at=datetime(2025, 6, 6, 12, 0, 0), hours=1.25))
+    in_memory_db.commit()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, watermark) is None
+
+@pytest.mark.parametrize("edit", [
+    lambda order: setattr(order, "tracking_number", order.tracking_number + "0"),
+    lambda order: setattr(order, "carrier_id", 3 - order.carrier_id),
+])
+def test_update_graph_order_payload_changed_below_watermark(patch_connector, in_memory_db, edit):
+    from model.order import Order as OrderModel
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+
+    edit(in_memory_db.get(OrderModel, 1))
+    in_memory_db.commit()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, watermark) is None
+
+def test_update_graph_order_status_change_keeps_watermark(patch_connector, in_memory_db):
+    from model.order import Order as OrderModel, OrderStatus
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+    watermark = builder.maybe_watermark
+
+    in_memory_db.get(OrderModel, 1).status = OrderStatus.IN_TRANSIT.value
+    in_memory_db.commit()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, watermark) is not None
+
+def test_update_graph_watermark_without_fingerprints(patch_connector):
+    from dataclasses import replace
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+
+    assert GraphBuilder("dummy_connection_string").update(graph, replace(builder.maybe_watermark, fingerprints={})) is None
+
+def test_update_graph_refreshes_site_attributes(patch_connector, in_memory_db):
+    from model.site import Site as SiteModel
+
+    builder: GraphBuilder = GraphBuilder("dummy_connection_string")
+    graph: ig.Graph = builder.build()
+
+    site = in_memory_db.get(SiteModel, 2)
+    site.n_rejections += 3
+    in_memory_db.commit()
+
+    result = GraphBuilder("dummy_connection_string").update(graph, builder.maybe_watermark)
+    assert result is not None
+    assert result.graph.vs.find(site_id=2)["n_rejections"] == site.n_rejections
@@ -0,0 +1,99 @@
+import os
+import time
+import logging
+import random
+import pytest
+import igraph as ig
+from collections import defaultdict
+
+from model.vertex import Vertex, VertexType
+from model.route import Route
+from model.carrier import Carrier
+
+from graph_config import N_ORDERS_BY_CARRIER_ATTR, V_ID_ATTR
+
+from builder_service.query_handler import CarrierOrderCountResult, OrderRoutesResult
+from builder_service.graph_builder import GraphBuilder
+
+logger = logging.getLogger(__name__)
+
+pytestmark = pytest.mark.benchmark
+
+# Multiplies the synthetic dataset sizes, e.g. GRAPH_BUILD_BENCHMARK_SCALE=10 for a production-like run
+SCALE: int = int(os.environ.get("GRAPH_BUILD_BENCHMARK_SCALE", "1"))
+
+N_CARRIERS: int = 3
+N_STEPS: int = 4
+
+def make_synthetic_dataset(n_sites: int, n_intermediates: int, n_orders: int, seed: int = 42):
+    rng = random.Random(seed)
+
+    vertices = [Vertex(id=i, name=str(i), type=VertexType.SUPPLIER_SITE) for i in range(1, n_sites + 1)]
+    intermediate_ids = list(range(n_sites + 1, n_sites + n_intermediates + 1))
+    vertices += [Vertex(id=i, name=f"Intermediate-{i}", type=VertexType.INTERMEDIATE) for i in intermediate_ids]
+    manufacturer_id: int = n_sites + n_intermediates + 1
+    vertices.append(Vertex(id=manufacturer_id, name="Manufacturer", type=VertexType.MANUFACTURER))
+
+    carriers = [Carrier(id=i, name=f"carrier-{i}") for i in range(1, N_CARRIERS + 1)]
+
+    # Every order goes site -> increasing intermediates -> manufacturer, so the graph is a DAG
+    route_keys = set()
+    order_routes = []
+    counts = defaultdict(int)
+    for order_id in range(1, n_orders + 1):
+        carrier_id: int = rng.randint(1, N_CARRIERS)
+        path = [rng.randint(1, n_sites)] + sorted(rng.sample(intermediate_ids, N_STEPS - 1)) + [manufacturer_id]
+        for source_id, dest_id in zip(path, path[1:]):
+            route_keys.add((source_id, dest_id))
+            counts[(source_id, dest_id, carrier_id)] += 1
+            order_routes.append(OrderRoutesResult(
+                source_id=source_id,
+                destination_id=dest_id,
+                order_id=order_id,
+                manufacturer_order_id=order_id,
+                tracking_number=str(order_id),
+                carrier_id=carrier_id
+            ))
+
+    routes = [Route(id=i, source_id=s, destination_id=d) for i, (s, d) in enumerate(sorted(route_keys), start=1)]
+    n_orders_per_carrier_route = [
+        CarrierOrderCountResult(source_id=s, destination_id=d, carrier_id=c, route_carrier_orders_count=n)
+        for (s, d, c), n in counts.items()
+    ]
+
+    return vertices, routes, carriers, n_orders_per_carrier_route, order_routes
+
+@pytest.mark.parametrize("n_sites, n_intermediates, n_orders", [
+    (10, 50, 500),
+    (50, 500, 5_000),
+])
+def test_set_orders_attributes_benchmark(n_sites, n_intermediates, n_orders):
+    vertices, routes, carriers, n_orders_per_carrier_route, order_routes = make_synthetic_dataset(
+        n_sites * SCALE, n_intermediates * SCALE, n_orders * SCALE
+    )
+
+    builder = GraphBuilder("db_connection_string")
+    builder.graph = ig.Graph(directed=True)
+    builder._build_graph_topology(vertices, routes, "Manufacturer")
+
+    start: float = time.perf_counter()
+    builder._set_orders_attributes(carriers, n_orders_per_carrier_route, order_routes)
+    elapsed: float = time.perf_counter() - start
+
+    g: ig.Graph = builder.graph
+    logger.info(f"_set_orders_attributes: {g.vcount()} vertices, {g.ecount()} edges, {len(order_routes)} route orders in {elapsed * 1000:.1f} ms")
+
+    # Every route order is attributed to its edge and to both of its endpoints
+    assert sum(g.es["n_orders"]) == len(order_routes)
+    assert sum(len(orders) for orders in g.es["orders"]) == len(order_routes)
+    assert sum(len(orders) for orders in g.vs["orders"]) == 2 * len(order_routes)
+
+    manufacturer: ig.Vertex = g.vs.find(v_id=vertices[-1].id)
+    assert manufacturer["n_orders"] == n_orders * SCALE
+    assert sum(manufacturer[N_ORDERS_BY_CARRIER_ATTR].values()) == n_orders * SCALE
+
+    for e in g.es.select(lambda e: e["n_orders"] > 0)[:20]:
+        source_v_id: int = g.vs[e.source][V_ID_ATTR]
+        dest_v_id: int = g.vs[e.target][V_ID_ATTR]
+        expected = [orr.order_id for orr in order_routes if (orr.source_id, orr.destination_id) == (source_v_id, dest_v_id)]
+        assert sorted(order["order_id"] for order in e["orders"]) == sorted(expected)
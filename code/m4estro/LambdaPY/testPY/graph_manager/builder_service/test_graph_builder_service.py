@@ -0,0 +1,50 @@
+import pytest
+import igraph as ig
+from unittest.mock import MagicMock
+
+from graph_config import GRAPH_WATERMARK_KEY
+
+from serializer.orders_overlay import OrdersOverlay
+
+from builder_service import graph_builder_service
+from builder_service.graph_builder_service import _update_graph
+
+BUCKET_NAME = "bucket"
+
+@pytest.fixture
+def lean_graph():
+    g = ig.Graph(directed=True)
+    g.add_vertices(2)
+    return g
+
+@pytest.fixture
+def stored_graph(mocker, lean_graph):
+    mocker.patch.object(graph_builder_service, "_get_s3_json", return_value={"n_vertices": 2})
+    mocker.patch.object(graph_builder_service, "GraphWatermark")
+    mocker.patch.object(graph_builder_service, "S3GraphSerializer").return_value.deserialize.return_value = lean_graph
+    return mocker.patch.object(graph_builder_service, "S3OrdersOverlaySerializer").return_value
+
+def test_update_graph_without_orders_overlay_falls_back(stored_graph):
+    stored_graph.maybe_deserialize.return_value = None
+    builder = MagicMock()
+
+    assert _update_graph(builder, BUCKET_NAME) is False
+    builder.update.assert_not_called()
+
+def test_update_graph_applies_orders_overlay(stored_graph, lean_graph):
+    overlay = MagicMock(spec=OrdersOverlay)
+    stored_graph.maybe_deserialize.return_value = overlay
+    builder = MagicMock()
+    builder.update.return_value = None
+
+    assert _update_graph(builder, BUCKET_NAME) is False
+    overlay.apply.assert_called_once_with(lean_graph)
+    assert builder.update.call_args.args[0] is lean_graph
+
+def test_update_graph_without_watermark_skips_graph_load(mocker):
+    get_json = mocker.patch.object(graph_builder_service, "_get_s3_json", return_value=None)
+    graph_serializer = mocker.patch.object(graph_builder_service, "S3GraphSerializer")
+
+    assert _update_graph(MagicMock(), BUCKET_NAME) is False
+    get_json.assert_called_once_with(BUCKET_NAME, GRAPH_WATERMARK_KEY)
+    graph_serializer.assert_not_called()
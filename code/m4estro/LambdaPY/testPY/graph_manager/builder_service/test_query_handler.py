@@ -120,3 +120,42 @@ class TestQueryHandler:
             assert isinstance(r.manufacturer_order_id, int)
             assert isinstance(r.tracking_number, str)
             assert isinstance(r.carrier_id, int)
+
+    def test_get_watermark_fingerprints_round_trip(self, seed_data, in_memory_db):
+        from builder_service.graph_watermark import GraphWatermark, WATERMARK_TABLES
+        from model.route_order import RouteOrder
+
+        qh = QueryHandler(in_memory_db)
+        watermark = qh.get_watermark()
+        assert set(watermark.fingerprints) == set(WATERMARK_TABLES)
+        assert watermark.fingerprints['route_order'].count == in_memory_db.query(RouteOrder).count()
+        assert watermark.same_applied_rows(qh.get_fingerprints(watermark))
+
+        restored = GraphWatermark.from_dict(watermark.to_dict())
+        assert restored == watermark
+        assert not GraphWatermark.from_dict({**watermark.to_dict(), 'fingerprints': {}}).same_applied_rows(watermark.fingerprints)
+
+    def test_watermark_from_older_version_never_matches(self, seed_data, in_memory_db):
+        from builder_service.graph_watermark import GraphWatermark
+
+        watermark = QueryHandler(in_memory_db).get_watermark()
+        data = watermark.to_dict()
+        del data['order_id']
+        del data['fingerprints']['order']
+
+        restored = GraphWatermark.from_dict(data)
+        assert restored.order_id == 0
+        assert not restored.same_applied_rows(watermark.fingerprints)
+
+    def test_order_fingerprint_hashes_tracking_numbers_on_postgresql(self):
+        from unittest.mock import MagicMock
+        from sqlalchemy import select
+        from sqlalchemy.dialects import postgresql
+
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "postgresql"
+
+        _, checksum = QueryHandler(session)._fingerprint_columns('order', 10)
+        sql = str(select(checksum).compile(dialect=postgresql.dialect())).lower()
+        assert "hashtext(orders.tracking_number)" in sql
+        assert "orders.carrier_id" in sql
@@ -1,5 +1,6 @@
 import os
 import sys
+import pytest
 
 PLATFORM_COMM_LAYER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../platform_comm_layer/python/'))
 if PLATFORM_COMM_LAYER_PATH not in sys.path:
@@ -11,4 +12,19 @@ if GRAPH_LAYER_PATH not in sys.path:
 
 GRAPH_MANAGER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../graph_manager/'))
 if GRAPH_MANAGER_PATH not in sys.path:
-    sys.path.insert(0, GRAPH_MANAGER_PATH)
\ No newline at end of file
+    sys.path.insert(0, GRAPH_MANAGER_PATH)
+
+# Benchmarks are opt-in, e.g. RUN_BENCHMARKS=1 python -m pytest --log-cli-level=INFO
+RUN_BENCHMARKS_KEY: str = "RUN_BENCHMARKS"
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", f"benchmark: timing benchmark, run only when {RUN_BENCHMARKS_KEY} is set")
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get(RUN_BENCHMARKS_KEY):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason=f"benchmark: set {RUN_BENCHMARKS_KEY} to run it")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
@@ -0,0 +1,211 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
+import contextlib
+
+from model.base import Base
+from model.country import Country
+from model.location import Location
+from model.site import Site
+from model.supplier import Supplier
+from model.carrier import Carrier
+from model.dispatch_time import DispatchTime
+from model.dispatch_time_gamma import DispatchTimeGamma
+from model.dispatch_time_sample import DispatchTimeSample
+from model.shipment_time import ShipmentTime
+from model.shipment_time_sample import ShipmentTimeSample
+from model.param import Param, ParamName, ParamCategory, ParamGeneralCategory
+
+from service.read_only_db_connector import ReadOnlyDBConnector
+
+from hist_service.historical_engine import HistoricalEngine, calculate_historical_lcdi
+
+from stats_utils import compute_gamma_mean, compute_gamma_ci, compute_sample_ci
+from quantile_sketch import QuantileSketch, QUANTILE_GRID
+
+#--------------------------------------------------------------
+# Setup
+#--------------------------------------------------------------
+
+@pytest.fixture(scope="function")
+def in_memory_db():
+    engine = create_engine("sqlite:///:memory:", echo=False, future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    yield SessionLocal
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def seed_data(in_memory_db):
+    session = in_memory_db()
+
+    session.add(Country(code="IT", name="Italy", total_holidays=10, weekend_start=6, weekend_end=7))
+    session.add_all([
+        Location(name="Location A", city="A", state="AA", country_code="IT", latitude=0, longitude=0),
+        Location(name="Location B", city="B", state="BB", country_code="IT", latitude=1, longitude=1),
+        Location(name="Location C", city="C", state="CC", country_code="IT", latitude=2, longitude=2),
+    ])
+    session.commit()
+
+    session.add_all([
+        Supplier(id=10, manufacturer_supplier_id=1, name="Supplier A"),
+        Supplier(id=20, manufacturer_supplier_id=2, name="Supplier B"),
+    ])
+    session.add_all([
+        Site(id=1, supplier_id=10, location_name="Location A", n_rejections=5, n_orders=100),
+        Site(id=2, supplier_id=10, location_name="Location B", n_rejections=3, n_orders=80),
+        Site(id=3, supplier_id=20, location_name="Location C", n_rejections=0, n_orders=0),
+    ])
+
+    dhl = Carrier(name="dhl", carrier_17track_id="10000", n_orders=50, n_losses=5)
+    ups = Carrier(name="ups", carrier_17track_id="30000", n_orders=0, n_losses=0)
+    session.add_all([dhl, ups])
+    session.commit()
+
+    session.add_all([DispatchTime(site_id=2, hours=h) for h in (3.0, 3.5, 3.2, 4.1)])
+    session.add_all([ShipmentTime(site_id=1, carrier=dhl, hours=h) for h in (2.5, 4.0, 3.1)])
+
+    session.add(DispatchTimeGamma(
+        id=1, site_id=1, shape=1.0, loc=0.5, scale=2.0,
+        skewness=0.1, kurtosis=3.0, mean=5.0, std_dev=1.5, n=100
+    ))
+    session.add(DispatchTimeSample(id=1, site_id=2, median=3.3, mean=3.45, std_dev=0.4, n=4))
+    session.add(ShipmentTimeSample(id=1, site_id=1, carrier=dhl, median=3.1, mean=3.2, std_dev=0.6, n=3))
+
+    session.add_all([
+        Param(
+            name=ParamName.DISPATCH_HIST_CONFIDENCE.value,
+            general_category=ParamGeneralCategory.HISTORICAL.value,
+            category=ParamCategory.DISPATCH_TIME.value,
+            value=0.95, description="Confidence level for dispatch time calculations"),
+        Param(
+            name=ParamName.SHIPMENT_HIST_CONFIDENCE.value,
+            general_category=ParamGeneralCategory.HISTORICAL.value,
+            category=ParamCategory.SHIPMENT_TIME.value,
+            value=0.9, description="Confidence level for shipment time calculations"),
+    ])
+    session.commit()
+    session.close()
+
+@pytest.fixture(scope="function")
+def session(in_memory_db, seed_data):
+    session = in_memory_db()
+    yield session
+    session.close()
+
+@pytest.fixture(scope="function")
+def patch_connector(in_memory_db, seed_data, mocker):
+    class TestConnector(ReadOnlyDBConnector):
+        def __init__(self):
+            self._SessionLocal = in_memory_db
+
+        @contextlib.contextmanager
+        def session_scope(self):
+            session = self._SessionLocal()
+            try:
+                yield session
+            finally:
+                session.close()
+
+    mocker.patch("hist_service.historical_engine.get_read_only_db_connector", return_value=TestConnector())
+
+#--------------------------------------------------------------
+# Tests
+#--------------------------------------------------------------
+
+def test_get_site_ids(session):
+    engine = HistoricalEngine(session)
+
+    assert engine.get_site_ids({}) == {1, 2}
+    assert engine.get_site_ids({"supplier": "20", "site": "1"}) == {1, 3}
+    assert engine.get_site_ids({"supplier": "99"}) == set()
+
+def test_get_carrier_ids(session):
+    engine = HistoricalEngine(session)
+
+    assert engine.get_carrier_ids({}) == {1}
+    assert engine.get_carrier_ids({"carrier_name": "UPS"}) == {2}
+
+def test_dri_and_cli(session):
+    engine = HistoricalEngine(session)
+
+    dri = engine.dri({1, 3})
+    assert [entry["indicators"]["DRI"] for entry in dri] == [pytest.approx(0.05), 0.0]
+    assert dri[0]["supplier"] == {"id": 10, "manufacturer_id": 1, "name": "Supplier A"}
+
+    cli = engine.cli({"carrier_name": "dhl,ups"})
+    assert [(entry["carrier"]["name"], entry["indicators"]["CLI"]) for entry in cli] == [("dhl", pytest.approx(0.1)), ("ups", 0.0)]
+
+def test_dispatch_time_gamma_and_sample(session):
+    body = HistoricalEngine(session).dispatch_time({1, 2})
+    assert [entry["site"]["id"] for entry in body] == [1, 2]
+
+    gamma_mean = compute_gamma_mean(shape=1.0, scale=2.0, loc=0.5)
+    l, u = compute_gamma_ci(shape=1.0, scale=2.0, loc=0.5, confidence_level=0.95)
+    assert body[0]["indicators"]["ADT"] == pytest.approx(gamma_mean)
+    assert body[0]["indicators"]["DDI"] == {"lower": pytest.approx(gamma_mean - l), "upper": pytest.approx(u - gamma_mean), "confidence": 0.95}
+
+    l, u = compute_sample_ci(x=[3.0, 3.5, 3.2, 4.1], confidence_level=0.95)
+    assert body[1]["indicators"]["ADT"] == 3.45
+    assert body[1]["indicators"]["DDI"] == {"lower": pytest.approx(3.45 - l), "upper": pytest.approx(u - 3.45), "confidence": 0.95}
+
+def test_shipment_time_sample(session):
+    body = HistoricalEngine(session).shipment_time({1}, {1})
+    assert len(body) == 1
+    assert body[0]["carrier"] == {"id": 1, "name": "dhl"}
+
+    l, u = compute_sample_ci(x=[2.5, 4.0, 3.1], confidence_level=0.9)
+    assert body[0]["indicators"]["AST"] == 3.2
+    assert body[0]["indicators"]["CTDI"] == {"lower": pytest.approx(3.2 - l), "upper": pytest.approx(u - 3.2), "confidence": 0.9}
+
+def test_empty_selections_skip_queries():
+    session = MagicMock()
+    engine = HistoricalEngine(session)
+
+    assert engine.dri(set()) == []
+    assert engine.dispatch_time(set()) == []
+    assert engine.shipment_time({1}, set()) == []
+    session.query.assert_not_called()
+
+def test_dispatch_time_uses_stored_quantile_sketch(session):
+    sample = session.get(DispatchTimeSample, 1)
+    sample.quantiles = QuantileSketch.from_sample([1.0, 2.0, 6.0]).to_list()
+    sample.quantiles_n = sample.n
+    session.commit()
+
+    body = HistoricalEngine(session).dispatch_time({2})
+
+    l, u = compute_sample_ci(x=[1.0, 2.0, 6.0], confidence_level=0.95)
+    assert body[0]["indicators"]["DDI"] == {"lower": pytest.approx(3.45 - l), "upper": pytest.approx(u - 3.45), "confidence": 0.95}
+
+def test_dispatch_time_ignores_stale_quantile_sketch(session):
+    expected = HistoricalEngine(session).dispatch_time({2})
+
+    sample = session.get(DispatchTimeSample, 1)
+    sample.quantiles = QuantileSketch.from_sample([1.0, 2.0, 6.0]).to_list()
+    sample.quantiles_n = sample.n - 1
+    session.commit()
+
+    assert HistoricalEngine(session).dispatch_time({2}) == expected
+
+def test_raw_sketches_use_percentile_cont_on_postgresql():
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [(2, 4, [3.0] * len(QUANTILE_GRID))]
+
+    sketches = HistoricalEngine(session)._get_raw_sketches([DispatchTime.site_id], DispatchTime.hours, {(2,)}, "dispatch_times")
+    assert sketches == {(2,): [3.0] * len(QUANTILE_GRID)}
+
+    columns = session.query.call_args.args
+    sql = str(select(*columns).compile(dialect=postgresql.dialect())).lower()
+    assert "within group (order by dispatch_times.hours)" in sql
+
+@pytest.mark.usefixtures("patch_connector")
+def test_calculate_historical_lcdi_aggregates_all_families():
+    body = calculate_historical_lcdi({"site": "1"})
+
+    assert len(body) == 1
+    assert body[0]["site"]["id"] == 1
+    assert body[0]["indicators"]["DRI"] == pytest.approx(0.05)
@@ -0,0 +1,162 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
+import contextlib
+
+from model.base import Base
+from model.country import Country
+from model.location import Location
+from model.site import Site
+from model.supplier import Supplier
+from model.carrier import Carrier
+from model.dispatch_time import DispatchTime
+from model.dispatch_time_sample import DispatchTimeSample
+from model.shipment_time import ShipmentTime
+from model.shipment_time_sample import ShipmentTimeSample
+
+from service.db_connector import DBConnector
+
+from hist_service.quantile_sketch_writer import QuantileSketchWriter, write_quantile_sketches
+
+from quantile_sketch import QuantileSketch, QUANTILE_GRID
+from stats_utils import compute_sample_ci
+
+#--------------------------------------------------------------
+# Setup
+#--------------------------------------------------------------
+
+DISPATCH_HOURS = [3.0, 3.5, 3.2, 4.1]
+SHIPMENT_HOURS = [2.5, 4.0, 3.1]
+
+@pytest.fixture(scope="function")
+def in_memory_db():
+    engine = create_engine("sqlite:///:memory:", echo=False, future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    yield SessionLocal
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def seed_data(in_memory_db):
+    session = in_memory_db()
+
+    session.add(Country(code="IT", name="Italy", total_holidays=10, weekend_start=6, weekend_end=7))
+    session.add_all([
+        Location(name="Location A", city="A", state="AA", country_code="IT", latitude=0, longitude=0),
+        Location(name="Location B", city="B", state="BB", country_code="IT", latitude=1, longitude=1),
+    ])
+    session.commit()
+
+    session.add(Supplier(id=10, manufacturer_supplier_id=1, name="Supplier A"))
+    session.add_all([
+        Site(id=1, supplier_id=10, location_name="Location A", n_rejections=0, n_orders=10),
+        Site(id=2, supplier_id=10, location_name="Location B", n_rejections=0, n_orders=10),
+    ])
+    dhl = Carrier(name="dhl", carrier_17track_id="10000", n_orders=10, n_losses=0)
+    session.add(dhl)
+    session.commit()
+
+    session.add_all([DispatchTime(site_id=2, hours=h) for h in DISPATCH_HOURS])
+    session.add_all([DispatchTime(site_id=1, hours=h) for h in (1.0, 2.0)])
+    session.add_all([ShipmentTime(site_id=1, carrier=dhl, hours=h) for h in SHIPMENT_HOURS])
+
+    session.add(DispatchTimeSample(id=1, site_id=2, median=3.35, mean=3.45, std_dev=0.4, n=4))
+    session.add(DispatchTimeSample(id=2, site_id=1, median=1.5, mean=1.5, std_dev=0.7, n=2, quantiles=[0.0] * len(QUANTILE_GRID), quantiles_n=2))
+    session.add(ShipmentTimeSample(id=1, site_id=1, carrier=dhl, median=3.1, mean=3.2, std_dev=0.6, n=3))
+    session.commit()
+    session.close()
+
+@pytest.fixture(scope="function")
+def session(in_memory_db, seed_data):
+    session = in_memory_db()
+    yield session
+    session.close()
+
+#--------------------------------------------------------------
+# Tests
+#--------------------------------------------------------------
+
+def test_writes_missing_sketches_only(session):
+    writer = QuantileSketchWriter(session)
+
+    assert writer.dispatch_time() == 1
+    assert writer.shipment_time() == 1
+    session.commit()
+
+    dispatch_quantiles = session.get(DispatchTimeSample, 1).quantiles
+    assert np.allclose(dispatch_quantiles, np.percentile(DISPATCH_HOURS, QUANTILE_GRID * 100))
+    assert session.get(DispatchTimeSample, 2).quantiles == [0.0] * len(QUANTILE_GRID)
+
+    shipment_quantiles = session.get(ShipmentTimeSample, 1).quantiles
+    assert shipment_quantiles == QuantileSketch.from_sample(SHIPMENT_HOURS).to_list()
+
+    assert session.get(DispatchTimeSample, 1).quantiles_n == len(DISPATCH_HOURS)
+    assert session.get(ShipmentTimeSample, 1).quantiles_n == len(SHIPMENT_HOURS)
+
+def test_rewrites_stale_sketches(session):
+    writer = QuantileSketchWriter(session)
+    writer.dispatch_time()
+
+    session.add(DispatchTime(site_id=1, hours=6.0))
+    session.get(DispatchTimeSample, 2).n = 3
+    session.commit()
+
+    assert writer.dispatch_time() == 1
+    sample = session.get(DispatchTimeSample, 2)
+    assert sample.quantiles_n == 3
+    assert np.allclose(sample.quantiles, np.percentile([1.0, 2.0, 6.0], QUANTILE_GRID * 100))
+
+def test_written_sketch_gives_raw_sample_ci(session):
+    QuantileSketchWriter(session).dispatch_time()
+
+    quantiles = session.get(DispatchTimeSample, 1).quantiles
+    assert np.allclose(compute_sample_ci(x=quantiles, confidence_level=0.95), compute_sample_ci(x=DISPATCH_HOURS, confidence_level=0.95))
+
+def test_refresh_rewrites_all_sketches(session):
+    assert QuantileSketchWriter(session).dispatch_time(refresh=True) == 2
+
+    assert np.allclose(session.get(DispatchTimeSample, 2).quantiles, np.percentile([1.0, 2.0], QUANTILE_GRID * 100))
+
+def test_second_write_has_nothing_to_write(session):
+    writer = QuantileSketchWriter(session)
+    writer.dispatch_time()
+
+    assert writer.dispatch_time() == 0
+
+def test_sketches_use_percentile_cont_on_postgresql():
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [(2, 4, [3.0] * len(QUANTILE_GRID))]
+
+    sketches = QuantileSketchWriter(session).get_sketches([DispatchTime.site_id], DispatchTime.hours, {(2,)})
+    assert sketches == {(2,): QuantileSketch.from_list(4, [3.0] * len(QUANTILE_GRID))}
+
+    columns = session.query.call_args.args
+    sql = str(select(*columns).compile(dialect=postgresql.dialect())).lower()
+    assert sql.count("percentile_cont(array[") == 1
+    assert "within group (order by dispatch_times.hours)" in sql
+
+def test_write_quantile_sketches_commits(in_memory_db, seed_data, mocker):
+    class TestConnector(DBConnector):
+        def __init__(self):
+            self._SessionLocal = in_memory_db
+
+        @contextlib.contextmanager
+        def session_scope(self):
+            session = self._SessionLocal()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+    mocker.patch("hist_service.quantile_sketch_writer.get_db_connector", return_value=TestConnector())
+
+    assert write_quantile_sketches() == {"dispatch_time_samples": 1, "shipment_time_samples": 1}
+
+    session = in_memory_db()
+    assert session.get(DispatchTimeSample, 1).quantiles is not None
+    session.close()
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import json
 from historical_lcdi_handler import app, HISTORICAL_BASE_PATH
 
@@ -92,35 +92,30 @@ def test_get_shipment_time_internal_error(base_query):
 
 # Historical LCDI
 def test_get_historical_lcdi_success(base_query):
-    dispatch = [{"dispatch": 1}]
-    shipment = [{"shipment": 2}]
-    dri = [{"dri": 3}]
-    cli = [{"cli": 4}]
     aggregated = [{"lcdi": "ok"}]
 
-    with patch("historical_lcdi_handler.calculate_dispatch_time", return_value=dispatch), \
-         patch("historical_lcdi_handler.calculate_shipment_time", return_value=shipment), \
-         patch("historical_lcdi_handler.calculate_dri", return_value=dri), \
-         patch("historical_lcdi_handler.calculate_cli", return_value=cli), \
-         patch("historical_lcdi_handler.HistoricalLCDIAggregator") as mock_agg:
-
-        instance = MagicMock()
-        instance.aggregate.return_value = aggregated
-        mock_agg.return_value = instance
-
+    with patch("historical_lcdi_handler.calculate_historical_lcdi", return_value=aggregated) as mock_calculate:
         event = build_event(f"{HISTORICAL_BASE_PATH}", query=base_query)
         response = app.resolve(event, None)     # type: ignore
         assert response["statusCode"] == 200
         assert json.loads(response["body"]) == aggregated
+        mock_calculate.assert_called_once()
 
 
 def test_get_historical_lcdi_internal_error(base_query):
-    with patch("historical_lcdi_handler.calculate_dispatch_time", side_effect=Exception("boom")), \
-         patch("historical_lcdi_handler.calculate_shipment_time", side_effect=Exception("boom")), \
-         patch("historical_lcdi_handler.calculate_dri", side_effect=Exception("boom")), \
-         patch("historical_lcdi_handler.calculate_cli", side_effect=Exception("boom")):
-
+    with patch("historical_lcdi_handler.calculate_historical_lcdi", side_effect=Exception("boom")):
         event = build_event(f"{HISTORICAL_BASE_PATH}", query=base_query)
         response = app.resolve(event, None)     # type: ignore
         assert response["statusCode"] == 500
         assert "boom" in response["body"].lower()
+
+
+# Quantile sketches
+def test_post_quantile_sketches_success():
+    written = {"dispatch_time_samples": 2, "shipment_time_samples": 3}
+    with patch("historical_lcdi_handler.write_quantile_sketches", return_value=written) as mock_write:
+        event = build_event(f"{HISTORICAL_BASE_PATH}/quantiles", method="POST", query={"refresh": "true"})
+        response = app.resolve(event, None)     # type: ignore
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"]) == written
+        mock_write.assert_called_once_with(refresh=True)
@@ -21,6 +21,22 @@ def test_success_response():
     assert response.headers["Content-Type"] == "application/json"
 
 
+def test_ndjson_response():
+    response = rs.ndjson_response(iter([json.dumps({"id": 1}), json.dumps({"id": 2})]))
+
+    assert response.status_code == 200
+    assert response.body == '{"id": 1}\n{"id": 2}\n'
+    assert response.headers["Content-Type"] == rs.NDJSON_CONTENT_TYPE
+    assert rs.NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_ndjson_response_with_next_cursor():
+    response = rs.ndjson_response([json.dumps({"id": 1})], maybe_next_cursor=1)
+
+    assert response.headers[rs.NEXT_CURSOR_HEADER] == "1"
+    assert response.headers["Access-Control-Expose-Headers"] == rs.NEXT_CURSOR_HEADER
+
+
 def test_created_response_with_data():
     location = "/resources/123"
     data = {"id": 123}
@@ -0,0 +1,36 @@
+import pytest
+from pydantic import ValidationError
+
+from utils.parsing import parse_as
+
+from api.dto.carrier_dto import CarrierIdDTO, CarrierNameDTO
+from api.dto.vertex_estimation.carrier_matrix_request import CarrierMatrixRequestDTO
+
+def make_payload(**overrides):
+    base = {
+        "vertex": {
+            "vertexName": "vertex1",
+            "vertexType": "intermediate"
+        },
+        "carriers": [{"carrierName": "carrier1"}, {"carrierId": 7}],
+        "site": {
+            "siteId": 12345
+        },
+        "orderTime": "2025-06-27T10:00:00Z",
+        "eventTime": "2025-06-27T10:30:00Z",
+        "estimationTime": "2025-06-27T11:00:00Z",
+    }
+    base.update(overrides)
+    return base
+
+def test_carrier_matrix_request_accepts_mixed_carrier_descriptors():
+    dto = parse_as(CarrierMatrixRequestDTO, make_payload())
+
+    assert isinstance(dto.carriers[0], CarrierNameDTO)
+    assert isinstance(dto.carriers[1], CarrierIdDTO)
+    assert dto.site.site_id == 12345
+    assert dto.maybe_shipment_time is None
+
+def test_carrier_matrix_request_rejects_no_carriers():
+    with pytest.raises(ValidationError):
+        parse_as(CarrierMatrixRequestDTO, make_payload(carriers=[]))
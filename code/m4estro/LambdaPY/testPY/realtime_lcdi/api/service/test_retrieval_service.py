@@ -1,9 +1,17 @@
 import pytest
+import json
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
-from api.service.retrieval_service import get_realtime_lcdi_by_order
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.dialects import postgresql
+
+from api.service import retrieval_service
+from api.service.retrieval_service import get_realtime_lcdi_by_order, get_realtime_lcdi_page, get_realtime_lcdi_ndjson_page
 from api.service.retrieval_service import RealtimeQParamKeys
+from api.exception.bad_pagination_exception import BadPaginationException
 
 from model.order import OrderStatus
 from model.order import Order
@@ -16,6 +24,7 @@ from model.supplier import Supplier
 from model.time_deviation import TimeDeviation
 from model.alpha import Alpha
 from model.estimated_time import EstimatedTime
+from model.latest_estimated_time import LatestEstimatedTime
 from model.estimation_params import EstimationParams
 
 @pytest.fixture
@@ -103,7 +112,7 @@ def test_get_realtime_lcdi_with_single_order(mock_formatter_cls, mock_get_db_con
     mock_get_db_connector.return_value = mock_connector
 
     # Provide one order's worth of data
-    mock_session.query.return_value.options.return_value.filter.return_value.all.return_value = [fake_estimated_time]
+    mock_session.query.return_value.options.return_value.filter.return_value.order_by.return_value.all.return_value = [fake_estimated_time]
     
     mock_formatter = MagicMock()
     mock_formatter_cls.return_value = mock_formatter
@@ -116,3 +125,136 @@ def test_get_realtime_lcdi_with_single_order(mock_formatter_cls, mock_get_db_con
     assert result == {"formatted": "data"}
     mock_formatter.format_et_by_order.assert_called_once()
     mock_session.query.assert_called()
+
+
+def test_latest_only_query_reads_projection():
+    query = retrieval_service._build_estimated_times_query(Session(), {1, 2}, latest_only=True)
+    sql = str(query.statement.compile(dialect=postgresql.dialect())).upper()
+
+    assert "JOIN LATEST_ESTIMATED_TIMES ON LATEST_ESTIMATED_TIMES.ESTIMATED_TIME_ID = ESTIMATED_TIMES.ID" in sql
+
+
+def test_full_history_query_does_not_read_projection():
+    query = retrieval_service._build_estimated_times_query(Session(), set(), latest_only=False)
+    sql = str(query.statement.compile(dialect=postgresql.dialect())).upper()
+
+    assert "LATEST_ESTIMATED_TIMES" not in sql
+    assert "ORDER BY ESTIMATED_TIMES.ORDER_ID, ESTIMATED_TIMES.ESTIMATION_TIME" in sql
+
+
+@patch("api.service.retrieval_service.get_read_only_db_connector")
+def test_get_latest_lcdi(mock_get_db_connector):
+    engine = create_engine("sqlite:///:memory:")
+    LatestEstimatedTime.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for order_id in (1, 2, 3):
+        session.add(LatestEstimatedTime(
+            order_id=order_id, estimated_time_id=10 + order_id, vertex_id=5,
+            estimation_time=datetime(2025, 7, 1), status="IN_TRANSIT",
+            EODT=float(order_id), EDD=datetime(2025, 7, order_id + 1)
+        ))
+    session.commit()
+    mock_get_db_connector.return_value.session_scope.return_value.__enter__.return_value = session
+
+    data = retrieval_service.get_latest_lcdi({RealtimeQParamKeys.ORDER.value: "1,3,4"})
+
+    assert [d["order_id"] for d in data] == [1, 3]
+    assert data[1] == {
+        "order_id": 3,
+        "estimated_time_id": 13,
+        "vertex_id": 5,
+        "estimation_time": "2025-07-01T00:00:00",
+        "status": "IN_TRANSIT",
+        "EODT": 3.0,
+        "EDD": "2025-07-04T00:00:00",
+    }
+
+
+@pytest.mark.parametrize("q_params", [
+    {RealtimeQParamKeys.LIMIT.value: "0"},
+    {RealtimeQParamKeys.LIMIT.value: "abc"},
+    {RealtimeQParamKeys.LIMIT.value: str(retrieval_service.MAX_PAGE_SIZE + 1)},
+    {RealtimeQParamKeys.AFTER.value: "-1"},
+])
+def test_parse_retrieval_params_rejects_bad_pagination(q_params):
+    with pytest.raises(BadPaginationException):
+        retrieval_service.parse_retrieval_params(q_params)
+
+
+@pytest.fixture
+def fake_store(monkeypatch):
+    """Estimates of orders 1..7, two per order, served by the keyset queries without a database."""
+    ets = [SimpleNamespace(order_id=order_id, estimation_time=i) for order_id in range(1, 8) for i in range(2)]
+    order_id_queries = []
+
+    def query_order_ids_page(session, params, maybe_after, limit):
+        order_id_queries.append((maybe_after, limit))
+        order_ids = sorted({et.order_id for et in ets if maybe_after is None or et.order_id > maybe_after})
+        return order_ids[:limit]
+
+    def query_estimated_times(session, order_ids, latest_only):
+        selected = [et for et in ets if et.order_id in order_ids]
+        if latest_only:
+            selected = [et for et in selected if et.estimation_time == 1]
+        return selected
+
+    connector = MagicMock()
+    monkeypatch.setattr(retrieval_service, "get_read_only_db_connector", lambda: connector)
+    monkeypatch.setattr(retrieval_service, "_query_order_ids_page", query_order_ids_page)
+    monkeypatch.setattr(retrieval_service, "_query_estimated_times", query_estimated_times)
+    monkeypatch.setattr(retrieval_service, "_format_order",
+                        lambda formatter, order_id, ets: {"order_id": order_id, "n": len(ets)})
+    return order_id_queries
+
+
+def test_get_realtime_lcdi_page_walks_orders_with_cursor(fake_store):
+    first = get_realtime_lcdi_page({RealtimeQParamKeys.LIMIT.value: "3"})
+    assert [d["order_id"] for d in first.data] == [1, 2, 3]
+    assert all(d["n"] == 2 for d in first.data)
+    assert first.maybe_next_cursor == 3
+
+    last = get_realtime_lcdi_page({
+        RealtimeQParamKeys.LIMIT.value: "4",
+        RealtimeQParamKeys.AFTER.value: str(first.maybe_next_cursor)
+    })
+    assert [d["order_id"] for d in last.data] == [4, 5, 6, 7]
+    assert last.maybe_next_cursor is None
+    assert last.to_dict() == {"data": last.data, "next_cursor": None}
+
+
+def test_get_realtime_lcdi_page_latest_only(fake_store):
+    page = get_realtime_lcdi_page({RealtimeQParamKeys.LIMIT.value: "2", RealtimeQParamKeys.LATEST.value: "true"})
+    assert page.data == [{"order_id": 1, "n": 1}, {"order_id": 2, "n": 1}]
+
+
+def test_get_realtime_lcdi_ndjson_page_loads_one_chunk_at_a_time(fake_store, monkeypatch):
+    monkeypatch.setattr(retrieval_service, "EXPORT_PAGE_SIZE", 3)
+
+    page = get_realtime_lcdi_ndjson_page({})
+
+    assert [json.loads(line)["order_id"] for line in page.lines] == [1, 2, 3, 4, 5, 6, 7]
+    assert page.maybe_next_cursor is None
+    assert fake_store == [(None, 3), (3, 3), (6, 3)]
+
+
+def test_get_realtime_lcdi_ndjson_page_respects_limit(fake_store, monkeypatch):
+    monkeypatch.setattr(retrieval_service, "EXPORT_PAGE_SIZE", 3)
+
+    page = get_realtime_lcdi_ndjson_page({RealtimeQParamKeys.LIMIT.value: "4", RealtimeQParamKeys.AFTER.value: "1"})
+
+    assert [json.loads(line)["order_id"] for line in page.lines] == [2, 3, 4, 5]
+    assert page.maybe_next_cursor == 5
+    assert fake_store == [(1, 3), (4, 2)]
+
+
+def test_get_realtime_lcdi_ndjson_page_is_bounded_by_default(fake_store, monkeypatch):
+    monkeypatch.setattr(retrieval_service, "EXPORT_PAGE_SIZE", 3)
+    monkeypatch.setattr(retrieval_service, "MAX_PAGE_SIZE", 5)
+
+    first = get_realtime_lcdi_ndjson_page({})
+    assert [json.loads(line)["order_id"] for line in first.lines] == [1, 2, 3, 4, 5]
+    assert first.maybe_next_cursor == 5
+
+    last = get_realtime_lcdi_ndjson_page({RealtimeQParamKeys.AFTER.value: str(first.maybe_next_cursor)})
+    assert [json.loads(line)["order_id"] for line in last.lines] == [6, 7]
+    assert last.maybe_next_cursor is None
@@ -8,6 +8,7 @@ from aws_lambda_powertools.event_handler.api_gateway import APIGatewayRestResolv
 
 from graph_config import V_ID_ATTR
 from api.route.realtime_lcdi_route import register_routes, REALTIME_LCDI_PATH
+from api.service.retrieval_service import RetrievalPage, NDJSONPage
 from api.dto.order_estimation.order_estimation_response import OrderEstimationStatus
 from resolver.vertex_not_found_exception import VertexNotFoundException
 from core.exception.invalid_time_sequence_exception import InvalidTimeSequenceException
@@ -77,6 +78,46 @@ def test_handle_retrieve_realtime_lcdi_internal_error(app):
         assert response["statusCode"] == 500
 
 
+def test_handle_retrieve_realtime_lcdi_page(app):
+    page = RetrievalPage(data=[{"order_id": 1}], maybe_next_cursor=1)
+    with patch("api.route.realtime_lcdi_route.get_realtime_lcdi_page", return_value=page) as mock_page:
+        event = make_event(REALTIME_LCDI_PATH, query_params={"limit": "1", "latest": "true"})
+        response = app.resolve(event, LambdaContext())
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == {"data": [{"order_id": 1}], "next_cursor": 1}
+    mock_page.assert_called_once_with({"limit": "1", "latest": "true"})
+
+
+def test_handle_retrieve_realtime_lcdi_ndjson(app):
+    page = NDJSONPage(lines=[json.dumps({"order_id": 1}), json.dumps({"order_id": 2})], maybe_next_cursor=2)
+    with patch("api.route.realtime_lcdi_route.get_realtime_lcdi_ndjson_page", return_value=page):
+        event = make_event(REALTIME_LCDI_PATH, query_params={"format": "ndjson"})
+        response = app.resolve(event, LambdaContext())
+
+    assert response["statusCode"] == 200
+    assert response["multiValueHeaders"]["Content-Type"] == ["application/x-ndjson"]
+    assert response["multiValueHeaders"]["X-Next-Cursor"] == ["2"]
+    assert [json.loads(line) for line in response["body"].splitlines()] == [{"order_id": 1}, {"order_id": 2}]
+
+
+def test_handle_retrieve_latest_realtime_lcdi(app):
+    latest = [{"order_id": 1, "EDD": "2025-07-02T00:00:00"}]
+    with patch("api.route.realtime_lcdi_route.get_latest_lcdi", return_value=latest) as mock_latest:
+        event = make_event(f"{REALTIME_LCDI_PATH}/latest", query_params={"order": "1", "format": "ndjson"})
+        response = app.resolve(event, LambdaContext())
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == latest
+    mock_latest.assert_called_once_with({"order": "1"})
+
+
+def test_handle_retrieve_realtime_lcdi_bad_pagination(app):
+    event = make_event(REALTIME_LCDI_PATH, query_params={"limit": "zero"})
+    response = app.resolve(event, LambdaContext())
+    assert response["statusCode"] == 400
+
+
 # --------------------------------------------------------------
 # Tests POST /lcdi/realtime
 # --------------------------------------------------------------
@@ -88,7 +129,7 @@ def test_handle_compute_realtime_lcdi_single_created(app):
         "event_time": "2023-10-01T12:00:00Z"
     }
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", return_value={"id": 123, "data": "some data"}) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", side_effect=lambda inputs, **kwargs: [{"id": 123, "data": "some data"}] * len(inputs)) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -125,7 +166,7 @@ def test_handle_compute_realtime_lcdi_list_single_created(app):
         "event_time": "2023-10-01T12:00:00Z"
     }]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", return_value={"id": 123, "data": "some data"}) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", side_effect=lambda inputs, **kwargs: [{"id": 123, "data": "some data"}] * len(inputs)) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -162,7 +203,7 @@ def test_handle_compute_realtime_lcdi_list_created(app):
         {"vertex": {"vertexName": "test_name1", "vertexType": "INTERMEDIATE"}, "order_id": 1025, "event_time": "2023-10-01T12:10:00Z", "estimation_time": "2023-10-01T12:11:00Z"}
     ]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", return_value={"id": 123, "data": "some data"}) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", side_effect=lambda inputs, **kwargs: [{"id": 123, "data": "some data"}] * len(inputs)) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -190,7 +231,8 @@ def test_handle_compute_realtime_lcdi_list_created(app):
             assert item["id"] == 123
             assert item["location"].endswith("/123")
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
 
 
 def test_handle_compute_realtime_lcdi_single_error(app):
@@ -200,7 +242,7 @@ def test_handle_compute_realtime_lcdi_single_error(app):
         "event_time": "2023-10-01T12:00:00Z"
     }
          
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=Exception("boom")) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", side_effect=Exception("boom")) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -241,7 +283,7 @@ def test_handle_compute_realtime_lcdi_multiple_partial_error(app):
         Exception("failed")
     ]
     
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=side_effects) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", return_value=side_effects) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -273,7 +315,8 @@ def test_handle_compute_realtime_lcdi_multiple_partial_error(app):
         assert "message" in body[1]
         assert "message" in body[2]
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
 
 
 def test_handle_compute_realtime_lcdi_multiple_only_errors(app):
@@ -283,7 +326,7 @@ def test_handle_compute_realtime_lcdi_multiple_only_errors(app):
         {"vertex": {"vertexName": "test_name1"}, "order_id": 1025, "event_time": "2023-10-01T12:10:00Z"}
     ]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=Exception("boom")) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", side_effect=Exception("boom")) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -308,7 +351,8 @@ def test_handle_compute_realtime_lcdi_multiple_only_errors(app):
         body = json.loads(response["body"])
         assert "message" in body
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
 
 
 def test_handle_compute_realtime_lcdi_single_failed(app):
@@ -360,7 +404,7 @@ def test_handle_compute_realtime_lcdi_multiple_partial_failed(app):
         ProbPathException("Path extraction failed")
     ]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=side_effects) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", return_value=side_effects) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -394,7 +438,8 @@ def test_handle_compute_realtime_lcdi_multiple_partial_failed(app):
         assert "message" in body[2]
         assert "Path extraction failed" in body[2]["message"]
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
 
 
 def test_handle_compute_realtime_lcdi_multiple_only_failed(app):
@@ -414,7 +459,7 @@ def test_handle_compute_realtime_lcdi_multiple_only_failed(app):
         VertexNotFoundException("Vertex 3 not found")
     ]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=side_effects) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", return_value=side_effects) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -447,7 +492,8 @@ def test_handle_compute_realtime_lcdi_multiple_only_failed(app):
         assert "message" in body_list[1]
         assert "message" in body_list[2]
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
 
 
 def test_handle_compute_realtime_lcdi_multiple_mixed_errors_and_failures(app):
@@ -467,7 +513,7 @@ def test_handle_compute_realtime_lcdi_multiple_mixed_errors_and_failures(app):
                                      datetime(2023, 10, 1, 12, 11, tzinfo=timezone.utc)),
     ]
 
-    with patch("api.route.realtime_lcdi_route.compute_order_realtime_lcdi", side_effect=side_effects) as mock_compute, \
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", return_value=side_effects) as mock_compute, \
          patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
          patch("api.route.realtime_lcdi_route.BucketDataLoader") as MockBucketLoader, \
          patch("boto3.client") as mock_boto3_client:
@@ -496,7 +542,40 @@ def test_handle_compute_realtime_lcdi_multiple_mixed_errors_and_failures(app):
         assert body[1]["status"] == OrderEstimationStatus.ERROR.value
         assert body[2]["status"] == OrderEstimationStatus.FAILED.value
 
-        assert mock_compute.call_count == 3
+        mock_compute.assert_called_once()
+        assert len(mock_compute.call_args.args[0]) == 3
+
+
+def test_handle_compute_realtime_lcdi_multiple_unresolved_vertex_is_not_estimated(app):
+    multiple_requests = [
+        {"vertex": {"vertex_id": 1}, "order_id": 1023, "event_time": "2023-10-01T12:00:00Z"},
+        {"vertex": {"vertexName": "unknown"}, "order_id": 1024, "event_time": "2023-10-01T12:05:00Z"},
+        {"vertex": {"vertexName": "test_name1"}, "order_id": 1025, "event_time": "2023-10-01T12:10:00Z"}
+    ]
+
+    with patch("api.route.realtime_lcdi_route.compute_orders_realtime_lcdi", return_value=[{"id": 100}, {"id": 101}]) as mock_compute, \
+         patch("api.route.realtime_lcdi_route.SCGraphResolver") as MockResolver, \
+         patch("api.route.realtime_lcdi_route.BucketDataLoader"), \
+         patch("boto3.client"):
+
+        mock_resolver_instance = MagicMock()
+        mock_resolver_instance.resolve.side_effect = [FAKE_VERTEX_RESULT, VertexNotFoundException("Vertex not found"), FAKE_VERTEX_RESULT]
+        MockResolver.return_value = mock_resolver_instance
+
+        event = make_event(REALTIME_LCDI_PATH, method="POST", body=multiple_requests)
+        response = app.resolve(event, LambdaContext())
+
+        assert response["statusCode"] == 207
+
+        body = json.loads(response["body"])
+        assert [item["status"] for item in body] == [
+            OrderEstimationStatus.CREATED.value, OrderEstimationStatus.FAILED.value, OrderEstimationStatus.CREATED.value
+        ]
+        assert body[0]["id"] == 100
+        assert body[2]["id"] == 101
+
+        mock_compute.assert_called_once()
+        assert [i.order_id for i in mock_compute.call_args.args[0]] == [1023, 1025]
 
 
 def test_handle_compute_realtime_lcdi_bad_request(app):
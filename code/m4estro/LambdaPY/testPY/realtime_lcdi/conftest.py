@@ -27,4 +27,8 @@ def set_env_vars(monkeypatch):
     monkeypatch.setenv("SC_GRAPH_BUCKET", "mock-sc-graph-bucket-name")
     monkeypatch.setenv("RECONFIGURATION_QUEUE_URL", "https://dummy.queue")
     monkeypatch.setenv("ROUTE_TIME_ESTIMATOR_MODEL_KEY", "rt_estimator_xgboost.json")
-    monkeypatch.setenv("RT_ESTIMATOR_LAMBDA_ARN", "mock-rt-estimator-lambda-arn")
\ No newline at end of file
+    monkeypatch.setenv("RT_ESTIMATOR_LAMBDA_ARN", "mock-rt-estimator-lambda-arn")
+
+@pytest.fixture(autouse=True)
+def isolate_s3_local_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr("serializer.s3_transfer.LOCAL_CACHE_DIR", str(tmp_path / "s3_object_cache"))
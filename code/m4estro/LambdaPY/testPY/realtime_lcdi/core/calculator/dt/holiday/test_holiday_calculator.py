@@ -345,3 +345,86 @@ def test_holiday_calculation_no_holidays_found(in_memory_session):
     assert result.weekend_holidays == []
     assert result.working_holidays == []
 
+
+def test_holiday_calculation_extends_window_for_dense_holidays(populated_session):
+    country = populated_session.query(Country).filter(Country.code == "XX").one()
+    dense_holidays = [
+        Holiday(
+            name=f"Closure {day}",
+            date=date(2025, 1, day),
+            country=country,
+            country_code="XX",
+            category=HolidayCategory.CLOSURE,
+            type="NATIONAL",
+            description=None,
+            week_day=date(2025, 1, day).isoweekday(),
+            month=1,
+            year_day=day,
+            url=None
+        )
+        for day in range(1, 15)
+    ]
+    populated_session.add_all(dense_holidays)
+    populated_session.commit()
+
+    fake_connector = FakeReadOnlyDBConnector(populated_session)
+    calculator = HolidayCalculator(
+        consider_closure_holidays=True,
+        consider_weekends_holidays=True,
+        consider_working_holidays=True,
+        maybe_ro_db_connector=fake_connector,
+        maybe_days_window=1
+    )
+
+    holiday_input = HolidayADTInputDTO(
+        start_time=datetime(2024, 12, 30),
+        adt=24 * 3,  # 3 days
+        site_id=1,
+    )
+
+    result = calculator.calculate(holiday_input)
+
+    closure_dates = {h.date for h in result.closure_holidays}
+    weekend_dates = {h.date for h in result.weekend_holidays}
+
+    assert closure_dates == {date(2025, 1, day) for day in range(1, 15)}
+    assert weekend_dates == set()                        # Weekends in the window are closure holidays
+    assert result.n_closure_days == 14                   # Working days: Dec 30, Dec 31, Jan 15
+
+
+def test_holiday_calculation_reuses_site_calendar(populated_session):
+    fake_connector = FakeReadOnlyDBConnector(populated_session)
+    calculator = HolidayCalculator(
+        consider_closure_holidays=True,
+        consider_weekends_holidays=True,
+        consider_working_holidays=True,
+        maybe_ro_db_connector=fake_connector,
+        maybe_days_window=10
+    )
+
+    calculator.calculate(HolidayPeriodInputDTO(start_time=datetime(2024, 12, 18), end_time=datetime(2024, 12, 20), site_id=1))
+    
+    fake_connector.session_scope = None  # type: ignore
+    result = calculator.calculate(HolidayADTInputDTO(start_time=datetime(2024, 12, 20), adt=24 * 5, site_id=1))
+
+    assert {h.date for h in result.closure_holidays} == {date(2024, 12, 25)}
+
+
+def test_holiday_calculation_reloads_expired_site_calendar(populated_session):
+    fake_connector = FakeReadOnlyDBConnector(populated_session)
+    calculator = HolidayCalculator(
+        consider_closure_holidays=True,
+        consider_weekends_holidays=True,
+        consider_working_holidays=True,
+        maybe_ro_db_connector=fake_connector,
+        maybe_days_window=10,
+        maybe_calendar_ttl_seconds=0
+    )
+
+    holiday_input = HolidayPeriodInputDTO(start_time=datetime(2024, 12, 18), end_time=datetime(2024, 12, 26), site_id=1)
+    assert {h.date for h in calculator.calculate(holiday_input).closure_holidays} == {date(2024, 12, 25)}
+
+    populated_session.delete(populated_session.query(Holiday).filter(Holiday.name == "Christmas").one())
+    populated_session.commit()
+
+    assert calculator.calculate(holiday_input).closure_holidays == []
@@ -0,0 +1,102 @@
+import pytest
+import random
+from datetime import date, timedelta
+
+from core.calculator.dt.holiday.working_calendar import WorkingCalendar
+
+
+def _is_working_day(d: date, weekend_days, closure_dates, working_dates) -> bool:
+    if d in closure_dates:
+        return False
+    if d in working_dates:
+        return True
+    return d.isoweekday() not in weekend_days
+
+
+def _brute_force_offset(start: date, n: int, weekend_days, closure_dates, working_dates) -> date:
+    d: date = start
+    while True:
+        if _is_working_day(d, weekend_days, closure_dates, working_dates):
+            n -= 1
+            if n == 0:
+                return d
+        d += timedelta(days=1)
+
+
+@pytest.fixture
+def calendar():
+    return WorkingCalendar(
+        valid_from=date(2024, 12, 1),
+        valid_to=date(2025, 1, 31),
+        weekend_days=[6, 7],
+        closure_dates=[date(2024, 12, 25), date(2024, 12, 26), date(2025, 1, 1)],
+        working_dates=[date(2024, 12, 22)]                                         # Sunday
+    )
+
+
+def test_working_day_offset(calendar):
+    assert calendar.working_day_offset(date(2024, 12, 20), 1) == date(2024, 12, 20)
+    assert calendar.working_day_offset(date(2024, 12, 21), 1) == date(2024, 12, 22)
+    assert calendar.working_day_offset(date(2024, 12, 20), 5) == date(2024, 12, 27)
+
+
+def test_working_day_offset_invalid(calendar):
+    with pytest.raises(ValueError):
+        calendar.working_day_offset(date(2024, 12, 20), 0)
+
+
+def test_days_between(calendar):
+    start, end = date(2024, 12, 20), date(2024, 12, 29)
+
+    assert calendar.closure_holidays_between(start, end) == [date(2024, 12, 25), date(2024, 12, 26)]
+    assert calendar.working_holidays_between(start, end) == [date(2024, 12, 22)]
+    assert calendar.weekend_days_between(start, end) == [date(2024, 12, 21), date(2024, 12, 28), date(2024, 12, 29)]
+
+
+def test_closure_holiday_takes_precedence_over_working_holiday():
+    calendar = WorkingCalendar(
+        valid_from=date(2024, 1, 1),
+        valid_to=date(2024, 1, 31),
+        weekend_days=[6, 7],
+        closure_dates=[date(2024, 1, 7)],
+        working_dates=[date(2024, 1, 7)]
+    )
+
+    assert calendar.closure_holidays_between(date(2024, 1, 7), date(2024, 1, 7)) == [date(2024, 1, 7)]
+    assert calendar.working_holidays_between(date(2024, 1, 7), date(2024, 1, 7)) == []
+    assert calendar.working_day_offset(date(2024, 1, 7), 1) == date(2024, 1, 8)
+
+
+def test_no_working_days_in_week():
+    with pytest.raises(ValueError):
+        WorkingCalendar(
+            valid_from=date(2024, 1, 1),
+            valid_to=date(2024, 1, 31),
+            weekend_days=range(1, 8),
+            closure_dates=[],
+            working_dates=[]
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_day_by_day_walk(seed):
+    rng = random.Random(seed)
+    valid_from, valid_to = date(2024, 1, 1), date(2026, 12, 31)
+    n_days = (valid_to - valid_from).days
+
+    weekend_days = {rng.choice([5, 6]), 7}
+    closure_dates = {valid_from + timedelta(days=rng.randrange(n_days)) for _ in range(80)}
+    working_dates = {valid_from + timedelta(days=rng.randrange(n_days)) for _ in range(40)}
+
+    calendar = WorkingCalendar(valid_from, valid_to, weekend_days, closure_dates, working_dates)
+
+    for _ in range(50):
+        start = valid_from + timedelta(days=rng.randrange(365))
+        n = rng.randint(1, 200)
+
+        expected_end = _brute_force_offset(start, n, weekend_days, closure_dates, working_dates)
+        assert calendar.working_day_offset(start, n) == expected_end
+
+        days = [start + timedelta(days=i) for i in range((expected_end - start).days + 1)]
+        n_closure_days = len(calendar.closure_holidays_between(start, expected_end)) + len(calendar.weekend_days_between(start, expected_end))
+        assert n_closure_days == sum(not _is_working_day(d, weekend_days, closure_dates, working_dates) for d in days)
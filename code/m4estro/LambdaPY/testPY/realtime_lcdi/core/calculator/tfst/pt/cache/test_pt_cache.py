@@ -0,0 +1,107 @@
+import pytest
+import threading
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+
+from model.tmi import TransportationMode
+
+from core.calculator.tfst.pt.tmi.tmi_dto import TMI_DTO
+from core.calculator.tfst.pt.wmi.wmi_dto import WMI_DTO
+from core.calculator.tfst.pt.wmi.calculator.wmi_calculation_dto import By
+
+from core.calculator.tfst.pt.cache.pt_cache import PTCache, PTCacheEntry, PTCacheBackend, get_pt_cache_key
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+class InMemoryBackend(PTCacheBackend):
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, key):
+        return self.objects.get(key)
+
+    def put(self, key, content):
+        self.objects.setdefault(key, content)
+
+def make_entry(lower=1.0):
+    tmi = TMI_DTO(
+        value=0.2, transportation_mode=TransportationMode.ROAD,
+        distance_geodesic_km=10.0, distance_road_km=12.0,
+        time_hours=1.0, time_road_no_traffic_hours=0.9, time_road_with_traffic_hours=1.1,
+        source_index=0, source_id=1, source_name="A",
+        destination_index=1, destination_id=2, destination_name="B",
+        timestamp=T0
+    )
+    wmi = WMI_DTO(
+        value=0.3, weather_code="RA", weather_description="Rain", temperature_celsius=8.5, by=By.WEATHER_CONDITION,
+        source_index=0, source_id=1, source_name="A",
+        destination_index=1, destination_id=2, destination_name="B",
+        timestamp=T0, n_interpolation_points=3, step_distance_km=5.0
+    )
+    return PTCacheEntry(lower=lower, upper=lower + 1.0, n_paths=2, avg_tmi=0.2, avg_wmi=0.3, tmi_data=[tmi], wmi_data=[wmi])
+
+def test_entry_json_round_trip():
+    entry = make_entry()
+    assert PTCacheEntry.from_json(entry.to_json()) == entry
+
+def test_key_is_shared_within_a_time_bucket():
+    key = get_pt_cache_key(1, ["ups", "dhl"], T0, T0, 900, "p", "g")
+
+    assert get_pt_cache_key(1, ["dhl", "ups"], T0 + timedelta(minutes=5), T0 + timedelta(minutes=10), 900, "p", "g") == key
+    assert get_pt_cache_key(1, ["dhl", "ups"], T0, T0 + timedelta(minutes=15), 900, "p", "g") != key
+    assert get_pt_cache_key(1, ["dhl", "ups"], T0, T0, 900, "p", "g2") != key
+    assert get_pt_cache_key(1, ["dhl", "ups"], T0, T0, 900, "p2", "g") != key
+    assert get_pt_cache_key(2, ["dhl", "ups"], T0, T0, 900, "p", "g") != key
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PTCache(max_size=2)
+    cache.put("a", make_entry(1.0))
+    cache.put("b", make_entry(2.0))
+    cache.get("a")
+    cache.put("c", make_entry(3.0))
+
+    assert cache.get("b") is None
+    assert cache.get("a").lower == 1.0
+    assert cache.get("c").lower == 3.0
+
+def test_entries_are_shared_through_the_backend():
+    backend = InMemoryBackend()
+    cache = PTCache(maybe_backend=backend)
+    cache.put("a", make_entry())
+    cache.flush()
+
+    other = PTCache(maybe_backend=backend)
+    assert other.get("a") == make_entry()
+    assert "a" in other.entries
+
+def test_backend_errors_are_misses():
+    backend = MagicMock(spec=PTCacheBackend)
+    backend.get.side_effect = RuntimeError("S3 down")
+    backend.put.side_effect = RuntimeError("S3 down")
+    cache = PTCache(maybe_backend=backend)
+
+    assert cache.get("a") is None
+    cache.put("a", make_entry())
+    cache.flush()
+    assert cache.get("a") == make_entry()
+
+def test_backend_writes_do_not_block_the_put():
+    written = threading.Event()
+    release = threading.Event()
+
+    class SlowBackend(InMemoryBackend):
+        def put(self, key, content):
+            release.wait(timeout=5)
+            super().put(key, content)
+            written.set()
+
+    backend = SlowBackend()
+    cache = PTCache(maybe_backend=backend)
+    cache.put("a", make_entry())
+
+    assert cache.get("a") == make_entry()
+    assert not written.is_set()
+
+    release.set()
+    cache.flush()
+    assert "a" in backend.objects
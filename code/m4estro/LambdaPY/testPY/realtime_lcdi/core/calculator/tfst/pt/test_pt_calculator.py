@@ -1,25 +1,34 @@
 import pytest
 import numpy as np
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import igraph as ig
 
 from core.dto.time_sequence.time_sequence_dto import TimeSequenceDTO
 
-from core.query_handler.params.params_result import PTParams
+from core.query_handler.params.params_result import PTParams, PTMode
 
 from core.dto.path.prob_path_dto import ProbPathIdDTO
+from core.dto.path.prob_path_time_dto import ProbPathIdTimeDTO
 from core.dto.path.paths_dto import PathsIdDTO
 
-from core.calculator.tfst.pt.pt_input_dto import PTInputDTO
+from core.calculator.tfst.pt.pt_input_dto import PTInputDTO, PTDisruptionDTO
 from core.calculator.tfst.pt.pt_dto import PT_DTO
 
 from core.calculator.tfst.pt.tmi.tmi_manager import TMIValueDTO
 from core.calculator.tfst.pt.wmi.wmi_manager import WMIValueDTO
 
 from core.calculator.tfst.pt.pt_calculator import PTCalculator
+from core.calculator.tfst.pt.cache.pt_cache import PTCache
+from core.calculator.tfst.pt.pt_carrier_matrix import PTCarrierMatrix
+from core.metrics.stage_metrics import StageMetrics, Stage
 from core.sc_graph.sc_graph import SCGraph
+from core.sc_graph.path_extraction.path_extraction_manager import PathExtractionManager
+from core.sc_graph.path_prob.path_prob_manager import PathProbManager
+from core.calculator.tfst.pt.vertex_time.vertex_time_calculator import VertexTimeCalculator
+from core.calculator.tfst.pt.route_time.route_time_calculator import RouteTimeCalculator
+from core.calculator.tfst.pt.route_time.route_time_estimator import RouteTimeEstimator
 from core.calculator.tfst.pt.vertex_time.vertex_time_dto import VertexTimeDTO
 from core.calculator.tfst.pt.route_time.route_time_dto import RouteTimeDTO
 
@@ -35,7 +44,8 @@ from graph_config import (
     DISTANCE_ATTR,
     AVG_OTI_ATTR,
     AVG_WMI_ATTR,
-    AVG_TMI_ATTR
+    AVG_TMI_ATTR,
+    N_ORDERS_BY_CARRIER_ATTR
 )
 
 @pytest.fixture
@@ -137,6 +147,19 @@ def pt_calculator(extended_graph, mocked_calculators):
                             confidence=0.95
                         ))
 
+def paths_time_from(calc_path_time):
+    """Per-path time function turned into a _calculate_paths_time side effect, failures returned as errors."""
+    def calc_paths_time(paths, use_ext_data, event_time, estimation_time, maybe_context=None):
+        results = []
+        for path in paths:
+            try:
+                results.append(calc_path_time(path, use_ext_data, event_time, estimation_time, maybe_context))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    return calc_paths_time
+
 def test_path_no_time_adjustment(pt_calculator):
     path = [1, 2, 3, 4]
     epsilon = 0.01
@@ -251,8 +274,8 @@ def test_calculate_remaining_time(pt_calculator):
     # Mock the sc_graph.extract_paths to return these paths
     pt_calculator.sc_graph.extract_paths = MagicMock(return_value=paths_dto)
     
-    # Patch _calculate_path_time to return fixed values per path to avoid deep complexity
-    def mock_calc_path_time(path, prob, starting_time, current_time):
+    # Patch the path time to return fixed values per path to avoid deep complexity
+    def mock_calc_path_time(path, prob, starting_time, current_time, maybe_context=None):
         if path == [1, 2, 5]:
             return (lowers[0], uppers[0], tmi_values[0], wmi_values[0])
         elif path == [1, 2, 3, 4, 5]:
@@ -262,7 +285,7 @@ def test_calculate_remaining_time(pt_calculator):
         else:
             return (0.0, 0.0, 0.0, 0.0)
     
-    pt_calculator._calculate_path_time = MagicMock(side_effect=mock_calc_path_time)
+    pt_calculator._calculate_paths_time = MagicMock(side_effect=paths_time_from(mock_calc_path_time))
 
     estimation_time = datetime.now(timezone.utc)                     # t   
     event_time = estimation_time - timedelta(hours=1)                # timestamp of the last event
@@ -333,15 +356,15 @@ def test_calculate_remaining_time_exception_in_path_time_single_failure(pt_calcu
 
     pt_calculator.sc_graph.graph = g
 
-    # Setup paths with one path that will raise in _calculate_path_time
+    # Setup paths with one path that will fail
     path1 = ProbPathIdDTO(path=[1, 2, 3], prob=0.5, carrier="CarrierA")
     path2 = ProbPathIdDTO(path=[4, 5, 6], prob=0.5, carrier="CarrierB")
     paths_dto = PathsIdDTO(paths=[path1, path2], source=1, destination=6, requestedCarriers=["CarrierA", "CarrierB"], validCarriers=["CarrierA", "CarrierB"])
 
     pt_calculator.sc_graph.extract_paths = MagicMock(return_value=paths_dto)
 
-    # Patch _calculate_path_time so path1 raises, path2 returns normal
-    def mock_calc_path_time(path, prob, starting_time, current_time):
+    # Patch the path time so path1 raises, path2 returns normal
+    def mock_calc_path_time(path, prob, starting_time, current_time, maybe_context=None):
         if path == [1, 2, 3]:
             raise RuntimeError("Calculation error")
         elif path == [4, 5, 6]:
@@ -349,7 +372,7 @@ def test_calculate_remaining_time_exception_in_path_time_single_failure(pt_calcu
         else:
             return (0.0, 0.0)
 
-    pt_calculator._calculate_path_time = MagicMock(side_effect=mock_calc_path_time)
+    pt_calculator._calculate_paths_time = MagicMock(side_effect=paths_time_from(mock_calc_path_time))
 
     estimation_time = datetime.now(timezone.utc)  # e.g. t
     event_time = estimation_time - timedelta(hours=1)
@@ -387,8 +410,8 @@ def test_calculate_remaining_time_exception_in_path_time_double_failure(pt_calcu
 
     pt_calculator.sc_graph.extract_paths = MagicMock(return_value=paths_dto)
 
-    # Patch _calculate_path_time so path2 raises, others return normal times
-    def mock_calc_path_time(path, prob, starting_time, current_time):
+    # Patch the path time so path2 raises, others return normal times
+    def mock_calc_path_time(path, prob, starting_time, current_time, maybe_context=None):
         if path == [4, 5, 6]:
             raise RuntimeError("Calculation error")
         elif path == [1, 2, 3]:
@@ -400,7 +423,7 @@ def test_calculate_remaining_time_exception_in_path_time_double_failure(pt_calcu
         else:
             return (0.0, 0.0)
 
-    pt_calculator._calculate_path_time = MagicMock(side_effect=mock_calc_path_time)
+    pt_calculator._calculate_paths_time = MagicMock(side_effect=paths_time_from(mock_calc_path_time))
 
     estimation_time = datetime.now(timezone.utc)  # e.g. t
     event_time = estimation_time - timedelta(hours=1)  # timestamp of the last event
@@ -488,4 +511,261 @@ def test_calculate_total_processing_time_estimate(pt_calculator):
     assert pt.n_paths == fixed_remaining.n_paths
 
     assert pytest.approx(pt.avg_tmi) == fixed_remaining.avg_tmi
-    assert pytest.approx(pt.avg_wmi) == fixed_remaining.avg_wmi
\ No newline at end of file
+    assert pytest.approx(pt.avg_wmi) == fixed_remaining.avg_wmi
+def test_shared_prefixes_are_evaluated_once(pt_calculator, mocked_calculators):
+    vt_calculator, rt_calculator, tmi_manager, wmi_manager = mocked_calculators
+    vt_calculator.calculate.side_effect = None
+    vt_calculator.calculate.return_value = VertexTimeDTO(lower=1.0, upper=2.0)
+    rt_calculator.calculate.side_effect = None
+    rt_calculator.calculate.return_value = RouteTimeDTO(lower=3.0, upper=4.0)
+    tmi_manager.calculate_tmi.side_effect = None
+    tmi_manager.calculate_tmi.return_value = TMIValueDTO(value=0.2, computed=True)
+    wmi_manager.calculate_wmi.side_effect = None
+    wmi_manager.calculate_wmi.return_value = WMIValueDTO(value=0.5, computed=True)
+
+    g = pt_calculator.sc_graph.graph
+    g.add_edges([(1, 3)])
+    g.es[3][DISTANCE_ATTR] = 150.0
+    g.es[3][AVG_OTI_ATTR] = 10.0
+    g.es[3][AVG_WMI_ATTR] = 1.0
+    g.es[3][AVG_TMI_ATTR] = 1.0
+
+    estimation_time = datetime.now(timezone.utc)
+    event_time = estimation_time - timedelta(hours=1)
+    paths = [[1, 2, 3, 4], [1, 2, 4], [1, 2, 3, 4]]
+
+    results = pt_calculator._calculate_paths_time(paths, True, event_time, estimation_time)
+
+    # 1->2, 2->3, 3->4 and 2->4: 4 distinct hops instead of 8, vertex times of 2 and 3 once each
+    assert rt_calculator.calculate.call_count == 4
+    assert tmi_manager.calculate_tmi.call_count == 4
+    assert wmi_manager.calculate_wmi.call_count == 4
+    assert vt_calculator.calculate.call_count == 2
+
+    assert results[0] == results[2] == (3 * 3.0 + 2 * 1.0, 3 * 4.0 + 2 * 2.0, 0.2, 0.5)
+    assert results[1] == (2 * 3.0 + 1.0, 2 * 4.0 + 2.0, 0.2, 0.5)
+    for path, result in zip(paths, results):
+        assert pt_calculator._calculate_path_time(path, 0.9, event_time, estimation_time) == result
+
+def test_vertices_are_resolved_without_graph_scans(pt_calculator):
+    g = pt_calculator.sc_graph.graph
+
+    with patch.object(ig.VertexSeq, "find", side_effect=AssertionError("vertex scan")):
+        assert pt_calculator._get_vertex(3).index == 2
+        assert pt_calculator._find_vertex(4).index == 3
+        with pytest.raises(ValueError):
+            pt_calculator._find_vertex(99)
+
+    assert pt_calculator._maybe_vertex_indices == {v_id: i for i, v_id in enumerate(g.vs[V_ID_ATTR])}
+
+def test_failed_hop_fails_only_the_paths_below_it(pt_calculator, mocked_calculators):
+    _, rt_calculator, _, _ = mocked_calculators
+    rt_calculator.calculate.side_effect = None
+    rt_calculator.calculate.return_value = RouteTimeDTO(lower=3.0, upper=4.0)
+
+    estimation_time = datetime.now(timezone.utc)
+    event_time = estimation_time - timedelta(hours=1)
+
+    results = pt_calculator._calculate_paths_time([[1, 2], [1, 3], [1, 2, 3]], True, event_time, estimation_time)
+
+    assert results[0][:2] == (8.0, 10.0)
+    assert isinstance(results[1], Exception)    # No edge 1->3
+    assert results[2][:2] == (15.0, 19.0)
+
+def test_disruption_evaluates_only_the_paths_through_its_vertices(pt_calculator):
+    paths = [
+        ProbPathIdDTO(path=[1, 2, 4], prob=0.5, carrier="CarrierA"),
+        ProbPathIdDTO(path=[1, 2, 3, 4], prob=0.3, carrier="CarrierA"),
+        ProbPathIdDTO(path=[1, 3, 4], prob=0.2, carrier="CarrierA"),
+    ]
+    pt_calculator.sc_graph.extract_paths = MagicMock(return_value=PathsIdDTO(
+        paths=paths, source=1, destination=4, requestedCarriers=["CarrierA"], validCarriers=["CarrierA"]
+    ))
+    pt_calculator.sc_graph.get_paths_through_vertices = MagicMock(return_value={(1, 2, 3, 4)})
+    pt_calculator._calculate_paths_time = MagicMock(side_effect=paths_time_from(lambda *_: (20.0, 30.0, 0.9, 0.8)))
+
+    # [1, 3, 4] failed in the previous estimate, the others were evaluated
+    previous_pt = PT_DTO(
+        lower=0.0, upper=0.0, n_paths=2, avg_tmi=0.0, avg_wmi=0.0, params=pt_calculator.params,
+        path_times=[
+            ProbPathIdTimeDTO(path=path, prob=0.5, carrier="CarrierA", lower_time=10.0, upper_time=12.0, avg_tmi=0.1, avg_wmi=0.2)
+            for path in ([1, 2, 4], [1, 2, 3, 4])
+        ]
+    )
+    estimation_time = datetime.now(timezone.utc)
+
+    pt_dto = pt_calculator.calculate_disrupted_remaining_time(
+        PTInputDTO(vertex_id=1, carrier_names=["CarrierA"]),
+        PTDisruptionDTO(vertex_ids=frozenset({3}), previous_pt=previous_pt),
+        event_time=estimation_time - timedelta(hours=1),
+        estimation_time=estimation_time
+    )
+
+    pt_calculator.sc_graph.get_paths_through_vertices.assert_called_once()
+    source, v_indices = pt_calculator.sc_graph.get_paths_through_vertices.call_args.args
+    assert source.index == 0 and v_indices == [2]
+    evaluated = [path for call in pt_calculator._calculate_paths_time.call_args_list for path in call.args[0]]
+    assert sorted(evaluated) == [[1, 2, 3, 4], [1, 3, 4]]
+
+    assert pt_dto.n_paths == 3
+    assert pytest.approx(pt_dto.lower) == 0.5 * 10.0 + 0.5 * 20.0
+    assert pytest.approx(pt_dto.upper) == 0.5 * 12.0 + 0.5 * 30.0
+    assert sorted(p.path for p in pt_dto.path_times) == sorted(p.path for p in paths)
+
+def test_disruption_without_previous_path_times_evaluates_every_path(pt_calculator):
+    previous_pt = PT_DTO(lower=1.0, upper=2.0, n_paths=1, avg_tmi=0.0, avg_wmi=0.0, params=pt_calculator.params)
+    pt_input = PTInputDTO(vertex_id=1, carrier_names=["CarrierA"])
+    estimation_time = datetime.now(timezone.utc)
+
+    with patch.object(PTCalculator, "calculate_remaining_time") as calculate_remaining_time:
+        pt_dto = pt_calculator.calculate_disrupted_remaining_time(
+            pt_input, PTDisruptionDTO(vertex_ids=frozenset({3}), previous_pt=previous_pt), estimation_time, estimation_time
+        )
+
+    assert pt_dto is calculate_remaining_time.return_value
+    assert calculate_remaining_time.call_args.args[0] is pt_input
+
+def make_carriers_sc_graph():
+    # 1 -> 2 -> 3 -> 4 (manufacturer), 1 -> 3, 2 -> 4
+    g = ig.Graph(directed=True)
+    g.add_vertices(4)
+    g.vs[V_ID_ATTR] = [1, 2, 3, 4]
+    g.vs["name"] = ["S", "A", "B", "M"]
+    g.vs[TYPE_ATTR] = [VertexType.SUPPLIER_SITE.value, VertexType.INTERMEDIATE.value, VertexType.INTERMEDIATE.value, VertexType.MANUFACTURER.value]
+    g.vs[AVG_ORI_ATTR] = [1.0, 2.0, 3.0, 0.0]
+    g.vs[LATITUDE_ATTR] = g.vs[LONGITUDE_ATTR] = [0.0, 1.0, 2.0, 3.0]
+    g.vs[N_ORDERS_BY_CARRIER_ATTR] = [{"dhl": 10, "ups": 4}, {"dhl": 6, "ups": 4}, {"dhl": 8}, {"dhl": 10, "ups": 4}]
+    g.add_edges([(0, 1), (1, 2), (2, 3), (0, 2), (1, 3)])
+    g.es[DISTANCE_ATTR] = [100.0, 110.0, 120.0, 130.0, 140.0]
+    g.es[AVG_OTI_ATTR] = [10.0, 11.0, 12.0, 13.0, 14.0]
+    g.es[AVG_WMI_ATTR] = g.es[AVG_TMI_ATTR] = [0.0] * 5
+    g.es[N_ORDERS_BY_CARRIER_ATTR] = [{"dhl": 6, "ups": 4}, {"dhl": 4}, {"dhl": 8}, {"dhl": 4}, {"dhl": 2, "ups": 4}]
+
+    manufacturer = g.vs[3]
+    return SCGraph(
+        g,
+        path_extraction_manager=PathExtractionManager(g, maybe_manufacturer=manufacturer),
+        path_prob_manager=PathProbManager(g, maybe_manufacturer=manufacturer),
+        maybe_manufacturer=manufacturer
+    )
+
+@pytest.mark.parametrize("source", [1, 2])
+@pytest.mark.parametrize("dp_prefix_hops", [0, 1, 3])
+def test_dp_mode_matches_path_enumeration(source, dp_prefix_hops):
+    sc_graph = make_carriers_sc_graph()
+    rt_calculator = RouteTimeCalculator(estimator=RouteTimeEstimator(MagicMock(), use_model=False), mape=0.1)
+
+    def make_calculator(mode):
+        params = PTParams(
+            rte_estimator_params=MagicMock(), tmi_params=MagicMock(), wmi_params=MagicMock(),
+            path_min_probability=0.0, max_paths=100, ext_data_min_probability=1.1, confidence=0.9,
+            mode=mode, dp_prefix_hops=dp_prefix_hops
+        )
+        return PTCalculator(sc_graph, VertexTimeCalculator(), rt_calculator, MagicMock(), MagicMock(), params)
+
+    estimation_time = datetime.now(timezone.utc)
+    event_time = estimation_time - timedelta(hours=1)
+    pt_input = PTInputDTO(vertex_id=source, carrier_names=["dhl", "ups"])
+
+    enumerated = make_calculator(PTMode.ENUMERATION).calculate_remaining_time(pt_input, event_time, estimation_time)
+    dp = make_calculator(PTMode.DP).calculate_remaining_time(pt_input, event_time, estimation_time)
+
+    assert dp.n_paths == enumerated.n_paths > 0
+    assert dp.lower == pytest.approx(enumerated.lower)
+    assert dp.upper == pytest.approx(enumerated.upper)
+    assert dp.lower < dp.upper
+
+def test_cached_pt_skips_the_calculation(extended_graph, mocked_calculators, monkeypatch):
+    monkeypatch.setattr("core.calculator.tfst.pt.pt_calculator.get_params_version", lambda params: "params")
+    sc_graph = MagicMock(spec=SCGraph)
+    sc_graph.graph = extended_graph
+    sc_graph.version = "graph"
+    vt_calculator, rt_calculator, tmi_manager, wmi_manager = mocked_calculators
+
+    params = PTParams(
+        rte_estimator_params=MagicMock(), tmi_params=MagicMock(), wmi_params=MagicMock(),
+        path_min_probability=0.0, max_paths=10, ext_data_min_probability=0.0, confidence=0.95,
+        cache_time_bucket_seconds=900.0
+    )
+    pt_calculator = PTCalculator(sc_graph=sc_graph, vt_calculator=vt_calculator, rt_calculator=rt_calculator,
+                                 tmi_manager=tmi_manager, wmi_manager=wmi_manager, params=params, maybe_cache=PTCache())
+    pt_calculator.calculate_remaining_time = MagicMock(return_value=PT_DTO(lower=3.0, upper=4.0, avg_tmi=0.5, avg_wmi=0.6, n_paths=5, params=params))
+
+    estimation_time = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    time_sequence = TimeSequenceDTO(
+        order_time=estimation_time - timedelta(hours=50),
+        shipment_time=estimation_time - timedelta(hours=40),
+        event_time=estimation_time - timedelta(hours=1),
+        estimation_time=estimation_time
+    )
+    pt_input = PTInputDTO(vertex_id=1, carrier_names=["CarrierA"])
+
+    first = pt_calculator.calculate(pt_input, time_sequence)
+    second = pt_calculator.calculate(pt_input, time_sequence)
+
+    assert pt_calculator.calculate_remaining_time.call_count == 1
+    assert second == first
+
+def test_carrier_matrix_matches_single_carrier_estimates():
+    sc_graph = make_carriers_sc_graph()
+    rt_calculator = RouteTimeCalculator(estimator=RouteTimeEstimator(MagicMock(), use_model=False), mape=0.1)
+    params = PTParams(
+        rte_estimator_params=MagicMock(), tmi_params=MagicMock(), wmi_params=MagicMock(),
+        path_min_probability=0.0, max_paths=100, ext_data_min_probability=1.1, confidence=0.9
+    )
+    pt_calculator = PTCalculator(sc_graph, VertexTimeCalculator(), rt_calculator, MagicMock(), MagicMock(), params)
+
+    estimation_time = datetime.now(timezone.utc)
+    event_time = estimation_time - timedelta(hours=1)
+
+    with patch.object(RouteTimeCalculator, "calculate", autospec=True, side_effect=RouteTimeCalculator.calculate) as rt_calculate:
+        singles = {
+            carrier: pt_calculator.calculate_remaining_time(PTInputDTO(vertex_id=1, carrier_names=[carrier]), event_time, estimation_time)
+            for carrier in ["dhl", "ups", "fedex"]
+        }
+        single_hops = rt_calculate.call_count
+        rt_calculate.reset_mock()
+
+        matrix = PTCarrierMatrix(vertex_id=1, carrier_names=["dhl", "ups", "fedex"])
+        by_carrier = {carrier: matrix.get(pt_calculator, carrier, event_time, estimation_time)[0] for carrier in singles}
+
+    # dhl: 1->2, 2->3, 3->4, 2->4, 1->3, 3->4 below 1->3; ups: 1->2, 2->4, shared with dhl
+    assert (single_hops, rt_calculate.call_count) == (8, 6)
+    for carrier, single in singles.items():
+        assert by_carrier[carrier].n_paths == single.n_paths
+        assert by_carrier[carrier].lower == pytest.approx(single.lower)
+        assert by_carrier[carrier].upper == pytest.approx(single.upper)
+    assert by_carrier["fedex"].n_paths == 0
+
+def test_carrier_matrix_keeps_external_data_by_carrier():
+    sc_graph = make_carriers_sc_graph()
+    rt_calculator = RouteTimeCalculator(estimator=RouteTimeEstimator(MagicMock(), use_model=False), mape=0.1)
+    params = PTParams(
+        rte_estimator_params=MagicMock(), tmi_params=MagicMock(), wmi_params=MagicMock(),
+        path_min_probability=0.0, max_paths=100, ext_data_min_probability=0.0, confidence=0.9
+    )
+
+    def record(data_attr, value_dto):
+        def calculate(ext_input, maybe_context=None):
+            hop = MagicMock(source_id=ext_input.source[V_ID_ATTR], destination_id=ext_input.destination[V_ID_ATTR])
+            getattr(maybe_context, data_attr).append(hop)
+            return value_dto(value=0.0, computed=True)
+        return calculate
+
+    tmi_manager, wmi_manager = MagicMock(), MagicMock()
+    tmi_manager.calculate_tmi.side_effect = record("tmi_data", TMIValueDTO)
+    wmi_manager.calculate_wmi.side_effect = record("wmi_data", WMIValueDTO)
+    pt_calculator = PTCalculator(sc_graph, VertexTimeCalculator(), rt_calculator, tmi_manager, wmi_manager, params)
+
+    estimation_time = datetime.now(timezone.utc)
+    event_time = estimation_time - timedelta(hours=1)
+    metrics = StageMetrics()
+    matrix = PTCarrierMatrix(vertex_id=1, carrier_names=["dhl", "ups"])
+    _, dhl_context = matrix.get(pt_calculator, "dhl", event_time, estimation_time, metrics)
+    _, ups_context = matrix.get(pt_calculator, "ups", event_time, estimation_time)
+
+    # ups: 1->2->4 only, dhl: every hop
+    assert {(t.source_id, t.destination_id) for t in ups_context.tmi_data} == {(1, 2), (2, 4)}
+    assert {(w.source_id, w.destination_id) for w in ups_context.wmi_data} == {(1, 2), (2, 4)}
+    assert {(t.source_id, t.destination_id) for t in dhl_context.tmi_data} == {(1, 2), (2, 3), (3, 4), (2, 4), (1, 3)}
+    assert Stage.PT_TIMES in metrics.stages
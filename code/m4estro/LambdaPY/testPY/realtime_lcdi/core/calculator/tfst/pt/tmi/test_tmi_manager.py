@@ -9,10 +9,11 @@ from core.calculator.tfst.pt.tmi.tmi_dto import TMIInputDTO
 from core.calculator.tfst.pt.tmi.calculator.tmi_calculation_input_dto import TMICalculationInputDTO
 
 from core.calculator.tfst.pt.tmi.tmi_manager import TMIManager
+from core.calculator.tfst.pt.pt_context import PTRequestContext
 from model.tmi import TransportationMode
 
 # Constants for testing
-from graph_config import V_ID_ATTR, LATITUDE_ATTR, LONGITUDE_ATTR
+from graph_config import V_ID_ATTR, LATITUDE_ATTR, LONGITUDE_ATTR, TRANSPORTATION_MODE_PARAMS_ATTR
 
 @pytest.fixture
 def graph():
@@ -56,14 +57,15 @@ def tmi_manager(mock_lambda_client, mock_tmi_calculator):
         max_timedelta=3.0  # hours
     )
 
-def make_tmi_input(graph, departure_time_delta=2):
+def make_tmi_input(graph, departure_time_delta=2, maybe_transportation_mode=None):
     return TMIInputDTO(
         source=graph.vs[0],
         destination=graph.vs[1],
         route_geodesic_distance=100.0,
         route_average_time=3.0,
         shipment_estimation_time=datetime.now(),
-        departure_time=datetime.now() + timedelta(hours=departure_time_delta)
+        departure_time=datetime.now() + timedelta(hours=departure_time_delta),
+        maybe_transportation_mode=maybe_transportation_mode
     )
 
 def test_calculate_tmi_returns_computed_result(tmi_manager, graph):
@@ -110,3 +112,40 @@ def test_initialize_resets_tmi_data(tmi_manager, graph):
 
     tmi_manager.initialize()
     assert tmi_manager.tmi_data == []
+
+def test_calculate_tmi_stores_in_request_context(tmi_manager, graph):
+    context = PTRequestContext()
+
+    tmi_manager.calculate_tmi(make_tmi_input(graph), maybe_context=context)
+
+    assert len(context.tmi_data) == 1
+    assert tmi_manager.tmi_data == []
+
+@pytest.mark.parametrize("mode", [TransportationMode.AIR, TransportationMode.SEA, TransportationMode.UNKNOWN])
+def test_calculate_tmi_skips_traffic_request_for_classified_non_road_edges(tmi_manager, mock_lambda_client, mock_tmi_calculator, graph, mode):
+    mock_tmi_calculator.transportation_mode_params = {"road_max_speed_km_h": 110.0}
+    graph[TRANSPORTATION_MODE_PARAMS_ATTR] = {"road_max_speed_km_h": 110.0}
+
+    result = tmi_manager.calculate_tmi(make_tmi_input(graph, maybe_transportation_mode=mode.value))
+
+    assert result == TMIValueDTO(value=0.0, computed=True)
+    mock_lambda_client.get_traffic_data.assert_not_called()
+    assert tmi_manager.tmi_data == []
+
+def test_calculate_tmi_requests_traffic_for_classified_road_edges(tmi_manager, mock_lambda_client, mock_tmi_calculator, graph):
+    mock_tmi_calculator.transportation_mode_params = {"road_max_speed_km_h": 110.0}
+    graph[TRANSPORTATION_MODE_PARAMS_ATTR] = {"road_max_speed_km_h": 110.0}
+
+    result = tmi_manager.calculate_tmi(make_tmi_input(graph, maybe_transportation_mode=TransportationMode.ROAD.value))
+
+    assert result.value == 0.42
+    mock_lambda_client.get_traffic_data.assert_called_once()
+
+def test_calculate_tmi_ignores_modes_classified_with_other_params(tmi_manager, mock_lambda_client, mock_tmi_calculator, graph):
+    mock_tmi_calculator.transportation_mode_params = {"road_max_speed_km_h": 110.0}
+    graph[TRANSPORTATION_MODE_PARAMS_ATTR] = {"road_max_speed_km_h": 90.0}
+
+    result = tmi_manager.calculate_tmi(make_tmi_input(graph, maybe_transportation_mode=TransportationMode.AIR.value))
+
+    assert result.value == 0.42
+    mock_lambda_client.get_traffic_data.assert_called_once()
@@ -2,6 +2,8 @@ import pytest
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
+from gamma_summary import GammaSummary
+
 from core.dto.time_sequence.time_sequence_dto import TimeSequenceDTO
 
 from core.calculator.tfst.tt.tt_calculator import TTCalculator
@@ -45,6 +47,19 @@ def test_calculate_with_gamma_input(mock_gamma_ci, time_sequence):
 
     mock_gamma_ci.assert_called_once_with(shape=2.0, scale=3.0, loc=0.0, confidence_level=0.95)
 
+@patch("core.calculator.tfst.tt.tt_calculator.compute_gamma_ci")
+def test_calculate_with_gamma_summary(mock_gamma_ci, time_sequence):
+    summary = GammaSummary(shape=2.0, scale=3.0, loc=0.0, mean=6.0, cis={0.95: (30.0, 50.0)})
+    gamma_dto = TTGammaDTO(shape=2.0, scale=3.0, loc=0.0, maybe_summary=summary)
+    input_dto = TTInputDTO(distribution=gamma_dto)
+
+    calculator = TTCalculator(confidence=0.95)
+    result = calculator.calculate(input_dto, time_sequence)
+
+    assert result.lower == pytest.approx(30.0 - 5.0)
+    assert result.upper == pytest.approx(50.0 - 5.0)
+    mock_gamma_ci.assert_not_called()
+
 @patch("core.calculator.tfst.tt.tt_calculator.compute_gamma_ci")
 def test_gamma_ci_with_elapsed_time_greater_than_bounds(mock_gamma_ci, time_sequence):
     mock_gamma_ci.return_value = (2.0, 4.0)  # very small CI
@@ -2,6 +2,8 @@ from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock
 import pytest
 
+from gamma_summary import GammaSummaryTable
+
 from core.dto.dto_factory import DTOFactory
 from core.query_handler.query_result import (
     DispatchTimeGammaResult, DispatchTimeSampleResult,
@@ -234,4 +236,26 @@ def test_create_time_deviation_input_dto(factory):
     assert isinstance(full_dto, TimeDeviationInputDTO)
     assert full_dto.td_partial_input == partial
     assert full_dto.dt == dt
-    assert full_dto.tfst == tfst
\ No newline at end of file
+    assert full_dto.tfst == tfst
+
+def test_gamma_dtos_carry_precomputed_summary():
+    table = GammaSummaryTable()
+    factory = DTOFactory(maybe_gamma_summary_table=table, confidence_levels=[0.9, 0.95])
+    st_gamma = ShipmentTimeGamma(id=3, shape=2.0, scale=1.5, loc=0.0)
+    st_result = ShipmentTimeGammaResult(dt_gamma=st_gamma)
+
+    tt_dto = factory.create_tt_base_input_dto(shipment_time_result=st_result)
+    alpha_dto = factory.create_alpha_base_input_dto(shipment_time_result=st_result, vertex_id=1)
+
+    assert tt_dto.distribution.maybe_summary is not None
+    assert tt_dto.distribution.maybe_summary is alpha_dto.st_distribution.maybe_summary
+    assert set(tt_dto.distribution.maybe_summary.cis) == {0.9, 0.95}
+    assert len(table) == 1
+
+
+def test_gamma_dtos_without_summary_table(factory):
+    result = DispatchTimeGammaResult(dt_gamma=DispatchTimeGamma(id=1, shape=1.1, scale=2.2, loc=0.0))
+
+    dto = factory.create_dt_input_dto(site_id=1, maybe_dispatch_time_result=result)
+
+    assert dto.distribution.maybe_summary is None
@@ -23,6 +23,9 @@ from core.calculator.tfst.tt.tt_dto import TT_DTO
 # TFST
 from core.calculator.tfst.tfst_dto import TFST_DTO
 
+# Metrics
+from core.metrics.stage_metrics import StageMetrics
+
 @pytest.fixture
 def time_sequence():
     return TimeSequenceDTO(
@@ -94,7 +97,7 @@ def test_tfst_executor_sequential(input_dtos, time_sequence, mocked_calculators)
     result = executor.execute(time_sequence, *input_dtos)
 
     alpha_calc.calculate.assert_called_once_with(input_dtos[0], time_sequence)
-    pt_calc.calculate.assert_called_once_with(input_dtos[1], time_sequence)
+    pt_calc.calculate.assert_called_once_with(input_dtos[1], time_sequence, maybe_metrics=None)
     tt_calc.calculate.assert_called_once_with(input_dtos[2], time_sequence)
     tfst_calc.calculate.assert_called_once_with(alpha=alpha, pt=pt, tt=tt)
 
@@ -115,8 +118,55 @@ def test_tfst_executor_parallel(input_dtos, time_sequence, mocked_calculators):
     result = executor.execute(time_sequence, *input_dtos)
 
     alpha_calc.calculate.assert_called_once_with(input_dtos[0], time_sequence)
-    pt_calc.calculate.assert_called_once_with(input_dtos[1], time_sequence)
+    pt_calc.calculate.assert_called_once_with(input_dtos[1], time_sequence, maybe_metrics=None)
     tt_calc.calculate.assert_called_once_with(input_dtos[2], time_sequence)
     tfst_calc.calculate.assert_called_once_with(alpha=alpha, pt=pt, tt=tt)
 
     assert_result_matches(result, alpha, pt, tt, tfst)
+
+
+@pytest.mark.parametrize("parallelization", [0, 4])
+def test_tfst_executor_records_stage_metrics(input_dtos, time_sequence, mocked_calculators, parallelization):
+    alpha_calc, pt_calc, tt_calc, tfst_calc, *_ = mocked_calculators
+    executor = TFSTExecutor(
+        alpha_calculator=alpha_calc,
+        pt_calculator=pt_calc,
+        tt_calculator=tt_calc,
+        tfst_calculator=tfst_calc,
+        parallelization=parallelization,
+        tolerance=0.1
+    )
+    metrics = StageMetrics()
+
+    executor.execute(time_sequence, *input_dtos, maybe_metrics=metrics)
+
+    assert {stage: stats["calls"] for stage, stats in metrics.summary().items()} == {"alpha": 1, "pt": 1, "tt": 1}
+    pt_calc.calculate.assert_called_once_with(input_dtos[1], time_sequence, maybe_metrics=metrics)
+
+
+@pytest.mark.parametrize("computed, recomputed", [(TFSTCompute.ALL, True), (TFSTCompute.PT, True), (TFSTCompute.TT, False)])
+def test_tfst_executor_reexecute_pt_reuses_alpha_and_tt(input_dtos, time_sequence, mocked_calculators, computed, recomputed):
+    alpha_calc, pt_calc, tt_calc, tfst_calc, alpha, pt, tt, tfst = mocked_calculators
+    executor = TFSTExecutor(
+        alpha_calculator=alpha_calc,
+        pt_calculator=pt_calc,
+        tt_calculator=tt_calc,
+        tfst_calculator=tfst_calc,
+        parallelization=0,
+        tolerance=0.1
+    )
+    previous_pt = PT_DTO(lower=0.5, upper=1.0, n_paths=1, avg_wmi=0.0, avg_tmi=0.0, tmi_data=[], wmi_data=[], params=MagicMock())
+    previous = TFSTExecutorResult(
+        alpha=alpha, pt=previous_pt, tt=tt,
+        tfst=TFST_DTO(lower=1.0, upper=2.0, alpha=0.8, tolerance=0.1, computed=computed)
+    )
+
+    result = executor.reexecute_pt(time_sequence, previous, input_dtos[1])
+
+    alpha_calc.calculate.assert_not_called()
+    tt_calc.calculate.assert_not_called()
+    expected_pt = pt if recomputed else previous_pt
+    assert pt_calc.calculate.call_count == int(recomputed)
+    tfst_calc.calculate.assert_called_once_with(pt=expected_pt, tt=tt, alpha=alpha)
+    assert result.pt == expected_pt
+    assert result.tfst.computed == computed
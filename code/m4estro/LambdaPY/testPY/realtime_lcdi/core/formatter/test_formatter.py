@@ -19,7 +19,7 @@ from core.calculator.dt.dt_dto import DT_DTO
 from core.calculator.dt.holiday.holiday_dto import HolidayResultDTO
 from core.calculator.tfst.pt.pt_dto import PT_DTO
 
-from core.formatter.formatter import Formatter, EstimatedTimeSharedDTO
+from core.formatter.formatter import Formatter, EstimatedTimeSharedDTO, PAYLOAD_VERSION
 
 def test_format_et():
     alpha: Alpha = Alpha(
@@ -31,6 +31,7 @@ def test_format_et():
     )
     
     et = Mock()
+    et.payload = None
     et.vertex_id = 1
     et.vertex.name = "Node A"
     et.vertex.type = VertexType.SUPPLIER_SITE
@@ -134,6 +135,7 @@ def test_format_et_by_order():
     )
 
     et = Mock()
+    et.payload = None
     et.vertex_id = 99
     et.vertex.name = "Warehouse"
     et.vertex.type = VertexType.INTERMEDIATE
@@ -166,6 +168,18 @@ def test_format_et_by_order():
     assert len(formatted["data"]) == 1
     assert formatted["delay"]["total"]["upper"] == 3.5
 
+    # A stored payload is used as is, without touching the estimate relationships
+    stored = Mock(payload={"id": 7, "stored": True}, payload_version=PAYLOAD_VERSION)
+    formatted = formatter.format_et_by_order(shared, [stored])
+    assert formatted["data"] == [{"id": 7, "stored": True}]
+
+    # A payload stored by another format version is formatted live
+    et.payload = {"id": 7, "stored": True}
+    et.payload_version = PAYLOAD_VERSION - 1
+    formatted = formatter.format_et_by_order(shared, [et])
+    assert formatted["data"] == [formatter.format_et_payload(et).data]
+    assert "stored" not in formatted["data"][0]
+
 
 def test_format_volatile_result():
     vertex = ig.Graph().add_vertex(name="Hub", **{
@@ -274,3 +288,43 @@ def test_format_volatile_result():
     assert result["indicators"]["delay"]["total"]["upper"] == 3.5
     assert result["indicators"]["EDD"] == "2025-01-10T00:00:00"
 
+
+def test_format_carrier_matrix_result():
+    vertex = ig.Graph().add_vertex(name="Hub", **{
+        V_ID_ATTR: 42,
+        TYPE_ATTR: VertexType.SUPPLIER_SITE.value
+    })
+
+    site = SimpleNamespace(id=1, location_name="Paris")
+    supplier = SimpleNamespace(id=2, manufacturer_supplier_id=3, name="Best Supplies")
+    carriers = [SimpleNamespace(id=4, name="Speedy Carrier"), SimpleNamespace(id=6, name="Slow Carrier")]
+    manufacturer = SimpleNamespace(id=5, name="Tech Corp", location_name="Berlin")
+
+    request = SimpleNamespace(
+        carrier_id=4, order_time=datetime(2025, 1, 1), event_time=datetime(2025, 1, 3), estimation_time=datetime(2025, 1, 4)
+    )
+    executor_result = SimpleNamespace(
+        time_sequence=SimpleNamespace(shipment_time=datetime(2025, 1, 2)),
+        tfst_executor_result=SimpleNamespace(
+            pt=SimpleNamespace(avg_tmi=11.0, avg_wmi=9.0, lower=1.0, upper=3.0, n_paths=2),
+            tfst=SimpleNamespace(lower=0.4, upper=1.4, computed=TFSTCompute.ALL),
+        ),
+        est=SimpleNamespace(value=2.1),
+        eodt=SimpleNamespace(value=5.5),
+        cfdi=SimpleNamespace(lower=1.1, upper=2.1),
+        edd=SimpleNamespace(value=datetime(2025, 1, 10))
+    )
+    results = [
+        SimpleNamespace(request=request, maybe_executor_result=executor_result, maybe_error=None),
+        SimpleNamespace(request=SimpleNamespace(carrier_id=6), maybe_executor_result=None, maybe_error="No reference data")
+    ]
+
+    formatter = Formatter()
+    result = formatter.format_carrier_matrix_result(vertex, site, supplier, carriers, manufacturer, results, status=OrderStatus.PENDING)      # type: ignore
+
+    assert result["vertex"]["id"] == 42
+    assert result["estimation_time"] == "2025-01-04T00:00:00"
+    assert [c["carrier"]["name"] for c in result["carriers"]] == ["Speedy Carrier", "Slow Carrier"]
+    assert result["carriers"][0]["indicators"]["EDD"] == "2025-01-10T00:00:00"
+    assert result["carriers"][0]["indicators"]["CFDI"] == {"lower": 1.1, "upper": 2.1}
+    assert result["carriers"][1] == {"carrier": {"id": 6, "name": "Slow Carrier"}, "message": "No reference data"}
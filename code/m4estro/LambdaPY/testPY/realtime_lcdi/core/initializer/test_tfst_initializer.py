@@ -10,7 +10,7 @@ from core.calculator.tfst.alpha.alpha_calculator import AlphaCalculator
 from core.calculator.tfst.tfst_calculator import TFSTCalculator
 from core.initializer.alpha_initializer import AlphaInitializer
 
-from core.query_handler.params.params_result import TFSTParams, PTParams, TTParams, AlphaParams
+from core.query_handler.params.params_result import TFSTParams, PTParams, TTParams, AlphaParams, TMISpeedParameters, TMIDistanceParameters
 
 @pytest.fixture
 def mock_graph():
@@ -33,8 +33,8 @@ def make_params():
     pt_params = PTParams(
         rte_estimator_params=MagicMock(model_mape=0.1),
         tmi_params=MagicMock(
-            speed_parameters={},
-            distance_parameters={},
+            speed_parameters=TMISpeedParameters.default(),
+            distance_parameters=TMIDistanceParameters.default(),
             use_traffic_service=False,
             traffic_max_timedelta=0
         ),
@@ -0,0 +1,77 @@
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from core.metrics.stage_metrics import StageMetrics, Stage, Counter, measure, count, count_db_queries
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_stages_accumulate_calls_duration_and_counters():
+    metrics = StageMetrics()
+    for _ in range(2):
+        with metrics.measure(Stage.PT):
+            metrics.count(Stage.PT, Counter.CACHE_MISSES)
+    metrics.count(Stage.PT_TIMES, Counter.ROUTES, 5)
+
+    summary = metrics.summary()
+    assert summary["pt"]["calls"] == 2
+    assert summary["pt"]["duration_ms"] >= 0.0
+    assert summary["pt"]["cache_misses"] == 2
+    assert summary["pt_times"] == {"calls": 0, "duration_ms": 0.0, "routes": 5}
+
+def test_stage_is_recorded_when_it_fails():
+    metrics = StageMetrics()
+    with pytest.raises(RuntimeError):
+        with metrics.measure(Stage.DT):
+            raise RuntimeError("boom")
+
+    assert metrics.summary()["dt"]["calls"] == 1
+
+def test_stages_can_be_recorded_from_worker_threads():
+    metrics = StageMetrics()
+
+    def work(_):
+        with metrics.measure(Stage.PT_TIMES):
+            metrics.count(Stage.PT_TIMES, Counter.LAMBDA_INVOKES)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(100)))
+
+    assert metrics.summary()["pt_times"]["calls"] == 100
+    assert metrics.summary()["pt_times"]["lambda_invokes"] == 100
+
+def test_db_queries_are_counted_within_the_block_only(session):
+    metrics = StageMetrics()
+    with metrics.count_db_queries(Stage.SAVE, session):
+        session.execute(text("SELECT 1"))
+        session.execute(text("SELECT 2"))
+    session.execute(text("SELECT 3"))
+
+    assert metrics.summary()["save"]["db_queries"] == 2
+
+def test_emit_prints_an_embedded_metric_format_record(capsys):
+    metrics = StageMetrics()
+    with metrics.measure(Stage.PT):
+        metrics.count(Stage.PT, Counter.CACHE_HITS)
+
+    metrics.emit("M4ESTRO/Test", {"operation": "order"})
+
+    record = json.loads(capsys.readouterr().out.strip())
+    directive = record["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "M4ESTRO/Test"
+    assert ["operation"] in directive["Dimensions"]
+    assert {m["Name"] for m in directive["Metrics"]} == {"pt.calls", "pt.duration", "pt.cache_hits"}
+    assert record["operation"] == "order"
+    assert record["pt.cache_hits"] == [1.0]
+
+def test_helpers_without_metrics_do_nothing(session):
+    with measure(None, Stage.PT), count_db_queries(None, Stage.SAVE, session):
+        count(None, Stage.PT, Counter.CACHE_HITS)
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+from dataclasses import replace
+
+from core.pipeline.estimation_request import EstimationRequest
+from core.pipeline.estimate_store import EstimateStore, StoredEstimate
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+PARAMS = MagicMock()
+GRAPH_VERSION = "v1"
+
+def make_request():
+    return EstimationRequest(
+        site_id=1, carrier_id=10, carrier_name="CarrierA", vertex_id=5,
+        order_time=T0, event_time=T0 + timedelta(hours=2), estimation_time=T0 + timedelta(hours=3)
+    )
+
+def make_estimate(estimated_time_id):
+    return StoredEstimate(estimated_time_id=estimated_time_id, request=make_request(), executor_result=MagicMock(), params=PARAMS, graph_version=GRAPH_VERSION)
+
+def test_estimate_matches_requests_differing_only_in_times():
+    estimate = make_estimate(1)
+    request = make_request()
+
+    assert estimate.matches(replace(request, event_time=T0 + timedelta(hours=5), estimation_time=T0 + timedelta(hours=6)), PARAMS, GRAPH_VERSION)
+    assert not estimate.matches(replace(request, vertex_id=6), PARAMS, GRAPH_VERSION)
+    assert not estimate.matches(replace(request, maybe_shipment_time=T0 + timedelta(hours=1)), PARAMS, GRAPH_VERSION)
+
+def test_estimate_does_not_match_other_params_or_graph():
+    estimate = make_estimate(1)
+    request = make_request()
+
+    assert not estimate.matches(request, MagicMock(), GRAPH_VERSION)
+    assert not estimate.matches(request, PARAMS, "v2")
+
+def test_only_the_latest_saved_estimate_is_returned():
+    store = EstimateStore()
+    store.put(101, make_estimate(7))
+
+    assert store.get(101, latest_estimated_time_id=7).estimated_time_id == 7
+    # Another execution environment saved a newer estimate
+    assert store.get(101, latest_estimated_time_id=8) is None
+    assert store.get(101, latest_estimated_time_id=7) is None
+
+def test_least_recently_used_estimate_is_evicted():
+    store = EstimateStore(max_size=2)
+    store.put(1, make_estimate(1))
+    store.put(2, make_estimate(2))
+    store.get(1, latest_estimated_time_id=1)
+    store.put(3, make_estimate(3))
+
+    assert store.get(2, latest_estimated_time_id=2) is None
+    assert store.get(1, latest_estimated_time_id=1) is not None
+    assert store.get(3, latest_estimated_time_id=3) is not None
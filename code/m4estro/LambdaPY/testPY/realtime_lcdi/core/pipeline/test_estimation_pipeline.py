@@ -0,0 +1,235 @@
+import pytest
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+from dataclasses import replace
+
+import igraph as ig
+
+from model.alpha import AlphaType
+from model.vertex import VertexType
+
+from core.pipeline.estimation_pipeline import EstimationPipeline
+from core.service import calculator_service
+from core.serializer import s3_sc_graph_serializer
+from core.serializer.s3_sc_graph_serializer import S3SCGraphSerializer
+from core.sc_graph.path_extraction.path_dp_manager import PathDPManager
+from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager
+from core.pipeline.estimation_request import EstimationRequest
+from core.dto.time_sequence.time_sequence_dto import TimeSequenceDTO
+from core.calculator.tfst.alpha.alpha_exp_calculator import AlphaExpCalculator
+
+
+@pytest.fixture
+def params():
+    params = MagicMock()
+    params.tfst_params.alpha_params.alpha_type = AlphaType.EXP
+    params.tfst_params.alpha_params.const_alpha_value = 0.5
+    params.confidence_levels.return_value = (0.9, 0.95)
+    return params
+
+
+@pytest.fixture
+def ro_db_connector():
+    connector = MagicMock()
+    connector.session_scope.return_value.__enter__.return_value = MagicMock()
+    return connector
+
+
+@pytest.fixture
+def pipeline(params, ro_db_connector):
+    with patch("core.pipeline.estimation_pipeline.Initializer") as initializer_cls:
+        initializer_cls.return_value.initialize.return_value = MagicMock()
+        pipeline = EstimationPipeline(params=params, sc_graph=MagicMock(), ro_db_connector=ro_db_connector)
+
+    assert initializer_cls.return_value.initialize.call_count == 1
+    return pipeline
+
+
+def make_request(site_id=1, carrier_id=10):
+    estimation_time = datetime.now(timezone.utc)
+    return EstimationRequest(
+        site_id=site_id,
+        carrier_id=carrier_id,
+        carrier_name="CarrierA",
+        vertex_id=5,
+        order_time=estimation_time - timedelta(hours=10),
+        event_time=estimation_time - timedelta(hours=1),
+        estimation_time=estimation_time
+    )
+
+
+def test_matches_same_params_and_graph_version_only(pipeline, params):
+    assert pipeline.matches(params, pipeline.sc_graph)
+    assert pipeline.matches(params, MagicMock(version=pipeline.sc_graph.version))
+    assert not pipeline.matches(params, MagicMock())
+    assert not pipeline.matches(MagicMock(), pipeline.sc_graph)
+
+
+def deserialize_sc_graph(version):
+    graph = ig.Graph(directed=True)
+    graph.add_vertices(2, attributes={"type": [VertexType.MANUFACTURER.value, VertexType.SUPPLIER_SITE.value]})
+    graph.add_edge(1, 0)
+
+    graph_serializer = MagicMock()
+    graph_serializer.deserialize_if_changed.return_value = (graph, version)
+    path_dp_serializer, path_prob_dp_serializer = MagicMock(), MagicMock()
+    path_dp_serializer.deserialize.return_value = PathDPManager(graph.vcount())
+    path_prob_dp_serializer.deserialize.return_value = PathProbDPManager(graph.vcount())
+
+    with patch.object(s3_sc_graph_serializer, "_cached_sc_graph", None):
+        return S3SCGraphSerializer(graph_serializer, path_dp_serializer, path_prob_dp_serializer).deserialize("bucket")
+
+
+def test_get_estimation_pipeline_reused_across_deserialized_graphs_of_same_version(params, ro_db_connector, monkeypatch):
+    monkeypatch.setattr(calculator_service, "_estimation_pipeline", None)
+    first_graph, second_graph = deserialize_sc_graph("etag"), deserialize_sc_graph("etag")
+    assert first_graph is not second_graph
+
+    with patch("core.pipeline.estimation_pipeline.Initializer") as initializer_cls:
+        pipeline = calculator_service.get_estimation_pipeline(params, first_graph, ro_db_connector)
+
+        assert calculator_service.get_estimation_pipeline(params, second_graph, ro_db_connector) is pipeline
+        assert calculator_service.get_estimation_pipeline(params, deserialize_sc_graph("etag-2"), ro_db_connector) is not pipeline
+
+    assert initializer_cls.return_value.initialize.call_count == 2
+
+
+def test_alpha_calculator_shared_by_tt_weight(pipeline):
+    first = pipeline._get_alpha_calculator(0.3)
+
+    assert isinstance(first, AlphaExpCalculator)
+    assert first.tt_weight == 0.3
+    assert pipeline._get_alpha_calculator(0.3) is first
+    assert pipeline._get_alpha_calculator(0.7) is not first
+
+
+def test_estimate_many_loads_reference_data_once(pipeline, ro_db_connector):
+    requests = [make_request(1, 10), make_request(1, 10), make_request(2, 20), make_request(3, 30)]
+    reference_data = {(1, 10): MagicMock(), (2, 20): MagicMock()}
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader") as loader_cls, \
+         patch.object(EstimationPipeline, "_execute", side_effect=lambda request, data, maybe_carrier_matrix=None, maybe_metrics=None: ("result", request.pair())):
+        loader_cls.return_value.load_many.return_value = reference_data
+        results = pipeline.estimate_many(requests)
+
+    assert loader_cls.return_value.load_many.call_count == 1
+    assert ro_db_connector.session_scope.call_count == 1
+
+    assert [r.request for r in results] == requests
+    assert [r.success for r in results] == [True, True, True, False]
+    assert results[2].maybe_executor_result == ("result", (2, 20))
+    assert "site ID 3" in results[3].maybe_error
+
+
+def test_estimate_many_isolates_failures(pipeline):
+    requests = [make_request(1, 10), make_request(2, 20)]
+
+    def execute(request, data, maybe_carrier_matrix=None, maybe_metrics=None):
+        if request.site_id == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader") as loader_cls, \
+         patch.object(EstimationPipeline, "_execute", side_effect=execute):
+        loader_cls.return_value.load_many.return_value = {(1, 10): MagicMock(), (2, 20): MagicMock()}
+        results = pipeline.estimate_many(requests)
+
+    assert results[0].maybe_error == "boom"
+    assert isinstance(results[0].maybe_exception, ValueError)
+    assert results[1].maybe_executor_result == "ok"
+
+
+def test_estimate_many_on_threads_keeps_request_order(pipeline):
+    requests = [make_request(site_id, 10) for site_id in range(1, 9)]
+    threads = set()
+
+    def execute(request, data, maybe_carrier_matrix=None, maybe_metrics=None):
+        threads.add(threading.get_ident())
+        # Later requests finish first
+        time.sleep(0.01 * (9 - request.site_id))
+        return request.site_id
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader") as loader_cls, \
+         patch.object(EstimationPipeline, "_execute", side_effect=execute):
+        loader_cls.return_value.load_many.return_value = {request.pair(): MagicMock() for request in requests}
+        results = pipeline.estimate_many(requests, max_workers=4)
+
+    assert [r.maybe_executor_result for r in results] == list(range(1, 9))
+    assert 1 < len(threads) <= 4
+
+
+def test_estimate_carriers_shares_one_carrier_matrix(pipeline):
+    base = make_request(1, 10)
+    requests = [base, replace(base, carrier_id=20, carrier_name="CarrierB")]
+    matrices = []
+
+    def execute(request, data, maybe_carrier_matrix=None, maybe_metrics=None):
+        matrices.append(maybe_carrier_matrix)
+        return request.carrier_name
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader") as loader_cls, \
+         patch.object(EstimationPipeline, "_execute", side_effect=execute):
+        loader_cls.return_value.load_many.return_value = {(1, 10): MagicMock(), (1, 20): MagicMock()}
+        results = pipeline.estimate_carriers(requests)
+
+    assert [r.maybe_executor_result for r in results] == ["CarrierA", "CarrierB"]
+    assert matrices[0] is matrices[1]
+    assert matrices[0].carrier_names == ["CarrierA", "CarrierB"]
+
+
+def test_estimate_carriers_rejects_different_shipments(pipeline):
+    base = make_request(1, 10)
+
+    with pytest.raises(ValueError):
+        pipeline.estimate_carriers([base, replace(base, carrier_id=20, vertex_id=6)])
+
+
+def make_previous(request, shipment_time):
+    previous = MagicMock()
+    previous.time_sequence = TimeSequenceDTO(
+        order_time=request.order_time,
+        shipment_time=shipment_time,
+        event_time=request.event_time - timedelta(minutes=30),
+        estimation_time=request.estimation_time - timedelta(minutes=30)
+    )
+    return previous
+
+
+def test_estimate_with_previous_recomputes_only_pt(pipeline):
+    request = make_request()
+    previous = make_previous(request, shipment_time=request.order_time + timedelta(hours=2))
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader"), \
+         patch.object(pipeline.dto_factory, "create_time_deviation_partial_input_dto"), \
+         patch.object(EstimationPipeline, "_execute") as execute, \
+         patch.object(EstimationPipeline, "_create_executor") as create_executor:
+        result = pipeline.estimate(request, maybe_previous=previous, maybe_disrupted_vertex_ids=frozenset({7}))
+
+    execute.assert_not_called()
+    executor = create_executor.return_value
+    assert result is executor.reexecute_pt.return_value
+
+    kwargs = executor.reexecute_pt.call_args.kwargs
+    assert kwargs["previous"] is previous
+    assert kwargs["pt_base_input"].bypass_cache
+    assert kwargs["pt_base_input"].maybe_disruption.vertex_ids == frozenset({7})
+    assert kwargs["pt_base_input"].maybe_disruption.previous_pt is previous.tfst_executor_result.pt
+    assert kwargs["time_sequence"].shipment_time == previous.time_sequence.shipment_time
+    assert kwargs["time_sequence"].estimation_time == request.estimation_time
+
+
+def test_estimate_with_previous_of_another_stage_is_computed_in_full(pipeline):
+    request = make_request()
+    # Dispatch stage then, shipment stage now
+    previous = make_previous(request, shipment_time=request.estimation_time - timedelta(minutes=10))
+
+    with patch("core.pipeline.estimation_pipeline.ReferenceDataLoader"), \
+         patch.object(EstimationPipeline, "_execute", return_value="full") as execute, \
+         patch.object(EstimationPipeline, "_create_executor") as create_executor:
+        result = pipeline.estimate(request, maybe_previous=previous)
+
+    assert result == "full"
+    execute.assert_called_once()
+    create_executor.return_value.reexecute_pt.assert_not_called()
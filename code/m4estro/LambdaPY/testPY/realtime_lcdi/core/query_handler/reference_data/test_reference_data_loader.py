@@ -0,0 +1,151 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from model.base import Base
+from model.country import Country
+from model.location import Location
+from model.supplier import Supplier
+from model.site import Site
+from model.carrier import Carrier
+from model.alpha_opt import AlphaOpt
+from model.shipment_time_gamma import ShipmentTimeGamma
+from model.shipment_time_sample import ShipmentTimeSample
+from model.shipment_time import ShipmentTime
+from model.dispatch_time_gamma import DispatchTimeGamma
+from model.dispatch_time_sample import DispatchTimeSample
+from model.dispatch_time import DispatchTime
+
+from core.query_handler.query_result import (
+    ShipmentTimeGammaResult, ShipmentTimeSampleResult,
+    DispatchTimeGammaResult, DispatchTimeSampleResult
+)
+from core.query_handler.reference_data.reference_data_loader import ReferenceDataLoader
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine)()
+
+    session.add(Country(id=1, name="TestCountry", code="TC", total_holidays=10, weekend_start=6, weekend_end=7))
+    session.add(Location(name="LocationA", city="TestCity", state="TestState", country_code="TC", latitude=12.34, longitude=56.78))
+    session.add(Location(name="LocationB", city="TestCity", state="TestState", country_code="TC", latitude=12.34, longitude=56.78))
+    session.add(Supplier(id=1, name="TestSupplier", manufacturer_supplier_id=12345))
+    session.commit()
+
+    session.add_all([
+        Site(id=100, supplier_id=1, location_name="LocationA", n_rejections=0, n_orders=10),
+        Site(id=200, supplier_id=1, location_name="LocationB", n_rejections=0, n_orders=10),
+        Carrier(id=1000, name="CarrierA", carrier_17track_id="A", n_losses=0, n_orders=5),
+        Carrier(id=2000, name="CarrierB", carrier_17track_id="B", n_losses=0, n_orders=5),
+    ])
+    session.commit()
+
+    session.add_all([
+        AlphaOpt(site_id=100, carrier_id=1000, tt_weight=0.3),
+        AlphaOpt(site_id=200, carrier_id=2000, tt_weight=0.7),
+
+        DispatchTimeGamma(site_id=100, shape=1.7, scale=0.8, loc=0.0, skewness=0.1, kurtosis=0.2, mean=2.5, std_dev=0.3, n=50),
+        ShipmentTimeGamma(site_id=100, carrier_id=1000, shape=2.0, scale=1.5, loc=0.0, skewness=0.1, kurtosis=0.2, mean=3.0, std_dev=0.5, n=100),
+
+        DispatchTimeSample(site_id=200, median=4.5, mean=5.0, std_dev=0.8, n=2),
+        DispatchTime(site_id=200, hours=4.0),
+        DispatchTime(site_id=200, hours=6.0),
+        ShipmentTimeSample(site_id=200, carrier_id=2000, median=6.5, mean=7.0, std_dev=1.0, n=3),
+        ShipmentTime(site_id=200, carrier_id=2000, hours=5.0),
+        ShipmentTime(site_id=200, carrier_id=2000, hours=6.5),
+        ShipmentTime(site_id=200, carrier_id=2000, hours=7.0),
+        ShipmentTime(site_id=200, carrier_id=1000, hours=99.0),
+    ])
+    session.commit()
+
+    yield session
+    session.close()
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+def test_load_gamma(session, engine):
+    statements = count_statements(engine)
+
+    result = ReferenceDataLoader(session).load(site_id=100, carrier_id=1000)
+
+    assert len(statements) == 1
+    assert result.alpha_opt.tt_weight == 0.3
+    assert isinstance(result.dispatch_time_result, DispatchTimeGammaResult)
+    assert result.dispatch_time_result.dt_gamma.shape == 1.7
+    assert isinstance(result.shipment_time_result, ShipmentTimeGammaResult)
+    assert result.shipment_time_result.dt_gamma.scale == 1.5
+
+def test_load_sample_with_raw_hours(session, engine):
+    statements = count_statements(engine)
+
+    result = ReferenceDataLoader(session).load(site_id=200, carrier_id=2000)
+
+    assert len(statements) == 2
+    assert isinstance(result.dispatch_time_result, DispatchTimeSampleResult)
+    assert sorted(result.dispatch_time_result.dt_x) == [4.0, 6.0]
+    assert isinstance(result.shipment_time_result, ShipmentTimeSampleResult)
+    assert sorted(result.shipment_time_result.dt_x) == [5.0, 6.5, 7.0]
+
+def test_load_sample_with_quantile_sketch(session, engine):
+    for sample in session.query(ShipmentTimeSample).all() + session.query(DispatchTimeSample).all():
+        sample.quantiles = [1.0] * 201
+        sample.quantiles_n = sample.n
+    session.commit()
+    statements = count_statements(engine)
+
+    result = ReferenceDataLoader(session).load(site_id=200, carrier_id=2000)
+
+    assert len(statements) == 1
+    assert result.dispatch_time_result.dt_x == [1.0] * 201         # type: ignore
+    assert result.shipment_time_result.dt_x == [1.0] * 201         # type: ignore
+
+def test_load_sample_with_stale_quantile_sketch_uses_raw_hours(session):
+    for sample in session.query(ShipmentTimeSample).all() + session.query(DispatchTimeSample).all():
+        sample.quantiles = [1.0] * 201
+        sample.quantiles_n = sample.n - 1
+    session.commit()
+
+    result = ReferenceDataLoader(session).load(site_id=200, carrier_id=2000)
+
+    assert sorted(result.dispatch_time_result.dt_x) == [4.0, 6.0]          # type: ignore
+    assert sorted(result.shipment_time_result.dt_x) == [5.0, 6.5, 7.0]     # type: ignore
+
+def test_load_many(session):
+    results = ReferenceDataLoader(session).load_many([(100, 1000), (200, 2000), (100, 2000)])
+
+    assert set(results) == {(100, 1000), (200, 2000)}             # No alpha_opt nor shipment data for (100, 2000)
+    assert results[(200, 2000)].alpha_opt.tt_weight == 0.7
+
+def test_load_many_empty(session):
+    assert ReferenceDataLoader(session).load_many([]) == {}
+
+def test_load_incomplete_raises(session):
+    with pytest.raises(ValueError):
+        ReferenceDataLoader(session).load(site_id=100, carrier_id=2000)
+    with pytest.raises(ValueError):
+        ReferenceDataLoader(session).load(site_id=999, carrier_id=1000)
+
+def test_load_duplicates_uses_latest(session):
+    session.add_all([
+        DispatchTimeGamma(site_id=100, shape=3.0, scale=0.8, loc=0.0, skewness=0.1, kurtosis=0.2, mean=2.5, std_dev=0.3, n=50),
+        ShipmentTimeGamma(site_id=100, carrier_id=1000, shape=4.0, scale=1.5, loc=0.0, skewness=0.1, kurtosis=0.2, mean=3.0, std_dev=0.5, n=100),
+    ])
+    session.commit()
+
+    with patch("core.query_handler.reference_data.reference_data_loader.logger") as mock_logger:
+        result = ReferenceDataLoader(session).load(site_id=100, carrier_id=1000)
+
+    assert result.dispatch_time_result.dt_gamma.shape == 3.0      # type: ignore
+    assert result.shipment_time_result.dt_gamma.shape == 4.0      # type: ignore
+    mock_logger.warning.assert_called_once()
@@ -1,10 +1,11 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from model.alpha import Alpha
+from model.alpha import Alpha, AlphaType
 from model.alpha_opt import AlphaOpt
 from model.country import Country
 from model.location import Location
@@ -18,14 +19,21 @@ from model.shipment_time import ShipmentTime
 from model.dispatch_time_gamma import DispatchTimeGamma
 from model.dispatch_time_sample import DispatchTimeSample
 from model.estimated_time import EstimatedTime
+from model.latest_estimated_time import LatestEstimatedTime
 from model.tmi import TMI
+from model.vertex import Vertex, VertexType
 from model.wmi import WMI
 
 from core.calculator.dt.dt_dto import DT_DTO
 from core.calculator.dt.holiday.holiday_dto import HolidayResultDTO
 from core.executor.executor import ExecutorResult, TimeSequenceDTO
-from core.query_handler.params.params_result import PTParams, TMIParams, WMIParams, TMISpeedParameters, TMIDistanceParameters
+from core.query_handler.params.params_result import PTParams, PTMode, TMIParams, WMIParams, TMISpeedParameters, TMIDistanceParameters
 from core.query_handler.query_handler import QueryHandler
+from core.formatter.formatter import Formatter, PAYLOAD_VERSION
+from core.metrics.stage_metrics import StageMetrics
+
+from stats_utils import compute_sample_ci
+from quantile_sketch import QuantileSketch
 
 @pytest.fixture(scope="function")
 def session():
@@ -120,6 +128,14 @@ def test_get_order(seeded_session):
     assert order.site_id == 100
     assert order.carrier_id == 1000
 
+def test_get_orders(seeded_session):
+    handler = QueryHandler(seeded_session)
+    orders = handler.get_orders([1, 1, 999], with_site_and_carrier=True)
+
+    assert list(orders) == [1]
+    assert orders[1].site is not None
+    assert orders[1].carrier is not None
+
 def test_get_site(seeded_session):
     handler = QueryHandler(seeded_session)
     site = handler.get_site(100)
@@ -171,10 +187,42 @@ def test_get_dispatch_time_sample(seeded_session):
     result = handler.get_dispatch_time(200)
     assert hasattr(result, "dt_sample")
 
-def test_save_estimated_time(seeded_session):
+def test_get_delivery_time_sample_uses_quantile_sketch(seeded_session):
+    sample = seeded_session.query(ShipmentTimeSample).filter_by(site_id=200, carrier_id=2000).one()
+    sketch = QuantileSketch.from_sample([5.0, 6.5, 7.0, 9.0])
+    sample.quantiles = sketch.to_list()
+    sample.quantiles_n = sample.n
+    seeded_session.commit()
+
     handler = QueryHandler(seeded_session)
-    now = datetime.now(timezone.utc)
+    result = handler.get_delivery_time(200, 2000)
+
+    assert result.dt_x == sketch.to_list()              # type: ignore
+    assert compute_sample_ci(result.dt_x, 0.9) == pytest.approx(sketch.ci(0.9))     # type: ignore
+
+def test_get_dispatch_time_sample_uses_quantile_sketch(seeded_session):
+    sample = seeded_session.query(DispatchTimeSample).filter_by(site_id=200).one()
+    sketch = QuantileSketch.from_sample([4.0, 4.5, 6.0])
+    sample.quantiles = sketch.to_list()
+    sample.quantiles_n = sample.n
+    seeded_session.commit()
 
+    handler = QueryHandler(seeded_session)
+    result = handler.get_dispatch_time(200)
+
+    assert result.dt_x == sketch.to_list()              # type: ignore
+
+def test_get_dispatch_time_sample_ignores_stale_quantile_sketch(seeded_session):
+    raw_x = QueryHandler(seeded_session).get_dispatch_time(200).dt_x                # type: ignore
+
+    sample = seeded_session.query(DispatchTimeSample).filter_by(site_id=200).one()
+    sample.quantiles = QuantileSketch.from_sample([4.0, 4.5, 6.0]).to_list()
+    sample.quantiles_n = sample.n + 1
+    seeded_session.commit()
+
+    assert QueryHandler(seeded_session).get_dispatch_time(200).dt_x == raw_x         # type: ignore
+
+def make_executor_result(now):
     class DummyValue:
         def __init__(self, value):
             self.value = value
@@ -183,7 +231,7 @@ def test_save_estimated_time(seeded_session):
 
     class DummyAlpha:
         def __init__(self):
-            self.type_ = "EXP"
+            self.type_ = AlphaType.EXP
             self.maybe_tt_weight = 0.1
             self.maybe_tau = 0.5
             self.maybe_gamma = None
@@ -223,10 +271,12 @@ def test_save_estimated_time(seeded_session):
                 max_paths=5,
                 ext_data_min_probability=0.05,
                 confidence=0.95,
+                mode=PTMode.DP,
+                dp_prefix_hops=2,
                 rte_estimator_params=MagicMock(model_mape=0.15, use_model=True),
                 wmi_params=MagicMock(
                     use_weather_service=True,
-                    wmi_max_timediff=2.0,
+                    weather_max_timedelta=2.0,
                     step_distance_km=10.0,
                     max_points=100.0
                 ),
@@ -313,9 +363,19 @@ def test_save_estimated_time(seeded_session):
         )
     )
 
+    return executor_result
+
+def test_save_estimated_time(seeded_session):
+    handler = QueryHandler(seeded_session, maybe_payload_formatter=Formatter().format_et_payload)
+    now = datetime.now(timezone.utc)
+    executor_result = make_executor_result(now)
+
     alpha_opt = handler.get_alpha_opt(100, 1000)
     assert alpha_opt is not None
 
+    seeded_session.add(Vertex(id=5, name="LocationA", type=VertexType.SUPPLIER_SITE))
+    seeded_session.commit()
+
     et = handler.save_estimated_time(
         order_id=1,
         vertex_id=5,
@@ -349,6 +409,8 @@ def test_save_estimated_time(seeded_session):
     assert et.estimation_params.consider_working_holidays is False
     assert et.estimation_params.consider_weekends_holidays is True
     assert et.estimation_params.pt_confidence == 0.95
+    assert et.estimation_params.pt_mode == PTMode.DP.value
+    assert et.estimation_params.pt_dp_prefix_hops == 2
 
 
     tmi_data = seeded_session.query(TMI).filter_by(estimated_time_id=et_id).all()
@@ -357,6 +419,85 @@ def test_save_estimated_time(seeded_session):
     wmi_data = seeded_session.query(WMI).filter_by(estimated_time_id=et_id).all()
     assert len(wmi_data) == 3
 
+    assert et.payload is not None
+    assert et.payload["id"] == et_id
+    assert et.payload["vertex"] == {"id": 5, "name": "LocationA", "type": "SUPPLIER_SITE"}
+    assert et.payload["indicators"]["EODT"] == 3.0
+    assert et.payload["indicators"]["DT"]["holidays"]["closure"] == {"n": 0, "days": []}
+    assert et.payload_version == PAYLOAD_VERSION
+    assert et.payload["indicators"]["parameters"]["PT"]["mode"] == PTMode.DP.value
+
+    latest = seeded_session.query(LatestEstimatedTime).filter_by(order_id=1).one()
+    assert latest.estimated_time_id == et_id
+    assert latest.vertex_id == 5
+    assert latest.EODT == 3.0
+    assert handler.get_latest_estimated_time_id(1) == et_id
+    assert handler.get_latest_estimated_time_id(999) is None
+
+
+def test_save_estimated_times_isolates_failures(seeded_session):
+    handler = QueryHandler(seeded_session)
+    executor_result = make_executor_result(datetime.now(timezone.utc))
+
+    seeded_session.add(Vertex(id=5, name="LocationA", type=VertexType.SUPPLIER_SITE))
+    seeded_session.commit()
+
+    results = handler.save_estimated_times([
+        (1, 5, "PENDING", executor_result),
+        (1, 5, "PENDING", SimpleNamespace()),                              # type: ignore
+        (1, 5, "IN_TRANSIT", executor_result)
+    ])
+
+    assert isinstance(results[0], EstimatedTime)
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[2], EstimatedTime)
+    assert results[0].payload is None                   # No payload formatter: formatted when retrieved
+
+    seeded_session.expire_all()
+    assert seeded_session.query(EstimatedTime).count() == 2
+    assert seeded_session.query(TMI).count() == 4
+    assert seeded_session.query(LatestEstimatedTime).filter_by(order_id=1).one().estimated_time_id in {results[0].id, results[2].id}
+
+
+def test_save_estimated_times_records_stage_metrics(seeded_session):
+    handler = QueryHandler(seeded_session)
+    executor_result = make_executor_result(datetime.now(timezone.utc))
+
+    seeded_session.add(Vertex(id=5, name="LocationA", type=VertexType.SUPPLIER_SITE))
+    seeded_session.commit()
+
+    metrics = StageMetrics()
+    handler.save_estimated_times([
+        (1, 5, "PENDING", executor_result),
+        (1, 5, "PENDING", SimpleNamespace()),                              # type: ignore
+    ], maybe_metrics=metrics)
+
+    save = metrics.summary()["save"]
+    assert save["calls"] == 1
+    assert save["records"] == 1
+    assert save["db_queries"] > 0
+
+
+def test_upsert_latest_estimated_time_keeps_newest(seeded_session):
+    handler = QueryHandler(seeded_session)
+    base_time = datetime(2025, 7, 1, 12, 0)
+
+    def upsert(et_id, hours):
+        handler._upsert_latest_estimated_time(SimpleNamespace(                  # type: ignore
+            id=et_id, order_id=1, vertex_id=5, estimation_time=base_time + timedelta(hours=hours),
+            status="IN_TRANSIT", EODT=float(hours), EDD=base_time + timedelta(days=1)
+        ))
+        seeded_session.expire_all()
+        return seeded_session.query(LatestEstimatedTime).filter_by(order_id=1).one()
+
+    assert upsert(10, hours=2).estimated_time_id == 10
+    assert upsert(11, hours=5).estimated_time_id == 11
+    # An estimate older than the stored one does not replace it
+    latest = upsert(12, hours=3)
+    assert latest.estimated_time_id == 11
+    assert latest.EODT == 5.0
+    assert seeded_session.query(LatestEstimatedTime).count() == 1
+
 
 from model.param import Base, Param, ParamName, ParamGeneralCategory, ParamCategory
 from model.alpha import AlphaType
@@ -0,0 +1,99 @@
+import pytest
+import igraph as ig
+
+from model.vertex import VertexType
+
+from core.sc_graph.path_extraction.path_extraction_manager import PathExtractionManager
+from core.sc_graph.path_prob.path_prob_manager import PathProbManager
+from core.sc_graph.remaining_time.remaining_time_dp_manager import RemainingTimeDPManager, UNTIMED_VERTEX_TYPES
+from core.sc_graph.sc_graph import SCGraph
+from core.sc_graph.utils import VertexIdentifier
+
+from graph_config import N_ORDERS_BY_CARRIER_ATTR, V_ID_ATTR, TYPE_ATTR, AVG_ORI_ATTR, AVG_OTI_ATTR
+
+@pytest.fixture
+def graph():
+    # S -> A -> B -> M (manufacturer), S -> B, A -> X (dead end)
+    g = ig.Graph(directed=True)
+    g.add_vertices(5)
+    g.vs["name"] = ["S", "A", "B", "M", "X"]
+    g.vs[V_ID_ATTR] = [1, 2, 3, 4, 5]
+    g.vs[TYPE_ATTR] = [
+        VertexType.SUPPLIER_SITE.value, VertexType.INTERMEDIATE.value, VertexType.INTERMEDIATE.value,
+        VertexType.MANUFACTURER.value, VertexType.INTERMEDIATE.value
+    ]
+    g.vs[AVG_ORI_ATTR] = [1.0, 2.0, 3.0, 4.0, 5.0]
+    g.vs[N_ORDERS_BY_CARRIER_ATTR] = [
+        {"dhl": 10, "ups": 5}, {"dhl": 6, "ups": 5, "fedex": 1}, {"dhl": 8}, {"dhl": 10, "ups": 5}, {"fedex": 1}
+    ]
+
+    g.add_edges([(0, 1), (0, 2), (1, 2), (2, 3), (1, 4), (1, 3)])
+    g.es[AVG_OTI_ATTR] = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+    g.es[N_ORDERS_BY_CARRIER_ATTR] = [
+        {"dhl": 6, "ups": 5}, {"dhl": 4}, {"dhl": 4}, {"dhl": 8}, {"fedex": 1}, {"dhl": 2, "ups": 5}
+    ]
+    return g
+
+@pytest.fixture
+def sc_graph(graph):
+    manufacturer = graph.vs.find(name="M")
+    return SCGraph(
+        graph,
+        path_extraction_manager=PathExtractionManager(graph, maybe_manufacturer=manufacturer),
+        path_prob_manager=PathProbManager(graph, maybe_manufacturer=manufacturer),
+        maybe_manufacturer=manufacturer
+    )
+
+def enumerated_sums(sc_graph, source, carriers):
+    g = sc_graph.graph
+    paths = sc_graph.extract_paths(source, carriers, by=VertexIdentifier.INDEX).paths
+
+    mass, ori, oti = 0.0, 0.0, 0.0
+    for p in paths:
+        mass += p.prob
+        ori += p.prob * sum(0.0 if g.vs[v][TYPE_ATTR] in UNTIMED_VERTEX_TYPES else g.vs[v][AVG_ORI_ATTR] for v in p.path[1:])
+        oti += p.prob * sum(g.es[g.get_eid(s, d)][AVG_OTI_ATTR] for s, d in zip(p.path, p.path[1:]))
+    return len(paths), mass, ori, oti
+
+@pytest.mark.parametrize("carriers", [["dhl"], ["ups"], ["dhl", "ups"]])
+@pytest.mark.parametrize("source", [1, 2, 3])
+def test_dp_sums_match_path_enumeration(sc_graph, source, carriers):
+    dp_manager = sc_graph.remaining_time_dp_manager
+    prefixes = dp_manager.get_prefixes(sc_graph.graph.vs.find(**{V_ID_ATTR: source}).index, carriers, k_hops=0)
+
+    n_paths, mass, ori, oti = enumerated_sums(sc_graph, source, carriers)
+    assert sum(p.n_paths for p in prefixes) == n_paths
+    assert sum(p.prob for p in prefixes) == pytest.approx(mass)
+    assert sum(p.tail_ori for p in prefixes) == pytest.approx(ori)
+    assert sum(p.tail_oti for p in prefixes) == pytest.approx(oti)
+
+def test_prefixes_split_the_paths_up_to_k_hops(sc_graph):
+    prefixes = sc_graph.remaining_time_dp_manager.get_prefixes(0, ["dhl", "ups"], k_hops=1)
+
+    by_path = {tuple(p.path): p for p in prefixes}
+    assert set(by_path) == {(0, 1), (0, 2)}
+
+    n_paths, mass, _, oti = enumerated_sums(sc_graph, 1, ["dhl", "ups"])
+    assert sum(p.n_paths for p in prefixes) == n_paths
+    assert sum(p.prob for p in prefixes) == pytest.approx(mass)
+    # The route of the prefix is evaluated by the PT calculator, not in the tail
+    assert sum(p.tail_oti for p in prefixes) == pytest.approx(oti - (by_path[(0, 1)].prob * 10.0 + by_path[(0, 2)].prob * 20.0))
+
+def test_prefix_reaching_the_manufacturer_stops_early(sc_graph):
+    prefixes = sc_graph.remaining_time_dp_manager.get_prefixes(2, ["dhl"], k_hops=5)
+
+    assert [(p.path, p.prob, p.n_paths, p.tail_ori, p.tail_oti) for p in prefixes] == [([2, 3], 1.0, 1, 0.0, 0.0)]
+
+def test_carriers_without_paths_give_no_prefixes(sc_graph):
+    dp_manager = sc_graph.remaining_time_dp_manager
+
+    assert dp_manager.get_prefixes(0, ["fedex"], k_hops=0) == []
+    assert dp_manager.get_prefixes(1, ["fedex"], k_hops=0) == []
+    assert dp_manager.get("fedex").mass[1] == 0.0
+
+def test_cyclic_graph_is_not_available(graph):
+    graph.add_edges([(2, 1)])
+    dp_manager = RemainingTimeDPManager(graph)
+
+    assert not dp_manager.is_available()
+    assert dp_manager.get_prefixes(0, ["dhl"], k_hops=0) == []
@@ -2,6 +2,7 @@ import pytest
 import igraph as ig
 
 from core.sc_graph.path_extraction.path_extraction_manager import PathExtractionManager
+from core.sc_graph.path_extraction.path_dp_manager import VertexPathDPManager
 from core.sc_graph.path_prob.path_prob_manager import PathProbManager
 from core.dto.path.paths_dto import PathsIdDTO
 from core.sc_graph.sc_graph import SCGraph
@@ -323,3 +324,108 @@ def test_extract_paths_empty_carriers_list(sc_graph_fixture):
     )
 
 
+
+def test_get_paths_through_vertex(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    a, b, c, d = (graph.vs.find(name=name).index for name in ["A", "B", "C", "D"])
+
+    sc_graph.extract_paths("A", ["carrier1"])
+    v_dp_manager = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index)
+
+    through_c = v_dp_manager.get_paths_through_vertex(c)
+    assert set(through_c) == {a, c}
+    assert through_c[c] == [0]
+    assert set(v_dp_manager.get_paths_through_vertex(d)) == {a, b, c, d}
+
+    # Every referenced path traverses the vertex
+    paths = v_dp_manager.get(a)
+    for path_id in through_c[a]:
+        assert c in paths[path_id]
+
+def test_get_paths_through_edge(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    a, b, c = (graph.vs.find(name=name).index for name in ["A", "B", "C"])
+
+    sc_graph.extract_paths("A", ["carrier1"])
+
+    assert set(sc_graph.get_paths_through_edge(a, b)) == {a}
+    assert sc_graph.get_paths_through_edge(b, c) == {}
+
+    # Every referenced path traverses the edge
+    paths = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index).get(a)
+    for path_id in sc_graph.get_paths_through_edge(a, b)[a]:
+        assert paths[path_id][0] == b
+
+def test_get_paths_through_vertices(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    source = graph.vs.find(name="A")
+    c = graph.vs.find(name="C")
+
+    extracted = {tuple(p.path) for p in sc_graph.extract_paths("A", ["carrier1"], zero_prob_paths=True).paths}
+    through_c = sc_graph.get_paths_through_vertices(source, [c.index])
+
+    assert through_c
+    assert through_c == {path for path in extracted if c[V_ID_ATTR] in path}
+    assert sc_graph.get_paths_through_vertices(source, []) == set()
+
+def test_invalidate_edge_recomputes_only_affected_sources(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    a, b, c = (graph.vs.find(name=name).index for name in ["A", "B", "C"])
+    expected = sc_graph.extract_paths("A", ["carrier1"])
+    v_dp_manager = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index)
+    b_paths = v_dp_manager.get(b)
+
+    assert sorted(sc_graph.invalidate_edge(a, c)) == [a]
+    assert not v_dp_manager.contains(a)
+    assert v_dp_manager.get(b) is b_paths
+    assert sc_graph.get_paths_through_edge(a, c) == {}
+    assert a not in sc_graph.get_paths_through_vertex(b)
+    assert not sc_graph.path_prob_manager.dp_manager.contains("carrier1", a)
+
+    assert sc_graph.extract_paths("A", ["carrier1"]) == expected
+    assert set(sc_graph.get_paths_through_edge(a, c)) == {a}
+
+def test_invalidated_sources_are_not_merged_back(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    sc_graph.extract_paths("A", ["carrier1"])
+    v_dp_manager = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index)
+    stale = VertexPathDPManager.from_json(v_dp_manager.to_json())
+    a = sc_graph.graph.vs.find(name="A").index
+
+    assert a in sc_graph.invalidate_vertex(a)
+    v_dp_manager.merge(stale)
+
+    assert not v_dp_manager.contains(a)
+    assert sc_graph.get_paths_through_vertex(a) == {}
+
+def test_reverse_index_is_serialized_with_the_paths(sc_graph_fixture, mocker):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    a, b, d = (graph.vs.find(name=name).index for name in ["A", "B", "D"])
+    sc_graph.extract_paths("A", ["carrier1"])
+    v_dp_manager = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index)
+
+    index_source = mocker.spy(VertexPathDPManager, "_index_source")
+    loaded = VertexPathDPManager.from_json(v_dp_manager.to_json())
+
+    index_source.assert_not_called()
+    assert loaded.get_paths_through_vertex(d) == v_dp_manager.get_paths_through_vertex(d)
+    assert loaded.get_paths_through_edge(a, b) == v_dp_manager.get_paths_through_edge(a, b)
+
+def test_reverse_index_is_rebuilt_for_shards_without_it(sc_graph_fixture):
+    sc_graph = sc_graph_fixture
+    graph = sc_graph.graph
+    a, b, d = (graph.vs.find(name=name).index for name in ["A", "B", "D"])
+    sc_graph.extract_paths("A", ["carrier1"])
+    v_dp_manager = sc_graph.path_extraction_manager.dp_manager.get(sc_graph.manufacturer.index)
+
+    data = v_dp_manager.to_json()
+    del data["reverse_index"]
+    loaded = VertexPathDPManager.from_json(data)
+
+    assert loaded.get_paths_through_vertex(d) == v_dp_manager.get_paths_through_vertex(d)
+    assert loaded.get_paths_through_edge(a, b) == v_dp_manager.get_paths_through_edge(a, b)
@@ -0,0 +1,37 @@
+import io
+import hashlib
+from botocore.exceptions import ClientError
+
+class FakeS3:
+    """In-memory S3 client supporting the conditional reads and writes used by the DP serializers."""
+    def __init__(self):
+        self.objects = {}
+        self.put_keys = []
+
+    def _etag(self, body):
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def put_object(self, Bucket, Key, Body, ContentType, ContentEncoding=None, IfMatch=None, IfNoneMatch=None):
+        current = self.objects.get((Bucket, Key))
+        if IfNoneMatch == "*" and current is not None:
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": "Exists"}}, "PutObject")
+        if IfMatch is not None and (current is None or current[2] != IfMatch):
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": "Changed"}}, "PutObject")
+
+        etag = self._etag(Body)
+        self.objects[(Bucket, Key)] = (Body, ContentEncoding, etag)
+        self.put_keys.append(Key)
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+
+        body, encoding, etag = self.objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+
+        response = {"Body": io.BytesIO(body), "ETag": etag}
+        if encoding:
+            response["ContentEncoding"] = encoding
+        return response
@@ -1,149 +1,115 @@
-import json
 import pytest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
 
-from core.serializer.dp.s3_path_dp_manager_serializer import S3PathDPManagerSerializer, PATH_DP_MANAGER_KEY
-from core.sc_graph.path_extraction.path_dp_manager import PathDPManager, VertexPathDPManager, PathMem
+from core.serializer.dp.s3_path_dp_manager_serializer import S3PathDPManagerSerializer
+from core.sc_graph.path_extraction.path_dp_manager import PathDPManager
 
-@pytest.fixture
-def serializer():
-    return S3PathDPManagerSerializer()
+from fake_s3 import FakeS3
 
+BUCKET = "test-bucket"
+VERSION = "v1"
 
 @pytest.fixture
-def mock_s3():
-    with patch("core.serializer.dp.s3_path_dp_manager_serializer.s3") as mock:
-        yield mock
-
+def serializer():
+    return S3PathDPManagerSerializer()
 
 @pytest.fixture
-def dp_manager_fixture():
-    n = 5
-    dp_manager = PathDPManager(n) 
-    for i in range(n):
-        v_path_dp_manager = VertexPathDPManager(n)
-        for j in range(n):
-            v_path_dp_manager.mem[j] = PathMem()
-            v_path_dp_manager.mem[j].paths.append([1, 2, 3] * j)  # Example paths
-        
-        dp_manager.v_path_dp_managers[i] = v_path_dp_manager
-
+def fake_s3():
+    fake = FakeS3()
+    with patch("core.serializer.dp.s3_path_dp_manager_serializer.s3", new=fake):
+        yield fake
+
+def make_dp_manager(n, entries):
+    dp_manager = PathDPManager(n)
+    for target_index, v_index, path in entries:
+        dp_manager.get(target_index).add(v_index, path)
     return dp_manager
 
-def test_serialize_success(serializer, mock_s3, dp_manager_fixture):
-    bucket = "test-bucket"
-    key = "custom_key.json"
-
-    serializer.serialize(dp_manager_fixture, bucket, key, force=True)
-
-    mock_s3.put_object.assert_called_once_with(
-        Bucket=bucket,
-        Key=key,
-        Body=json.dumps(dp_manager_fixture.to_json()).encode("utf-8"),
-        ContentType="application/json"
-    )
-
-
-def test_serialize_raises_on_to_json_error(serializer, mock_s3):
-    dp_manager = MagicMock()
-    dp_manager.to_json.side_effect = RuntimeError("fail")
-
-    with pytest.raises(RuntimeError):
-        serializer.serialize(dp_manager, "bucket")
-
-    mock_s3.put_object.assert_not_called()
-
-
-def test_serialize_raises_on_put_error(serializer, mock_s3, dp_manager_fixture):
-    mock_s3.put_object.side_effect = Exception("S3 failed")
-
-    with pytest.raises(Exception, match="S3 failed"):
-        serializer.serialize(dp_manager_fixture, "bucket", force=True)
+def test_serialize_writes_updated_target_shards(serializer, fake_s3):
+    dp_manager = make_dp_manager(4, [(3, 3, []), (3, 1, [3]), (2, 2, [])])
 
+    serializer.serialize(dp_manager, BUCKET, VERSION)
 
-def test_deserialize_success(serializer, mock_s3):
-    # JSON structure returned from S3
-    dp_data = {"key": "value"}
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=json.dumps(dp_data).encode("utf-8")))
-    }
+    assert sorted(fake_s3.put_keys) == ["path_dp/v1/2.json", "path_dp/v1/3.json"]
+    assert not dp_manager.is_updated()
 
-    with patch("core.serializer.dp.s3_path_dp_manager_serializer.PathDPManager") as mock_path_dp:
-        instance = mock_path_dp.from_json.return_value
-        result = serializer.deserialize("bucket", "some_key.json")
+def test_serialize_skips_without_updates(serializer, fake_s3):
+    serializer.serialize(PathDPManager(3), BUCKET, VERSION)
 
-        mock_s3.head_object.assert_called_once_with(Bucket="bucket", Key="some_key.json")
-        mock_s3.get_object.assert_called_once_with(Bucket="bucket", Key="some_key.json")
-        mock_path_dp.from_json.assert_called_once_with(dp_data)
-        assert result == instance
+    assert fake_s3.put_keys == []
 
+def test_serialize_merges_concurrent_writes(serializer, fake_s3):
+    first = make_dp_manager(4, [(3, 3, []), (3, 1, [3])])
+    second = make_dp_manager(4, [(3, 3, []), (3, 2, [3])])
 
-def test_deserialize_returns_none_if_key_missing(serializer, mock_s3):
-    from botocore.exceptions import ClientError
-    mock_s3.head_object.side_effect = ClientError(
-        {"Error": {"Code": "404", "Message": "Not Found"}}, "head_object"
-    )
+    serializer.serialize(first, BUCKET, VERSION)
+    serializer.serialize(second, BUCKET, VERSION)
 
-    result = serializer.deserialize("bucket", "missing_key.json")
-    assert result is None
+    result = serializer.deserialize(BUCKET, n=4, version=VERSION)
+    target = result.get(3)
+    assert target.get(1) == [[3]]
+    assert target.get(2) == [[3]]
+    assert target.get(3) == [[]]
 
-    mock_s3.head_object.assert_called_once()
+    # The second writer also picked up the first writer's paths
+    assert second.get(3).get(1) == [[3]]
 
+def test_serialize_skips_up_to_date_shard(serializer, fake_s3):
+    serializer.serialize(make_dp_manager(4, [(3, 1, [3])]), BUCKET, VERSION)
+    serializer.serialize(make_dp_manager(4, [(3, 1, [3])]), BUCKET, VERSION)
 
-def test_deserialize_raises_on_invalid_json(serializer, mock_s3):
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=b"{invalid json}"))
-    }
+    assert fake_s3.put_keys == ["path_dp/v1/3.json"]
 
-    with pytest.raises(json.JSONDecodeError):
-        serializer.deserialize("bucket", "bad.json")
+def test_serialize_retries_on_conflict(serializer, fake_s3):
+    serializer.serialize(make_dp_manager(4, [(3, 3, [])]), BUCKET, VERSION)
 
+    put_object = fake_s3.put_object
+    conflicts = [ClientError({"Error": {"Code": "PreconditionFailed", "Message": "Changed"}}, "PutObject")]
+    def put_with_conflict(**kwargs):
+        if conflicts:
+            raise conflicts.pop()
+        return put_object(**kwargs)
+    fake_s3.put_object = put_with_conflict
 
-def test_deserialize_raises_on_from_json_error(serializer, mock_s3):
-    dp_data = {"key": "value"}
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=json.dumps(dp_data).encode("utf-8")))
-    }
+    serializer.serialize(make_dp_manager(4, [(3, 2, [3])]), BUCKET, VERSION)
 
-    with patch("core.serializer.dp.s3_path_dp_manager_serializer.PathDPManager") as mock_path_dp:
-        mock_path_dp.from_json.side_effect = RuntimeError("bad data")
+    target = serializer.deserialize(BUCKET, n=4, version=VERSION).get(3)
+    assert target.get(2) == [[3]]
+    assert target.get(3) == [[]]
 
-        with pytest.raises(RuntimeError, match="bad data"):
-            serializer.deserialize("bucket", "some_key.json")
+def test_serialize_raises_on_put_error(serializer):
+    failing_s3 = MagicMock()
+    failing_s3.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+    failing_s3.put_object.side_effect = ClientError({"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "PutObject")
 
+    with patch("core.serializer.dp.s3_path_dp_manager_serializer.s3", new=failing_s3):
+        with pytest.raises(ClientError):
+            serializer.serialize(make_dp_manager(2, [(1, 1, [])]), BUCKET, VERSION)
 
-def test_serialize_deserialize_round_trip(serializer, mock_s3, dp_manager_fixture):
-    bucket = "test-bucket"
-    key = "round_trip.json"
+def test_deserialize_loads_shards_lazily(serializer, fake_s3):
+    serializer.serialize(make_dp_manager(4, [(3, 1, [3]), (2, 0, [1, 2])]), BUCKET, VERSION)
 
-    # Prepare mock for put_object (serialization)
-    mock_s3.put_object.return_value = {}
+    get_object = MagicMock(wraps=fake_s3.get_object)
+    fake_s3.get_object = get_object
+    result = serializer.deserialize(BUCKET, n=4, version=VERSION)
 
-    # Act: Serialize
-    serializer.serialize(dp_manager_fixture, bucket, key, force=True)
+    assert get_object.call_count == 0
+    assert result.get(3).get(1) == [[3]]
+    assert result.get(3).get(1) == [[3]]
+    assert get_object.call_count == 1
+    assert not result.is_updated()
 
-    # Simulate what was uploaded to S3
-    serialized_body = json.dumps(dp_manager_fixture.to_json()).encode("utf-8")
+def test_deserialize_ignores_shard_of_other_graph_size(serializer, fake_s3):
+    serializer.serialize(make_dp_manager(4, [(3, 1, [3])]), BUCKET, VERSION)
 
-    # Prepare mock for head_object and get_object (deserialization)
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=serialized_body))
-    }
+    result = serializer.deserialize(BUCKET, n=5, version=VERSION)
 
-    # Patch the real PathDPManager.from_json to produce a proper instance from dict
-    with patch("core.serializer.dp.s3_path_dp_manager_serializer.PathDPManager.from_json") as mock_from_json:
-        mock_from_json.return_value = dp_manager_fixture  # Return the original for comparison
+    assert not result.get(3).contains(1)
 
-        # Act: Deserialize
-        result = serializer.deserialize(bucket, key)
+def test_deserialize_ignores_shards_of_other_version(serializer, fake_s3):
+    serializer.serialize(make_dp_manager(4, [(3, 1, [3])]), BUCKET, VERSION)
 
-        # Assert
-        mock_s3.put_object.assert_called_once()
-        mock_s3.head_object.assert_called_once_with(Bucket=bucket, Key=key)
-        mock_s3.get_object.assert_called_once_with(Bucket=bucket, Key=key)
+    result = serializer.deserialize(BUCKET, n=4, version="v2")
 
-        assert result == dp_manager_fixture
\ No newline at end of file
+    assert not result.get(3).contains(1)
@@ -1,18 +1,25 @@
-import json
 import pytest
 from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
 
-from core.serializer.dp.s3_path_prob_dp_manager_serializer import S3PathProbDPManagerSerializer, PATH_PROB_DP_MANAGER_KEY
-from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager, ProbMem
+from core.serializer.dp.s3_path_prob_dp_manager_serializer import S3PathProbDPManagerSerializer
+from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager
+from dp_version import DPVersions
+
+from fake_s3 import FakeS3
+
+BUCKET = "test-bucket"
+VERSIONS = DPVersions(path_dp="p1", path_prob_dp_by_carrier={"carrierA": "a1"})
 
 @pytest.fixture
 def serializer():
     return S3PathProbDPManagerSerializer()
 
 @pytest.fixture
-def mock_s3():
-    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.s3") as mock:
-        yield mock
+def fake_s3():
+    fake = FakeS3()
+    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.s3", new=fake):
+        yield fake
 
 @pytest.fixture
 def dp_manager_fixture():
@@ -21,122 +28,81 @@ def dp_manager_fixture():
     dp_manager.add("carrierA", 0, 0.1)
     dp_manager.add("carrierA", 1, 0.2)
     dp_manager.add("carrierB", 2, 0.3)
-    dp_manager.add("carrierB", 3, 0.4)
+    dp_manager.add("carrierB", 2, 0.4)
     return dp_manager
 
-def test_serialize_success(serializer, mock_s3, dp_manager_fixture):
-    bucket = "test-bucket"
-    key = "custom_prob_key.json"
-
-    serializer.serialize(dp_manager_fixture, bucket, key)
-
-    mock_s3.put_object.assert_called_once_with(
-        Bucket=bucket,
-        Key=key,
-        Body=json.dumps(dp_manager_fixture.to_json()).encode("utf-8"),
-        ContentType="application/json"
-    )
-
-def test_serialize_raises_on_to_json_error(serializer, mock_s3):
-    dp_manager = MagicMock()
-    dp_manager.to_json.side_effect = RuntimeError("fail")
-
-    with pytest.raises(RuntimeError):
-        serializer.serialize(dp_manager, "bucket")
-
-    mock_s3.put_object.assert_not_called()
-
-def test_serialize_raises_on_put_error(serializer, mock_s3, dp_manager_fixture):
-    mock_s3.put_object.side_effect = Exception("S3 failed")
-
-    with pytest.raises(Exception, match="S3 failed"):
-        serializer.serialize(dp_manager_fixture, "bucket")
+def test_serialize_writes_one_shard_per_entry(serializer, fake_s3, dp_manager_fixture):
+    serializer.serialize(dp_manager_fixture, BUCKET, VERSIONS)
 
-def test_deserialize_success(serializer, mock_s3):
-    dp_data = {
-        "n": 2,
-        "mem": {
-            "carrierA": [[0.1], [0.2]],
-            "carrierB": [[0.3], [0.4]]
-        }
-    }
+    assert sorted(fake_s3.put_keys) == [
+        "path_prob_dp/carrierA/a1/0.json",
+        "path_prob_dp/carrierA/a1/1.json",
+        "path_prob_dp/carrierB/p1/2.json",
+    ]
+    assert not dp_manager_fixture.is_updated()
+    assert not dp_manager_fixture.added_entries
 
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=json.dumps(dp_data).encode("utf-8")))
-    }
+def test_serialize_uploads_only_added_entries(serializer, fake_s3, dp_manager_fixture):
+    serializer.serialize(dp_manager_fixture, BUCKET, VERSIONS)
+    fake_s3.put_keys.clear()
 
-    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.PathProbDPManager") as mock_class:
-        instance = mock_class.from_json.return_value
-        result = serializer.deserialize("bucket", "some_key.json")
+    dp_manager_fixture.add("carrierB", 3, 0.5)
+    serializer.serialize(dp_manager_fixture, BUCKET, VERSIONS)
 
-        mock_s3.head_object.assert_called_once_with(Bucket="bucket", Key="some_key.json")
-        mock_s3.get_object.assert_called_once_with(Bucket="bucket", Key="some_key.json")
-        mock_class.from_json.assert_called_once_with(dp_data)
-        assert result == instance
+    assert fake_s3.put_keys == ["path_prob_dp/carrierB/p1/3.json"]
 
-def test_deserialize_returns_none_if_key_missing(serializer, mock_s3):
-    from botocore.exceptions import ClientError
-    mock_s3.head_object.side_effect = ClientError(
-        {"Error": {"Code": "404", "Message": "Not Found"}}, "head_object"
-    )
+def test_serialize_skips_without_updates(serializer, fake_s3):
+    serializer.serialize(PathProbDPManager(3), BUCKET, VERSIONS)
 
-    result = serializer.deserialize("bucket", "missing_key.json")
-    assert result is None
+    assert fake_s3.put_keys == []
 
-    mock_s3.head_object.assert_called_once()
+def test_serialize_keeps_shard_written_concurrently(serializer, fake_s3):
+    other = PathProbDPManager(3)
+    other.add("carrierA", 1, 0.9)
+    serializer.serialize(other, BUCKET, VERSIONS)
 
-def test_deserialize_raises_on_invalid_json(serializer, mock_s3):
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=b"{invalid json}"))
-    }
+    dp_manager = PathProbDPManager(3)
+    dp_manager.add("carrierA", 1, 0.9)
+    dp_manager.add("carrierA", 2, 0.7)
+    serializer.serialize(dp_manager, BUCKET, VERSIONS)
 
-    with pytest.raises(json.JSONDecodeError):
-        serializer.deserialize("bucket", "bad.json")
+    assert fake_s3.put_keys == ["path_prob_dp/carrierA/a1/1.json", "path_prob_dp/carrierA/a1/2.json"]
 
-def test_deserialize_raises_on_from_json_error(serializer, mock_s3):
-    dp_data = {
-        "n": 1,
-        "mem": {
-            "carrierX": [[0.1]]
-        }
-    }
+def test_serialize_raises_on_put_error(serializer):
+    failing_s3 = MagicMock()
+    failing_s3.put_object.side_effect = ClientError({"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "PutObject")
+    dp_manager = PathProbDPManager(2)
+    dp_manager.add("carrierA", 0, 1.0)
 
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=json.dumps(dp_data).encode("utf-8")))
-    }
+    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.s3", new=failing_s3):
+        with pytest.raises(ClientError):
+            serializer.serialize(dp_manager, BUCKET, VERSIONS)
 
-    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.PathProbDPManager") as mock_class:
-        mock_class.from_json.side_effect = RuntimeError("bad data")
+    assert dp_manager.is_updated()
 
-        with pytest.raises(RuntimeError, match="bad data"):
-            serializer.deserialize("bucket", "some_key.json")
+def test_deserialize_loads_shards_lazily(serializer, fake_s3, dp_manager_fixture):
+    serializer.serialize(dp_manager_fixture, BUCKET, VERSIONS)
 
-def test_serialize_deserialize_round_trip(serializer, mock_s3, dp_manager_fixture):
-    bucket = "test-bucket"
-    key = "round_trip_prob.json"
+    get_object = MagicMock(wraps=fake_s3.get_object)
+    fake_s3.get_object = get_object
+    result = serializer.deserialize(BUCKET, n=4, versions=VERSIONS)
 
-    mock_s3.put_object.return_value = {}
+    assert get_object.call_count == 0
+    assert result.contains("carrierB", 2)
+    assert result.get("carrierB", 2) == [0.3, 0.4]
+    assert not result.contains("carrierB", 3)
+    assert not result.is_updated()
+    assert get_object.call_count == 2
 
-    # Act: Serialize
-    serializer.serialize(dp_manager_fixture, bucket, key)
+def test_deserialize_missing_shards(serializer, fake_s3):
+    result = serializer.deserialize(BUCKET, n=3, versions=VERSIONS)
 
-    # Prepare get_object mock with the serialized JSON
-    serialized_body = json.dumps(dp_manager_fixture.to_json()).encode("utf-8")
-    mock_s3.head_object.return_value = {}
-    mock_s3.get_object.return_value = {
-        "Body": MagicMock(read=MagicMock(return_value=serialized_body))
-    }
+    assert not result.contains("carrierA", 1)
 
-    with patch("core.serializer.dp.s3_path_prob_dp_manager_serializer.PathProbDPManager.from_json") as mock_from_json:
-        mock_from_json.return_value = dp_manager_fixture
-
-        result = serializer.deserialize(bucket, key)
+def test_deserialize_ignores_shards_of_other_carrier_version(serializer, fake_s3, dp_manager_fixture):
+    serializer.serialize(dp_manager_fixture, BUCKET, VERSIONS)
 
-        mock_s3.put_object.assert_called_once()
-        mock_s3.head_object.assert_called_once_with(Bucket=bucket, Key=key)
-        mock_s3.get_object.assert_called_once_with(Bucket=bucket, Key=key)
+    result = serializer.deserialize(BUCKET, n=4, versions=DPVersions(path_dp="p1", path_prob_dp_by_carrier={"carrierA": "a2"}))
 
-        assert result == dp_manager_fixture
+    assert not result.contains("carrierA", 0)
+    assert result.get("carrierB", 2) == [0.3, 0.4]
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock
 import igraph as ig
 
+from core.serializer import s3_sc_graph_serializer
 from core.serializer.s3_sc_graph_serializer import S3SCGraphSerializer
 from core.sc_graph.sc_graph import SCGraph
 from core.sc_graph.path_extraction.path_extraction_manager import PathExtractionManager
@@ -11,6 +12,12 @@ from core.sc_graph.path_prob.path_prob_dp_manager import PathProbDPManager
 
 from model.vertex import VertexType
 from graph_config import TYPE_ATTR
+from dp_version import get_dp_versions
+
+
+@pytest.fixture(autouse=True)
+def no_cached_sc_graph(monkeypatch):
+    monkeypatch.setattr(s3_sc_graph_serializer, "_cached_sc_graph", None)
 
 
 @pytest.fixture
@@ -64,12 +71,13 @@ def test_serialize_calls_all(mock_serializers, serializer, sc_graph):
     force = False
     serializer.serialize(sc_graph, bucket, force)
 
+    versions = get_dp_versions(sc_graph.graph)
     mock_serializers["graph_serializer"].serialize.assert_called_once_with(sc_graph.graph, bucket)
     mock_serializers["path_dp_serializer"].serialize.assert_called_once_with(
-        sc_graph.path_extraction_manager.dp_manager, bucket, force=force
+        sc_graph.path_extraction_manager.dp_manager, bucket, versions.path_dp, force=force
     )
     mock_serializers["path_prob_dp_serializer"].serialize.assert_called_once_with(
-        sc_graph.path_prob_manager.dp_manager, bucket, force=force
+        sc_graph.path_prob_manager.dp_manager, bucket, versions, force=force
     )
 
 
@@ -77,7 +85,7 @@ def test_deserialize_returns_sc_graph(mock_serializers, serializer, manufacturer
     bucket = "test-bucket"
     manufacturer = manufacturer_graph.vs.find(type=VertexType.MANUFACTURER.value)
 
-    mock_serializers["graph_serializer"].deserialize.return_value = manufacturer_graph
+    mock_serializers["graph_serializer"].deserialize_if_changed.return_value = (manufacturer_graph, "etag")
     mock_serializers["path_dp_serializer"].deserialize.return_value = PathDPManager(manufacturer_graph.vcount())
     mock_serializers["path_prob_dp_serializer"].deserialize.return_value = PathProbDPManager(manufacturer_graph.vcount())
 
@@ -88,13 +96,47 @@ def test_deserialize_returns_sc_graph(mock_serializers, serializer, manufacturer
     assert result.manufacturer == manufacturer
     assert isinstance(result.path_extraction_manager, PathExtractionManager)
     assert isinstance(result.path_prob_manager, PathProbManager)
+    assert not result.remaining_time_dp_manager.built          # Built on first use, not on every load
 
 
 def test_deserialize_raises_without_manufacturer(mock_serializers, serializer):
     graph = ig.Graph()
     graph.add_vertex(name="NoM", type="warehouse")  # No MANUFACTURER
 
-    mock_serializers["graph_serializer"].deserialize.return_value = graph
+    mock_serializers["graph_serializer"].deserialize_if_changed.return_value = (graph, "etag")
 
     with pytest.raises(ValueError, match="Manufacturer vertex not found"):
         serializer.deserialize("test-bucket")
+
+
+def test_deserialize_reuses_sc_graph_of_unchanged_version(mock_serializers, serializer, manufacturer_graph):
+    graph_serializer = mock_serializers["graph_serializer"]
+    graph_serializer.deserialize_if_changed.return_value = (manufacturer_graph, "etag")
+    mock_serializers["path_dp_serializer"].deserialize.return_value = PathDPManager(manufacturer_graph.vcount())
+    mock_serializers["path_prob_dp_serializer"].deserialize.return_value = PathProbDPManager(manufacturer_graph.vcount())
+
+    first = serializer.deserialize("test-bucket")
+    assert first.version == "etag"
+    graph_serializer.deserialize_if_changed.assert_called_once_with(None, "test-bucket")
+
+    graph_serializer.deserialize_if_changed.return_value = None
+    assert serializer.deserialize("test-bucket") is first
+    graph_serializer.deserialize_if_changed.assert_called_with("etag", "test-bucket")
+    assert mock_serializers["path_dp_serializer"].deserialize.call_count == 1
+
+    graph_serializer.deserialize_if_changed.return_value = (manufacturer_graph.copy(), "etag-2")
+    second = serializer.deserialize("test-bucket")
+    assert second is not first
+    assert second.version == "etag-2"
+
+
+def test_deserialize_does_not_cache_unversioned_graph(mock_serializers, serializer, manufacturer_graph):
+    mock_serializers["graph_serializer"].deserialize_if_changed.return_value = (manufacturer_graph, None)
+    mock_serializers["path_dp_serializer"].deserialize.return_value = PathDPManager(manufacturer_graph.vcount())
+    mock_serializers["path_prob_dp_serializer"].deserialize.return_value = PathProbDPManager(manufacturer_graph.vcount())
+
+    serializer.deserialize("test-bucket")
+
+    mock_serializers["graph_serializer"].deserialize_if_changed.return_value = (manufacturer_graph, None)
+    serializer.deserialize("test-bucket")
+    assert all(call.args[0] is None for call in mock_serializers["graph_serializer"].deserialize_if_changed.call_args_list)
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timezone, timedelta
 from typing import List
+import igraph as ig
 
 from sqs.dto.reconfiguration_dto import ReconfigurationEvent
 from sqs.handler.disruption_event_handler import DisruptionEventHandler
@@ -42,7 +43,11 @@ def sample_event_data() -> DisruptionEventDataDTO:
 def mock_sc_graph_resolver() -> VertexResolver:
     resolver = MagicMock(spec=VertexResolver)
     resolver.resolve.return_value.vertex = {"v_id": 999}
-    resolver.resolve.return_value.sc_graph = MagicMock()
+    graph = ig.Graph(n=2)
+    graph.vs["v_id"] = [1, 2]
+    graph.vs["latitude"] = [45.01, 46.0]        # About 1 km and 111 km from the disruption
+    graph.vs["longitude"] = [7.0, 7.0]
+    resolver.resolve.return_value.sc_graph = MagicMock(graph=graph, version="v1")
     return resolver
 
 @patch("sqs.handler.disruption_event_handler.compute_order_realtime_lcdi")
@@ -101,4 +106,5 @@ def test_disruption_event_handler_returns_expected_events(
         assert event.delay.shipment_upper == 3.2
 
     assert compute_lcdi_mock.call_count == 2
+    assert all(call.kwargs["maybe_disrupted_vertex_ids"] == frozenset({1}) for call in compute_lcdi_mock.call_args_list)
     assert db_connector_mock.called
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+import scipy.stats as stats
+
+from stats_utils import compute_gamma_mean, compute_gamma_ci, clear_gamma_cache, _gamma_ci
+from gamma_summary import GammaSummaryTable, summarize_gamma
+
+def test_compute_gamma_mean_matches_scipy():
+    assert np.isclose(compute_gamma_mean(2.5, 3.0, 1.0), stats.gamma(a=2.5, scale=3.0, loc=1.0).mean())
+
+def test_compute_gamma_ci_is_memoized():
+    clear_gamma_cache()
+    compute_gamma_ci(2.0, 3.0, 0.0, 0.95)
+    compute_gamma_ci(2, 3, 0, 0.95)
+
+    info = _gamma_ci.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+def test_summarize_gamma():
+    summary = summarize_gamma(shape=2.0, scale=3.0, loc=0.5, confidence_levels=[0.9, 0.95])
+
+    assert np.isclose(summary.mean, compute_gamma_mean(2.0, 3.0, 0.5))
+    for confidence in (0.9, 0.95):
+        expected = compute_gamma_ci(2.0, 3.0, 0.5, confidence)
+        assert np.allclose(summary.cis[confidence], expected)
+        assert np.allclose(summary.ci(confidence), expected)
+
+def test_summary_ci_falls_back_for_unknown_confidence():
+    summary = summarize_gamma(shape=2.0, scale=3.0, loc=0.0, confidence_levels=[0.9])
+
+    assert 0.8 not in summary.cis
+    assert np.allclose(summary.ci(0.8), compute_gamma_ci(2.0, 3.0, 0.0, 0.8))
+
+def test_summarize_gamma_invalid_confidence():
+    with pytest.raises(AssertionError):
+        summarize_gamma(shape=2.0, scale=3.0, loc=0.0, confidence_levels=[1.0])
+
+def test_table_reuses_summary():
+    table = GammaSummaryTable()
+    first = table.get("row", 2.0, 3.0, 0.0, [0.9])
+    second = table.get("row", 2.0, 3.0, 0.0, [0.9])
+
+    assert first is second
+    assert len(table) == 1
+
+def test_table_refreshes_on_parameter_change():
+    table = GammaSummaryTable()
+    first = table.get("row", 2.0, 3.0, 0.0, [0.9])
+    second = table.get("row", 2.5, 3.0, 0.0, [0.9])
+
+    assert first is not second
+    assert np.isclose(second.mean, compute_gamma_mean(2.5, 3.0, 0.0))
+
+def test_table_extends_confidence_levels():
+    table = GammaSummaryTable()
+    table.get("row", 2.0, 3.0, 0.0, [0.9])
+    summary = table.get("row", 2.0, 3.0, 0.0, [0.95])
+
+    assert set(summary.cis) == {0.9, 0.95}
+
+def test_table_evicts_least_recently_used():
+    table = GammaSummaryTable(maxsize=2)
+    table.get("a", 1.0, 1.0, 0.0, [0.9])
+    table.get("b", 2.0, 1.0, 0.0, [0.9])
+    first_a = table.get("a", 1.0, 1.0, 0.0, [0.9])
+    table.get("c", 3.0, 1.0, 0.0, [0.9])
+
+    assert len(table) == 2
+    assert table.get("a", 1.0, 1.0, 0.0, [0.9]) is first_a
+
+def test_table_invalidate():
+    table = GammaSummaryTable()
+    first = table.get("row", 2.0, 3.0, 0.0, [0.9])
+    table.invalidate("row")
+
+    assert table.get("row", 2.0, 3.0, 0.0, [0.9]) is not first
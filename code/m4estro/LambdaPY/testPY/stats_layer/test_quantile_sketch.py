@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+
+from stats_utils import compute_sample_ci
+from quantile_sketch import QuantileSketch, QUANTILE_GRID_SIZE
+
+@pytest.mark.parametrize("confidence", [0.8, 0.9, 0.95, 0.99])
+def test_sketch_ci_matches_raw_sample(confidence):
+    rng = np.random.default_rng(0)
+    x = rng.gamma(2.0, 3.0, size=5000)
+    sketch = QuantileSketch.from_sample(x)             # type: ignore
+
+    assert np.allclose(sketch.ci(confidence), compute_sample_ci(x, confidence))      # type: ignore
+
+def test_percentiles_over_sketch_match_sketch_ci():
+    rng = np.random.default_rng(1)
+    sketch = QuantileSketch.from_sample(rng.normal(10.0, 2.0, size=300))           # type: ignore
+
+    for confidence in (0.5, 0.9, 0.937):
+        assert np.allclose(compute_sample_ci(sketch.to_list(), confidence), sketch.ci(confidence))
+
+def test_update_approximates_full_sample():
+    rng = np.random.default_rng(2)
+    x = rng.gamma(2.0, 3.0, size=20000)
+
+    sketch = QuantileSketch.from_sample(x[:1000])     # type: ignore
+    for batch in np.array_split(x[1000:], 50):
+        sketch = sketch.update(batch)                 # type: ignore
+
+    assert sketch.n == len(x)
+    assert sketch.quantiles[0] == x.min()
+    assert sketch.quantiles[-1] == x.max()
+    lower, upper = compute_sample_ci(x, 0.9)          # type: ignore
+    sketch_lower, sketch_upper = sketch.ci(0.9)
+    assert sketch_lower == pytest.approx(lower, rel=0.02)
+    assert sketch_upper == pytest.approx(upper, rel=0.02)
+
+def test_update_with_empty_batch():
+    sketch = QuantileSketch.from_sample([1.0, 2.0, 3.0])
+    assert sketch.update([]) is sketch
+
+def test_round_trip():
+    sketch = QuantileSketch.from_sample([1.0, 2.0, 3.0])
+    assert QuantileSketch.from_list(sketch.n, sketch.to_list()) == sketch
+
+def test_invalid_sketch():
+    with pytest.raises(ValueError):
+        QuantileSketch(n=3, quantiles=(1.0, 2.0))
+    with pytest.raises(ValueError):
+        QuantileSketch.from_sample([])
+
+def test_grid_size():
+    assert len(QuantileSketch.from_sample([1.0]).quantiles) == QUANTILE_GRID_SIZE
@@ -305,6 +305,8 @@ export interface DispatchTimeSample extends BaseTable {
   mean: number;
   std_dev: number;
   n: number;
+  quantiles: number[] | null;
+  quantiles_n: number | null;
 }
 
 export interface DeliveryTimeSample extends BaseTable {
@@ -314,6 +316,8 @@ export interface DeliveryTimeSample extends BaseTable {
   mean: number;
   std_dev: number;
   n: number;
+  quantiles: number[] | null;
+  quantiles_n: number | null;
 }
 
 export interface WeatherData extends BaseTable {
@@ -373,6 +377,16 @@ export interface EstimatedDeliveryTime extends BaseTable {
   hours: number;
 }
 
+export interface LatestEstimatedTime extends BaseTable {
+  order_id: number;
+  estimated_time_id: number;
+  vertex_id: number;
+  estimation_time: Date;
+  status: string;
+  EODT: number;
+  EDD: Date;
+}
+
 export interface Delay extends BaseTable {
   vertex_id: number;
   order_id: number;
@@ -99,6 +99,8 @@ export const addSampleFields = (table: Knex.CreateTableBuilder): void => {
   table.decimal('mean', 12, 6).notNullable();       // Mean of the sample
   table.decimal('std_dev', 12, 6).notNullable();    // Standard deviation of the sample
   table.integer('n').unsigned().notNullable();      // Number of observations in the sample
+  table.jsonb('quantiles').nullable();              // Quantile sketch of the sample on a fixed grid of 201 probability levels
+  table.integer('quantiles_n').unsigned().nullable(); // Number of observations summarized by the quantile sketch
 };
 
 
@@ -166,6 +166,8 @@ export const createTimeBasedTables = async (knex: Knex): Promise<void> => {
     table.integer('pt_max_paths').unsigned().notNullable();
     table.decimal('pt_ext_data_min_prob', 12, 6).notNullable();
     table.decimal('pt_confidence', 7, 6).notNullable();
+    table.string('pt_mode', 20).notNullable().defaultTo('ENUMERATION');
+    table.integer('pt_dp_prefix_hops').unsigned().notNullable().defaultTo(0);
     
     table.decimal('tt_confidence', 7, 6).notNullable();
 
@@ -201,6 +203,8 @@ export const createTimeBasedTables = async (knex: Knex): Promise<void> => {
     table.decimal('CFDI_lower', 12, 6).notNullable();
     table.decimal('CFDI_upper', 12, 6).notNullable();
     addTimestampWithTz(table, 'EDD', false);
+    table.jsonb('payload').nullable();              // Formatted estimate, computed once when the estimate is saved
+    table.integer('payload_version').nullable();    // Version of the format of payload: other versions are formatted live
 
     addForeignKey(table, 'time_deviation_id', 'time_deviations');
     addForeignKey(table, 'alpha_id', 'alphas');
@@ -220,6 +224,23 @@ export const createTimeBasedTables = async (knex: Knex): Promise<void> => {
     table.comment('Estimated Times Holidays table - stores the holidays considered in the estimated times calculations.');
   });
 
+  // Latest Estimated Times table
+  await knex.schema.createTable('latest_estimated_times', (table) => {
+    addBaseFields(table);
+    addForeignKey(table, 'order_id', 'orders');
+    addForeignKey(table, 'estimated_time_id', 'estimated_times');
+    addForeignKey(table, 'vertex_id', 'vertices');
+
+    addTimestampWithTz(table, 'estimation_time', false);
+    table.string('status', 100).notNullable();
+    table.decimal('EODT', 12, 6).notNullable();
+    addTimestampWithTz(table, 'EDD', false);
+
+    table.unique(['order_id'], { indexName: 'unique_latest_estimated_time_order' });
+
+    table.comment('Latest Estimated Times table - stores the newest estimated time of each order, upserted on every estimation.');
+  });
+
   // Disruptions table
   await knex.schema.createTable('disruptions', (table) => {
     addBaseFields(table);
@@ -300,6 +321,7 @@ export const createTimeBasedTables = async (knex: Knex): Promise<void> => {
     'estimation_params',
     'disruptions',
     'estimated_times_holidays',
+    'latest_estimated_times',
     'estimated_times',
     'shipment_time_samples',
     'dispatch_time_samples',
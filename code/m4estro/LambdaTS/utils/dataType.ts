@@ -224,6 +224,8 @@ export interface DispatchTimeSample extends BaseTable {
   mean: number;
   std_dev: number;
   n: number;
+  quantiles: number[] | null;
+  quantiles_n: number | null;
 }
 export const DispatchTimeSampleSchema = BaseTableSchema.extend({
   supplier_id: z.number(),
@@ -231,6 +233,8 @@ export const DispatchTimeSampleSchema = BaseTableSchema.extend({
   mean: z.number(),
   std_dev: z.number(),
   n: z.number(),
+  quantiles: z.array(z.number()).length(201).nullable().optional(),
+  quantiles_n: z.number().nullable().optional(),
 });
 
 export interface DeliveryTimeSample extends BaseTable {
@@ -240,6 +244,8 @@ export interface DeliveryTimeSample extends BaseTable {
   mean: number;
   std_dev: number;
   n: number;
+  quantiles: number[] | null;
+  quantiles_n: number | null;
 }
 
 export const DeliveryTimeSampleSchema = BaseTableSchema.extend({
@@ -249,6 +255,8 @@ export const DeliveryTimeSampleSchema = BaseTableSchema.extend({
   mean: z.number(),
   std_dev: z.number(),
   n: z.number(),
+  quantiles: z.array(z.number()).length(201).nullable().optional(),
+  quantiles_n: z.number().nullable().optional(),
 });
 
 
@@ -318,6 +318,13 @@ recentDisruptionsResource.addMethod('GET', new apigateway.LambdaIntegration(TsLa
           'method.request.path.proxy': true,
         },
     });
+    histProxy.addMethod('POST', new apigateway.LambdaIntegration(PyLambdaFunctions.histLCDILambda, {
+      }), {
+        methodResponses: commonMethodResponses,
+        requestParameters: {
+          'method.request.path.proxy': true,
+        },
+    });
 
     // Realtime LCDI endpoints - /lcdi/realtime
     const realtimeLCDIResource = lcdiResource.addResource('realtime');
@@ -329,11 +336,21 @@ recentDisruptionsResource.addMethod('GET', new apigateway.LambdaIntegration(TsLa
       }), {
         methodResponses: commonMethodResponses,
     });
+    const realtimeLCDILatestResource = realtimeLCDIResource.addResource('latest');
+    realtimeLCDILatestResource.addMethod('GET', new apigateway.LambdaIntegration(PyLambdaFunctions.realtimeLCDIApiLambda, {
+      }), {
+        methodResponses: commonMethodResponses,
+    });
     const realtimeLCDIVolatileResource = realtimeLCDIResource.addResource('volatile');
     realtimeLCDIVolatileResource.addMethod('POST', new apigateway.LambdaIntegration(PyLambdaFunctions.realtimeLCDIApiLambda, {
       }), {
         methodResponses: commonMethodResponses,
     });
+    const realtimeLCDIVolatileCarriersResource = realtimeLCDIVolatileResource.addResource('carriers');
+    realtimeLCDIVolatileCarriersResource.addMethod('POST', new apigateway.LambdaIntegration(PyLambdaFunctions.realtimeLCDIApiLambda, {
+      }), {
+        methodResponses: commonMethodResponses,
+    });
 
     // Supply Chain Graph endpoints - /lcdi/sc-graph
     const scGraphResource = lcdiResource.addResource('sc-graph');